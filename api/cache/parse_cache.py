@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内容寻址的解析结果缓存
+
+缓存键 = SHA-256(文件内容) + 解析器名称/版本 + 配置指纹（映射YAML、词典等），
+同一文件重复上传（文件名/上传ID不同）时直接复用已有解析结果。
+结果以JSON存放在本地目录（按键前两位分片），按最近使用时间淘汰，总大小不超过上限；
+多进程（解析任务进程池）共享同一目录，写入采用临时文件 + 原子替换。
+
+解析时提取的附件（如图片）可随结果一起缓存在 {key}.assets 目录，
+命中时复制到本次上传的输出目录，不再引用首次上传的文件。
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from prometheus_client import Counter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent / "parse_results"
+# 超出上限后淘汰到上限的该比例，避免每次写入都触发淘汰
+LOW_WATER_RATIO = 0.9
+
+PARSE_CACHE_REQUESTS = Counter('kg_parse_cache_requests_total', 'Parse result cache lookups',
+                               ['parser', 'result'])
+PARSE_CACHE_EVICTIONS = Counter('kg_parse_cache_evictions_total', 'Parse result cache evictions')
+
+
+def file_sha256(path: Union[str, Path], block_size: int = 1 << 20) -> str:
+    """文件内容的SHA-256（分块读取）"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def config_fingerprint(*parts: Any) -> str:
+    """
+    解析配置指纹
+
+    Args:
+        parts: 文件路径（Path，按内容计算，不存在时记为missing）或可JSON序列化的配置对象
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, Path):
+            digest.update(file_sha256(part).encode() if part.exists() else b"missing")
+        else:
+            digest.update(json.dumps(part, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class ParseResultCache:
+    """本地磁盘LRU解析结果缓存"""
+
+    def __init__(self, cache_dir: Optional[Union[str, Path]] = None, max_bytes: Optional[int] = None,
+                 enabled: Optional[bool] = None):
+        """
+        Args:
+            cache_dir: 缓存目录，默认读取 PARSE_CACHE_DIR
+            max_bytes: 总大小上限，默认读取 PARSE_CACHE_MAX_MB（512MB）
+            enabled: 是否启用，默认读取 PARSE_CACHE_ENABLED
+        """
+        self.cache_dir = Path(cache_dir or os.getenv("PARSE_CACHE_DIR") or DEFAULT_CACHE_DIR)
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("PARSE_CACHE_MAX_MB", "512")) * 1024 * 1024
+        if enabled is None:
+            enabled = os.getenv("PARSE_CACHE_ENABLED", "true").lower() != "false"
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size: Optional[int] = None    # 本进程对目录总大小的估计，首次写入时扫描
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(file_hash: str, parser: str, version: str, config_hash: str = "") -> str:
+        """组合缓存键"""
+        return hashlib.sha256(f"{file_hash}|{parser}|{version}|{config_hash}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _assets_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.assets"
+
+    @staticmethod
+    def _tree_size(path: Path) -> int:
+        if not path.is_dir():
+            return 0
+        return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+    def get(self, key: str, parser: str = "default") -> Optional[Dict[str, Any]]:
+        """读取缓存并刷新最近使用时间；未命中返回None"""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+            os.utime(path)
+        except (FileNotFoundError, json.JSONDecodeError, OSError):
+            self.misses += 1
+            PARSE_CACHE_REQUESTS.labels(parser=parser, result="miss").inc()
+            return None
+        self.hits += 1
+        PARSE_CACHE_REQUESTS.labels(parser=parser, result="hit").inc()
+        logger.info(f"解析结果缓存命中: {parser} {key[:12]}")
+        return value
+
+    def put(self, key: str, value: Dict[str, Any], assets_dir: Optional[Path] = None) -> None:
+        """
+        写入缓存（失败只记录日志），超出大小上限时按最近使用时间淘汰
+
+        Args:
+            assets_dir: 随结果缓存的附件目录（整个目录复制），先于结果写入，命中结果时附件一定存在
+        """
+        if not self.enabled:
+            return
+        path = self._path(key)
+        assets_path = self._assets_path(key)
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            previous = (path.stat().st_size if path.exists() else 0) + self._tree_size(assets_path)
+            assets_size = 0
+            if assets_dir is not None and Path(assets_dir).is_dir():
+                tmp_assets = assets_path.with_name(assets_path.name + suffix)
+                shutil.copytree(assets_dir, tmp_assets)
+                shutil.rmtree(assets_path, ignore_errors=True)
+                os.replace(tmp_assets, assets_path)
+                assets_size = self._tree_size(assets_path)
+            body = json.dumps(value, ensure_ascii=False, default=str).encode("utf-8")
+            tmp_path = path.with_suffix(suffix)
+            tmp_path.write_bytes(body)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"写入解析结果缓存失败: {e}")
+            return
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(body) + assets_size - previous
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def copy_assets(self, key: str, target_dir: Path) -> bool:
+        """把缓存的附件复制到 target_dir；没有缓存附件时返回False"""
+        assets_path = self._assets_path(key)
+        if not self.enabled or not assets_path.is_dir():
+            return False
+        try:
+            shutil.copytree(assets_path, target_dir, dirs_exist_ok=True)
+        except OSError as e:
+            logger.warning(f"复制缓存附件失败: {e}")
+            return False
+        return True
+
+    def _remove(self, json_path: str) -> None:
+        try:
+            os.remove(json_path)
+        except FileNotFoundError:
+            pass
+        shutil.rmtree(json_path[:-len(".json")] + ".assets", ignore_errors=True)
+
+    def _entry_size(self, entry) -> int:
+        return entry.stat().st_size + self._tree_size(Path(entry.path[:-len(".json")] + ".assets"))
+
+    def _entries(self):
+        for shard in self.cache_dir.iterdir() if self.cache_dir.exists() else ():
+            if shard.is_dir():
+                for entry in os.scandir(shard):
+                    if entry.name.endswith(".json"):
+                        yield entry
+
+    def _scan_size(self) -> int:
+        return sum(self._entry_size(entry) for entry in self._entries())
+
+    def _evict(self) -> None:
+        """按最近使用时间从旧到新删除，直到低于上限的LOW_WATER_RATIO（其他进程可能同时写入，以实际扫描为准）"""
+        entries = sorted(((e.stat().st_mtime, self._entry_size(e), e.path) for e in self._entries()))
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * LOW_WATER_RATIO
+        for _, size, path in entries:
+            if total <= target:
+                break
+            self._remove(path)
+            total -= size
+            self.evictions += 1
+            PARSE_CACHE_EVICTIONS.inc()
+        self._size = total
+        logger.info(f"解析结果缓存淘汰完成，当前 {total / 1024 / 1024:.1f}MB")
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            for entry in list(self._entries()):
+                self._remove(entry.path)
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """本进程的命中统计和目录占用"""
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            total = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes
+            }
+
+
+# 全局解析结果缓存
+parse_cache = ParseResultCache()
@@ -2,18 +2,34 @@
 # -*- coding: utf-8 -*-
 """
 Redis缓存管理器 - 提供高性能缓存服务
+
+查询缓存分两级：
+- L1：进程内有界LRU，保存已反序列化的对象，命中时不访问Redis、不反序列化
+- L2：Redis（pickle），多个worker进程共享
+同一个键缓存未命中时只有一个协程执行查询，其余协程等待同一结果（single-flight）；
+图数据、统计类键过期后在宽限期内先返回旧值，同时在后台刷新（stale-while-revalidate）。
+
+失效方式：写入方按涉及的节点标签、关系类型递增写版本号（Redis哈希 kg:versions），
+查询缓存键包含其读取范围内的版本号，写入后旧键不再被命中，无需扫描删除。
 """
 
 import json
+import time
 import logging
 import asyncio
-from typing import Any, Optional, Union, Dict
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Iterable, List, Optional, Tuple, Union, Dict
 from datetime import datetime, timedelta
 import redis.asyncio as redis
 import pickle
 import hashlib
 from functools import wraps
 import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "services" / "nlp"))
+from write_versions import VERSIONS_KEY, SyncVersionWriter, read_tags, write_tags
 
 logger = logging.getLogger(__name__)
 
@@ -105,16 +121,27 @@ class RedisManager:
             logger.error(f"Redis检查失败 {key}: {e}")
             return False
     
-    async def clear_pattern(self, pattern: str) -> int:
-        """清除匹配模式的所有键"""
+    async def clear_pattern(self, pattern: str, batch_size: int = 500) -> int:
+        """
+        清除匹配模式的所有键（管理用途）
+        
+        使用 SCAN 增量遍历、UNLINK 分批删除，不会像 KEYS 一样阻塞Redis。
+        日常失效请使用写版本号（CacheVersions.bump）。
+        """
         if not self.redis_client:
             return 0
         
         try:
-            keys = await self.redis_client.keys(pattern)
-            if keys:
-                return await self.redis_client.delete(*keys)
-            return 0
+            deleted = 0
+            batch = []
+            async for key in self.redis_client.scan_iter(match=pattern, count=batch_size):
+                batch.append(key)
+                if len(batch) >= batch_size:
+                    deleted += await self.redis_client.unlink(*batch)
+                    batch = []
+            if batch:
+                deleted += await self.redis_client.unlink(*batch)
+            return deleted
         except Exception as e:
             logger.error(f"Redis清除模式失败 {pattern}: {e}")
             return 0
@@ -177,63 +204,390 @@ def cache_result(prefix: str, ttl: Optional[int] = None):
         return wrapper
     return decorator
 
+class L1Cache:
+    """
+    进程内一级缓存（LRU，按条目数限制）
+
+    保存的是反序列化后的对象，多个请求共享同一个对象，调用方不得修改返回值。
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, max_age: Optional[float] = None):
+        """
+        Args:
+            max_entries: 最大条目数，默认 QUERY_CACHE_L1_SIZE（256）
+            max_age: 条目在L1中的最长保留秒数，默认 QUERY_CACHE_L1_TTL（30）；
+                     过期后回到L2读取，其他worker写入的新值最多延迟这么久可见
+        """
+        self.max_entries = max_entries or int(os.getenv("QUERY_CACHE_L1_SIZE", "256"))
+        self.max_age = max_age if max_age is not None else float(os.getenv("QUERY_CACHE_L1_TTL", "30"))
+        # key -> (value, fresh_until, stale_until, l1_expires_at)
+        self._items: "OrderedDict[str, Tuple[Any, float, float, float]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float, float]]:
+        """返回 (value, fresh_until, stale_until)；不存在或已超出宽限期时返回None"""
+        entry = self._items.get(key)
+        if entry is None:
+            return None
+        value, fresh_until, stale_until, l1_expires_at = entry
+        now = time.time()
+        if now >= stale_until or now >= l1_expires_at:
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return value, fresh_until, stale_until
+
+    def set(self, key: str, value: Any, fresh_until: float, stale_until: float) -> None:
+        self._items[key] = (value, fresh_until, stale_until, time.time() + self.max_age)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._items.pop(key, None)
+
+    def clear(self, prefix: str = "") -> None:
+        if not prefix:
+            self._items.clear()
+            return
+        for key in [k for k in self._items if k.startswith(prefix)]:
+            del self._items[key]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+# L2中带宽限期的值：{"__swr__": 1, "value": ..., "fresh_until": 时间戳}
+_SWR_MARKER = "__swr__"
+
+
+def _unwrap(raw: Any, default_fresh_until: float) -> Tuple[Any, float]:
+    """拆出L2中的值和新鲜截止时间（旧格式的值视为新鲜）"""
+    if isinstance(raw, dict) and raw.get(_SWR_MARKER) == 1:
+        return raw["value"], raw["fresh_until"]
+    return raw, default_fresh_until
+
+
+class TieredCache:
+    """L1（进程内）+ L2（Redis）两级缓存，支持single-flight与stale-while-revalidate"""
+
+    def __init__(self, manager: RedisManager, l1: Optional[L1Cache] = None):
+        self.manager = manager
+        self.l1 = l1 if l1 is not None else L1Cache()
+        # 正在计算的键 → 计算任务；计算与发起请求解耦，任一请求被取消都不影响其他等待者
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "coalesced": 0,
+                      "stale_served": 0, "refreshes": 0, "refresh_errors": 0}
+
+    async def get(self, key: str) -> Optional[Any]:
+        """读取（L1 → L2），不区分新鲜/宽限期"""
+        hit = await self._lookup(key)
+        return hit[0] if hit else None
+
+    async def set(self, key: str, value: Any, ttl: int, stale_ttl: int = 0) -> None:
+        """写入L1和L2；stale_ttl>0时过期后还可作为旧值返回stale_ttl秒"""
+        now = time.time()
+        fresh_until = now + ttl
+        stale_until = fresh_until + stale_ttl
+        self.l1.set(key, value, fresh_until, stale_until)
+        payload = {_SWR_MARKER: 1, "value": value, "fresh_until": fresh_until} if stale_ttl else value
+        await self.manager.set(key, payload, ttl + stale_ttl)
+
+    async def delete(self, key: str) -> None:
+        self.l1.delete(key)
+        await self.manager.delete(key)
+
+    async def _lookup(self, key: str) -> Optional[Tuple[Any, float, str]]:
+        """返回 (value, fresh_until, 来源 l1/l2)"""
+        entry = self.l1.get(key)
+        if entry is not None:
+            self.stats["l1_hits"] += 1
+            return entry[0], entry[1], "l1"
+        raw = await self.manager.get(key)
+        if raw is None:
+            return None
+        self.stats["l2_hits"] += 1
+        # L2的剩余存活时间未知，L1按新鲜截止时间保存（宽限期内的值交给刷新流程）
+        value, fresh_until = _unwrap(raw, time.time() + self.l1.max_age)
+        self.l1.set(key, value, fresh_until, max(fresh_until, time.time() + self.l1.max_age))
+        return value, fresh_until, "l2"
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]], ttl: int,
+                             stale_ttl: int = 0) -> Tuple[Any, str]:
+        """
+        读取缓存，未命中时计算并写入
+
+        Args:
+            compute: 无参协程函数，返回None时不缓存
+            ttl: 新鲜期（秒）
+            stale_ttl: 宽限期（秒），过期后宽限期内先返回旧值并在后台刷新
+
+        Returns:
+            (value, 来源)：l1 / l2 / stale / computed / coalesced
+        """
+        hit = await self._lookup(key)
+        if hit is not None:
+            value, fresh_until, source = hit
+            if time.time() < fresh_until:
+                return value, source
+            if stale_ttl:
+                self.stats["stale_served"] += 1
+                self._refresh_in_background(key, compute, ttl, stale_ttl)
+                return value, "stale"
+
+        self.stats["misses"] += 1
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            source = "coalesced"
+        else:
+            task = self._start(key, compute, ttl, stale_ttl)
+            source = "computed"
+        # 发起计算的请求与合并等待的请求一样用shield等待：请求被取消时计算继续，结果照常写入缓存
+        return await asyncio.shield(task), source
+
+    def _start(self, key: str, compute: Callable[[], Awaitable[Any]], ttl: int, stale_ttl: int) -> asyncio.Task:
+        """创建计算任务并登记（同步完成，保证同一个键只有一个计算者）"""
+        task = asyncio.ensure_future(self._compute(key, compute, ttl, stale_ttl))
+        self._inflight[key] = task
+        # 所有等待者都已取消时没有人读取异常，避免 "Task exception was never retrieved"
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def _compute(self, key: str, compute: Callable[[], Awaitable[Any]], ttl: int, stale_ttl: int) -> Any:
+        """执行计算并写入缓存"""
+        try:
+            value = await compute()
+            if value is not None:
+                await self.set(key, value, ttl, stale_ttl)
+            return value
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                self._inflight.pop(key, None)
+
+    def _refresh_in_background(self, key: str, compute: Callable[[], Awaitable[Any]], ttl: int,
+                               stale_ttl: int) -> None:
+        if key in self._inflight:
+            return
+        self.stats["refreshes"] += 1
+        task = self._start(key, compute, ttl, stale_ttl)
+
+        def report(task: asyncio.Task):
+            if not task.cancelled() and task.exception() is not None:
+                self.stats["refresh_errors"] += 1
+                logger.warning(f"后台刷新缓存失败 {key}: {task.exception()}")
+
+        task.add_done_callback(report)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "l1_size": len(self.l1), "l1_max_entries": self.l1.max_entries,
+                "inflight": len(self._inflight)}
+
+
+
+class CacheVersions:
+    """
+    按节点标签、关系类型维护的写版本号
+
+    标签形如 label:Term、rel:CAUSES；任一标签/关系类型变更时同时递增 label:* / rel:*，
+    供读取范围不限标签/关系类型的查询使用。Redis哈希与标签规则定义在 services/nlp/write_versions.py，
+    不加载API缓存层的独立进程直接使用该模块递增版本号。
+    """
+
+    write_tags = staticmethod(write_tags)
+    read_tags = staticmethod(read_tags)
+
+    def __init__(self, manager: RedisManager, refresh_interval: Optional[float] = None):
+        """
+        Args:
+            refresh_interval: 从Redis重新读取版本号的最短间隔（秒），默认 QUERY_CACHE_VERSION_REFRESH（1）；
+                              本进程的写入立即生效，其他进程的写入最多延迟这么久
+        """
+        self.manager = manager
+        self.refresh_interval = refresh_interval if refresh_interval is not None else \
+            float(os.getenv("QUERY_CACHE_VERSION_REFRESH", "1"))
+        self._local: Dict[str, int] = {}
+        self._loaded_at = 0.0
+        self._sync_writer: Optional[SyncVersionWriter] = None
+
+    def _bump_local(self, tags: List[str]) -> None:
+        for tag in tags:
+            self._local[tag] = self._local.get(tag, 0) + 1
+
+    def _merge(self, remote: Iterable[Tuple[str, int]]) -> None:
+        """合并Redis中的版本号；只增不减（Redis重启或本进程离线递增后，回退会让旧缓存键重新命中）"""
+        for tag, version in remote:
+            tag = tag.decode() if isinstance(tag, bytes) else tag
+            self._local[tag] = max(self._local.get(tag, 0), int(version))
+
+    async def bump(self, labels: Optional[Iterable[str]] = None,
+                   rel_types: Optional[Iterable[str]] = None) -> List[str]:
+        """写入完成后调用：递增相关版本号，依赖这些标签的缓存键随即失效"""
+        tags = self.write_tags(labels, rel_types)
+        if not tags:
+            return tags
+        self._bump_local(tags)
+        client = self.manager.redis_client
+        if client:
+            try:
+                pipe = client.pipeline(transaction=False)
+                for tag in tags:
+                    pipe.hincrby(VERSIONS_KEY, tag, 1)
+                self._merge(zip(tags, await pipe.execute()))
+            except Exception as e:
+                logger.error(f"递增缓存版本失败 {tags}: {e}")
+        logger.debug(f"缓存版本已递增: {tags}")
+        return tags
+
+    def bump_sync(self, labels: Optional[Iterable[str]] = None,
+                  rel_types: Optional[Iterable[str]] = None) -> List[str]:
+        """同步版本的 bump，供API进程内的同步写入流程（含工作线程）调用"""
+        tags = self.write_tags(labels, rel_types)
+        if not tags:
+            return tags
+        self._bump_local(tags)
+        if self._sync_writer is None:
+            self._sync_writer = SyncVersionWriter(self.manager.redis_url)
+        versions = self._sync_writer.bump(tags)
+        if versions is not None:
+            self._merge(zip(tags, versions))
+        return tags
+
+    async def token(self, tags: List[str]) -> str:
+        """读取范围的版本标识，嵌入缓存键"""
+        await self._refresh()
+        return ".".join(str(self._local.get(tag, 0)) for tag in tags)
+
+    async def _refresh(self) -> None:
+        client = self.manager.redis_client
+        if not client or time.time() - self._loaded_at < self.refresh_interval:
+            return
+        try:
+            stored = await client.hgetall(VERSIONS_KEY)
+            self._merge(stored.items())
+            self._loaded_at = time.time()
+        except Exception as e:
+            logger.error(f"读取缓存版本失败: {e}")
+
+    def snapshot(self) -> Dict[str, int]:
+        return dict(self._local)
+
+
+# 全局写版本号
+cache_versions = CacheVersions(redis_manager)
+
+# 全局两级查询缓存
+query_cache = TieredCache(redis_manager)
+
+# 图数据、统计类键的宽限期（秒）
+GRAPH_STALE_TTL = int(os.getenv("QUERY_CACHE_GRAPH_STALE_TTL", "300"))
+STATS_STALE_TTL = int(os.getenv("QUERY_CACHE_STATS_STALE_TTL", "600"))
+
 class QueryCache:
-    """查询缓存管理"""
+    """
+    查询缓存管理
+    
+    缓存键包含读取范围（labels / rel_types，None表示不限）内的写版本号，
+    写入方调用 invalidate() 后依赖这些标签的键自动失效。
+    """
+    
+    @staticmethod
+    async def _key(prefix: str, *args, labels: Optional[Iterable[str]] = None,
+                   rel_types: Optional[Iterable[str]] = None) -> str:
+        token = await cache_versions.token(CacheVersions.read_tags(labels, rel_types))
+        return redis_manager._generate_key(prefix, *args, versions=token)
+    
+    @staticmethod
+    async def invalidate(labels: Optional[Iterable[str]] = None, rel_types: Optional[Iterable[str]] = None):
+        """写入完成后调用：使依赖这些节点标签、关系类型的查询缓存失效"""
+        return await cache_versions.bump(labels, rel_types)
     
     @staticmethod
     async def get_entity_by_id(entity_id: str) -> Optional[Dict]:
         """获取实体缓存"""
-        key = redis_manager._generate_key("entity", entity_id)
-        return await redis_manager.get(key)
+        key = await QueryCache._key("entity", entity_id, rel_types=[])
+        return await query_cache.get(key)
     
     @staticmethod
     async def set_entity_by_id(entity_id: str, entity_data: Dict, ttl: int = 1800):
         """设置实体缓存 (30分钟)"""
-        key = redis_manager._generate_key("entity", entity_id)
-        await redis_manager.set(key, entity_data, ttl)
+        key = await QueryCache._key("entity", entity_id, rel_types=[])
+        await query_cache.set(key, entity_data, ttl)
     
     @staticmethod
     async def get_search_results(query: str, filters: Dict = None) -> Optional[Dict]:
         """获取搜索结果缓存"""
-        key = redis_manager._generate_key("search", query, filters or {})
-        return await redis_manager.get(key)
+        key = await QueryCache._key("search", query, filters or {}, rel_types=[])
+        return await query_cache.get(key)
     
     @staticmethod
     async def set_search_results(query: str, results: Dict, filters: Dict = None, ttl: int = 600):
         """设置搜索结果缓存 (10分钟)"""
-        key = redis_manager._generate_key("search", query, filters or {})
-        await redis_manager.set(key, results, ttl)
+        key = await QueryCache._key("search", query, filters or {}, rel_types=[])
+        await query_cache.set(key, results, ttl)
     
     @staticmethod
     async def get_graph_data(node_id: str, depth: int = 1) -> Optional[Dict]:
         """获取图数据缓存"""
-        key = redis_manager._generate_key("graph", node_id, depth)
-        return await redis_manager.get(key)
+        key = await QueryCache._key("graph", node_id, depth)
+        return await query_cache.get(key)
     
     @staticmethod
     async def set_graph_data(node_id: str, graph_data: Dict, depth: int = 1, ttl: int = 1200):
         """设置图数据缓存 (20分钟)"""
-        key = redis_manager._generate_key("graph", node_id, depth)
-        await redis_manager.set(key, graph_data, ttl)
+        key = await QueryCache._key("graph", node_id, depth)
+        await query_cache.set(key, graph_data, ttl, GRAPH_STALE_TTL)
+    
+    @staticmethod
+    async def graph_data(node_id: str, compute: Callable[[], Awaitable[Optional[Dict]]], depth: int = 1,
+                         ttl: int = 1200, labels: Optional[Iterable[str]] = None,
+                         rel_types: Optional[Iterable[str]] = None) -> Tuple[Optional[Dict], str]:
+        """
+        获取图数据，未命中时由 compute 计算（并发请求只计算一次），过期后宽限期内先返回旧值
+        
+        Args:
+            labels / rel_types: 查询读取的节点标签、关系类型（None表示不限），决定哪些写入使其失效
+        
+        Returns:
+            (图数据, 来源 l1/l2/stale/computed/coalesced)
+        """
+        key = await QueryCache._key("graph", node_id, depth, labels=labels, rel_types=rel_types)
+        return await query_cache.get_or_compute(key, compute, ttl, GRAPH_STALE_TTL)
+    
+    @staticmethod
+    async def stats_data(name: str, compute: Callable[[], Awaitable[Optional[Dict]]], ttl: int = 300,
+                         labels: Optional[Iterable[str]] = None,
+                         rel_types: Optional[Iterable[str]] = None) -> Tuple[Optional[Dict], str]:
+        """获取统计数据，缓存策略同 graph_data"""
+        key = await QueryCache._key("stats", name, labels=labels, rel_types=rel_types)
+        return await query_cache.get_or_compute(key, compute, ttl, STATS_STALE_TTL)
     
     @staticmethod
     async def clear_entity_cache(entity_id: str = None):
         """清除实体缓存"""
         if entity_id:
-            key = redis_manager._generate_key("entity", entity_id)
-            await redis_manager.delete(key)
+            key = await QueryCache._key("entity", entity_id, rel_types=[])
+            await query_cache.delete(key)
         else:
+            query_cache.l1.clear("kg:entity:")
             await redis_manager.clear_pattern("kg:entity:*")
     
     @staticmethod
     async def clear_search_cache():
         """清除搜索缓存"""
+        query_cache.l1.clear("kg:search:")
         await redis_manager.clear_pattern("kg:search:*")
     
     @staticmethod
     async def clear_graph_cache():
         """清除图数据缓存"""
+        query_cache.l1.clear("kg:graph:")
         await redis_manager.clear_pattern("kg:graph:*")
+    
+    @staticmethod
+    async def clear_stats_cache():
+        """清除统计缓存"""
+        query_cache.l1.clear("kg:stats:")
+        await redis_manager.clear_pattern("kg:stats:*")
 
 class FileCache:
     """文件处理缓存"""
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步Neo4j数据访问层
+
+优先使用neo4j官方AsyncGraphDatabase驱动，在事件循环内原生等待查询结果；
+异步驱动不可用（或NEO4J_ASYNC=false）时，退回到共享同步驱动并在有界线程池中执行，
+保证慢查询不会阻塞事件循环。
+
+异步驱动与同步驱动各自持有连接池，两者按NEO4J_ASYNC_POOL_SHARE划分
+NEO4J_MAX_CONNECTION_POOL_SIZE，总连接数不超过配置上限。
+"""
+
+import os
+import time
+import asyncio
+import logging
+import functools
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from database.neo4j_manager import neo4j_manager, Neo4jManager, _PoolStats
+
+try:
+    from neo4j import AsyncGraphDatabase
+except ImportError:  # neo4j < 5.0 没有异步驱动
+    AsyncGraphDatabase = None
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncGraphClient:
+    """异步图数据库客户端"""
+
+    def __init__(self, manager: Neo4jManager = neo4j_manager, max_workers: Optional[int] = None,
+                 use_async: Optional[bool] = None):
+        self.manager = manager
+        self.max_workers = max_workers or int(os.getenv("NEO4J_SYNC_WORKERS", "16"))
+        if use_async is None:
+            use_async = os.getenv("NEO4J_ASYNC", "true").lower() != "false"
+        self.use_async = use_async and AsyncGraphDatabase is not None
+        self.async_pool_size = manager.reserve_async_pool() if self.use_async else 0
+        self.stats = _PoolStats()
+        self._async_driver = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def mode(self) -> str:
+        """当前访问模式"""
+        return "async" if self.use_async else "threadpool"
+
+    def _get_async_driver(self):
+        """延迟创建异步驱动（使用从连接池总预算中划出的份额）"""
+        if self._async_driver is None:
+            self._async_driver = AsyncGraphDatabase.driver(
+                self.manager.uri,
+                auth=(self.manager.user, self.manager.password),
+                **self.manager.driver_options(self.async_pool_size)
+            )
+            logger.info(f"创建异步Neo4j驱动: {self.manager.uri} (pool_size={self.async_pool_size})")
+        return self._async_driver
+
+    @asynccontextmanager
+    async def _session(self):
+        """异步会话上下文 - 与同步驱动一样统计借出/归还"""
+        start = time.perf_counter()
+        try:
+            session = self._get_async_driver().session()
+        except Exception:
+            self.stats.on_failure()
+            raise
+        self.stats.on_acquire(time.perf_counter() - start)
+        try:
+            async with session:
+                yield session
+        finally:
+            self.stats.on_release()
+
+    def get_pool_stats(self) -> Dict[str, Dict[str, Any]]:
+        """异步驱动的连接池统计（键格式与Neo4jManager.get_pool_stats一致，加async:前缀）"""
+        if not self.use_async:
+            return {}
+        key = f"async:{self.manager.user}@{self.manager.uri}"
+        return {key: self.stats.report(self.async_pool_size)}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """有界线程池，仅用于同步Neo4j驱动调用"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix="neo4j-sync")
+        return self._executor
+
+    async def connect(self):
+        """校验连通性（失败时记录日志，不抛出异常）"""
+        try:
+            if self.use_async:
+                await self._get_async_driver().verify_connectivity()
+            else:
+                await self.run_sync(self.manager.get_driver().verify_connectivity)
+            logger.info(f"Neo4j数据访问层已就绪 (mode={self.mode})")
+        except Exception as e:
+            logger.error(f"Neo4j数据访问层连接失败: {e}")
+
+    async def close(self):
+        """关闭异步驱动和线程池"""
+        if self._async_driver is not None:
+            await self._async_driver.close()
+            self._async_driver = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def run_sync(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        在有界线程池中执行使用同步Neo4j驱动的阻塞调用
+
+        线程数与同步驱动的连接池份额相匹配；不访问Neo4j的CPU/文件操作
+        请使用asyncio.to_thread或run_in_threadpool，避免占用查询线程。
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), functools.partial(func, *args, **kwargs))
+
+    def _fetch_blocking(self, query: str, params: Dict[str, Any]) -> List:
+        with self.manager.get_driver().session() as session:
+            return list(session.run(query, params))
+
+    async def fetch(self, query: str, parameters: Optional[Dict[str, Any]] = None, **kwargs) -> List:
+        """
+        执行查询并返回全部记录（neo4j.Record列表，支持record["key"]和record.data()）
+
+        Args:
+            query: Cypher查询
+            parameters: 参数字典，可与关键字参数混用
+        """
+        params = dict(parameters or {}, **kwargs)
+        if self.use_async:
+            async with self._session() as session:
+                result = await session.run(query, params)
+                return [record async for record in result]
+        return await self.run_sync(self._fetch_blocking, query, params)
+
+    async def stream(self, query: str, parameters: Optional[Dict[str, Any]] = None,
+                     batch_size: int = 500, **kwargs) -> AsyncIterator:
+        """
+        逐条产出查询结果，不等待全部记录返回
+
+        线程池模式下按batch_size分批从游标拉取，会话在整个迭代期间保持打开。
+        """
+        params = dict(parameters or {}, **kwargs)
+        if self.use_async:
+            async with self._session() as session:
+                result = await session.run(query, params)
+                async for record in result:
+                    yield record
+            return
+
+        session_ctx = self.manager.get_driver().session()
+        session = await self.run_sync(session_ctx.__enter__)
+        try:
+            result = await self.run_sync(session.run, query, params)
+            while True:
+                batch = await self.run_sync(result.fetch, batch_size)
+                if not batch:
+                    break
+                for record in batch:
+                    yield record
+        finally:
+            await self.run_sync(session_ctx.__exit__, None, None, None)
+
+    async def fetch_one(self, query: str, parameters: Optional[Dict[str, Any]] = None, **kwargs):
+        """执行查询并返回第一条记录，无结果时返回None"""
+        records = await self.fetch(query, parameters, **kwargs)
+        return records[0] if records else None
+
+    async def fetch_data(self, query: str, parameters: Optional[Dict[str, Any]] = None, **kwargs) -> List[Dict[str, Any]]:
+        """执行查询并返回字典列表"""
+        records = await self.fetch(query, parameters, **kwargs)
+        return [record.data() for record in records]
+
+
+# 全局异步图数据库客户端
+graph_db = AsyncGraphClient()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Neo4j驱动管理器 - 进程级共享驱动与连接池
+"""
+
+import os
+import time
+import logging
+import threading
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional, Tuple
+
+from neo4j import GraphDatabase
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Neo4jPoolConfig:
+    """连接池配置"""
+    max_connection_pool_size: int = 50
+    connection_acquisition_timeout: float = 60.0
+    max_connection_lifetime: int = 3600
+    liveness_check_timeout: Optional[float] = 30.0
+    async_pool_share: float = 0.5
+
+    @classmethod
+    def from_env(cls) -> "Neo4jPoolConfig":
+        """从环境变量读取连接池配置"""
+        liveness = os.getenv("NEO4J_LIVENESS_CHECK_TIMEOUT", "30")
+        return cls(
+            max_connection_pool_size=int(os.getenv("NEO4J_MAX_CONNECTION_POOL_SIZE", "50")),
+            connection_acquisition_timeout=float(os.getenv("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", "60")),
+            max_connection_lifetime=int(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600")),
+            liveness_check_timeout=float(liveness) if liveness else None,
+            async_pool_share=float(os.getenv("NEO4J_ASYNC_POOL_SHARE", "0.5"))
+        )
+
+
+class _PoolStats:
+    """连接池使用统计（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.acquired_total = 0
+        self.failed_total = 0
+        self.acquire_seconds_total = 0.0
+
+    def on_acquire(self, elapsed: float):
+        with self._lock:
+            self.in_use += 1
+            self.acquired_total += 1
+            self.acquire_seconds_total += elapsed
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def on_release(self):
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    def on_failure(self):
+        with self._lock:
+            self.failed_total += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            avg_acquire = self.acquire_seconds_total / self.acquired_total if self.acquired_total else 0.0
+            return {
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "acquired_total": self.acquired_total,
+                "failed_total": self.failed_total,
+                "avg_acquire_ms": round(avg_acquire * 1000, 3)
+            }
+
+    def report(self, max_size: int) -> Dict[str, Any]:
+        """
+        统计快照附带连接池上限
+
+        in_use统计的是借出的会话数而非物理连接数（会话在执行查询时才占用连接），
+        因此session_utilization = 会话数 / 连接池上限，只能作为连接占用的上界参考。
+        """
+        stats = self.snapshot()
+        stats["max_size"] = max_size
+        stats["session_utilization"] = round(stats["in_use"] / max_size, 4) if max_size else 0.0
+        return stats
+
+
+class _TrackedSession:
+    """会话上下文 - 统计借出/归还次数"""
+
+    def __init__(self, driver, stats: _PoolStats, kwargs: Dict[str, Any]):
+        self._driver = driver
+        self._stats = stats
+        self._kwargs = kwargs
+        self._session = None
+
+    def __enter__(self):
+        start = time.perf_counter()
+        try:
+            self._session = self._driver.session(**self._kwargs)
+            # 会话在首次执行查询时才真正借出连接，这里统计的是会话占用
+        except Exception:
+            self._stats.on_failure()
+            raise
+        self._stats.on_acquire(time.perf_counter() - start)
+        return self._session
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self._session.close()
+        finally:
+            self._stats.on_release()
+        return False
+
+
+class PooledDriver:
+    """
+    共享驱动代理
+
+    接口与neo4j.Driver保持一致（session/verify_connectivity/execute_query等），
+    但close()不会真正关闭底层驱动，驱动生命周期由Neo4jManager统一管理。
+    """
+
+    def __init__(self, driver, config: Neo4jPoolConfig, key: Tuple[str, str], max_size: Optional[int] = None):
+        self._driver = driver
+        self.config = config
+        self.key = key
+        self.max_size = max_size or config.max_connection_pool_size
+        self.stats = _PoolStats()
+
+    def session(self, **kwargs) -> _TrackedSession:
+        """获取会话（需配合with使用）"""
+        return _TrackedSession(self._driver, self.stats, kwargs)
+
+    def close(self):
+        """共享驱动由管理器关闭，这里忽略"""
+        pass
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """获取连接池使用情况"""
+        return self.stats.report(self.max_size)
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+
+class Neo4jManager:
+    """Neo4j驱动注册表 - 每个(uri, user)在进程内只创建一个驱动"""
+
+    def __init__(self, config: Optional[Neo4jPoolConfig] = None):
+        self.uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
+        self.user = os.getenv("NEO4J_USER", "neo4j")
+        self.password = os.getenv("NEO4J_PASS", "password123")
+        self.config = config or Neo4jPoolConfig.from_env()
+        self._drivers: Dict[Tuple[str, str], PooledDriver] = {}
+        self._lock = threading.Lock()
+        self._async_reserved = 0
+
+    @property
+    def sync_pool_size(self) -> int:
+        """同步驱动可用的连接数（总预算扣除异步驱动划走的部分）"""
+        return max(1, self.config.max_connection_pool_size - self._async_reserved)
+
+    def reserve_async_pool(self) -> int:
+        """
+        从连接池总预算中按async_pool_share划出异步驱动的连接数
+
+        同步驱动和异步驱动各自维护连接池，划分后两者之和不超过max_connection_pool_size。
+        应在创建同步驱动之前调用；已创建的同步驱动保持原连接池大小。
+        """
+        total = self.config.max_connection_pool_size
+        reserved = min(max(1, round(total * self.config.async_pool_share)), max(1, total - 1))
+        with self._lock:
+            if self._drivers:
+                logger.warning("同步Neo4j驱动已创建，连接池划分仅对之后创建的驱动生效")
+            self._async_reserved = reserved
+        logger.info(f"Neo4j连接池划分: 异步驱动 {reserved}, 同步驱动 {self.sync_pool_size} (总计 {total})")
+        return reserved
+
+    def driver_options(self, pool_size: Optional[int] = None) -> Dict[str, Any]:
+        """驱动连接池参数，pool_size默认取同步驱动的份额"""
+        options = {
+            "max_connection_pool_size": pool_size or self.sync_pool_size,
+            "connection_acquisition_timeout": self.config.connection_acquisition_timeout,
+            "max_connection_lifetime": self.config.max_connection_lifetime
+        }
+        if self.config.liveness_check_timeout is not None:
+            options["liveness_check_timeout"] = self.config.liveness_check_timeout
+        return options
+
+    def _create_driver(self, uri: str, user: str, password: str):
+        """按连接池配置创建底层驱动"""
+        return GraphDatabase.driver(uri, auth=(user, password), **self.driver_options())
+
+    def get_driver(self, uri: Optional[str] = None, user: Optional[str] = None,
+                   password: Optional[str] = None, verify: bool = False) -> PooledDriver:
+        """
+        获取共享驱动，不存在时创建
+
+        Args:
+            uri: 连接地址，默认取环境变量
+            user: 用户名
+            password: 密码
+            verify: 新建时是否校验连通性（失败会抛出异常且不注册）
+        """
+        uri = uri or self.uri
+        user = user or self.user
+        key = (uri, user)
+
+        pooled = self._drivers.get(key)
+        if pooled is not None:
+            return pooled
+
+        with self._lock:
+            pooled = self._drivers.get(key)
+            if pooled is None:
+                raw_driver = self._create_driver(uri, user, password or self.password)
+                if verify:
+                    try:
+                        raw_driver.verify_connectivity()
+                    except Exception:
+                        raw_driver.close()
+                        raise
+                pooled = PooledDriver(raw_driver, self.config, key, self.sync_pool_size)
+                self._drivers[key] = pooled
+                logger.info(f"创建共享Neo4j驱动: {uri} (pool_size={pooled.max_size})")
+            return pooled
+
+    def get_pool_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取所有驱动的连接池统计"""
+        return {f"{user}@{uri}": pooled.get_pool_stats()
+                for (uri, user), pooled in list(self._drivers.items())}
+
+    def get_config(self) -> Dict[str, Any]:
+        """获取连接池配置"""
+        return asdict(self.config)
+
+    def close_all(self):
+        """关闭所有驱动"""
+        with self._lock:
+            for key, pooled in self._drivers.items():
+                try:
+                    pooled._driver.close()
+                    logger.info(f"关闭共享Neo4j驱动: {key[0]}")
+                except Exception as e:
+                    logger.error(f"关闭Neo4j驱动失败 {key[0]}: {e}")
+            self._drivers.clear()
+
+
+# 全局Neo4j管理器实例
+neo4j_manager = Neo4jManager()
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FastAPI依赖注入 - 共享Neo4j驱动与业务服务
+"""
+
+from fastapi import HTTPException
+
+from database.neo4j_manager import neo4j_manager, PooledDriver
+from services.kg_query_service import KGQueryService
+from services.kg_relation_service import KGRelationService
+
+
+def get_neo4j_driver() -> PooledDriver:
+    """获取共享Neo4j驱动的依赖注入函数"""
+    try:
+        return neo4j_manager.get_driver()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Neo4j连接不可用: {str(e)}")
+
+
+def get_query_service() -> KGQueryService:
+    """获取查询服务（复用共享驱动）"""
+    return KGQueryService(driver=get_neo4j_driver())
+
+
+def get_relation_service() -> KGRelationService:
+    """获取关系服务（复用共享驱动）"""
+    return KGRelationService(driver=get_neo4j_driver())
@@ -5,19 +5,26 @@
 词典管理API接口
 """
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Query
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 import pandas as pd
 import io
+import sys
 import logging
 from pathlib import Path
 
 from .dictionary_manager import DictionaryManager, DictionaryEntry
 
+sys.path.append(str(Path(__file__).resolve().parent))
+from cache.redis_manager import QueryCache
+
 logger = logging.getLogger(__name__)
 
+# 词典条目对应的图谱节点标签，词典变更后使依赖这些标签的查询缓存失效
+DICTIONARY_LABELS = ["Term", "Category", "Tag"]
+
 # 初始化词典管理器
 dictionary_manager = DictionaryManager()
 
@@ -112,6 +119,7 @@ def setup_dictionary_routes(app: FastAPI):
             success = dictionary_manager.add_entry(entry)
             if success:
                 dictionary_manager.save_dictionary()
+                await QueryCache.invalidate(labels=DICTIONARY_LABELS)
                 return DictionaryResponse(
                     success=True,
                     message="词典条目创建成功",
@@ -142,6 +150,7 @@ def setup_dictionary_routes(app: FastAPI):
             
             dictionary_manager.update_entry(entry)
             dictionary_manager.save_dictionary()
+            await QueryCache.invalidate(labels=DICTIONARY_LABELS)
             
             return DictionaryResponse(
                 success=True,
@@ -163,6 +172,7 @@ def setup_dictionary_routes(app: FastAPI):
                 
                 if success:
                     dictionary_manager.save_dictionary()
+                    await QueryCache.invalidate(labels=DICTIONARY_LABELS)
                     return DictionaryResponse(
                         success=True,
                         message="词典条目删除成功"
@@ -178,10 +188,10 @@ def setup_dictionary_routes(app: FastAPI):
             raise HTTPException(status_code=500, detail=str(e))
     
     @app.get("/kg/dictionary/duplicates", response_model=DictionaryResponse)
-    async def find_duplicates():
-        """查找重复条目"""
+    async def find_duplicates(similarity_threshold: Optional[float] = Query(None, gt=0, le=1)):
+        """查找重复条目（similarity_threshold：同时查找同一分类内名称近重复的条目，如0.8）"""
         try:
-            duplicates = dictionary_manager.find_duplicates()
+            duplicates = dictionary_manager.find_duplicates(similarity_threshold)
             
             return DictionaryResponse(
                 success=True,
@@ -196,11 +206,13 @@ def setup_dictionary_routes(app: FastAPI):
             raise HTTPException(status_code=500, detail=str(e))
     
     @app.post("/kg/dictionary/remove-duplicates", response_model=DictionaryResponse)
-    async def remove_duplicates(strategy: str = "keep_latest"):
-        """清除重复条目"""
+    async def remove_duplicates(strategy: str = "keep_latest",
+                                similarity_threshold: Optional[float] = Query(None, gt=0, le=1)):
+        """清除重复条目（给出 similarity_threshold 时只支持 merge 策略）"""
         try:
-            result = dictionary_manager.remove_duplicates(strategy)
+            result = dictionary_manager.remove_duplicates(strategy, similarity_threshold)
             dictionary_manager.save_dictionary()
+            await QueryCache.invalidate(labels=DICTIONARY_LABELS)
             
             return DictionaryResponse(
                 success=True,
@@ -208,6 +220,8 @@ def setup_dictionary_routes(app: FastAPI):
                 data=result
             )
             
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         except Exception as e:
             logger.error(f"清除重复条目失败: {e}")
             raise HTTPException(status_code=500, detail=str(e))
@@ -218,6 +232,7 @@ def setup_dictionary_routes(app: FastAPI):
         try:
             result = dictionary_manager.batch_import_from_table(request.data)
             dictionary_manager.save_dictionary()
+            await QueryCache.invalidate(labels=DICTIONARY_LABELS)
             
             return DictionaryResponse(
                 success=True,
@@ -251,6 +266,7 @@ def setup_dictionary_routes(app: FastAPI):
             # 批量导入
             result = dictionary_manager.batch_import_from_table(data)
             dictionary_manager.save_dictionary()
+            await QueryCache.invalidate(labels=DICTIONARY_LABELS)
             
             return DictionaryResponse(
                 success=True,
@@ -6,6 +6,7 @@
 支持重复清除、批量导入、持续更新等功能
 """
 
+import sys
 import json
 import csv
 import pandas as pd
@@ -16,8 +17,17 @@ from datetime import datetime
 import logging
 import hashlib
 
+# 词典全文检索索引（services/nlp，仅依赖标准库）
+sys.path.append(str(Path(__file__).resolve().parents[1] / "services" / "nlp"))
+from dictionary_search import DictionarySearchIndex, DocumentFields, IndexedMapping
+from entity_dedup import NearDuplicateIndex, UnionFind
+
 logger = logging.getLogger(__name__)
 
+# 词典条目 → 全文检索文档
+ENTRY_SEARCH_FIELDS = DocumentFields(term='term', aliases='aliases', tags='tags',
+                                     definition='definition', category='category')
+
 @dataclass
 class DictionaryEntry:
     """词典条目数据结构"""
@@ -60,8 +70,13 @@ class DictionaryManager:
         self.backup_dir = self.data_dir / "backups"
         self.backup_dir.mkdir(exist_ok=True)
         
-        # 加载现有词典
-        self.entries: Dict[str, DictionaryEntry] = {}
+        # 加载现有词典；写入 entries 时同步更新全文检索索引
+        self._search_index = DictionarySearchIndex()
+        self.entries: Dict[str, DictionaryEntry] = IndexedMapping(self._search_index, ENTRY_SEARCH_FIELDS)
+        # 近重复检测的名称索引（按分类），查重前只加入新增条目
+        self._dedup_indexes: Dict[str, NearDuplicateIndex] = {}
+        self._dedup_indexed: Dict[str, str] = {}                   # 已索引条目 → 所在分类
+        self._dedup_threshold: Optional[float] = None
         self.load_dictionary()
     
     def load_dictionary(self):
@@ -144,39 +159,88 @@ class DictionaryManager:
         logger.warning(f"词典条目不存在: {term}")
         return False
     
-    def find_duplicates(self) -> List[Dict[str, Any]]:
-        """查找重复条目"""
-        duplicates = []
-        term_to_entries = {}
-        
+    def find_duplicates(self, similarity_threshold: float = None) -> List[Dict[str, Any]]:
+        """查找重复条目
+
+        共享术语或别名的条目用并查集归为一组（A、B 共享 x，B、C 共享 y 时 A、B、C 为同一组），
+        每个条目只出现在一组中。给出 similarity_threshold 时，同一分类内主术语名称的字符二元组相似度
+        不低于该值的条目也归为一组（MinHash/LSH 生成候选，索引只加入新增条目）；
+        相似关系会传递，因此不跨分类合组。
+
+        Raises:
+            ValueError: similarity_threshold 不在 (0, 1] 范围内
+        """
+        self._check_threshold(similarity_threshold)
+        clusters = UnionFind()
+        term_to_hashes: Dict[str, List[str]] = {}
+
         # 按术语分组
         for entry_hash, entry in self.entries.items():
+            clusters.add(entry_hash)
             for term in entry.get_all_terms():
-                if term not in term_to_entries:
-                    term_to_entries[term] = []
-                term_to_entries[term].append((entry_hash, entry))
-        
-        # 找出重复的术语
-        for term, entries_list in term_to_entries.items():
-            if len(entries_list) > 1:
-                duplicates.append({
-                    'term': term,
-                    'count': len(entries_list),
-                    'entries': [
-                        {
-                            'hash': entry_hash,
-                            'main_term': entry.term,
-                            'category': entry.category,
-                            'aliases': entry.aliases,
-                            'definition': entry.definition
-                        }
-                        for entry_hash, entry in entries_list
-                    ]
-                })
-        
+                term_to_hashes.setdefault(term, []).append(entry_hash)
+
+        for hashes in term_to_hashes.values():
+            for other in hashes[1:]:
+                clusters.union(hashes[0], other)
+
+        if similarity_threshold is not None:
+            indexes = self._near_duplicate_indexes(similarity_threshold)
+            for entry_hash, entry in self.entries.items():
+                clusters.union(entry_hash, indexes[entry.category].root(entry_hash))
+
+        shared_terms: Dict[str, Set[str]] = {}
+        for term, hashes in term_to_hashes.items():
+            if len(hashes) > 1:
+                shared_terms.setdefault(clusters.find(hashes[0]), set()).add(term)
+
+        duplicates = []
+        for group in clusters.groups(list(self.entries)):
+            if len(group) < 2:
+                continue
+            terms = sorted(shared_terms.get(clusters.find(group[0]), ()))
+            duplicates.append({
+                'term': terms[0] if terms else self.entries[group[0]].term,
+                'terms': terms,
+                'match_type': 'exact' if terms else 'similar',
+                'count': len(group),
+                'entries': [
+                    {
+                        'hash': entry_hash,
+                        'main_term': self.entries[entry_hash].term,
+                        'category': self.entries[entry_hash].category,
+                        'aliases': self.entries[entry_hash].aliases,
+                        'definition': self.entries[entry_hash].definition
+                    }
+                    for entry_hash in group
+                ]
+            })
+
         return duplicates
+
+    @staticmethod
+    def _check_threshold(similarity_threshold: Optional[float]):
+        if similarity_threshold is not None and not 0 < similarity_threshold <= 1:
+            raise ValueError(f"similarity_threshold 必须在 (0, 1] 范围内: {similarity_threshold}")
+
+    def _near_duplicate_indexes(self, threshold: float) -> Dict[str, NearDuplicateIndex]:
+        """按分类的名称近重复索引：已索引的条目被删除、改了分类或阈值变化时重建，否则只加入新增条目"""
+        if (self._dedup_threshold != threshold
+                or any(self.entries.get(h) is None or self.entries[h].category != category
+                       for h, category in self._dedup_indexed.items())):
+            self._dedup_indexes = {}
+            self._dedup_indexed = {}
+            self._dedup_threshold = threshold
+        for entry_hash, entry in self.entries.items():
+            if entry_hash not in self._dedup_indexed:
+                index = self._dedup_indexes.get(entry.category)
+                if index is None:
+                    index = self._dedup_indexes[entry.category] = NearDuplicateIndex(threshold=threshold)
+                index.add(entry_hash, entry.term)
+                self._dedup_indexed[entry_hash] = entry.category
+        return self._dedup_indexes
     
-    def remove_duplicates(self, strategy: str = "keep_latest") -> Dict[str, Any]:
+    def remove_duplicates(self, strategy: str = "keep_latest", similarity_threshold: float = None) -> Dict[str, Any]:
         """清除重复条目
         
         Args:
@@ -184,8 +248,16 @@ class DictionaryManager:
                 - keep_latest: 保留最新的
                 - keep_first: 保留最早的
                 - merge: 合并条目
+            similarity_threshold: 同时处理名称近重复的条目（见 find_duplicates），只能与 merge 策略一起使用：
+                近重复不一定是同一术语，合并会保留其余名称作为别名，删除则会丢失词条
+
+        Raises:
+            ValueError: 阈值超出范围，或给出阈值时策略不是 merge
         """
-        duplicates = self.find_duplicates()
+        self._check_threshold(similarity_threshold)
+        if similarity_threshold is not None and strategy != "merge":
+            raise ValueError(f"按名称相似度清除重复只支持 merge 策略，当前为 {strategy}")
+        duplicates = self.find_duplicates(similarity_threshold)
         removed_count = 0
         merged_count = 0
         
@@ -394,24 +466,9 @@ class DictionaryManager:
             'avg_aliases_per_entry': round(total_aliases / len(self.entries), 2) if self.entries else 0
         }
 
-    def search_entries(self, query: str, category: str = None) -> List[DictionaryEntry]:
-        """搜索词典条目"""
-        query_lower = query.lower()
-        results = []
-
-        for entry in self.entries.values():
-            # 类别过滤
-            if category and entry.category != category:
-                continue
-
-            # 文本匹配
-            if (query_lower in entry.term.lower() or
-                any(query_lower in alias.lower() for alias in entry.aliases) or
-                query_lower in entry.definition.lower() or
-                any(query_lower in tag.lower() for tag in entry.tags)):
-                results.append(entry)
-
-        return results
+    def search_entries(self, query: str, category: str = None, limit: int = None) -> List[DictionaryEntry]:
+        """搜索词典条目（术语、别名、标签、定义全文检索，按相关度排序）"""
+        return [self.entries[h] for h in self._search_index.search_ids(query, category, limit)]
 
     def _create_backup(self):
         """创建备份"""
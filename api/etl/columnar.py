@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+表格数据列式处理
+Excel/CSV导入时按整列完成空值/时间戳处理、词典标准化和行哈希，
+代替 iterrows() 把每行装箱成 pd.Series 再逐个单元格处理。
+
+标准化函数只对每列的不同取值调用一次（pd.factorize），再按编码映射回整列；
+质量数据中组件、症状、产品等列重复度很高，调用次数通常远小于行数。
+"""
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# 行哈希（重复行检测）使用的字段
+ROW_HASH_FIELDS = ["产品", "版本", "组件", "症状", "异常描述"]
+
+
+def cell_text(value: Any) -> str:
+    """单元格转文本：时间戳转ISO格式，其余去除首尾空白"""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value).strip()
+
+
+def strip_text(value: Any) -> str:
+    """单元格转文本并去除首尾空白（时间戳按 str() 格式）"""
+    return str(value).strip()
+
+
+def map_unique(series: pd.Series, func: Callable[[Any], Any], na_value: Any = None) -> pd.Series:
+    """
+    对整列应用 func，每个不同的非空取值只计算一次
+
+    Args:
+        series: 输入列
+        func: 作用于单个非空取值的函数
+        na_value: 空值（NaN/None/NaT）的结果
+
+    Returns:
+        object类型的结果列，索引与输入一致
+    """
+    # 混合类型的列中 1、1.0、True 会被factorize视为同一个值，退回逐个计算
+    if pd.api.types.infer_dtype(series, skipna=True).startswith("mixed"):
+        values = series.to_numpy(dtype=object)
+        missing = pd.isna(values)
+        result = np.empty(len(values), dtype=object)
+        for i, (value, is_missing) in enumerate(zip(values, missing)):
+            result[i] = na_value if is_missing else func(value)
+        return pd.Series(result, index=series.index, dtype=object)
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    mapped = np.empty(len(uniques) + 1, dtype=object)
+    for i, value in enumerate(uniques):
+        mapped[i] = func(value)
+    mapped[-1] = na_value    # 编码-1（空值）取最后一个
+    return pd.Series(mapped[codes], index=series.index, dtype=object)
+
+
+def normalize_frame(df: pd.DataFrame, func: Callable[[Any], Any] = cell_text,
+                    columns: Optional[Sequence[Any]] = None) -> pd.DataFrame:
+    """
+    整表标准化：空值为None，其余按 func 转换
+
+    Args:
+        df: 原始数据
+        func: 单元格转换函数，默认 cell_text
+        columns: 只处理这些列（默认全部）
+    """
+    columns = list(df.columns) if columns is None else [c for c in columns if c in df.columns]
+    return pd.DataFrame({col: map_unique(df[col], func) for col in columns}, index=df.index)
+
+
+def join_columns(frame: pd.DataFrame, sep: str = " | ") -> List[str]:
+    """
+    每行拼接为 "列名: 值 | 列名: 值"，跳过空值
+
+    Args:
+        frame: normalize_frame 的结果（值为字符串或None）
+    """
+    n = len(frame)
+    parts = []
+    for col in frame.columns:
+        values = frame[col].to_numpy(dtype=object)
+        present = pd.notna(values)
+        prefixed = np.full(n, None, dtype=object)
+        prefixed[present] = f"{col}: " + values[present]
+        parts.append(prefixed)
+    if not parts:
+        return [""] * n
+    return [sep.join([p for p in row if p is not None]) for row in zip(*parts)]
+
+
+def row_hashes(df: pd.DataFrame, fields: Iterable[Any] = ROW_HASH_FIELDS) -> List[str]:
+    """
+    按字段生成每行的MD5（缺失的字段跳过，空值记为空字符串），用于重复行检测
+    """
+    present = [field for field in fields if field in df.columns]
+    if present:
+        columns = [map_unique(df[field], str, "").to_numpy(dtype=object) for field in present]
+        keys = ["|".join(values) for values in zip(*columns)]
+    else:
+        keys = [""] * len(df)
+    return [hashlib.md5(key.encode('utf-8')).hexdigest() for key in keys]
+
+
+def frame_records(frame: pd.DataFrame) -> List[Dict[Any, Any]]:
+    """一次性把整表转换为记录列表"""
+    return frame.to_dict("records")
@@ -2,8 +2,10 @@
 """
 增强版Excel ETL处理器
 支持幂等导入、字段映射、错误处理和统计报告
+同一文件 + 同一映射配置的处理结果按内容寻址缓存
 """
 
+import sys
 import pandas as pd
 import json
 import yaml
@@ -13,11 +15,20 @@ from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass, asdict
 import hashlib
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from cache.parse_cache import parse_cache, file_sha256, config_fingerprint
+from etl.columnar import ROW_HASH_FIELDS, map_unique, row_hashes, strip_text
+from etl.tabular_stream import iter_table_batches
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 处理逻辑或结果格式变化时递增，使已缓存的结果失效
+ETL_PROCESSOR_VERSION = "3"
+
 @dataclass
 class ETLStats:
     """ETL统计信息"""
@@ -151,10 +162,9 @@ class EnhancedETLProcessor:
     def _generate_row_hash(self, row: pd.Series) -> str:
         """生成行的哈希值用于重复检测"""
         # 使用主要字段生成哈希
-        key_fields = ["产品", "版本", "组件", "症状", "异常描述"]
         key_values = []
         
-        for field in key_fields:
+        for field in ROW_HASH_FIELDS:
             if field in row.index:
                 value = str(row[field]) if pd.notna(row[field]) else ""
                 key_values.append(value)
@@ -240,6 +250,152 @@ class EnhancedETLProcessor:
         
         return relationships
     
+    def _process_row(self, index: Any, row: pd.Series,
+                     all_entities: List[Dict[str, Any]], all_relationships: List[Dict[str, Any]]):
+        """逐行处理（与 _process_frame 结果一致，用于对照和基准测试）"""
+        self.stats.processed_rows += 1
+        
+        try:
+            # 生成行哈希检查重复
+            row_hash = self._generate_row_hash(row)
+            if row_hash in self.processed_hashes:
+                self.stats.duplicate_rows += 1
+                self.stats.skipped_rows += 1
+                logger.debug(f"Skipping duplicate row {index}")
+                return
+            
+            self.processed_hashes.add(row_hash)
+            
+            # 验证行数据
+            is_valid, validation_errors = self._validate_row(row, index)
+            if not is_valid:
+                self.stats.failed_rows += 1
+                self._record_error(index, "validation", "; ".join(validation_errors), row.to_dict())
+                return
+            
+            # 提取实体和关系
+            entities = self._extract_entities(row)
+            relationships = self._extract_relationships(row, entities)
+            
+            all_entities.extend(entities)
+            all_relationships.extend(relationships)
+            
+            self.stats.success_rows += 1
+            
+        except Exception as e:
+            self.stats.failed_rows += 1
+            self._record_error(index, "processing", str(e), row.to_dict())
+    
+    def _process_frame(self, df: pd.DataFrame) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        按列批量处理一批行：重复检测、必填校验、实体和关系提取
+        
+        结果与逐行调用 _process_row 后再按ID去重一致：实体按首次出现的位置排序，
+        名称取首次出现的值，属性取最后一个非空值；关系按行、映射顺序去重
+        
+        Returns:
+            (该批次去重后的实体, 该批次去重后的关系)
+        """
+        self.stats.processed_rows += len(df)
+        
+        # 重复行：与本批次之前的行或之前批次的行哈希相同
+        hashes = pd.Series(row_hashes(df), index=df.index)
+        duplicate = (hashes.duplicated() | hashes.isin(self.processed_hashes)).to_numpy()
+        self.processed_hashes.update(hashes[~duplicate])
+        self.stats.duplicate_rows += int(duplicate.sum())
+        self.stats.skipped_rows += int(duplicate.sum())
+        rows = df[~duplicate]
+        
+        # 必填列校验
+        required_columns = self.mapping.get("validation", {}).get("required_columns", [])
+        missing = {}
+        for col in required_columns:
+            if col in rows.columns:
+                missing[col] = map_unique(rows[col], strip_text, "").to_numpy(dtype=object) == ""
+            else:
+                missing[col] = np.ones(len(rows), dtype=bool)
+        failed = np.zeros(len(rows), dtype=bool)
+        for mask in missing.values():
+            failed |= mask
+        if failed.any():
+            failed_rows = rows[failed]
+            failed_masks = {col: mask[failed] for col, mask in missing.items()}
+            for i, (index, record) in enumerate(zip(failed_rows.index, failed_rows.to_dict("records"))):
+                errors = [f"Missing required field: {col}" for col, mask in failed_masks.items() if mask[i]]
+                self.stats.failed_rows += 1
+                self._record_error(index, "validation", "; ".join(errors), record)
+        
+        rows = rows[~failed]
+        self.stats.success_rows += len(rows)
+        positions = np.arange(len(rows))
+        
+        # 实体：每种类型一个列式批次
+        row_entity_ids = {}    # 实体类型 -> 每行的实体ID（该行无此实体时为None）
+        ranked_entities = []
+        for order, (entity_type, config) in enumerate(self.mapping.get("entities", {}).items()):
+            id_field = config.get("id_field")
+            name_field = config.get("name_field")
+            if id_field not in rows.columns:
+                continue
+            
+            ids = map_unique(rows[id_field], strip_text, "").to_numpy(dtype=object)
+            present = ids != ""
+            entity_ids = np.full(len(rows), None, dtype=object)
+            entity_ids[present] = f"{entity_type}:" + ids[present]
+            row_entity_ids[entity_type] = entity_ids
+            if not present.any():
+                continue
+            
+            if name_field in rows.columns:
+                names = map_unique(rows[name_field], strip_text, "").to_numpy(dtype=object)
+            else:
+                names = ids
+            frame = pd.DataFrame({"_pos": positions[present], "id": entity_ids[present], "name": names[present]})
+            properties = [(prop_name, col_name) for prop_name, col_name in config.get("properties", {}).items()
+                          if col_name in rows.columns]
+            for i, (_, col_name) in enumerate(properties):
+                frame[f"p{i}"] = map_unique(rows[col_name], strip_text).to_numpy(dtype=object)[present]
+            
+            firsts = frame.drop_duplicates("id")
+            # groupby(sort=False) 的分组顺序即首次出现顺序，与 firsts 逐行对齐；
+            # last() 跳过空值，即每个属性取最后一个非空值
+            prop_columns = [f"p{i}" for i in range(len(properties))]
+            lasts = frame.groupby("id", sort=False)[prop_columns].last() if properties else None
+            prop_values = [lasts[col].to_numpy(dtype=object) for col in prop_columns] if properties else []
+            for k, (pos, entity_id, name) in enumerate(zip(firsts["_pos"], firsts["id"], firsts["name"])):
+                entity_properties = {}
+                for (prop_name, _), values in zip(properties, prop_values):
+                    value = values[k]
+                    if value is not None and not pd.isna(value):
+                        entity_properties[prop_name] = value
+                ranked_entities.append((pos, order, {
+                    "type": entity_type,
+                    "id": entity_id,
+                    "name": name,
+                    "properties": entity_properties
+                }))
+        ranked_entities.sort(key=lambda item: (item[0], item[1]))
+        
+        # 关系：同一行内两端实体都存在时建立
+        rel_frames = []
+        for order, (rel_type, config) in enumerate(self.mapping.get("relationships", {}).items()):
+            sources = row_entity_ids.get(config.get("from"))
+            targets = row_entity_ids.get(config.get("to"))
+            if sources is None or targets is None:
+                continue
+            both = pd.notna(sources) & pd.notna(targets)
+            if both.any():
+                rel_frames.append(pd.DataFrame({"_pos": positions[both], "_order": order, "type": rel_type,
+                                                "source": sources[both], "target": targets[both]}))
+        relationships = []
+        if rel_frames:
+            rels = pd.concat(rel_frames, ignore_index=True)
+            rels = rels.sort_values(["_pos", "_order"], kind="stable").drop_duplicates(["source", "type", "target"])
+            relationships = [{"type": rel_type, "source": source, "target": target, "properties": {}}
+                             for rel_type, source, target in zip(rels["type"], rels["source"], rels["target"])]
+        
+        return [entity for _, _, entity in ranked_entities], relationships
+    
     def _record_error(self, row_index: int, error_type: str, message: str, row_data: Dict[str, Any] = None):
         """记录错误"""
         error = {
@@ -252,58 +408,57 @@ class EnhancedETLProcessor:
         self.stats.errors.append(error)
         logger.error(f"Row {row_index}: {error_type} - {message}")
     
-    def process_excel(self, file_path: str) -> Dict[str, Any]:
-        """处理Excel文件"""
+    def _restore_cached(self, cached: Dict[str, Any], file_path: str) -> Dict[str, Any]:
+        """恢复缓存的处理结果（统计信息中的时间在缓存里是字符串）"""
+        stats = dict(cached["stats"])
+        for field_name in ("start_time", "end_time"):
+            if isinstance(stats.get(field_name), str):
+                stats[field_name] = datetime.fromisoformat(stats[field_name])
+        self.stats = ETLStats(**stats)
+        cached["metadata"].update({
+            "source_file": file_path,
+            "processed_at": datetime.now().isoformat(),
+            "cache_hit": True
+        })
+        logger.info(f"ETL result cache hit: {file_path}")
+        return cached
+    
+    def process_excel(self, file_path: str, use_cache: bool = True,
+                      batch_rows: Optional[int] = None) -> Dict[str, Any]:
+        """
+        处理Excel文件
+        
+        Args:
+            use_cache: 文件内容和映射配置都未变化时直接返回缓存的结果
+            batch_rows: 每批读取的行数，默认 TABULAR_BATCH_ROWS
+        """
+        cache_key = None
+        if use_cache:
+            cache_key = parse_cache.make_key(file_sha256(file_path), "enhanced_etl", ETL_PROCESSOR_VERSION,
+                                             config_fingerprint(self.mapping))
+            cached = parse_cache.get(cache_key, "enhanced_etl")
+            if cached is not None:
+                return self._restore_cached(cached, file_path)
+        
         self.stats = ETLStats()
         self.stats.start_time = datetime.now()
         self.processed_hashes.clear()
         
         try:
-            # 读取Excel文件
+            # 按批次流式读取，每批读完即完成去重、校验和抽取
             logger.info(f"Reading Excel file: {file_path}")
-            df = pd.read_excel(file_path)
-            self.stats.total_rows = len(df)
-            
-            logger.info(f"Loaded {self.stats.total_rows} rows from Excel")
-            logger.info(f"Columns: {list(df.columns)}")
-            
-            # 处理每一行
             all_entities = []
             all_relationships = []
             
-            for index, row in df.iterrows():
-                self.stats.processed_rows += 1
-                
-                try:
-                    # 生成行哈希检查重复
-                    row_hash = self._generate_row_hash(row)
-                    if row_hash in self.processed_hashes:
-                        self.stats.duplicate_rows += 1
-                        self.stats.skipped_rows += 1
-                        logger.debug(f"Skipping duplicate row {index}")
-                        continue
-                    
-                    self.processed_hashes.add(row_hash)
-                    
-                    # 验证行数据
-                    is_valid, validation_errors = self._validate_row(row, index)
-                    if not is_valid:
-                        self.stats.failed_rows += 1
-                        self._record_error(index, "validation", "; ".join(validation_errors), row.to_dict())
-                        continue
-                    
-                    # 提取实体和关系
-                    entities = self._extract_entities(row)
-                    relationships = self._extract_relationships(row, entities)
-                    
-                    all_entities.extend(entities)
-                    all_relationships.extend(relationships)
-                    
-                    self.stats.success_rows += 1
-                    
-                except Exception as e:
-                    self.stats.failed_rows += 1
-                    self._record_error(index, "processing", str(e), row.to_dict())
+            for batch in iter_table_batches(file_path, batch_rows=batch_rows):
+                if self.stats.total_rows == 0:
+                    logger.info(f"Columns: {list(batch.columns)}")
+                self.stats.total_rows += len(batch)
+                entities, relationships = self._process_frame(batch)
+                all_entities.extend(entities)
+                all_relationships.extend(relationships)
+            
+            logger.info(f"Loaded {self.stats.total_rows} rows from Excel")
             
             self.stats.end_time = datetime.now()
             
@@ -340,6 +495,8 @@ class EnhancedETLProcessor:
             logger.info(f"ETL completed: {self.stats.success_rows}/{self.stats.processed_rows} rows processed successfully")
             logger.info(f"Extracted {len(result['entities'])} entities and {len(result['relationships'])} relationships")
             
+            if cache_key:
+                parse_cache.put(cache_key, result)
             return result
             
         except Exception as e:
@@ -4,11 +4,16 @@ ETL脚本：从Excel文件导入来料异常数据到Neo4j知识图谱
 基于ontology v0.2设计
 """
 import os
+import sys
 import pandas as pd
 from neo4j import GraphDatabase
 from datetime import datetime
+from pathlib import Path
 import logging
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from cache.redis_manager import cache_versions
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -206,6 +211,14 @@ def run_etl():
                 continue
     
     driver.close()
+    if processed_count:
+        # 使API进程中依赖这些标签/关系类型的查询缓存失效
+        cache_versions.bump_sync(
+            labels=["Anomaly", "Factory", "Project", "Material", "Symptom", "RootCause",
+                    "Countermeasure", "Owner", "Supplier"],
+            rel_types=["HAPPENED_IN", "RELATED_TO", "INVOLVES", "HAS_SYMPTOM", "HAS_ROOTCAUSE",
+                       "RESOLVED_BY", "OWNED_BY", "SUPPLIED_BY"]
+        )
     logger.info(f"ETL流程完成！成功处理: {processed_count} 条，错误: {error_count} 条")
 
 if __name__ == "__main__":
@@ -4,27 +4,47 @@ Normalizer for Quality KG ETL
 - Component alias mapping using data/vocab/components.csv
 - Symptom/RootCause vocab normalization using data/vocab/symptoms.csv, data/vocab/causes.csv
 - Unified key generation according to ontology_v0.1.md
+- Lookups go through the shared TermIndex (services/nlp/term_index.py); optional fuzzy fallback
+- norm_column normalizes a whole DataFrame column, resolving each distinct value once
 """
 from __future__ import annotations
+import sys
 import pandas as pd
 from pathlib import Path
 from typing import Dict, Optional
 
+# services/nlp 按目录引入，避免与 api/services 包重名
+sys.path.append(str(Path(__file__).resolve().parents[2] / "services" / "nlp"))
+from term_index import TermIndex
+
+from .columnar import map_unique, strip_text
+
 class Normalizer:
-    def __init__(self):
+    def __init__(self, fuzzy_threshold: Optional[float] = None):
+        """fuzzy_threshold: 精确匹配未命中时的模糊匹配阈值，None 表示只做精确匹配"""
+        self.fuzzy_threshold = fuzzy_threshold
         self.comp_alias2std: Dict[str, str] = {}
         self.symptom_std: Dict[str, str] = {}
         self.cause_std: Dict[str, str] = {}
         self._load_vocabs()
+        self.comp_index = TermIndex.from_mapping(self.comp_alias2std)
+        self.symptom_index = TermIndex.from_mapping(self.symptom_std)
+        self.cause_index = TermIndex.from_mapping(self.cause_std)
+
+    @staticmethod
+    def _text_column(df: pd.DataFrame, col: str) -> list:
+        """按列取去除首尾空白的文本，缺失列或空值为 ''"""
+        if col not in df.columns:
+            return [''] * len(df)
+        return map_unique(df[col], strip_text, '').tolist()
 
     def _load_vocabs(self) -> None:
         # components.csv: name,alias
         comp_path = Path('data/vocab/components.csv')
         if comp_path.exists():
             df = pd.read_csv(comp_path)
-            for _, r in df.iterrows():
-                name = str(r.get('name', '')).strip()
-                alias = str(r.get('alias', '')).strip()
+            # 按行顺序写入，后出现的别名覆盖先出现的
+            for name, alias in zip(self._text_column(df, 'name'), self._text_column(df, 'alias')):
                 if name:
                     self.comp_alias2std[name.lower()] = name
                 if alias:
@@ -33,16 +53,14 @@ class Normalizer:
         sym_path = Path('data/vocab/symptoms.csv')
         if sym_path.exists():
             df = pd.read_csv(sym_path)
-            for x in df['name'].dropna().tolist():
-                s = str(x).strip()
-                self.symptom_std[s.lower()] = s
+            names = df['name'].dropna().astype(str).str.strip()
+            self.symptom_std.update(zip(names.str.lower(), names))
         # causes.csv: name
         cause_path = Path('data/vocab/causes.csv')
         if cause_path.exists():
             df = pd.read_csv(cause_path)
-            for x in df['name'].dropna().tolist():
-                s = str(x).strip()
-                self.cause_std[s.lower()] = s
+            names = df['name'].dropna().astype(str).str.strip()
+            self.cause_std.update(zip(names.str.lower(), names))
 
     @staticmethod
     def _clean(s: Optional[str]) -> str:
@@ -50,13 +68,28 @@ class Normalizer:
             return ''
         return str(s).strip()
 
-    def norm_component(self, name: Optional[str]) -> str:
+    def _resolve(self, index: TermIndex, name: Optional[str]) -> str:
         n = self._clean(name)
-        return self.comp_alias2std.get(n.lower(), n)
+        if not n:
+            return n
+        std = index.resolve(n, self.fuzzy_threshold)
+        return std if std is not None else n
+
+    def norm_component(self, name: Optional[str]) -> str:
+        return self._resolve(self.comp_index, name)
 
     def norm_symptom(self, name: Optional[str]) -> str:
-        n = self._clean(name)
-        return self.symptom_std.get(n.lower(), n)
+        return self._resolve(self.symptom_index, name)
+
+    def norm_cause(self, name: Optional[str]) -> str:
+        return self._resolve(self.cause_index, name)
+
+    def norm_column(self, series: pd.Series, kind: str) -> pd.Series:
+        """整列标准化，kind 为 component/symptom/cause；每个不同取值只解析一次，空值为 ''"""
+        resolve = {'component': self.norm_component,
+                   'symptom': self.norm_symptom,
+                   'cause': self.norm_cause}[kind]
+        return map_unique(series, resolve, '')
 
     def make_key(self, label: str, name: str, extra: Optional[Dict[str, str]] = None) -> str:
         extra = extra or {}
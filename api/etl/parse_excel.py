@@ -3,13 +3,17 @@
 Parse Excel sources for ETL
 - anomalies.xlsx: AnomalyID, Title, Severity, Product, Build, Component, Symptom
 - testcases.xlsx: CaseID, Title, Module, Priority
-Note: Use pandas with openpyxl engine under the hood.
+Note: Sheets are streamed in row batches (openpyxl read_only / pandas chunksize),
+see etl/tabular_stream.py; iter_*_batches feed the Neo4j writer batch by batch.
 """
 from __future__ import annotations
 import pandas as pd
-from typing import List, Dict, Tuple
+from typing import List, Dict, Iterator, Optional, Tuple
 from pathlib import Path
 
+from .columnar import map_unique, strip_text
+from .tabular_stream import iter_table_batches
+
 CANON_ANOMALY = {
     'anomalyid': 'AnomalyID',
     'anomaly_id': 'AnomalyID',
@@ -42,42 +46,39 @@ def _canonize_columns(df: pd.DataFrame, mapping: Dict[str, str]) -> pd.DataFrame
     return df.rename(columns=rename)
 
 
-def read_anomalies(path: str | Path) -> List[Dict[str, str]]:
-    p = Path(path)
-    if not p.exists():
-        return []
-    df = pd.read_excel(p, engine='openpyxl')
-    df = _canonize_columns(df, CANON_ANOMALY)
-    # keep only expected columns
-    cols = ['AnomalyID','Title','Severity','Product','Build','Component','Symptom']
-    for col in cols:
-        if col not in df.columns:
-            df[col] = None
-    df = df[cols]
-    records = []
-    for _, r in df.iterrows():
-        rec = {c: ('' if pd.isna(r[c]) else str(r[c]).strip()) for c in cols}
-        # minimal required: AnomalyID, Product, Build, Component
-        if rec['AnomalyID']:
-            records.append(rec)
-    return records
+ANOMALY_COLUMNS = ['AnomalyID', 'Title', 'Severity', 'Product', 'Build', 'Component', 'Symptom']
+CASE_COLUMNS = ['CaseID', 'Title', 'Module', 'Priority']
 
 
-def read_testcases(path: str | Path) -> List[Dict[str, str]]:
+def _iter_record_batches(path: str | Path, mapping: Dict[str, str], cols: List[str], id_col: str,
+                         batch_rows: Optional[int] = None) -> Iterator[List[Dict[str, str]]]:
+    """Stream the sheet in row batches; each batch is canonized and converted column-wise."""
     p = Path(path)
     if not p.exists():
-        return []
-    df = pd.read_excel(p, engine='openpyxl')
-    df = _canonize_columns(df, CANON_CASE)
-    cols = ['CaseID','Title','Module','Priority']
-    for col in cols:
-        if col not in df.columns:
-            df[col] = None
-    df = df[cols]
-    records = []
-    for _, r in df.iterrows():
-        rec = {c: ('' if pd.isna(r[c]) else str(r[c]).strip()) for c in cols}
-        if rec['CaseID']:
-            records.append(rec)
-    return records
+        return
+    for df in iter_table_batches(p, batch_rows=batch_rows):
+        df = _canonize_columns(df, mapping)
+        df = df.loc[:, ~df.columns.duplicated()]
+        # keep only expected columns
+        frame = pd.DataFrame({c: (map_unique(df[c], strip_text, '') if c in df.columns
+                                  else pd.Series('', index=df.index, dtype=object)) for c in cols})
+        # minimal required: id column
+        frame = frame[frame[id_col].to_numpy(dtype=object) != '']
+        if len(frame):
+            yield frame.to_dict('records')
+
+
+def iter_anomaly_batches(path: str | Path, batch_rows: Optional[int] = None) -> Iterator[List[Dict[str, str]]]:
+    return _iter_record_batches(path, CANON_ANOMALY, ANOMALY_COLUMNS, 'AnomalyID', batch_rows)
 
+
+def iter_testcase_batches(path: str | Path, batch_rows: Optional[int] = None) -> Iterator[List[Dict[str, str]]]:
+    return _iter_record_batches(path, CANON_CASE, CASE_COLUMNS, 'CaseID', batch_rows)
+
+
+def read_anomalies(path: str | Path) -> List[Dict[str, str]]:
+    return [rec for batch in iter_anomaly_batches(path) for rec in batch]
+
+
+def read_testcases(path: str | Path) -> List[Dict[str, str]]:
+    return [rec for batch in iter_testcase_batches(path) for rec in batch]
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+表格文件流式读取
+大体量Excel/CSV（如MES系统导出的数百MB文件）按行批次读取，内存占用只与批次大小相关：
+- .xlsx/.xlsm：openpyxl read_only 模式逐行读取
+- .csv：pandas chunksize 分块读取
+- .xls：xlrd不支持流式读取，整表读入后按批次切分
+
+每个批次是一个 DataFrame，索引为该行在整个表中的位置（从0开始），
+列名处理与 pd.read_excel 一致（空列名为 "Unnamed: i"，重复列名追加 ".1"）。
+单元格保持原始类型（object列），同一列在不同批次中的取值格式一致。
+"""
+from __future__ import annotations
+
+import os
+import logging
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Union
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+STREAMING_EXCEL_SUFFIXES = ('.xlsx', '.xlsm')
+
+
+def default_batch_rows() -> int:
+    """每批行数，读取 TABULAR_BATCH_ROWS（默认5000）"""
+    return int(os.getenv("TABULAR_BATCH_ROWS", "5000"))
+
+
+def _header_names(values: List[Any]) -> List[str]:
+    """表头去重，与 pd.read_excel 的列名规则一致"""
+    names = []
+    seen = {}
+    for i, value in enumerate(values):
+        name = f"Unnamed: {i}" if value is None or str(value).strip() == "" else value
+        if name in seen:
+            seen[name] += 1
+            candidate = f"{name}.{seen[name]}"
+            while candidate in seen:
+                seen[name] += 1
+                candidate = f"{name}.{seen[name]}"
+            seen[candidate] = 0
+            name = candidate
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _convert_cell(value: Any) -> Any:
+    """与pandas的openpyxl读取一致：整数值的浮点数转为int，空字符串视为空值"""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str) and value == "":
+        return None
+    return value
+
+
+def _frame(rows: List[List[Any]], columns: List[str], start: int) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=columns, index=pd.RangeIndex(start, start + len(rows)), dtype=object)
+
+
+def _iter_xlsx(path: Path, batch_rows: int, sheet: Union[int, str]) -> Iterator[pd.DataFrame]:
+    import openpyxl
+
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    try:
+        ws = wb.worksheets[sheet] if isinstance(sheet, int) else wb[sheet]
+        rows_iter = ws.iter_rows(values_only=True)
+        header = next(rows_iter, None)
+        if header is None:
+            return
+        columns = _header_names(list(header))
+        width = len(columns)
+
+        batch: List[List[Any]] = []
+        blank_run: List[List[Any]] = []    # 空行暂存：表尾的空行丢弃，表中的空行保留
+        start = 0
+        for raw in rows_iter:
+            row = [_convert_cell(v) for v in raw[:width]]
+            row.extend([None] * (width - len(row)))
+            if all(v is None for v in row):
+                blank_run.append(row)
+                continue
+            if blank_run:
+                batch.extend(blank_run)
+                blank_run = []
+            batch.append(row)
+            while len(batch) >= batch_rows:
+                yield _frame(batch[:batch_rows], columns, start)
+                start += batch_rows
+                batch = batch[batch_rows:]
+        if batch:
+            yield _frame(batch, columns, start)
+    finally:
+        wb.close()
+
+
+def _iter_csv(path: Path, batch_rows: int, encoding: Optional[str]) -> Iterator[pd.DataFrame]:
+    encodings = [encoding] if encoding else ['utf-8-sig', 'gbk']
+    for i, enc in enumerate(encodings):
+        yielded = False
+        try:
+            start = 0
+            with pd.read_csv(path, encoding=enc, chunksize=batch_rows, dtype=object) as reader:
+                for chunk in reader:
+                    chunk.index = pd.RangeIndex(start, start + len(chunk))
+                    start += len(chunk)
+                    yielded = True
+                    yield chunk
+            return
+        except UnicodeDecodeError:
+            # 已经产出的批次无法撤回，只在首个批次之前切换编码
+            if yielded or i == len(encodings) - 1:
+                raise
+            logger.info(f"CSV编码 {enc} 解码失败，改用 {encodings[i + 1]}: {path}")
+
+
+def iter_table_batches(file_path: Union[str, Path], batch_rows: Optional[int] = None,
+                       sheet: Union[int, str] = 0, encoding: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """
+    按批次读取表格文件
+
+    Args:
+        file_path: .xlsx/.xlsm/.xls/.csv 文件
+        batch_rows: 每批行数，默认 TABULAR_BATCH_ROWS
+        sheet: Excel工作表（序号或名称）
+        encoding: CSV编码，默认依次尝试 utf-8-sig、gbk
+
+    Yields:
+        DataFrame批次（object列，索引为全表行位置）
+    """
+    path = Path(file_path)
+    batch_rows = max(1, batch_rows or default_batch_rows())
+    suffix = path.suffix.lower()
+    if suffix in STREAMING_EXCEL_SUFFIXES:
+        yield from _iter_xlsx(path, batch_rows, sheet)
+    elif suffix == '.csv':
+        yield from _iter_csv(path, batch_rows, encoding)
+    elif suffix == '.xls':
+        df = pd.read_excel(path, sheet_name=sheet, dtype=object)
+        for start in range(0, len(df), batch_rows):
+            yield df.iloc[start:start + batch_rows]
+    else:
+        raise ValueError(f"不支持的表格格式: {suffix}")
+
+
+def read_table(file_path: Union[str, Path], sheet: Union[int, str] = 0,
+               encoding: Optional[str] = None) -> pd.DataFrame:
+    """整表读取（与流式读取的取值格式一致），用于需要全表统计的场景"""
+    batches = list(iter_table_batches(file_path, sheet=sheet, encoding=encoding))
+    if not batches:
+        return pd.DataFrame()
+    return pd.concat(batches) if len(batches) > 1 else batches[0]
+
+
+def estimate_rows(file_path: Union[str, Path], sheet: Union[int, str] = 0) -> Optional[int]:
+    """
+    估计数据行数（用于进度显示），不读取数据
+
+    xlsx取工作表的维度信息（可能缺失），其他格式返回None
+    """
+    path = Path(file_path)
+    if path.suffix.lower() not in STREAMING_EXCEL_SUFFIXES:
+        return None
+    import openpyxl
+
+    wb = openpyxl.load_workbook(path, read_only=True, keep_links=False)
+    try:
+        ws = wb.worksheets[sheet] if isinstance(sheet, int) else wb[sheet]
+        return max(ws.max_row - 1, 0) if ws.max_row else None
+    finally:
+        wb.close()
@@ -4,11 +4,28 @@ Upsert writer to Neo4j for the Quality KG
 - MERGE nodes by key (idempotent)
 - Create required relationships for anomalies
 - Maintain Product-[:HAS_BUILD]->Build linkage
+- Rows are written in batches (UNWIND); load_* stream a sheet batch by batch
+- Each written batch bumps the query-cache versions of the labels/relation types it touched
 """
 from __future__ import annotations
-from typing import Dict, Optional
+import sys
+import logging
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
 from neo4j import GraphDatabase
 from .normalizer import Normalizer
+from .parse_excel import iter_anomaly_batches, iter_testcase_batches
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from cache.redis_manager import cache_versions
+
+logger = logging.getLogger(__name__)
+
+# Labels / relation types written by each batch upsert (used for cache invalidation)
+ANOMALY_LABELS = ["Entity", "Anomaly", "Product", "Build", "Component", "Symptom"]
+ANOMALY_REL_TYPES = ["HAS_BUILD", "OBSERVED_IN", "AFFECTS", "HAS_SYMPTOM"]
+TESTCASE_LABELS = ["Entity", "TestCase", "Component"]
+TESTCASE_REL_TYPES = ["BELONGS_TO"]
 
 class UpsertWriter:
     def __init__(self, uri: str = "bolt://localhost:7687", user: str = "neo4j", password: str = "password"):
@@ -22,48 +39,68 @@ class UpsertWriter:
         with self.driver.session() as s:
             return s.run(cypher, **params)
 
+    def _memo(self, func) -> Callable[[str], str]:
+        """Per-batch memo: component/symptom values repeat heavily within a sheet."""
+        cache: Dict[str, str] = {}
+
+        def resolve(value: str) -> str:
+            if value not in cache:
+                cache[value] = func(value)
+            return cache[value]
+        return resolve
+
     def upsert_anomaly_row(self, row: Dict[str, str]) -> None:
         """Row keys: AnomalyID, Title, Severity, Product, Build, Component, Symptom"""
-        anomaly_id = row.get('AnomalyID') or ''
-        if not anomaly_id:
-            return
-        title = row.get('Title') or ''
-        severity = row.get('Severity') or ''
-        product = row.get('Product') or ''
-        build = row.get('Build') or ''
-        component_raw = row.get('Component') or ''
-        symptom_raw = row.get('Symptom') or ''
-
-        component = self.norm.norm_component(component_raw)
-        symptom = self.norm.norm_symptom(symptom_raw)
-
-        # keys
-        a_key = self.norm.make_key('Anomaly', anomaly_id, {'code': anomaly_id})
-        p_key = self.norm.make_key('Product', product)
-        b_key = self.norm.make_key('Build', build, {'version': build})
-        c_key = self.norm.make_key('Component', component)
-        s_key = self.norm.make_key('Symptom', symptom)
+        self.upsert_anomaly_batch([row])
+
+    def upsert_anomaly_batch(self, rows: List[Dict[str, str]]) -> int:
+        """Upsert a batch of anomaly rows in one UNWIND query; returns rows written."""
+        norm_component = self._memo(self.norm.norm_component)
+        norm_symptom = self._memo(self.norm.norm_symptom)
+        params = []
+        for row in rows:
+            anomaly_id = row.get('AnomalyID') or ''
+            if not anomaly_id:
+                continue
+            product = row.get('Product') or ''
+            build = row.get('Build') or ''
+            component = norm_component(row.get('Component') or '')
+            symptom = norm_symptom(row.get('Symptom') or '')
+            params.append({
+                # keys
+                'a_key': self.norm.make_key('Anomaly', anomaly_id, {'code': anomaly_id}),
+                'p_key': self.norm.make_key('Product', product),
+                'b_key': self.norm.make_key('Build', build, {'version': build}),
+                'c_key': self.norm.make_key('Component', component),
+                's_key': self.norm.make_key('Symptom', symptom),
+                'title': row.get('Title') or '', 'severity': row.get('Severity') or '',
+                'product': product, 'build': build,
+                'component': component, 'symptom': symptom,
+            })
+        if not params:
+            return 0
 
         cypher = """
-        MERGE (a:Entity:Anomaly {key: $a_key})
-        SET a.title=$title, a.severity=$severity,
+        UNWIND $rows AS row
+        MERGE (a:Entity:Anomaly {key: row.a_key})
+        SET a.title=row.title, a.severity=row.severity,
             a.created_at = coalesce(a.created_at, datetime()),
             a.updated_at = datetime()
 
-        MERGE (p:Entity:Product {key: $p_key})
-        SET p.name=$product,
+        MERGE (p:Entity:Product {key: row.p_key})
+        SET p.name=row.product,
             p.created_at = coalesce(p.created_at, datetime()), p.updated_at = datetime()
 
-        MERGE (b:Entity:Build {key: $b_key})
-        SET b.name=$build, b.version=$build,
+        MERGE (b:Entity:Build {key: row.b_key})
+        SET b.name=row.build, b.version=row.build,
             b.created_at = coalesce(b.created_at, datetime()), b.updated_at = datetime()
 
-        MERGE (c:Entity:Component {key: $c_key})
-        SET c.name=$component,
+        MERGE (c:Entity:Component {key: row.c_key})
+        SET c.name=row.component,
             c.created_at = coalesce(c.created_at, datetime()), c.updated_at = datetime()
 
-        MERGE (s:Entity:Symptom {key: $s_key})
-        SET s.name=$symptom,
+        MERGE (s:Entity:Symptom {key: row.s_key})
+        SET s.name=row.symptom,
             s.created_at = coalesce(s.created_at, datetime()), s.updated_at = datetime()
 
         MERGE (p)-[:HAS_BUILD]->(b)
@@ -71,40 +108,63 @@ class UpsertWriter:
         MERGE (a)-[:AFFECTS]->(c)
         MERGE (a)-[:HAS_SYMPTOM]->(s)
         """
-        self._run(cypher, {
-            'a_key': a_key, 'p_key': p_key, 'b_key': b_key, 'c_key': c_key, 's_key': s_key,
-            'title': title, 'severity': severity,
-            'product': product, 'build': build,
-            'component': component, 'symptom': symptom,
-        })
+        self._run(cypher, {'rows': params})
+        cache_versions.bump_sync(ANOMALY_LABELS, ANOMALY_REL_TYPES)
+        return len(params)
 
     def upsert_testcase_row(self, row: Dict[str, str]) -> None:
         """Row keys: CaseID, Title, Module, Priority"""
-        case_id = row.get('CaseID') or ''
-        if not case_id:
-            return
-        title = row.get('Title') or ''
-        module_raw = row.get('Module') or ''
-        priority = row.get('Priority') or ''
-
-        comp = self.norm.norm_component(module_raw)
-        t_key = self.norm.make_key('TestCase', case_id)
-        c_key = self.norm.make_key('Component', comp)
+        self.upsert_testcase_batch([row])
+
+    def upsert_testcase_batch(self, rows: List[Dict[str, str]]) -> int:
+        """Upsert a batch of test case rows in one UNWIND query; returns rows written."""
+        norm_component = self._memo(self.norm.norm_component)
+        params = []
+        for row in rows:
+            case_id = row.get('CaseID') or ''
+            if not case_id:
+                continue
+            comp = norm_component(row.get('Module') or '')
+            params.append({
+                't_key': self.norm.make_key('TestCase', case_id),
+                'c_key': self.norm.make_key('Component', comp),
+                'title': row.get('Title') or '', 'priority': row.get('Priority') or '',
+                'component': comp,
+            })
+        if not params:
+            return 0
 
         cypher = """
-        MERGE (t:Entity:TestCase {key: $t_key})
-        SET t.name=$title, t.priority=$priority,
+        UNWIND $rows AS row
+        MERGE (t:Entity:TestCase {key: row.t_key})
+        SET t.name=row.title, t.priority=row.priority,
             t.created_at = coalesce(t.created_at, datetime()), t.updated_at = datetime()
 
-        MERGE (c:Entity:Component {key: $c_key})
-        SET c.name=$component,
+        MERGE (c:Entity:Component {key: row.c_key})
+        SET c.name=row.component,
             c.created_at = coalesce(c.created_at, datetime()), c.updated_at = datetime()
 
         MERGE (t)-[:BELONGS_TO]->(c)
         """
-        self._run(cypher, {
-            't_key': t_key, 'c_key': c_key,
-            'title': title, 'priority': priority,
-            'component': comp,
-        })
+        self._run(cypher, {'rows': params})
+        cache_versions.bump_sync(TESTCASE_LABELS, TESTCASE_REL_TYPES)
+        return len(params)
 
+    def load_anomalies(self, path: str | Path, batch_rows: Optional[int] = None) -> int:
+        """
+        Stream an anomaly sheet into the graph: each row batch is mapped, normalized
+        and written before the next batch is read. Returns rows written.
+        """
+        written = 0
+        for batch in iter_anomaly_batches(path, batch_rows):
+            written += self.upsert_anomaly_batch(batch)
+            logger.info(f"Upserted {written} anomaly rows from {path}")
+        return written
+
+    def load_testcases(self, path: str | Path, batch_rows: Optional[int] = None) -> int:
+        """Stream a test case sheet into the graph batch by batch. Returns rows written."""
+        written = 0
+        for batch in iter_testcase_batches(path, batch_rows):
+            written += self.upsert_testcase_batch(batch)
+            logger.info(f"Upserted {written} test case rows from {path}")
+        return written
@@ -24,9 +24,11 @@ CACHE.mkdir(exist_ok=True)
 class FileStatus(str, Enum):
     """文件处理状态"""
     uploaded = "uploaded"      # 已上传
+    queued = "queued"          # 排队等待解析
     parsing = "parsing"        # 解析中
     parsed = "parsed"          # 解析完成
     failed = "failed"          # 解析失败
+    cancelled = "cancelled"    # 解析已取消
     committed = "committed"    # 已入库
 
 def new_upload(filename: str) -> str:
@@ -46,6 +48,22 @@ def new_upload(filename: str) -> str:
     logger.info(f"创建新上传记录: {uid} - {filename}")
     return uid
 
+def ensure_meta(uid: str, filename: str) -> dict:
+    """确保上传记录存在（/kg/upload 直接落盘的文件没有元数据）"""
+    meta_file = CACHE / f"{uid}.json"
+    if meta_file.exists():
+        return json.loads(meta_file.read_text(encoding='utf-8'))
+
+    meta = {
+        "id": uid,
+        "name": filename,
+        "status": FileStatus.uploaded,
+        "created": int(time.time()),
+        "updated": int(time.time())
+    }
+    meta_file.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding='utf-8')
+    return meta
+
 def write_file(uid: str, content: bytes) -> Path:
     """保存文件内容"""
     file_path = UPLOAD / uid
@@ -89,6 +107,19 @@ def get_meta(uid: str) -> dict:
     
     return json.loads(meta_file.read_text(encoding='utf-8'))
 
+def request_cancel(uid: str):
+    """写入取消标记，解析进程在页/行之间检查"""
+    (CACHE / f"{uid}.cancel").touch()
+    logger.info(f"请求取消解析: {uid}")
+
+def is_cancel_requested(uid: str) -> bool:
+    """是否已请求取消"""
+    return (CACHE / f"{uid}.cancel").exists()
+
+def clear_cancel(uid: str):
+    """清除取消标记"""
+    (CACHE / f"{uid}.cancel").unlink(missing_ok=True)
+
 def save_preview(uid: str, data: dict):
     """保存解析预览数据"""
     preview_file = CACHE / f"{uid}.preview.json"
@@ -143,6 +174,7 @@ def cleanup_old_files(days: int = 7):
                 (UPLOAD / uid).unlink(missing_ok=True)
                 (CACHE / f"{uid}.preview.json").unlink(missing_ok=True)
                 (CACHE / f"{uid}.log").unlink(missing_ok=True)
+                (CACHE / f"{uid}.cancel").unlink(missing_ok=True)
                 meta_file.unlink(missing_ok=True)
                 
                 logger.info(f"清理旧文件: {uid}")
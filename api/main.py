@@ -2,12 +2,14 @@
 """
 知识图谱核心API - 基于Neo4j的业务查询接口
 """
-from fastapi import FastAPI, HTTPException, File, UploadFile
+from fastapi import FastAPI, HTTPException, File, UploadFile, Depends, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse, Response
 from pydantic import BaseModel
-from neo4j import GraphDatabase
 from typing import List, Dict, Any, Optional
 import os
+import sys
 import logging
 import json
 from pathlib import Path
@@ -17,13 +19,38 @@ from datetime import datetime
 from contextlib import asynccontextmanager
 
 # 导入新的模型和服务
-from models.relation_models import RelationInput, RelationBatch
+from models.relation_models import RelationInput, RelationBatch, RelationBulkBatch
 from services.kg_relation_service import KGRelationService
 from services.kg_query_service import KGQueryService
+from database.neo4j_manager import neo4j_manager
+from database.async_neo4j import graph_db
+from services.graph_stats_service import GraphStatsService
+from services.graph_tile_service import GraphTileService, GRAPH_LABELS, GRAPH_LABEL_MAPPING
+from services.cursors import CursorError
+from services.graph_wire_format import to_compact_graph, negotiated_response, iter_graph_ndjson
+from services.adjacency_snapshot import AdjacencySnapshotService
+from services.dictionary_fulltext import (TermFulltextIndex, SEARCH_COUNT_QUERY, SEARCH_PAGE_QUERY,
+                                          SEARCH_CURSOR_FIELDS, search_params, search_cursor)
+from services.keyset_pagination import (decode_cursor, split_page, clamp_page_size, fetch_keyset_page,
+                                        KEYSET_CURSOR_FIELDS, fetch_dictionary_page, DICTIONARY_COUNT_QUERY,
+                                        dictionary_filter_params, dictionary_cursor,
+                                        label_page_queries, relation_page_queries, element_cursor,
+                                        LABEL_PAGE_KEY, RELATION_PAGE_KEY)
+from dependencies import get_query_service, get_relation_service
+from services.parse_job_queue import ParseJobQueue, QueueFullError
+from parsers.upload_parser import parse_upload, restore_cached_result
+from files.manager import FileStatus, ensure_meta, get_meta, set_status
+from cache.parse_cache import parse_cache
+
+# 词典内存快照（services/nlp，仅依赖标准库）
+sys.path.append(str(Path(__file__).resolve().parents[1] / "services" / "nlp"))
+from dictionary_store import get_dictionary_store, etag_matches
+from dictionary_search import build_entry_index
 
 # 导入缓存和监控模块
-from cache.redis_manager import redis_manager, QueryCache, FileCache, cache_result
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from cache.redis_manager import redis_manager, QueryCache, FileCache, cache_result, cache_versions, CacheVersions
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.core import CounterMetricFamily, REGISTRY
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -35,6 +62,71 @@ REQUEST_DURATION = Histogram('kg_api_request_duration_seconds', 'Request duratio
 CACHE_HITS = Counter('kg_cache_hits_total', 'Cache hits', ['cache_type'])
 CACHE_MISSES = Counter('kg_cache_misses_total', 'Cache misses', ['cache_type'])
 
+# Neo4j连接池指标（采集时从共享同步驱动和异步驱动读取）
+def _all_pool_stats():
+    return {**neo4j_manager.get_pool_stats(), **graph_db.get_pool_stats()}
+
+
+def _pool_metric(field: str):
+    def read():
+        return sum(stats.get(field, 0) for stats in _all_pool_stats().values())
+    return read
+
+NEO4J_POOL_IN_USE = Gauge('kg_neo4j_pool_sessions_in_use', 'Neo4j sessions currently checked out')
+NEO4J_POOL_IN_USE.set_function(_pool_metric("in_use"))
+NEO4J_POOL_PEAK = Gauge('kg_neo4j_pool_sessions_peak', 'Peak concurrent Neo4j sessions')
+NEO4J_POOL_PEAK.set_function(_pool_metric("peak_in_use"))
+
+
+class _PoolAcquiredCollector:
+    """累计借出会话数单调递增，按Counter导出（Counter不支持set_function，采集时读取）"""
+
+    def collect(self):
+        yield CounterMetricFamily('kg_neo4j_pool_sessions_acquired', 'Neo4j sessions acquired since start',
+                                  value=_pool_metric("acquired_total")())
+
+NEO4J_POOL_ACQUIRED = _PoolAcquiredCollector()
+REGISTRY.register(NEO4J_POOL_ACQUIRED)
+
+NEO4J_POOL_MAX_SIZE = Gauge('kg_neo4j_pool_max_size', 'Configured Neo4j connection pool size')
+NEO4J_POOL_MAX_SIZE.set_function(lambda: neo4j_manager.config.max_connection_pool_size)
+
+# 图谱统计快照（后台刷新，统计类接口直接读取）
+# 其他进程（ETL、upsert、脚本）的写入通过 Redis 写版本号（label:* / rel:*）通知刷新
+graph_stats = GraphStatsService(
+    graph_db, change_token=lambda: cache_versions.token(CacheVersions.read_tags(None, None))
+)
+GRAPH_STATS_VERSION = Gauge('kg_graph_stats_snapshot_version', 'Graph statistics snapshot version')
+GRAPH_STATS_VERSION.set_function(lambda: graph_stats.snapshot.version if graph_stats.snapshot else 0)
+
+# 文件解析任务队列（进程池执行，/kg/files/{upload_id}/parse 入队后立即返回）
+parse_jobs = ParseJobQueue(parse_upload)
+# 词典术语全文索引（启动时创建）
+term_fulltext = TermFulltextIndex()
+PARSE_CACHE_SIZE = Gauge('kg_parse_cache_size_bytes', 'Parse result cache size on disk')
+PARSE_CACHE_SIZE.set_function(lambda: parse_cache.stats()["size_bytes"])
+
+# 图谱分层浏览索引（随统计快照版本重建）
+graph_tiles = GraphTileService(graph_db, graph_stats)
+
+# 因果/依赖链路内存邻接快照（随统计快照版本重建，不可用时退回Cypher）
+path_snapshots = AdjacencySnapshotService(
+    graph_db, version_source=lambda: graph_stats.snapshot.version if graph_stats.snapshot else 0
+)
+
+# 链路查询最大深度（内存搜索与Cypher变长路径共用，超过时返回422）
+MAX_PATH_DEPTH = 5
+
+async def _get_path_index():
+    """获取内存邻接快照，未启用或加载失败时返回None"""
+    if not path_snapshots.enabled:
+        return None
+    try:
+        await graph_stats.get_snapshot()
+    except Exception as e:
+        logger.warning(f"获取图谱统计快照失败: {e}")
+    return await path_snapshots.get_snapshot()
+
 # 应用生命周期管理
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -42,6 +134,11 @@ async def lifespan(app: FastAPI):
     logger.info("正在启动知识图谱API服务...")
     await redis_manager.connect()
     logger.info("Redis缓存已初始化")
+    await graph_db.connect()
+    if driver:
+        await term_fulltext.ensure(graph_db)
+    graph_stats.start()
+    parse_jobs.start()
 
     yield
 
@@ -49,6 +146,11 @@ async def lifespan(app: FastAPI):
     logger.info("正在关闭知识图谱API服务...")
     await redis_manager.disconnect()
     logger.info("Redis连接已关闭")
+    await graph_stats.stop()
+    await parse_jobs.stop()
+    await graph_db.close()
+    neo4j_manager.close_all()
+    logger.info("Neo4j驱动已关闭")
 
 # 创建FastAPI应用
 app = FastAPI(
@@ -73,7 +175,8 @@ NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
 NEO4J_PASS = os.getenv("NEO4J_PASS", "password123")
 
 try:
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASS))
+    # 进程级共享驱动，KGQueryService/KGRelationService通过依赖注入复用同一连接池
+    driver = neo4j_manager.get_driver(NEO4J_URI, NEO4J_USER, NEO4J_PASS)
     # 测试连接
     with driver.session() as session:
         session.run("RETURN 1")
@@ -118,9 +221,9 @@ async def health_check():
     # 检查Neo4j连接
     try:
         if driver:
-            with driver.session() as session:
-                session.run("RETURN 1")
+            await graph_db.fetch("RETURN 1")
             health_status["services"]["neo4j"] = "connected"
+            health_status["neo4j_pool"] = _all_pool_stats()
         else:
             health_status["services"]["neo4j"] = "disconnected"
             health_status["status"] = "degraded"
@@ -143,6 +246,9 @@ async def health_check():
         health_status["services"]["redis"] = f"error: {str(e)}"
         health_status["status"] = "degraded"
 
+    # 解析结果缓存（本进程命中统计）
+    health_status["parse_cache"] = parse_cache.stats()
+
     return health_status
 
 # Prometheus监控指标端点
@@ -220,6 +326,35 @@ async def query_cause_path(request: SymptomRequest):
         raise HTTPException(status_code=500, detail="Neo4j数据库连接失败")
 
     try:
+        paths = []
+        path_index = await _get_path_index()
+        if path_index is not None:
+            # 内存快照中按固定模式匹配：症状 <- 异常 -> 根因 -> 对策
+            matched = path_index.match_pattern('Symptom', request.symptom, [
+                ('HAS_SYMPTOM', 'in', 'Anomaly'),
+                ('HAS_ROOTCAUSE', 'out', 'RootCause'),
+                ('RESOLVED_BY', 'out', 'Countermeasure')
+            ], limit=5)
+            for node_indexes, edge_indexes in matched:
+                nodes = [PathNode(
+                    id=path_index.node_ids[n],
+                    labels=list(path_index.node_labels[n]),
+                    properties=dict(path_index.node_props[n])
+                ) for n in node_indexes]
+                relations = [PathRelation(
+                    id=path_index.edge_ids[e],
+                    type=path_index.edge_types[e],
+                    start_node=path_index.node_ids[path_index.edge_sources[e]],
+                    end_node=path_index.node_ids[path_index.edge_targets[e]],
+                    properties=dict(path_index.edge_props[e])
+                ) for e in edge_indexes]
+                paths.append(CausePath(nodes=nodes, relations=relations))
+            return CausePathResponse(
+                success=True,
+                paths=paths,
+                message=f"找到 {len(paths)} 条因果路径"
+            )
+
         query = """
         MATCH (s:Symptom {name: $symptom})
         OPTIONAL MATCH path = (s)<-[:HAS_SYMPTOM]-(a:Anomaly)-[:HAS_ROOTCAUSE]->(rc:RootCause)-[:RESOLVED_BY]->(c:Countermeasure)
@@ -229,35 +364,33 @@ async def query_cause_path(request: SymptomRequest):
         LIMIT 5
         """
 
-        paths = []
-        with driver.session() as session:
-            result = session.run(query, symptom=request.symptom)
-
-            for record in result:
-                if record["path"]:
-                    path_obj = record["path"]
-
-                    # 提取节点
-                    nodes = []
-                    for node in path_obj.nodes:
-                        nodes.append(PathNode(
-                            id=str(node.element_id),
-                            labels=list(node.labels),
-                            properties=dict(node)
-                        ))
-
-                    # 提取关系
-                    relations = []
-                    for rel in path_obj.relationships:
-                        relations.append(PathRelation(
-                            id=str(rel.element_id),
-                            type=rel.type,
-                            start_node=str(rel.start_node.element_id),
-                            end_node=str(rel.end_node.element_id),
-                            properties=dict(rel)
-                        ))
-
-                    paths.append(CausePath(nodes=nodes, relations=relations))
+        result = await graph_db.fetch(query, symptom=request.symptom)
+
+        for record in result:
+            if record["path"]:
+                path_obj = record["path"]
+
+                # 提取节点
+                nodes = []
+                for node in path_obj.nodes:
+                    nodes.append(PathNode(
+                        id=str(node.element_id),
+                        labels=list(node.labels),
+                        properties=dict(node)
+                    ))
+
+                # 提取关系
+                relations = []
+                for rel in path_obj.relationships:
+                    relations.append(PathRelation(
+                        id=str(rel.element_id),
+                        type=rel.type,
+                        start_node=str(rel.start_node.element_id),
+                        end_node=str(rel.end_node.element_id),
+                        properties=dict(rel)
+                    ))
+
+                paths.append(CausePath(nodes=nodes, relations=relations))
 
         return CausePathResponse(
             success=True,
@@ -301,26 +434,25 @@ async def query_anomalies(request: AnomalyFilterRequest):
         """
 
         items = []
-        with driver.session() as session:
-            result = session.run(
-                query,
-                factory=request.factory,
-                project=request.project,
-                material_code=request.material_code,
-                limit=request.limit
-            )
+        result = await graph_db.fetch(
+            query,
+            factory=request.factory,
+            project=request.project,
+            material_code=request.material_code,
+            limit=request.limit
+        )
 
-            for record in result:
-                items.append(AnomalyItem(
-                    key=record["key"],
-                    title=record["title"],
-                    defects_number=record["defects_number"] or 0,
-                    defect_rate=record["defect_rate"] or 0.0,
-                    factory=record["factory"],
-                    project=record["project"],
-                    material_code=record["material_code"],
-                    date=record["date"]
-                ))
+        for record in result:
+            items.append(AnomalyItem(
+                key=record["key"],
+                title=record["title"],
+                defects_number=record["defects_number"] or 0,
+                defect_rate=record["defect_rate"] or 0.0,
+                factory=record["factory"],
+                project=record["project"],
+                material_code=record["material_code"],
+                date=record["date"]
+            ))
 
         return AnomalyResponse(
             success=True,
@@ -334,7 +466,6 @@ async def query_anomalies(request: AnomalyFilterRequest):
         raise HTTPException(status_code=500, detail=f"查询失败: {str(e)}")
 
 @app.get("/kg/stats")
-@cache_result("stats", ttl=300)  # 缓存5分钟
 async def get_statistics():
     """获取知识图谱统计信息"""
     REQUEST_COUNT.labels(method="GET", endpoint="/kg/stats").inc()
@@ -366,38 +497,15 @@ async def get_statistics():
                 "message": "统计信息获取成功（模拟数据）"
             }
 
-        stats = {}
-        with driver.session() as session:
-            # 统计各类节点数量
-            node_counts = session.run("""
-                MATCH (n)
-                RETURN labels(n)[0] AS label, count(n) AS count
-                ORDER BY count DESC
-            """)
-
-            stats["node_counts"] = {record["label"]: record["count"] for record in node_counts}
-
-            # 统计关系数量
-            rel_counts = session.run("""
-                MATCH ()-[r]->()
-                RETURN type(r) AS type, count(r) AS count
-                ORDER BY count DESC
-            """)
-
-            stats["relationship_counts"] = {record["type"]: record["count"] for record in rel_counts}
-
-            # 总体统计
-            total_stats = session.run("""
-                MATCH (n)
-                WITH count(n) AS total_nodes
-                MATCH ()-[r]->()
-                WITH total_nodes, count(r) AS total_relationships
-                RETURN total_nodes, total_relationships
-            """).single()
-
-            if total_stats:
-                stats["total_nodes"] = total_stats["total_nodes"]
-                stats["total_relationships"] = total_stats["total_relationships"]
+        snapshot = await graph_stats.get_snapshot()
+        stats = {
+            "node_counts": snapshot.primary_label_counts,
+            "relationship_counts": snapshot.relation_type_counts,
+            "total_nodes": snapshot.total_nodes,
+            "total_relationships": snapshot.total_relations,
+            "snapshot_version": snapshot.version,
+            "computed_at": snapshot.computed_at
+        }
 
         return {
             "ok": True,
@@ -429,9 +537,38 @@ async def get_statistics():
             "message": f"统计信息获取失败，返回模拟数据: {str(e)}"
         }
 
+async def _element_page(queries_for, key: str, name: str, cursor: Optional[str], limit: int) -> Dict[str, Any]:
+    """按 (key, elementId) 游标分页列出某个标签的节点 / 某个类型的关系"""
+    if not driver:
+        raise HTTPException(status_code=503, detail="Neo4j连接不可用")
+    limit = clamp_page_size(limit)
+    try:
+        queries = queries_for(name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        after = decode_cursor(cursor, KEYSET_CURSOR_FIELDS)
+    except CursorError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    result = await fetch_keyset_page(graph_db.fetch, queries, {}, after, limit)
+    rows, next_cursor = split_page(result, limit, element_cursor(key))
+    return {
+        "ok": True,
+        "data": [dict(row) for row in rows],
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None
+    }
+
 @app.get("/kg/entities")
-async def get_graph_entities():
-    """获取图谱实体类型统计 - 用于GraphSchema组件"""
+async def get_graph_entities(label: Optional[str] = None, limit: int = 100, cursor: Optional[str] = None):
+    """
+    获取图谱实体类型统计 - 用于GraphSchema组件
+
+    指定 label 时改为按游标分页列出该标签的节点（limit 每页条数，cursor 为上一页的 next_cursor）；
+    按 name 排序（name 有索引时按索引顺序读取），没有 name 的节点排在最后。
+    """
+    if label:
+        return await _element_page(label_page_queries, LABEL_PAGE_KEY, label, cursor, limit)
     try:
         if not driver:
             # Neo4j未连接时返回模拟数据
@@ -451,19 +588,18 @@ async def get_graph_entities():
             }
 
         # 从Neo4j获取实体统计
-        with driver.session() as session:
-            result = session.run("""
-                MATCH (n)
-                RETURN labels(n)[0] AS label, count(n) AS count
-                ORDER BY count DESC
-            """)
+        result = await graph_db.fetch("""
+            MATCH (n)
+            RETURN labels(n)[0] AS label, count(n) AS count
+            ORDER BY count DESC
+        """)
 
-            entities = [{"label": record["label"], "count": record["count"]} for record in result]
+        entities = [{"label": record["label"], "count": record["count"]} for record in result]
 
-            return {
-                "ok": True,
-                "data": entities
-            }
+        return {
+            "ok": True,
+            "data": entities
+        }
 
     except Exception as e:
         logger.error(f"获取实体统计失败: {e}")
@@ -483,8 +619,16 @@ async def get_graph_entities():
         }
 
 @app.get("/kg/relations")
-async def get_graph_relations():
-    """获取图谱关系类型统计 - 用于GraphSchema组件"""
+async def get_graph_relations(rel_type: Optional[str] = Query(None, alias="type"), limit: int = 100,
+                              cursor: Optional[str] = None):
+    """
+    获取图谱关系类型统计 - 用于GraphSchema组件
+
+    指定 type 时改为按游标分页列出该类型的关系（含两端节点名称）；
+    按 source_hash 排序（关系索引），没有 source_hash 的关系排在最后。
+    """
+    if rel_type:
+        return await _element_page(relation_page_queries, RELATION_PAGE_KEY, rel_type, cursor, limit)
     try:
         if not driver:
             # Neo4j未连接时返回模拟数据
@@ -504,19 +648,18 @@ async def get_graph_relations():
             }
 
         # 从Neo4j获取关系统计
-        with driver.session() as session:
-            result = session.run("""
-                MATCH ()-[r]->()
-                RETURN type(r) AS type, count(r) AS count
-                ORDER BY count DESC
-            """)
+        result = await graph_db.fetch("""
+            MATCH ()-[r]->()
+            RETURN type(r) AS type, count(r) AS count
+            ORDER BY count DESC
+        """)
 
-            relations = [{"type": record["type"], "count": record["count"]} for record in result]
+        relations = [{"type": record["type"], "count": record["count"]} for record in result]
 
-            return {
-                "ok": True,
-                "data": relations
-            }
+        return {
+            "ok": True,
+            "data": relations
+        }
 
     except Exception as e:
         logger.error(f"获取关系统计失败: {e}")
@@ -581,48 +724,36 @@ async def get_real_graph_stats():
                     "message": "返回硬编码的真实数据"
                 }
 
-        # 如果Neo4j连接正常，获取实时数据
-        with driver.session() as session:
-            # 获取Term节点的分类分布（基座层）
-            term_stats = session.run("""
-                MATCH (t:Term)
-                RETURN t.category AS category, count(t) AS count
-                ORDER BY count DESC
-            """).data()
-
-            # 获取关系统计
-            relation_stats = session.run("""
-                MATCH ()-[r]->()
-                RETURN type(r) AS type, count(r) AS count
-                ORDER BY count DESC
-            """).data()
-
-            # 获取总体统计
-            total_nodes = session.run("MATCH (n) RETURN count(n) AS count").single()['count']
-            total_relations = session.run("MATCH ()-[r]->() RETURN count(r) AS count").single()['count']
-            total_terms = session.run("MATCH (t:Term) RETURN count(t) AS count").single()['count']
-            total_tags = session.run("MATCH (g:Tag) RETURN count(g) AS count").single()['count']
-            total_categories = session.run("MATCH (c:Category) RETURN count(c) AS count").single()['count']
-            total_aliases = session.run("MATCH (a:Alias) RETURN count(a) AS count").single()['count']
+        # 如果Neo4j连接正常，读取统计快照
+        snapshot = await graph_stats.get_snapshot()
+        total_nodes = snapshot.total_nodes
+        total_relations = snapshot.total_relations
+        total_terms = snapshot.count('Term')
+        total_tags = snapshot.count('Tag')
+        total_categories = snapshot.count('Category')
+        total_aliases = snapshot.count('Alias')
+        term_stats = snapshot.term_categories
+        relation_stats = [{"type": rel_type, "count": count}
+                          for rel_type, count in snapshot.relation_type_counts.items()]
 
-            return {
-                "ok": True,
-                "success": True,
-                "data": {
-                    "stats": {
-                        "totalNodes": total_nodes,
-                        "totalRelations": total_relations,
-                        "totalTerms": total_terms,
-                        "totalTags": total_tags,
-                        "totalCategories": total_categories,
-                        "totalAliases": total_aliases,
-                        "dictEntries": total_terms  # 词典条目数等于Term数
-                    },
-                    "termsByCategory": [{"name": stat['category'], "count": stat['count']} for stat in term_stats],
-                    "relations": [{"type": stat['type'], "count": stat['count']} for stat in relation_stats]
+        return {
+            "ok": True,
+            "success": True,
+            "data": {
+                "stats": {
+                    "totalNodes": total_nodes,
+                    "totalRelations": total_relations,
+                    "totalTerms": total_terms,
+                    "totalTags": total_tags,
+                    "totalCategories": total_categories,
+                    "totalAliases": total_aliases,
+                    "dictEntries": total_terms  # 词典条目数等于Term数
                 },
-                "message": "获取实时Neo4j数据成功"
-            }
+                "termsByCategory": [{"name": stat['category'], "count": stat['count']} for stat in term_stats],
+                "relations": [{"type": stat['type'], "count": stat['count']} for stat in relation_stats]
+            },
+            "message": "获取实时Neo4j数据成功"
+        }
 
     except Exception as e:
         logger.error(f"获取真实图谱统计失败: {e}")
@@ -640,46 +771,235 @@ async def get_real_graph_stats():
         except:
             raise HTTPException(status_code=500, detail=f"获取图谱统计失败: {str(e)}")
 
+GRAPH_FORMATS = ("json", "compact", "ndjson")
+
+def _expand_rel_types(rel_types: Optional[str]) -> Optional[List[str]]:
+    """解析关系类型 + 别名映射（兼容历史边名）"""
+    if not rel_types:
+        return None
+    raw_types = [t.strip() for t in rel_types.split(',') if t.strip()]
+    alias_map = {
+        'USES': ['USES', 'USES_TOOL', 'CONSUMES'],
+        'DETECTED_BY': ['DETECTED_BY', 'MEASURES']
+    }
+    expanded = []
+    for t in raw_types:
+        expanded.extend(alias_map.get(t, [t]))
+    # 去重
+    seen = set()
+    return [x for x in expanded if not (x in seen or seen.add(x))]
+
+def _graph_sample_query() -> str:
+    """采样符合过滤条件的关系，同时抽出端点节点信息"""
+    allowed = "|".join(GRAPH_LABELS)
+    return f"""
+        MATCH (a)-[r]->(b)
+        WHERE (a:{' OR a:'.join(allowed.split('|'))})
+          AND (b:{' OR b:'.join(allowed.split('|'))})
+          AND coalesce(r.confidence, 1.0) >= $min_conf
+          AND ($inferred IS NULL OR coalesce(r.inferred,false) = $inferred)
+          AND ($types IS NULL OR type(r) IN $types)
+        RETURN elementId(a) AS sid,
+               labels(a)[0] AS sc,
+               coalesce(a.name, a.term, 'Unknown') AS sname,
+               coalesce(a.description, a.definition, '') AS sdesc,
+               elementId(b) AS tid,
+               labels(b)[0] AS tc,
+               coalesce(b.name, b.term, 'Unknown') AS tname,
+               coalesce(b.description, b.definition, '') AS tdesc,
+               type(r) AS rel_type,
+               properties(r) AS rel_props
+        ORDER BY coalesce(r.confidence, 1.0) DESC
+        LIMIT $limit
+    """
+
+def _graph_node(nid: str, name: str, cat: str, desc: str) -> Dict[str, Any]:
+    """构造前端节点（映射标签为前端期望的分类）"""
+    desc = desc or ''
+    return {
+        "id": nid,
+        "name": name,
+        "category": GRAPH_LABEL_MAPPING.get(cat, 'Component'),
+        "description": desc[:200] + "..." if len(desc) > 200 else desc
+    }
+
+def _graph_relation(row: Dict[str, Any]) -> Dict[str, Any]:
+    """构造前端关系"""
+    rel_props = row.get('rel_props') or {}
+    return {
+        "source": row['sid'],
+        "target": row['tid'],
+        "type": row['rel_type'],
+        "confidence": rel_props.get('confidence'),
+        "inferred": rel_props.get('inferred'),
+        "common_count": rel_props.get('common_count'),
+        "common_tags": rel_props.get('common_tags')
+    }
+
+def _render_graph_result(result: Dict[str, Any], fmt: str, request: Optional[Request]):
+    """按请求格式输出图谱数据；json保持原结构，compact输出列式结构（节点/关系各一份）"""
+    if fmt != "compact":
+        return result
+    data = result.get("data", {})
+    nodes = data.get("nodes") or data.get("sampleNodes") or []
+    links = data.get("links") or data.get("relations") or data.get("sampleRelations") or []
+    payload = {
+        "ok": result.get("ok", True),
+        "success": result.get("success", True),
+        "format": "compact",
+        "data": {
+            "stats": data.get("stats", {}),
+            "categories": data.get("categories", []),
+            "tags": data.get("tags", []),
+            "graph": to_compact_graph(nodes, links)
+        },
+        "message": result.get("message", "")
+    }
+    return negotiated_response(payload, request)
+
+async def _stream_graph_ndjson(limit: int, min_confidence: float, inferred: Optional[bool],
+                               types_list: Optional[List[str]]):
+    """NDJSON流：节点首次出现时输出node事件，每条关系输出link事件"""
+    snapshot = graph_stats.snapshot
+    meta = {
+        "limit": limit,
+        "totalNodes": snapshot.total_nodes if snapshot else None,
+        "totalRelations": snapshot.relation_count(types_list) if snapshot else None
+    }
+
+    async def rows():
+        async for record in graph_db.stream(_graph_sample_query(), min_conf=min_confidence,
+                                            inferred=inferred, types=types_list, limit=limit):
+            yield record.data()
+
+    def row_nodes(row):
+        return [(row['sid'], _graph_node(row['sid'], row['sname'], row['sc'], row['sdesc'])),
+                (row['tid'], _graph_node(row['tid'], row['tname'], row['tc'], row['tdesc']))]
+
+    async for line in iter_graph_ndjson(meta, rows(), row_nodes, _graph_relation):
+        yield line
+
 @app.get("/kg/graph")
 async def get_graph_data(
+    request: Request,
     limit: int = 5000,
     min_confidence: float = 0.3,
     inferred: Optional[bool] = None,
     rel_types: Optional[str] = None,
-    show_all: bool = False
+    show_all: bool = False,
+    format: str = "json"
 ):
-    """获取图谱数据 - 带过滤参数（关系类型/置信度/来源）"""
+    """获取图谱数据 - 带过滤参数（关系类型/置信度/来源），format 可选 json/compact/ndjson"""
     try:
         # 如果show_all为True，使用更大的limit
         actual_limit = 10000 if show_all else limit
         return await get_graph_visualization_data(
+            request=request,
             limit=actual_limit,
             min_confidence=min_confidence,
             inferred=inferred,
-            rel_types=rel_types
+            rel_types=rel_types,
+            format=format
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"获取图谱数据失败: {e}")
         raise HTTPException(status_code=500, detail=f"获取图谱数据失败: {str(e)}")
 
+async def _compute_graph_data(limit: int, min_confidence: float, inferred: Optional[bool],
+                              rel_types: Optional[str]) -> Dict[str, Any]:
+    """查询Neo4j采样关系，结合统计快照构造 /kg/graph-data 的结果（采样关系、总数、分类统计）"""
+    types_list = _expand_rel_types(rel_types)
+    rel_sample_query = _graph_sample_query()
+    rel_rows = await graph_db.fetch_data(rel_sample_query, min_conf=min_confidence, inferred=inferred, types=types_list, limit=limit)
+
+    # 标签映射：将Neo4j标签映射为前端期望的英文分类
+    label_mapping = GRAPH_LABEL_MAPPING
+
+    # 构造前端需要的 sampleNodes / sampleRelations
+    node_map = {}
+    relations = []
+    for row in rel_rows:
+        for nid, name, cat, desc in ((row['sid'], row['sname'], row['sc'], row['sdesc']),
+                                     (row['tid'], row['tname'], row['tc'], row['tdesc'])):
+            if nid not in node_map:
+                node_map[nid] = _graph_node(nid, name, cat, desc)
+        relations.append(_graph_relation(row))
+
+    nodes = list(node_map.values())
+
+    # 统计读取统计快照，不再每次全图扫描计数；关系总数按类型过滤，不按置信度/推理标记过滤
+    snapshot = await graph_stats.get_snapshot()
+    total_nodes = snapshot.count_any(GRAPH_LABELS)
+    total_relations = snapshot.relation_count(types_list)
+    categories_result = [{'category': label, 'count': count}
+                         for label, count in snapshot.primary_counts(GRAPH_LABELS).items()]
+
+    # 映射分类名称为前端期望的格式
+    categories = [{"name": label_mapping.get(r['category'], r['category']), "count": r['count']} for r in categories_result]
+
+    # 统计各类型节点数量
+    total_terms = sum(r['count'] for r in categories_result if r['category'] == 'Term')
+    total_categories = sum(r['count'] for r in categories_result if r['category'] == 'Category')
+    total_tags = sum(r['count'] for r in categories_result if r['category'] == 'Tag')
+
+    stats = {
+        "totalNodes": total_nodes,
+        "totalRelations": total_relations,
+        "totalTerms": total_terms,
+        "totalCategories": total_categories,
+        "totalTags": total_tags
+    }
+
+    result = {
+        "ok": True,
+        "success": True,
+        "data": {
+            "stats": stats,
+            "categories": categories,
+            "tags": [],
+            "nodes": nodes,
+            "links": relations,
+            "relations": relations,
+            "sampleNodes": nodes,
+            "sampleRelations": relations
+        },
+        "message": "获取实时图谱数据成功"
+    }
+    return result
+
+
 @app.get("/kg/graph-data")
 async def get_graph_visualization_data(
+    request: Request,
     limit: int = 5000,
     min_confidence: float = 0.3,
     inferred: Optional[bool] = None,
-    rel_types: Optional[str] = None
+    rel_types: Optional[str] = None,
+    format: str = "json"
 ):
-    """获取图谱可视化数据（支持关系过滤）"""
+    """
+    获取图谱可视化数据（支持关系过滤）
+
+    format:
+        json    - 默认结构（兼容旧前端）
+        compact - 列式数组 + 字符串表，可通过 Accept: application/x-msgpack 获取msgpack，
+                  Accept-Encoding: gzip 时压缩
+        ndjson  - 边从Neo4j游标取出即逐行输出
+    """
     REQUEST_COUNT.labels(method="GET", endpoint="/kg/graph-data").inc()
+    if format not in GRAPH_FORMATS:
+        raise HTTPException(status_code=400, detail=f"不支持的格式: {format}，可选 {', '.join(GRAPH_FORMATS)}")
 
-    # 检查缓存
-    cache_key = f"graph_data_{limit}_{min_confidence}_{inferred}_{rel_types}"
-    cached_result = await QueryCache.get_graph_data(cache_key, depth=1)
-    if cached_result:
-        CACHE_HITS.labels(cache_type="graph_data").inc()
-        return cached_result
+    if format == "ndjson" and driver:
+        return StreamingResponse(
+            _stream_graph_ndjson(limit, min_confidence, inferred, _expand_rel_types(rel_types)),
+            media_type="application/x-ndjson"
+        )
 
-    CACHE_MISSES.labels(cache_type="graph_data").inc()
+    # 两级缓存：L1命中不访问Redis；并发未命中只查询一次；过期后宽限期内先返回旧值并后台刷新
+    cache_key = f"graph_data_{limit}_{min_confidence}_{inferred}_{rel_types}"
     try:
         if not driver:
             import json
@@ -696,156 +1016,16 @@ async def get_graph_visualization_data(
                 logger.error(f"读取图谱配置文件失败: {file_error}")
                 raise HTTPException(status_code=500, detail="获取图谱数据失败")
 
-        # 解析关系类型 + 别名映射（兼容历史边名）
-        types_list = None
-        if rel_types:
-            raw_types = [t.strip() for t in rel_types.split(',') if t.strip()]
-            alias_map = {
-                'USES': ['USES', 'USES_TOOL', 'CONSUMES'],
-                'DETECTED_BY': ['DETECTED_BY', 'MEASURES']
-            }
-            expanded = []
-            for t in raw_types:
-                expanded.extend(alias_map.get(t, [t]))
-            # 去重
-            seen = set()
-            types_list = [x for x in expanded if not (x in seen or seen.add(x))]
-
-        allowed = "Term|Category|Tag|Component|Symptom|Tool|Process|TestCase|Material|Role|Metric"
-        with driver.session() as session:
-            # 采样符合过滤条件的关系，同时抽出端点节点信息
-            rel_sample_query = f"""
-                MATCH (a)-[r]->(b)
-                WHERE (a:{' OR a:'.join(allowed.split('|'))})
-                  AND (b:{' OR b:'.join(allowed.split('|'))})
-                  AND coalesce(r.confidence, 1.0) >= $min_conf
-                  AND ($inferred IS NULL OR coalesce(r.inferred,false) = $inferred)
-                  AND ($types IS NULL OR type(r) IN $types)
-                RETURN elementId(a) AS sid,
-                       labels(a)[0] AS sc,
-                       coalesce(a.name, a.term, 'Unknown') AS sname,
-                       coalesce(a.description, a.definition, '') AS sdesc,
-                       elementId(b) AS tid,
-                       labels(b)[0] AS tc,
-                       coalesce(b.name, b.term, 'Unknown') AS tname,
-                       coalesce(b.description, b.definition, '') AS tdesc,
-                       type(r) AS rel_type,
-                       properties(r) AS rel_props
-                ORDER BY coalesce(r.confidence, 1.0) DESC
-                LIMIT $limit
-            """
-            rel_rows = session.run(rel_sample_query, min_conf=min_confidence, inferred=inferred, types=types_list, limit=limit).data()
-
-            # 标签映射：将Neo4j标签映射为前端期望的英文分类
-            label_mapping = {
-                'Term': 'Component',      # 术语 -> 组件
-                'Tag': 'Metric',          # 标签 -> 指标
-                'Category': 'Process',    # 分类 -> 流程
-                'Product': 'Component',   # 产品 -> 组件
-                'Component': 'Component', # 组件 -> 组件
-                'Anomaly': 'Symptom',     # 异常 -> 症状
-                'TestCase': 'TestCase',   # 测试用例 -> 测试用例
-                'Symptom': 'Symptom',     # 症状 -> 症状
-                'Tool': 'Tool',           # 工具 -> 工具
-                'Process': 'Process',     # 流程 -> 流程
-                'Metric': 'Metric',       # 指标 -> 指标
-                'Role': 'Role',           # 角色 -> 角色
-                'Material': 'Material'    # 材料 -> 材料
-            }
-
-            # 构造前端需要的 sampleNodes / sampleRelations
-            node_map = {}
-            relations = []
-            def add_node(nid, name, cat, desc):
-                if nid not in node_map:
-                    # 映射标签为前端期望的分类
-                    mapped_category = label_mapping.get(cat, 'Component')
-                    node_map[nid] = {
-                        "id": nid,
-                        "name": name,
-                        "category": mapped_category,
-                        "description": desc[:200] + "..." if len(desc) > 200 else desc
-                    }
-
-            for row in rel_rows:
-                add_node(row['sid'], row['sname'], row['sc'], row['sdesc'])
-                add_node(row['tid'], row['tname'], row['tc'], row['tdesc'])
-                rel_props = row.get('rel_props') or {}
-                relations.append({
-                    "source": row['sid'],
-                    "target": row['tid'],
-                    "type": row['rel_type'],
-                    "confidence": rel_props.get('confidence'),
-                    "inferred": rel_props.get('inferred'),
-                    "common_count": rel_props.get('common_count'),
-                    "common_tags": rel_props.get('common_tags')
-                })
-
-            nodes = list(node_map.values())
-
-            # 统计（包含所有节点类型）
-            total_nodes = session.run(
-                """
-                MATCH (n)
-                WHERE n:Term OR n:Category OR n:Tag OR n:Component OR n:Symptom OR n:Tool OR n:Process OR n:TestCase OR n:Material OR n:Role OR n:Metric
-                RETURN count(n) AS c
-                """
-            ).single()['c']
-
-            total_relations = session.run(
-                """
-                MATCH ()-[r]->()
-                WHERE coalesce(r.confidence, 1.0) >= $min_conf
-                  AND ($inferred IS NULL OR coalesce(r.inferred,false) = $inferred)
-                  AND ($types IS NULL OR type(r) IN $types)
-                RETURN count(r) AS c
-                """,
-                min_conf=min_confidence, inferred=inferred, types=types_list
-            ).single()['c']
-
-            categories_result = session.run(
-                """
-                MATCH (n)
-                WHERE n:Term OR n:Category OR n:Tag OR n:Component OR n:Symptom OR n:Tool OR n:Process OR n:TestCase OR n:Material OR n:Role OR n:Metric
-                RETURN labels(n)[0] AS category, count(n) AS count
-                ORDER BY count DESC
-                """
-            ).data()
-            # 映射分类名称为前端期望的格式
-            categories = [{"name": label_mapping.get(r['category'], r['category']), "count": r['count']} for r in categories_result]
-
-            # 统计各类型节点数量
-            total_terms = sum(r['count'] for r in categories_result if r['category'] == 'Term')
-            total_categories = sum(r['count'] for r in categories_result if r['category'] == 'Category')
-            total_tags = sum(r['count'] for r in categories_result if r['category'] == 'Tag')
-
-            stats = {
-                "totalNodes": total_nodes,
-                "totalRelations": total_relations,
-                "totalTerms": total_terms,
-                "totalCategories": total_categories,
-                "totalTags": total_tags
-            }
-
-            result = {
-                "ok": True,
-                "success": True,
-                "data": {
-                    "stats": stats,
-                    "categories": categories,
-                    "tags": [],
-                    "nodes": nodes,
-                    "links": relations,
-                    "relations": relations,
-                    "sampleNodes": nodes,
-                    "sampleRelations": relations
-                },
-                "message": "获取实时图谱数据成功"
-            }
-
-            # 缓存结果（修复：先保存到变量，再缓存，最后返回）
-            await QueryCache.set_graph_data(cache_key, result, depth=1, ttl=600)
-            return result
+        cached_result, source = await QueryCache.graph_data(
+            cache_key,
+            lambda: _compute_graph_data(limit, min_confidence, inferred, rel_types),
+            depth=1, ttl=600, labels=GRAPH_LABELS, rel_types=_expand_rel_types(rel_types)
+        )
+        if source in ("computed", "coalesced"):
+            CACHE_MISSES.labels(cache_type="graph_data").inc()
+        else:
+            CACHE_HITS.labels(cache_type="graph_data").inc()
+        return _render_graph_result(cached_result, format, request)
 
     except Exception as e:
         logger.error(f"获取图谱可视化数据失败: {e}")
@@ -863,6 +1043,76 @@ async def get_graph_visualization_data(
         except:
             raise HTTPException(status_code=500, detail=f"获取图谱数据失败: {str(e)}")
 
+@app.get("/kg/graph/lod")
+async def get_graph_lod_overview(max_clusters: int = 200, min_link_weight: int = 1):
+    """图谱分层浏览 - 顶层社区概览"""
+    REQUEST_COUNT.labels(method="GET", endpoint="/kg/graph/lod").inc()
+    if not driver:
+        raise HTTPException(status_code=503, detail="Neo4j连接不可用")
+    try:
+        data = await graph_tiles.get_overview(max_clusters=max_clusters, min_link_weight=min_link_weight)
+        return {
+            "ok": True,
+            "success": True,
+            "data": data,
+            "message": f"获取图谱社区概览成功，共 {data['stats']['totalClusters']} 个社区"
+        }
+    except Exception as e:
+        logger.error(f"获取图谱社区概览失败: {e}")
+        raise HTTPException(status_code=500, detail=f"获取图谱社区概览失败: {str(e)}")
+
+@app.get("/kg/graph/lod/clusters/{cluster_id}")
+async def get_graph_lod_cluster(cluster_id: str, cursor: Optional[str] = None, limit: int = 200):
+    """图谱分层浏览 - 下钻社区（分页）"""
+    REQUEST_COUNT.labels(method="GET", endpoint="/kg/graph/lod/clusters").inc()
+    if not driver:
+        raise HTTPException(status_code=503, detail="Neo4j连接不可用")
+    try:
+        data = await graph_tiles.get_cluster(cluster_id, cursor=cursor, limit=max(1, min(limit, 1000)))
+    except CursorError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"获取社区详情失败: {e}")
+        raise HTTPException(status_code=500, detail=f"获取社区详情失败: {str(e)}")
+    if data is None:
+        raise HTTPException(status_code=404, detail=f"社区不存在: {cluster_id}")
+    return {
+        "ok": True,
+        "success": True,
+        "data": data,
+        "message": f"获取社区 {cluster_id} 成功"
+    }
+
+@app.get("/kg/graph/lod/neighbors")
+async def get_graph_lod_neighbors(
+    node_id: str,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    rel_types: Optional[str] = None,
+    min_confidence: float = 0.0
+):
+    """图谱分层浏览 - 展开节点邻居（分页）"""
+    REQUEST_COUNT.labels(method="GET", endpoint="/kg/graph/lod/neighbors").inc()
+    if not driver:
+        raise HTTPException(status_code=503, detail="Neo4j连接不可用")
+    types_list = [t.strip() for t in rel_types.split(',') if t.strip()] if rel_types else None
+    try:
+        data = await graph_tiles.get_neighbors(node_id, cursor=cursor, limit=max(1, min(limit, 500)),
+                                               rel_types=types_list, min_confidence=min_confidence)
+    except CursorError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"获取节点邻居失败: {e}")
+        raise HTTPException(status_code=500, detail=f"获取节点邻居失败: {str(e)}")
+    if data is None:
+        raise HTTPException(status_code=404, detail=f"节点不存在: {node_id}")
+    return {
+        "ok": True,
+        "success": True,
+        "data": data,
+        "message": f"获取 {len(data['nodes'])} 个邻居节点"
+    }
+
 @app.get("/kg/governance-data")
 async def get_governance_data():
     """获取数据治理信息"""
@@ -883,141 +1133,104 @@ async def get_governance_data():
                 logger.error(f"读取数据治理配置文件失败: {file_error}")
                 raise HTTPException(status_code=500, detail="获取数据治理数据失败")
 
-        # 如果Neo4j连接正常，获取实时数据
-        with driver.session() as session:
-            # 获取基础统计
-            total_dict = session.run('MATCH (n:Dictionary) RETURN count(n) AS c').single()['c']
-            total_relations = session.run('MATCH ()-[r]->() RETURN count(r) AS c').single()['c']
-            total_categories = session.run('MATCH (n:Category) RETURN count(n) AS c').single()['c']
-            total_tags = session.run('MATCH (n:Tag) RETURN count(n) AS c').single()['c']
-
-            # 获取分类分布
-            category_result = session.run("""
-                MATCH (d:Dictionary)
-                RETURN d.category AS category, count(d) AS count
-                ORDER BY count DESC
-            """)
-
-            categories = {}
-            for record in category_result:
-                categories[record['category'] or 'Unknown'] = record['count']
-
-            # 获取数据质量指标
-            # 检查缺少描述的记录
-            missing_desc = session.run("""
-                MATCH (d:Dictionary)
-                WHERE d.description IS NULL OR d.description = '' OR d.description = 'N/A'
-                RETURN count(d) AS count
-            """).single()['count']
-
-            # 检查缺少标签的记录
-            missing_tags = session.run("""
-                MATCH (d:Dictionary)
-                WHERE NOT (d)-[:HAS_TAG]->()
-                RETURN count(d) AS count
-            """).single()['count']
-
-            # 检查缺少别名的记录
-            missing_aliases = session.run("""
-                MATCH (d:Dictionary)
-                WHERE NOT (d)-[:HAS_ALIAS]->()
-                RETURN count(d) AS count
-            """).single()['count']
-
-            # 计算质量分数
-            completeness = ((total_dict - missing_desc) / total_dict) * 100 if total_dict > 0 else 0
-            tag_coverage = ((total_dict - missing_tags) / total_dict) * 100 if total_dict > 0 else 0
-            alias_coverage = ((total_dict - missing_aliases) / total_dict) * 100 if total_dict > 0 else 0
-            overall_quality = (completeness + tag_coverage + alias_coverage + 100) / 4  # 100 for uniqueness
-
-            # 获取热门标签
-            top_tags_result = session.run("""
-                MATCH (d:Dictionary)-[:HAS_TAG]->(t:Tag)
-                RETURN t.name AS tag, count(d) AS count
-                ORDER BY count DESC
-                LIMIT 20
-            """)
-
-            top_tags = {}
-            for record in top_tags_result:
-                top_tags[record['tag']] = record['count']
-
-            governance_data = {
-                "data_overview": {
-                    "total_entries": total_dict,
-                    "categories": len(categories),
-                    "tags": total_tags,
-                    "total_relations": total_relations,
-                    "quality_score": round(overall_quality, 1),
-                    "last_update": "2024-01-20"
+        # 如果Neo4j连接正常，读取统计快照
+        snapshot = await graph_stats.get_snapshot()
+        dictionary = snapshot.dictionary
+        total_dict = dictionary['total']
+        total_relations = snapshot.total_relations
+        total_categories = snapshot.count('Category')
+        total_tags = snapshot.count('Tag')
+        categories = dictionary['categories']
+
+        # 数据质量指标
+        missing_desc = dictionary['missing_desc']
+        missing_tags = dictionary['missing_tags']
+        missing_aliases = dictionary['missing_aliases']
+
+        # 计算质量分数
+        completeness = ((total_dict - missing_desc) / total_dict) * 100 if total_dict > 0 else 0
+        tag_coverage = ((total_dict - missing_tags) / total_dict) * 100 if total_dict > 0 else 0
+        alias_coverage = ((total_dict - missing_aliases) / total_dict) * 100 if total_dict > 0 else 0
+        overall_quality = (completeness + tag_coverage + alias_coverage + 100) / 4  # 100 for uniqueness
+
+        top_tags = dictionary['top_tags']
+
+        governance_data = {
+            "data_overview": {
+                "total_entries": total_dict,
+                "categories": len(categories),
+                "tags": total_tags,
+                "total_relations": total_relations,
+                "quality_score": round(overall_quality, 1),
+                "last_update": "2024-01-20"
+            },
+            "quality_metrics": [
+                {
+                    "metric": "数据完整性",
+                    "description": "包含完整描述的记录比例",
+                    "value": f"{total_dict - missing_desc}/{total_dict}",
+                    "percentage": round(completeness, 1),
+                    "status": "excellent" if completeness > 95 else "good" if completeness > 85 else "warning",
+                    "target": 95.0,
+                    "trend": "stable"
                 },
-                "quality_metrics": [
-                    {
-                        "metric": "数据完整性",
-                        "description": "包含完整描述的记录比例",
-                        "value": f"{total_dict - missing_desc}/{total_dict}",
-                        "percentage": round(completeness, 1),
-                        "status": "excellent" if completeness > 95 else "good" if completeness > 85 else "warning",
-                        "target": 95.0,
-                        "trend": "stable"
-                    },
-                    {
-                        "metric": "标签覆盖率",
-                        "description": "包含标签的记录比例",
-                        "value": f"{total_dict - missing_tags}/{total_dict}",
-                        "percentage": round(tag_coverage, 1),
-                        "status": "excellent" if tag_coverage > 95 else "good" if tag_coverage > 85 else "warning",
-                        "target": 90.0,
-                        "trend": "stable"
-                    },
-                    {
-                        "metric": "别名覆盖率",
-                        "description": "包含别名的记录比例",
-                        "value": f"{total_dict - missing_aliases}/{total_dict}",
-                        "percentage": round(alias_coverage, 1),
-                        "status": "excellent" if alias_coverage > 85 else "good" if alias_coverage > 70 else "warning",
-                        "target": 85.0,
-                        "trend": "improving"
-                    },
-                    {
-                        "metric": "术语唯一性",
-                        "description": "无重复术语的记录比例",
-                        "value": f"{total_dict}/{total_dict}",
-                        "percentage": 100.0,
-                        "status": "excellent",
-                        "target": 100.0,
-                        "trend": "stable"
-                    }
-                ],
-                "category_distribution": categories,
-                "top_tags": top_tags,
-                "issues": [
-                    {
-                        "type": "warning" if missing_desc > 0 else "info",
-                        "category": "数据完整性",
-                        "description": f"{missing_desc}条记录缺少描述信息",
-                        "severity": "medium" if missing_desc > 50 else "low",
-                        "affected_records": missing_desc,
-                        "recommendation": "补充缺失的描述信息"
-                    },
-                    {
-                        "type": "warning" if missing_aliases > total_dict * 0.3 else "info",
-                        "category": "数据丰富度",
-                        "description": f"{missing_aliases}条记录缺少别名信息",
-                        "severity": "low",
-                        "affected_records": missing_aliases,
-                        "recommendation": "添加常用别名以提高搜索效果"
-                    },
-                    {
-                        "type": "info",
-                        "category": "标签标准化",
-                        "description": f"{missing_tags}条记录缺少标签",
-                        "severity": "low",
-                        "affected_records": missing_tags,
-                        "recommendation": "为记录添加相关标签"
-                    }
-                ]
-            }
+                {
+                    "metric": "标签覆盖率",
+                    "description": "包含标签的记录比例",
+                    "value": f"{total_dict - missing_tags}/{total_dict}",
+                    "percentage": round(tag_coverage, 1),
+                    "status": "excellent" if tag_coverage > 95 else "good" if tag_coverage > 85 else "warning",
+                    "target": 90.0,
+                    "trend": "stable"
+                },
+                {
+                    "metric": "别名覆盖率",
+                    "description": "包含别名的记录比例",
+                    "value": f"{total_dict - missing_aliases}/{total_dict}",
+                    "percentage": round(alias_coverage, 1),
+                    "status": "excellent" if alias_coverage > 85 else "good" if alias_coverage > 70 else "warning",
+                    "target": 85.0,
+                    "trend": "improving"
+                },
+                {
+                    "metric": "术语唯一性",
+                    "description": "无重复术语的记录比例",
+                    "value": f"{total_dict}/{total_dict}",
+                    "percentage": 100.0,
+                    "status": "excellent",
+                    "target": 100.0,
+                    "trend": "stable"
+                }
+            ],
+            "category_distribution": categories,
+            "top_tags": top_tags,
+            "issues": [
+                {
+                    "type": "warning" if missing_desc > 0 else "info",
+                    "category": "数据完整性",
+                    "description": f"{missing_desc}条记录缺少描述信息",
+                    "severity": "medium" if missing_desc > 50 else "low",
+                    "affected_records": missing_desc,
+                    "recommendation": "补充缺失的描述信息"
+                },
+                {
+                    "type": "warning" if missing_aliases > total_dict * 0.3 else "info",
+                    "category": "数据丰富度",
+                    "description": f"{missing_aliases}条记录缺少别名信息",
+                    "severity": "low",
+                    "affected_records": missing_aliases,
+                    "recommendation": "添加常用别名以提高搜索效果"
+                },
+                {
+                    "type": "info",
+                    "category": "标签标准化",
+                    "description": f"{missing_tags}条记录缺少标签",
+                    "severity": "low",
+                    "affected_records": missing_tags,
+                    "recommendation": "为记录添加相关标签"
+                }
+            ]
+        }
 
         return {
             "ok": True,
@@ -1044,34 +1257,50 @@ async def get_governance_data():
 
 # 添加缺失的API端点
 
-@app.get("/kg/dictionary")
-async def get_dictionary():
-    """获取词典数据"""
+DICTIONARY_FILE = Path("data/dictionary.json")
+
+# 词典条目列表读取的节点标签、关系类型（决定哪些写入使缓存的总数失效）
+DICTIONARY_READ_LABELS = ["Term", "Category", "Alias"]
+DICTIONARY_READ_RELS = ["BELONGS_TO", "ALIAS_OF"]
+
+
+def _dictionary_snapshot():
+    """词典文件的内存快照（文件变化后自动重新加载）；文件不存在时返回None"""
     try:
-        # 优先使用真实的词典文件数据
-        import json
-        from pathlib import Path
+        return get_dictionary_store(DICTIONARY_FILE).snapshot()
+    except FileNotFoundError:
+        return None
 
-        data_file = Path("data/dictionary.json")
-        if data_file.exists():
-            with open(data_file, 'r', encoding='utf-8') as f:
-                dictionary_data = json.load(f)
 
-            # 按类别分组数据
-            categorized_data = {}
-            for item in dictionary_data:
-                category = item.get('category', 'other')
-                if category not in categorized_data:
-                    categorized_data[category] = []
-                categorized_data[category].append(item)
+def _json_bytes(payload: Dict[str, Any]) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode("utf-8")
+
+
+def _etag_response(request: Request, etag: str, build_body) -> Response:
+    """If-None-Match 与当前ETag一致时返回304，否则返回 build_body() 生成的JSON"""
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=build_body(), media_type="application/json", headers=headers)
 
-            return {
-                "ok": True,
-                "success": True,
-                "data": categorized_data,
-                "total": len(dictionary_data),
-                "message": f"词典数据获取成功 - {len(dictionary_data)}条数据"
-            }
+
+@app.get("/kg/dictionary")
+async def get_dictionary(request: Request):
+    """获取词典数据"""
+    try:
+        # 优先使用真实的词典文件数据（按类别分组的响应体按快照缓存）
+        snapshot = _dictionary_snapshot()
+        if snapshot is not None:
+            return _etag_response(request, snapshot.etag, lambda: snapshot.view(
+                "kg_dictionary.body",
+                lambda snap: _json_bytes({
+                    "ok": True,
+                    "success": True,
+                    "data": snap.by_category,
+                    "total": len(snap),
+                    "message": f"词典数据获取成功 - {len(snap)}条数据"
+                })
+            ))
 
         # 如果文件不存在，返回模拟数据
         return {
@@ -1099,15 +1328,35 @@ async def get_dictionary():
             "message": f"获取词典数据失败: {str(e)}"
         }
 
+async def _cached_total(name: str, query: str, params: Dict[str, Any]) -> int:
+    """
+    列表总数：按查询条件缓存，写入相关标签后失效，过期后宽限期内先返回旧值（近似总数）
+    """
+    async def compute():
+        record = await graph_db.fetch_one(query, params)
+        return {"total": record["total"] if record else 0}
+
+    stats, _ = await QueryCache.stats_data(
+        name, compute, labels=DICTIONARY_READ_LABELS, rel_types=DICTIONARY_READ_RELS
+    )
+    return (stats or {}).get("total", 0)
+
 @app.get("/kg/dictionary/entries")
 async def get_dictionary_entries(
     page: int = 1,
     page_size: int = 50,
     search: str = None,
     category: str = None,
-    type_filter: str = None
+    type_filter: str = None,
+    cursor: str = None
 ):
-    """获取词典条目 - 从Neo4j数据库查询真实数据"""
+    """
+    获取词典条目 - 从Neo4j数据库查询真实数据
+
+    传入上一页返回的 next_cursor 时按游标（keyset）翻页，不再 SKIP 前面的行；
+    未传 cursor 时仍按 page 偏移分页。total 按查询条件缓存，可能略有滞后。
+    """
+    page_size = clamp_page_size(page_size)
     try:
         if not driver:
             logger.warning("Neo4j未连接，返回空数据")
@@ -1118,85 +1367,70 @@ async def get_dictionary_entries(
                     "total": 0,
                     "page": page,
                     "page_size": page_size,
-                    "total_pages": 0
+                    "total_pages": 0,
+                    "next_cursor": None,
+                    "has_more": False
                 }
             }
 
-        # 从Neo4j数据库查询真实数据
-        with driver.session() as session:
-            # 构建查询条件
-            where_clauses = []
-            params = {}
-
-            if search:
-                where_clauses.append(
-                    "(toLower(t.name) CONTAINS toLower($search) OR "
-                    "toLower(t.description) CONTAINS toLower($search))"
-                )
-                params['search'] = search
-
-            if category:
-                where_clauses.append("c.name = $category")
-                params['category'] = category
-
-            where_clause = " AND ".join(where_clauses) if where_clauses else "1=1"
-
-            # 查询总数
-            count_query = f"""
-            MATCH (t:Term)
-            OPTIONAL MATCH (t)-[:BELONGS_TO]->(c:Category)
-            WHERE {where_clause}
-            RETURN count(t) as total
-            """
-            total = session.run(count_query, params).single()["total"]
-
-            # 查询数据（带分页）
-            skip = (page - 1) * page_size
-            data_query = f"""
-            MATCH (t:Term)
-            OPTIONAL MATCH (t)-[:BELONGS_TO]->(c:Category)
-            OPTIONAL MATCH (t)-[:HAS_TAG]->(tag:Tag)
-            OPTIONAL MATCH (a:Alias)-[:ALIAS_OF]->(t)
-            WHERE {where_clause}
-            WITH t, c,
-                 collect(DISTINCT tag.name) as tags,
-                 collect(DISTINCT a.name) as aliases
-            RETURN t.name as term,
-                   t.description as description,
-                   c.name as category,
-                   tags,
-                   aliases
-            ORDER BY t.name
-            SKIP $skip
-            LIMIT $limit
-            """
-            params['skip'] = skip
-            params['limit'] = page_size
-
-            result = session.run(data_query, params)
-
-            entries = []
-            for record in result:
-                entries.append({
-                    'term': record['term'],
-                    'name': record['term'],  # 兼容前端
-                    'description': record['description'] or '',
-                    'definition': record['description'] or '',  # 兼容前端
-                    'category': record['category'] or '未分类',
-                    'tags': [tag for tag in record['tags'] if tag],
-                    'aliases': [alias for alias in record['aliases'] if alias]
-                })
+        skip = (max(page, 1) - 1) * page_size
+        result = None
+        if search and term_fulltext.ready:
+            # 全文索引检索，按相关度排序
+            after = decode_cursor(cursor, SEARCH_CURSOR_FIELDS)
+            params = search_params(search, category, skip, page_size + 1, after=after)
+            if params["query"] is None:
+                result, total = [], 0
+            else:
+                try:
+                    result = await graph_db.fetch(SEARCH_PAGE_QUERY, params)
+                    total = await _cached_total(
+                        f"dictionary_total:fulltext:{params['query']}:{category}",
+                        SEARCH_COUNT_QUERY, params
+                    )
+                except Exception as e:
+                    logger.warning(f"全文索引检索失败，改用CONTAINS查询: {e}")
+                    result = None
+            cursor_of = search_cursor
+
+        if result is None:
+            # 按 (name, elementId) 排序，过滤、分页后再收集标签和别名
+            after = decode_cursor(cursor, KEYSET_CURSOR_FIELDS)
+            result = await fetch_dictionary_page(graph_db.fetch, search, category, after, skip, page_size)
+            total = await _cached_total(
+                f"dictionary_total:contains:{search}:{category}", DICTIONARY_COUNT_QUERY,
+                dictionary_filter_params(search, category)
+            )
+            cursor_of = dictionary_cursor
+
+        result, next_cursor = split_page(result, page_size, cursor_of)
+
+        entries = []
+        for record in result:
+            entries.append({
+                'term': record['term'],
+                'name': record['term'],  # 兼容前端
+                'description': record['description'] or '',
+                'definition': record['description'] or '',  # 兼容前端
+                'category': record['category'] or '未分类',
+                'tags': [tag for tag in record['tags'] if tag],
+                'aliases': [alias for alias in record['aliases'] if alias]
+            })
 
-            return {
-                "success": True,
-                "data": {
-                    "entries": entries,
-                    "total": total,
-                    "page": page,
-                    "page_size": page_size,
-                    "total_pages": (total + page_size - 1) // page_size if total > 0 else 0
-                }
+        return {
+            "success": True,
+            "data": {
+                "entries": entries,
+                "total": total,
+                "page": page,
+                "page_size": page_size,
+                "total_pages": (total + page_size - 1) // page_size if total > 0 else 0,
+                "next_cursor": next_cursor,
+                "has_more": next_cursor is not None
             }
+        }
+    except CursorError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"获取词典条目失败: {e}")
         return {
@@ -1204,6 +1438,41 @@ async def get_dictionary_entries(
             "message": f"获取词典条目失败: {str(e)}"
         }
 
+@app.get("/kg/dictionary/suggest")
+async def suggest_dictionary(q: str, limit: int = 10, category: Optional[str] = None):
+    """
+    词典输入联想（GlobalSearch） - 术语/别名/拼音前缀匹配优先，不足时补充全文检索结果
+
+    读取词典内存快照上的检索索引，词典文件变化后随快照重建。
+    """
+    snapshot = _dictionary_snapshot()
+    if snapshot is None or not q.strip():
+        return {"success": True, "data": []}
+
+    limit = max(1, min(limit, 50))
+    index = snapshot.view("dictionary_search.index", lambda snap: build_entry_index(snap.entries))
+    hits = index.suggest(q, limit=limit, category=category)
+    if len(hits) < limit:
+        seen = {doc_id for doc_id, _ in hits}
+        for doc_id in index.search_ids(q, category=category, limit=limit * 2):
+            if doc_id not in seen:
+                seen.add(doc_id)
+                hits.append((doc_id, None))
+                if len(hits) >= limit:
+                    break
+
+    data = []
+    for doc_id, matched in hits:
+        entry = snapshot.entries[doc_id]
+        data.append({
+            "term": entry.get("term", ""),
+            "category": entry.get("category", ""),
+            "matched": matched or entry.get("term", ""),
+            "match_type": "prefix" if matched else "fulltext",
+            "description": entry.get("description") or entry.get("definition") or ""
+        })
+    return {"success": True, "data": data}
+
 @app.get("/kg/dictionary/stats")
 async def get_dictionary_stats():
     """获取词典统计信息 - 用于DictionarySchema组件 - 从Neo4j数据库查询真实数据"""
@@ -1221,28 +1490,27 @@ async def get_dictionary_stats():
             }
 
         # 从Neo4j数据库查询真实数据
-        with driver.session() as session:
-            # 获取术语总数
-            term_count = session.run("MATCH (t:Term) RETURN count(t) as count").single()["count"]
+        # 获取术语总数
+        term_count = (await graph_db.fetch_one("MATCH (t:Term) RETURN count(t) as count"))["count"]
 
-            # 获取分类总数
-            category_count = session.run("MATCH (c:Category) RETURN count(c) as count").single()["count"]
+        # 获取分类总数
+        category_count = (await graph_db.fetch_one("MATCH (c:Category) RETURN count(c) as count"))["count"]
 
-            # 获取标签总数
-            tag_count = session.run("MATCH (t:Tag) RETURN count(t) as count").single()["count"]
+        # 获取标签总数
+        tag_count = (await graph_db.fetch_one("MATCH (t:Tag) RETURN count(t) as count"))["count"]
 
-            # 获取别名总数
-            alias_count = session.run("MATCH (a:Alias) RETURN count(a) as count").single()["count"]
+        # 获取别名总数
+        alias_count = (await graph_db.fetch_one("MATCH (a:Alias) RETURN count(a) as count"))["count"]
 
-            return {
-                "ok": True,
-                "data": {
-                    "totalTerms": term_count,
-                    "totalCategories": category_count,
-                    "totalTags": tag_count,
-                    "totalAliases": alias_count
-                }
+        return {
+            "ok": True,
+            "data": {
+                "totalTerms": term_count,
+                "totalCategories": category_count,
+                "totalTags": tag_count,
+                "totalAliases": alias_count
             }
+        }
     except Exception as e:
         logger.error(f"获取词典统计失败: {e}")
         return {
@@ -1262,35 +1530,34 @@ async def get_dictionary_categories():
             }
 
         # 从Neo4j数据库查询真实数据
-        with driver.session() as session:
-            # 查询每个分类的统计信息
-            query = """
-            MATCH (c:Category)
-            OPTIONAL MATCH (t:Term)-[:BELONGS_TO]->(c)
-            OPTIONAL MATCH (t)-[:HAS_TAG]->(tag:Tag)
-            OPTIONAL MATCH (a:Alias)-[:ALIAS_OF]->(t)
-            WITH c,
-                 count(DISTINCT t) as termCount,
-                 count(DISTINCT tag) as tagCount,
-                 count(DISTINCT a) as aliasCount
-            RETURN c.name as name, termCount, tagCount, aliasCount
-            ORDER BY termCount DESC
-            """
+        # 查询每个分类的统计信息
+        query = """
+        MATCH (c:Category)
+        OPTIONAL MATCH (t:Term)-[:BELONGS_TO]->(c)
+        OPTIONAL MATCH (t)-[:HAS_TAG]->(tag:Tag)
+        OPTIONAL MATCH (a:Alias)-[:ALIAS_OF]->(t)
+        WITH c,
+             count(DISTINCT t) as termCount,
+             count(DISTINCT tag) as tagCount,
+             count(DISTINCT a) as aliasCount
+        RETURN c.name as name, termCount, tagCount, aliasCount
+        ORDER BY termCount DESC
+        """
 
-            result = session.run(query)
-            categories = []
-            for record in result:
-                categories.append({
-                    'name': record['name'],
-                    'termCount': record['termCount'],
-                    'tagCount': record['tagCount'],
-                    'aliasCount': record['aliasCount']
-                })
+        result = await graph_db.fetch(query)
+        categories = []
+        for record in result:
+            categories.append({
+                'name': record['name'],
+                'termCount': record['termCount'],
+                'tagCount': record['tagCount'],
+                'aliasCount': record['aliasCount']
+            })
 
-            return {
-                "ok": True,
-                "data": categories
-            }
+        return {
+            "ok": True,
+            "data": categories
+        }
     except Exception as e:
         logger.error(f"获取词典分类失败: {e}")
         return {
@@ -1321,7 +1588,7 @@ async def upload_file(file: UploadFile = File(...)):
     """文件上传接口"""
     try:
         # 检查文件类型
-        allowed_extensions = {'.xlsx', '.xls', '.csv', '.pdf', '.docx', '.doc', '.txt'}
+        allowed_extensions = {'.xlsx', '.xls', '.csv', '.pdf', '.docx', '.doc', '.pptx', '.txt'}
         file_ext = Path(file.filename).suffix.lower()
 
         if file_ext not in allowed_extensions:
@@ -1395,26 +1662,31 @@ async def get_uploaded_files():
         logger.error(f"获取文件列表失败: {e}")
         raise HTTPException(status_code=500, detail=f"获取文件列表失败: {str(e)}")
 
+def _find_upload_file(upload_dir: Path, upload_id: str) -> Optional[Path]:
+    """按上传ID查找文件（文件名可能带扩展名，排除解析结果JSON）"""
+    for file in upload_dir.glob(f"{upload_id}*"):
+        if file.is_file() and not file.name.endswith('.json'):
+            return file
+    return None
+
 @app.get("/kg/files/{upload_id}/status")
 async def get_file_status(upload_id: str):
-    """获取文件处理状态"""
+    """获取文件处理状态（含解析任务的排队/执行进度）"""
     try:
         upload_dir = Path("api/uploads")
 
         # 查找匹配的文件（可能有扩展名）
-        file_path = None
-        for file in upload_dir.glob(f"{upload_id}*"):
-            if file.is_file() and not file.name.endswith('.json'):
-                file_path = file
-                break
-
+        file_path = _find_upload_file(upload_dir, upload_id)
         result_path = upload_dir / f"{upload_id}_result.json"
 
         if not file_path or not file_path.exists():
             return {"success": False, "message": "文件不存在"}
 
-        # 检查是否已有解析结果
-        if result_path.exists():
+        # 解析任务状态以元数据为准；没有任务记录时按是否已有解析结果判断
+        meta = get_meta(upload_id)
+        if "status" in meta:
+            status = meta["status"]
+        elif result_path.exists():
             status = "parsed"
         else:
             status = "uploaded"
@@ -1429,6 +1701,14 @@ async def get_file_status(upload_id: str):
             "status": status,
             "file_type": file_path.suffix.lower()
         }
+        if "status" in meta:
+            metadata["progress"] = meta.get("progress", 100 if status == "parsed" else 0)
+            metadata["stage"] = meta.get("stage")
+            if status == "failed" and meta.get("error"):
+                metadata["error"] = meta["error"]
+        job = parse_jobs.get(upload_id)
+        if job is not None:
+            metadata["job"] = job.to_dict()
 
         return {"success": True, "data": metadata}
 
@@ -1438,495 +1718,55 @@ async def get_file_status(upload_id: str):
 
 @app.post("/kg/files/{upload_id}/parse")
 async def parse_file_manually(upload_id: str):
-    """手动触发文件解析"""
+    """手动触发文件解析：提交到解析任务队列后立即返回，进度通过 /kg/files/{upload_id}/status 查询"""
     try:
         upload_dir = Path("api/uploads")
 
         # 查找匹配的文件（可能有扩展名）
-        file_path = None
-        for file in upload_dir.glob(f"{upload_id}*"):
-            if file.is_file():
-                file_path = file
-                break
-
-        if not file_path or not file_path.exists():
+        file_path = _find_upload_file(upload_dir, upload_id)
+        if not file_path:
             return {"success": False, "message": "文件不存在"}
 
-        # 真实文档解析
-        import time
-        time.sleep(1)  # 模拟解析时间
-
-        # 根据文件类型解析内容
-        file_ext = file_path.suffix.lower()
-        raw_content = []
-
-        try:
-            logger.info(f"开始解析文件: {file_path}, 类型: {file_ext}")
-
-            if file_ext == '.txt':
-                # 解析文本文件
-                logger.info(f"解析文本文件: {file_path}")
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-                logger.info(f"文本文件包含 {len(lines)} 行")
-
-                for i, line in enumerate(lines):
-                    if line.strip():  # 跳过空行
-                        raw_content.append({
-                            "id": i + 1,
-                            "content": line.strip(),
-                            "type": "文本行",
-                            "line_number": i + 1
-                        })
-                logger.info(f"提取了 {len(raw_content)} 行有效内容")
-
-            elif file_ext in ['.csv']:
-                # 解析CSV文件
-                import csv
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    for i, row in enumerate(reader):
-                        raw_content.append({
-                            "id": i + 1,
-                            "content": str(row),
-                            "type": "CSV行",
-                            "row_number": i + 1,
-                            "data": row
-                        })
-
-            elif file_ext in ['.xlsx', '.xls']:
-                # 解析Excel文件
-                try:
-                    import pandas as pd
-                    logger.info(f"使用pandas解析Excel文件: {file_path}")
-                    df = pd.read_excel(file_path)
-                    logger.info(f"Excel文件包含 {len(df)} 行数据")
-
-                    for i, row in df.iterrows():
-                        # 安全地转换行数据，处理时间戳对象
-                        row_dict = {}
-                        for col, val in row.items():
-                            if pd.isna(val):
-                                row_dict[col] = None
-                            elif hasattr(val, 'isoformat'):
-                                # 如果是时间戳对象，转换为ISO格式字符串
-                                row_dict[col] = val.isoformat()
-                            else:
-                                row_dict[col] = str(val).strip()
-
-                        # 创建更友好的内容显示
-                        content_parts = []
-                        for col, val in row_dict.items():
-                            if val is not None:  # 跳过None值
-                                content_parts.append(f"{col}: {val}")
-                        content_str = " | ".join(content_parts)
-
-                        raw_content.append({
-                            "id": i + 1,
-                            "content": content_str,
-                            "type": "Excel行",
-                            "row_number": i + 1,
-                            "data": row_dict
-                        })
-
-                except ImportError as e:
-                    logger.warning(f"pandas未安装，无法解析Excel文件: {e}")
-                    # 如果没有pandas，尝试使用openpyxl
-                    try:
-                        import openpyxl
-                        logger.info(f"使用openpyxl解析Excel文件: {file_path}")
-                        wb = openpyxl.load_workbook(file_path)
-                        ws = wb.active
-
-                        # 获取表头
-                        headers = []
-                        for cell in ws[1]:
-                            headers.append(cell.value if cell.value else f"列{cell.column}")
-
-                        # 读取数据行
-                        for row_idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), 1):
-                            row_data = dict(zip(headers, row))
-                            content_parts = []
-                            for col, val in row_data.items():
-                                if val is not None:
-                                    content_parts.append(f"{col}: {val}")
-                            content_str = " | ".join(content_parts)
-
-                            raw_content.append({
-                                "id": row_idx,
-                                "content": content_str,
-                                "type": "Excel行",
-                                "row_number": row_idx,
-                                "data": row_data
-                            })
-
-                    except ImportError:
-                        logger.warning("openpyxl也未安装，将Excel文件作为二进制处理")
-                        with open(file_path, 'rb') as f:
-                            content = f.read()
-                        raw_content.append({
-                            "id": 1,
-                            "content": f"Excel文件 ({len(content)} 字节) - 需要安装pandas或openpyxl来解析内容",
-                            "type": "Excel文件",
-                            "size": len(content),
-                            "note": "请安装 pip install pandas openpyxl 来支持Excel解析"
-                        })
-                except Exception as e:
-                    logger.error(f"Excel文件解析失败: {e}")
-                    raw_content.append({
-                        "id": 1,
-                        "content": f"Excel解析失败: {str(e)}",
-                        "type": "错误",
-                        "error": str(e)
-                    })
-
-            elif file_ext == '.pdf':
-                # 解析PDF文件
-                try:
-                    logger.info(f"解析PDF文件: {file_path}")
-                    import pdfplumber
-
-                    with pdfplumber.open(str(file_path)) as pdf:
-                        logger.info(f"PDF包含 {len(pdf.pages)} 页")
-
-                        for page_num, page in enumerate(pdf.pages, 1):
-                            text = page.extract_text()
-                            if text:
-                                # 将页面文本分割成段落
-                                paragraphs = [p.strip() for p in text.split('\n') if p.strip()]
-                                for para_num, para in enumerate(paragraphs, 1):
-                                    if len(para) > 10:  # 过滤太短的段落
-                                        raw_content.append({
-                                            "id": len(raw_content) + 1,
-                                            "content": para,
-                                            "type": "PDF段落",
-                                            "page_number": page_num,
-                                            "paragraph_number": para_num,
-                                            "data": {
-                                                "页码": page_num,
-                                                "段落": para_num,
-                                                "内容": para
-                                            }
-                                        })
-
-                            # 提取表格
-                            tables = page.extract_tables()
-                            for table_num, table in enumerate(tables, 1):
-                                if table:
-                                    headers = table[0] if table else []
-                                    for row_num, row in enumerate(table[1:], 1):
-                                        if row and any(cell for cell in row if cell):
-                                            content_str = " | ".join(str(cell) if cell else '' for cell in row)
-                                            raw_content.append({
-                                                "id": len(raw_content) + 1,
-                                                "content": content_str,
-                                                "type": "PDF表格",
-                                                "page_number": page_num,
-                                                "table_number": table_num,
-                                                "row_number": row_num,
-                                                "data": dict(zip(headers, row)) if headers else {"内容": content_str}
-                                            })
-
-                    logger.info(f"PDF解析完成，提取了 {len(raw_content)} 个内容块")
-
-                except ImportError:
-                    logger.warning("pdfplumber未安装，无法解析PDF文件")
-                    raw_content.append({
-                        "id": 1,
-                        "content": "PDF解析失败 - 需要安装pdfplumber库",
-                        "type": "错误",
-                        "note": "请安装: pip install pdfplumber"
-                    })
-                except Exception as e:
-                    logger.error(f"PDF解析失败: {e}")
-                    raw_content.append({
-                        "id": 1,
-                        "content": f"PDF解析失败: {str(e)}",
-                        "type": "错误",
-                        "error": str(e)
-                    })
-
-            elif file_ext == '.docx':
-                # 解析新版Word文档 (.docx)
-                try:
-                    logger.info(f"解析DOCX文档: {file_path}")
-                    import docx
-
-                    doc = docx.Document(str(file_path))
-                    logger.info(f"DOCX文档包含 {len(doc.paragraphs)} 个段落和 {len(doc.tables)} 个表格")
-
-                    # 提取段落
-                    for para_num, para in enumerate(doc.paragraphs, 1):
-                        if para.text.strip():
-                            raw_content.append({
-                                "id": len(raw_content) + 1,
-                                "content": para.text.strip(),
-                                "type": "Word段落",
-                                "paragraph_number": para_num,
-                                "style": para.style.name if para.style else 'Normal',
-                                "data": {
-                                    "段落号": para_num,
-                                    "样式": para.style.name if para.style else 'Normal',
-                                    "内容": para.text.strip()
-                                }
-                            })
-
-                    # 提取表格
-                    for table_num, table in enumerate(doc.tables, 1):
-                        headers = []
-                        if table.rows:
-                            headers = [cell.text.strip() for cell in table.rows[0].cells]
-
-                        for row_num, row in enumerate(table.rows[1:], 1):
-                            row_data = [cell.text.strip() for cell in row.cells]
-                            if any(cell for cell in row_data if cell):
-                                content_str = " | ".join(row_data)
-                                data_dict = dict(zip(headers, row_data)) if headers else {"内容": content_str}
-
-                                raw_content.append({
-                                    "id": len(raw_content) + 1,
-                                    "content": content_str,
-                                    "type": "Word表格",
-                                    "table_number": table_num,
-                                    "row_number": row_num,
-                                    "data": data_dict
-                                })
-
-                    logger.info(f"DOCX文档解析完成，提取了 {len(raw_content)} 个内容块")
-
-                except ImportError:
-                    logger.warning("python-docx未安装，无法解析DOCX文档")
-                    raw_content.append({
-                        "id": 1,
-                        "content": "DOCX解析失败 - 需要安装python-docx库",
-                        "type": "错误",
-                        "note": "请安装: pip install python-docx"
-                    })
-                except Exception as e:
-                    logger.error(f"DOCX文档解析失败: {e}")
-                    raw_content.append({
-                        "id": 1,
-                        "content": f"DOCX文档解析失败: {str(e)}",
-                        "type": "错误",
-                        "error": str(e)
-                    })
-
-            elif file_ext == '.doc':
-                # 解析旧版Word文档 (.doc)
-                try:
-                    logger.info(f"解析DOC文档: {file_path}")
-
-                    # 尝试使用docx2txt库
-                    try:
-                        import docx2txt
-                        text = docx2txt.process(str(file_path))
-
-                        if text:
-                            # 将文本分割成段落
-                            paragraphs = [p.strip() for p in text.split('\n') if p.strip()]
-                            logger.info(f"DOC文档提取了 {len(paragraphs)} 个段落")
-
-                            for para_num, para in enumerate(paragraphs, 1):
-                                if len(para) > 5:  # 过滤太短的段落
-                                    raw_content.append({
-                                        "id": len(raw_content) + 1,
-                                        "content": para,
-                                        "type": "DOC段落",
-                                        "paragraph_number": para_num,
-                                        "data": {
-                                            "段落号": para_num,
-                                            "内容": para
-                                        }
-                                    })
-                        else:
-                            raw_content.append({
-                                "id": 1,
-                                "content": "DOC文档内容为空或无法提取",
-                                "type": "警告"
-                            })
-
-                    except ImportError:
-                        # 如果docx2txt不可用，尝试使用python-docx（可能会失败）
-                        logger.warning("docx2txt未安装，尝试使用python-docx处理DOC文件")
-                        try:
-                            import docx
-                            doc = docx.Document(str(file_path))
-
-                            # 提取段落
-                            for para_num, para in enumerate(doc.paragraphs, 1):
-                                if para.text.strip():
-                                    raw_content.append({
-                                        "id": len(raw_content) + 1,
-                                        "content": para.text.strip(),
-                                        "type": "DOC段落",
-                                        "paragraph_number": para_num,
-                                        "data": {
-                                            "段落号": para_num,
-                                            "内容": para.text.strip()
-                                        }
-                                    })
-                        except Exception as docx_error:
-                            logger.error(f"python-docx处理DOC文件失败: {docx_error}")
-                            # 最后尝试作为文本文件读取
-                            try:
-                                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                                    content = f.read()
-                                raw_content.append({
-                                    "id": 1,
-                                    "content": content[:1000] + ("..." if len(content) > 1000 else ""),
-                                    "type": "DOC文本",
-                                    "note": "作为文本文件读取，可能包含格式字符"
-                                })
-                            except Exception:
-                                raw_content.append({
-                                    "id": 1,
-                                    "content": "DOC文件解析失败 - 建议转换为DOCX格式",
-                                    "type": "错误",
-                                    "note": "旧版DOC格式需要特殊处理，建议安装: pip install docx2txt"
-                                })
-
-                    logger.info(f"DOC文档解析完成，提取了 {len(raw_content)} 个内容块")
-
-                except Exception as e:
-                    logger.error(f"DOC文档解析失败: {e}")
-                    raw_content.append({
-                        "id": 1,
-                        "content": f"DOC文档解析失败: {str(e)}",
-                        "type": "错误",
-                        "error": str(e),
-                        "note": "建议将DOC文件转换为DOCX格式"
-                    })
-
-            else:
-                # 其他文件类型，尝试读取为文本
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    raw_content.append({
-                        "id": 1,
-                        "content": content[:1000] + ("..." if len(content) > 1000 else ""),
-                        "type": f"{file_ext}文件",
-                        "full_length": len(content)
-                    })
-                except UnicodeDecodeError:
-                    # 二进制文件
-                    with open(file_path, 'rb') as f:
-                        content = f.read()
-                    raw_content.append({
-                        "id": 1,
-                        "content": f"二进制文件 ({len(content)} 字节)",
-                        "type": f"{file_ext}文件",
-                        "size": len(content)
-                    })
-
-        except Exception as e:
-            logger.error(f"文件解析失败: {e}")
-            raw_content = [{
-                "id": 1,
-                "content": f"解析失败: {str(e)}",
-                "type": "错误",
-                "error": str(e)
-            }]
-
-        # 简单的实体识别（基于关键词匹配）
-        entities = []
-        relations = []
-
-        # 硬件质量相关关键词
-        component_keywords = ["屏幕", "电池", "摄像头", "充电", "接口", "处理器", "内存", "存储", "扬声器", "麦克风"]
-        symptom_keywords = ["故障", "异常", "错误", "失效", "损坏", "不良", "缺陷", "问题"]
-        test_keywords = ["测试", "检测", "验证", "检查", "评估", "测量"]
-
-        entity_id = 1
-        for item in raw_content:
-            content = item.get("content", "")
-
-            # 检测组件
-            for keyword in component_keywords:
-                if keyword in content:
-                    entities.append({
-                        "id": entity_id,
-                        "name": keyword,
-                        "type": "Component",
-                        "confidence": 0.8,
-                        "source_line": item.get("line_number", item.get("row_number", 1)),
-                        "context": content[:100]
-                    })
-                    entity_id += 1
-
-            # 检测症状
-            for keyword in symptom_keywords:
-                if keyword in content:
-                    entities.append({
-                        "id": entity_id,
-                        "name": keyword,
-                        "type": "Symptom",
-                        "confidence": 0.7,
-                        "source_line": item.get("line_number", item.get("row_number", 1)),
-                        "context": content[:100]
-                    })
-                    entity_id += 1
-
-            # 检测测试
-            for keyword in test_keywords:
-                if keyword in content:
-                    entities.append({
-                        "id": entity_id,
-                        "name": keyword,
-                        "type": "TestCase",
-                        "confidence": 0.6,
-                        "source_line": item.get("line_number", item.get("row_number", 1)),
-                        "context": content[:100]
-                    })
-                    entity_id += 1
-
-        # 去重实体
-        unique_entities = []
-        seen_names = set()
-        for entity in entities:
-            if entity["name"] not in seen_names:
-                unique_entities.append(entity)
-                seen_names.add(entity["name"])
-
-        # 创建解析结果
-        parse_result = {
-            "raw_data": raw_content,
-            "entities": unique_entities,
-            "relations": relations,
-            "metadata": {
-                "total_records": len(raw_content),
-                "total_entities": len(unique_entities),
-                "total_relations": len(relations),
-                "file_type": file_ext,
-                "file_size": file_path.stat().st_size,
-                "parse_time": datetime.now().isoformat()
-            }
-        }
-
-        # 保存解析结果
+        ensure_meta(upload_id, file_path.name)
         result_path = upload_dir / f"{upload_id}_result.json"
-        logger.info(f"准备保存解析结果到: {result_path}")
 
-        try:
-            with open(result_path, "w", encoding="utf-8") as f:
-                json.dump(parse_result, f, ensure_ascii=False, indent=2)
-            logger.info(f"解析结果已保存到: {result_path}")
-        except Exception as save_error:
-            logger.error(f"保存解析结果失败: {save_error}")
-            raise save_error
+        # 相同内容的文件已解析过时直接复用结果，不再入队
+        if parse_jobs.get(upload_id) is None:
+            cached = await run_in_threadpool(restore_cached_result, str(file_path), str(result_path))
+            if cached is not None:
+                set_status(upload_id, FileStatus.parsed, progress=100, stage="cached",
+                           entity_count=cached.get("total_entities", 0),
+                           record_count=cached.get("total_records", 0))
+                return {
+                    "success": True,
+                    "message": "解析结果命中缓存",
+                    "upload_id": upload_id,
+                    "cached": True
+                }
 
-        logger.info(f"文件解析完成: {upload_id}")
+        job = parse_jobs.submit(upload_id, str(file_path.resolve()), str(result_path.resolve()))
 
         return {
             "success": True,
-            "message": "解析任务已完成",
-            "upload_id": upload_id
+            "message": "解析任务已提交",
+            "upload_id": upload_id,
+            "job": job.to_dict()
         }
 
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
-        logger.error(f"文件解析失败: {e}")
+        logger.error(f"提交解析任务失败: {e}")
         return {"success": False, "message": str(e)}
 
+@app.post("/kg/files/{upload_id}/cancel")
+async def cancel_file_parse(upload_id: str):
+    """取消排队中或执行中的解析任务"""
+    job = parse_jobs.cancel(upload_id)
+    if job is None:
+        return {"success": False, "message": "没有进行中的解析任务"}
+    return {"success": True, "message": "已请求取消解析", "upload_id": upload_id, "job": job.to_dict()}
+
 @app.get("/kg/files/{upload_id}/preview")
 async def get_file_preview(upload_id: str):
     """获取文件解析预览"""
@@ -1952,43 +1792,28 @@ async def get_file_preview(upload_id: str):
 async def get_system_status():
     """获取系统状态 - 返回真实数据"""
     try:
-        # 获取Neo4j连接状态
+        # 获取Neo4j连接状态与基本统计信息（读取统计快照，不再单独建连）
+        if not driver:
+            raise RuntimeError("Neo4j未连接")
+        snapshot = await graph_stats.get_snapshot()
         neo4j_status = "connected"
-        try:
-            test_driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASS))
-            with test_driver.session() as session:
-                session.run("RETURN 1")
-            test_driver.close()
-        except:
-            neo4j_status = "disconnected"
 
-        # 获取基本统计信息
-        stats_driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASS))
-        with stats_driver.session() as session:
-            # 获取节点和关系数量
-            node_count = session.run("MATCH (n) RETURN count(n) as count").single()["count"]
-            rel_count = session.run("MATCH ()-[r]->() RETURN count(r) as count").single()["count"]
+        # 获取节点和关系数量
+        node_count = snapshot.total_nodes
+        rel_count = snapshot.total_relations
 
-            # 获取各类实体数量（真实数据）
-            term_count = session.run("MATCH (t:Term) RETURN count(t) as count").single()["count"]
-            category_count = session.run("MATCH (c:Category) RETURN count(c) as count").single()["count"]
-            tag_count = session.run("MATCH (t:Tag) RETURN count(t) as count").single()["count"]
-            alias_count = session.run("MATCH (a:Alias) RETURN count(a) as count").single()["count"]
+        # 获取各类实体数量（真实数据）
+        term_count = snapshot.count('Term')
+        category_count = snapshot.count('Category')
+        tag_count = snapshot.count('Tag')
+        alias_count = snapshot.count('Alias')
 
-            # 获取文件数量 - 尝试多种可能的节点类型
-            file_count_result = session.run("MATCH (f:File) RETURN count(f) as count").single()
-            file_count = file_count_result["count"] if file_count_result else 0
+        # 获取文件数量，没有 File 节点时使用 DataSource 节点
+        file_count = snapshot.count('File') or snapshot.count('DataSource')
 
-            # 如果没有 File 节点，尝试其他可能的数据源节点
-            if file_count == 0:
-                datasource_result = session.run("MATCH (d:DataSource) RETURN count(d) as count").single()
-                file_count = datasource_result["count"] if datasource_result else 0
-
-            # 计算系统健康度（基于数据完整性）
-            # 如果有数据，健康度为95%，否则为50%
-            system_health = 95 if node_count > 0 else 50
-
-        stats_driver.close()
+        # 计算系统健康度（基于数据完整性）
+        # 如果有数据，健康度为95%，否则为50%
+        system_health = 95 if node_count > 0 else 50
 
         # 获取版本号（可以从环境变量或配置文件读取）
         version = os.getenv("APP_VERSION", "v1.3.0")  # 当前最新版本 v1.3.0
@@ -2225,25 +2050,21 @@ async def get_prompts():
 # 新的词典API - 支持新数据结构
 
 @app.get("/api/dictionary")
-async def get_new_dictionary():
+async def get_new_dictionary(request: Request):
     """获取新结构的词典数据"""
     # 优先使用文件数据源
     try:
-        import json
-        from pathlib import Path
-
-        # 读取API词典文件
-        data_file = Path("data/dictionary.json")
-        if data_file.exists():
-            with open(data_file, 'r', encoding='utf-8') as f:
-                dictionary_data = json.load(f)
-
-            return {
-                "success": True,
-                "data": dictionary_data,
-                "total": len(dictionary_data),
-                "message": f"从文件加载 {len(dictionary_data)} 条词典数据"
-            }
+        snapshot = _dictionary_snapshot()
+        if snapshot is not None:
+            return _etag_response(request, snapshot.etag, lambda: snapshot.view(
+                "api_dictionary.body",
+                lambda snap: _json_bytes({
+                    "success": True,
+                    "data": list(snap.entries),
+                    "total": len(snap),
+                    "message": f"从文件加载 {len(snap)} 条词典数据"
+                })
+            ))
     except Exception as e:
         logger.error(f"读取词典文件失败: {e}")
 
@@ -2257,52 +2078,51 @@ async def get_new_dictionary():
         }
 
     try:
-        with driver.session() as session:
-            # 获取所有新结构的数据
-            result = session.run("""
-                MATCH (n)
-                WHERE n:Symptom OR n:Component OR n:Tool OR n:Process OR n:TestCase OR n:Metric OR n:Material OR n:Role
-                RETURN
-                    labels(n)[0] as label,
-                    n.name as name,
-                    n.aliases as aliases,
-                    n.tags as tags,
-                    n.definition as definition,
-                    n.source as source,
-                    n.status as status,
-                    CASE
-                        WHEN n:Component THEN n.component_type
-                        WHEN n:Process THEN n.process_type
-                        WHEN n:TestCase THEN n.test_type
-                        WHEN n:Material THEN n.material_type
-                        WHEN n:Tool THEN n.tool_type
-                        WHEN n:Role THEN n.function
-                        WHEN n:Symptom THEN n.category
-                        ELSE null
-                    END as sub_category
-                ORDER BY n.name
-            """)
-
-            data = []
-            for record in result:
-                item = {
-                    "term": record["name"],
-                    "aliases": record["aliases"] if record["aliases"] else [],
-                    "category": record["label"],
-                    "sub_category": record["sub_category"] if record["sub_category"] else "",
-                    "tags": record["tags"] if record["tags"] else [],
-                    "definition": record["definition"] if record["definition"] else "",
-                    "source": record["source"] if record["source"] else "",
-                    "status": record["status"] if record["status"] else "active"
-                }
-                data.append(item)
-
-            return {
-                "success": True,
-                "data": data,
-                "total": len(data),
-                "message": f"成功获取{len(data)}条词典数据"
+        # 获取所有新结构的数据
+        result = await graph_db.fetch("""
+            MATCH (n)
+            WHERE n:Symptom OR n:Component OR n:Tool OR n:Process OR n:TestCase OR n:Metric OR n:Material OR n:Role
+            RETURN
+                labels(n)[0] as label,
+                n.name as name,
+                n.aliases as aliases,
+                n.tags as tags,
+                n.definition as definition,
+                n.source as source,
+                n.status as status,
+                CASE
+                    WHEN n:Component THEN n.component_type
+                    WHEN n:Process THEN n.process_type
+                    WHEN n:TestCase THEN n.test_type
+                    WHEN n:Material THEN n.material_type
+                    WHEN n:Tool THEN n.tool_type
+                    WHEN n:Role THEN n.function
+                    WHEN n:Symptom THEN n.category
+                    ELSE null
+                END as sub_category
+            ORDER BY n.name
+        """)
+
+        data = []
+        for record in result:
+            item = {
+                "term": record["name"],
+                "aliases": record["aliases"] if record["aliases"] else [],
+                "category": record["label"],
+                "sub_category": record["sub_category"] if record["sub_category"] else "",
+                "tags": record["tags"] if record["tags"] else [],
+                "definition": record["definition"] if record["definition"] else "",
+                "source": record["source"] if record["source"] else "",
+                "status": record["status"] if record["status"] else "active"
             }
+            data.append(item)
+
+        return {
+            "success": True,
+            "data": data,
+            "total": len(data),
+            "message": f"成功获取{len(data)}条词典数据"
+        }
 
     except Exception as e:
         logger.error(f"获取新词典数据失败: {e}")
@@ -2325,30 +2145,29 @@ async def get_dictionary_labels():
         }
 
     try:
-        with driver.session() as session:
-            result = session.run("""
-                MATCH (n)
-                WHERE n:Symptom OR n:Component OR n:Tool OR n:Process OR n:TestCase OR n:Metric OR n:Material OR n:Role
-                RETURN labels(n)[0] as label, count(n) as count
-                ORDER BY count DESC
-            """)
-
-            labels = []
-            total = 0
-            for record in result:
-                labels.append({
-                    "label": record["label"],
-                    "count": record["count"]
-                })
-                total += record["count"]
+        result = await graph_db.fetch("""
+            MATCH (n)
+            WHERE n:Symptom OR n:Component OR n:Tool OR n:Process OR n:TestCase OR n:Metric OR n:Material OR n:Role
+            RETURN labels(n)[0] as label, count(n) as count
+            ORDER BY count DESC
+        """)
+
+        labels = []
+        total = 0
+        for record in result:
+            labels.append({
+                "label": record["label"],
+                "count": record["count"]
+            })
+            total += record["count"]
 
-            return {
-                "success": True,
-                "data": {
-                    "labels": labels,
-                    "total": total
-                }
+        return {
+            "success": True,
+            "data": {
+                "labels": labels,
+                "total": total
             }
+        }
 
     except Exception as e:
         logger.error(f"获取Label统计失败: {e}")
@@ -2364,31 +2183,30 @@ async def get_dictionary_tags():
         return {"error": "Neo4j连接失败"}
 
     try:
-        with driver.session() as session:
-            result = session.run("""
-                MATCH (n)
-                WHERE n:Symptom OR n:Component OR n:Tool OR n:Process OR n:TestCase OR n:Metric OR n:Material OR n:Role
-                AND n.tags IS NOT NULL
-                UNWIND n.tags as tag
-                RETURN tag, count(*) as count
-                ORDER BY count DESC
-                LIMIT 50
-            """)
-
-            tags = []
-            for record in result:
-                tags.append({
-                    "tag": record["tag"],
-                    "count": record["count"]
-                })
+        result = await graph_db.fetch("""
+            MATCH (n)
+            WHERE n:Symptom OR n:Component OR n:Tool OR n:Process OR n:TestCase OR n:Metric OR n:Material OR n:Role
+            AND n.tags IS NOT NULL
+            UNWIND n.tags as tag
+            RETURN tag, count(*) as count
+            ORDER BY count DESC
+            LIMIT 50
+        """)
+
+        tags = []
+        for record in result:
+            tags.append({
+                "tag": record["tag"],
+                "count": record["count"]
+            })
 
-            return {
-                "success": True,
-                "data": {
-                    "tags": tags,
-                    "total": len(tags)
-                }
+        return {
+            "success": True,
+            "data": {
+                "tags": tags,
+                "total": len(tags)
             }
+        }
 
     except Exception as e:
         logger.error(f"获取标签统计失败: {e}")
@@ -2411,50 +2229,49 @@ async def get_dictionary_by_label(label: str):
         }
 
     try:
-        with driver.session() as session:
-            result = session.run(f"""
-                MATCH (n:{label})
-                RETURN
-                    n.name as name,
-                    n.aliases as aliases,
-                    n.tags as tags,
-                    n.definition as definition,
-                    n.source as source,
-                    n.status as status,
-                    CASE
-                        WHEN n:Component THEN n.component_type
-                        WHEN n:Process THEN n.process_type
-                        WHEN n:TestCase THEN n.test_type
-                        WHEN n:Material THEN n.material_type
-                        WHEN n:Tool THEN n.tool_type
-                        WHEN n:Role THEN n.function
-                        WHEN n:Symptom THEN n.category
-                        ELSE null
-                    END as sub_category
-                ORDER BY n.name
-            """)
-
-            data = []
-            for record in result:
-                item = {
-                    "term": record["name"],
-                    "aliases": record["aliases"] if record["aliases"] else [],
-                    "category": label,
-                    "sub_category": record["sub_category"] if record["sub_category"] else "",
-                    "tags": record["tags"] if record["tags"] else [],
-                    "definition": record["definition"] if record["definition"] else "",
-                    "source": record["source"] if record["source"] else "",
-                    "status": record["status"] if record["status"] else "active"
-                }
-                data.append(item)
-
-            return {
-                "success": True,
-                "data": data,
-                "total": len(data),
-                "label": label,
-                "message": f"成功获取{len(data)}条{label}数据"
+        result = await graph_db.fetch(f"""
+            MATCH (n:{label})
+            RETURN
+                n.name as name,
+                n.aliases as aliases,
+                n.tags as tags,
+                n.definition as definition,
+                n.source as source,
+                n.status as status,
+                CASE
+                    WHEN n:Component THEN n.component_type
+                    WHEN n:Process THEN n.process_type
+                    WHEN n:TestCase THEN n.test_type
+                    WHEN n:Material THEN n.material_type
+                    WHEN n:Tool THEN n.tool_type
+                    WHEN n:Role THEN n.function
+                    WHEN n:Symptom THEN n.category
+                    ELSE null
+                END as sub_category
+            ORDER BY n.name
+        """)
+
+        data = []
+        for record in result:
+            item = {
+                "term": record["name"],
+                "aliases": record["aliases"] if record["aliases"] else [],
+                "category": label,
+                "sub_category": record["sub_category"] if record["sub_category"] else "",
+                "tags": record["tags"] if record["tags"] else [],
+                "definition": record["definition"] if record["definition"] else "",
+                "source": record["source"] if record["source"] else "",
+                "status": record["status"] if record["status"] else "active"
             }
+            data.append(item)
+
+        return {
+            "success": True,
+            "data": data,
+            "total": len(data),
+            "label": label,
+            "message": f"成功获取{len(data)}条{label}数据"
+        }
 
     except Exception as e:
         logger.error(f"获取{label}数据失败: {e}")
@@ -2481,65 +2298,64 @@ async def anomaly_overview(
     try:
         if not driver:
             return {"ok": True, "success": True, "data": {"anomaly": None, "symptoms": [], "suspects": [], "detections": [], "fixes": []}, "message": "Neo4j未连接，返回空数据"}
-        with driver.session() as session:
-            if anomaly_id:
-                q = """
-                MATCH (a:Anomaly {canonical_id:$aid})
-                OPTIONAL MATCH (a)-[r1:HAS_SYMPTOM]->(s:Symptom)
-                OPTIONAL MATCH (a)-[r2:OCCURS_IN]->(c)
-                OPTIONAL MATCH (a)-[r3:DETECTED_BY]->(d)
-                OPTIONAL MATCH (a)-[r4:FIXED_BY]->(f)
-                WITH a,
-                    [x IN collect({n:s, r:r1}) WHERE x.r IS NOT NULL AND coalesce(x.r.confidence,1.0) >= $min_conf] AS symptoms,
-                    [x IN collect({n:c, r:r2}) WHERE x.r IS NOT NULL AND coalesce(x.r.confidence,1.0) >= $min_conf] AS suspects,
-                    [x IN collect({n:d, r:r3}) WHERE x.r IS NOT NULL AND coalesce(x.r.confidence,1.0) >= $min_conf] AS detections,
-                    [x IN collect({n:f, r:r4}) WHERE x.r IS NOT NULL AND coalesce(x.r.confidence,1.0) >= $min_conf] AS fixes
-                RETURN a AS a, symptoms, suspects, detections, fixes
-                """
-                rec = session.run(q, aid=anomaly_id, min_conf=min_confidence).single()
-            else:
-                q = """
-                MATCH (a:Anomaly {name:$name})
-                OPTIONAL MATCH (a)-[r1:HAS_SYMPTOM]->(s:Symptom)
-                OPTIONAL MATCH (a)-[r2:OCCURS_IN]->(c)
-                OPTIONAL MATCH (a)-[r3:DETECTED_BY]->(d)
-                OPTIONAL MATCH (a)-[r4:FIXED_BY]->(f)
-                WITH a,
-                    [x IN collect({n:s, r:r1}) WHERE x.r IS NOT NULL AND coalesce(x.r.confidence,1.0) >= $min_conf] AS symptoms,
-                    [x IN collect({n:c, r:r2}) WHERE x.r IS NOT NULL AND coalesce(x.r.confidence,1.0) >= $min_conf] AS suspects,
-                    [x IN collect({n:d, r:r3}) WHERE x.r IS NOT NULL AND coalesce(x.r.confidence,1.0) >= $min_conf] AS detections,
-                    [x IN collect({n:f, r:r4}) WHERE x.r IS NOT NULL AND coalesce(x.r.confidence,1.0) >= $min_conf] AS fixes
-                RETURN a AS a, symptoms, suspects, detections, fixes
-                """
-                rec = session.run(q, name=anomaly, min_conf=min_confidence).single()
-            if not rec or not rec.get("a"):
-                return {"ok": True, "success": True, "data": None, "message": "未找到异常"}
-
-            def pack(items):
-                out = []
-                for it in items:
-                    n = it['n']
-                    r = it['r']
-                    if n is None or r is None:
-                        continue
-                    out.append({
-                        "id": session.run("RETURN elementId($n) AS id", n=n).single()["id"] if False else None,  # placeholder, avoid extra calls
-                        "labels": n.get("labels", None),
-                        "name": n.get("name", None),
-                        "type": r.type if hasattr(r, 'type') else None,
-                        "rel": {k:v for k,v in (r.items() if hasattr(r,'items') else {}).items()}
-                    })
-                return out
-
-            a = rec["a"]
-            data = {
-                "anomaly": {"canonical_id": a.get("canonical_id"), "name": a.get("name")},
-                "symptoms": pack(rec["symptoms"]),
-                "suspects": pack(rec["suspects"]),
-                "detections": pack(rec["detections"]),
-                "fixes": pack(rec["fixes"]),
-            }
-            return {"ok": True, "success": True, "data": data}
+        if anomaly_id:
+            q = """
+            MATCH (a:Anomaly {canonical_id:$aid})
+            OPTIONAL MATCH (a)-[r1:HAS_SYMPTOM]->(s:Symptom)
+            OPTIONAL MATCH (a)-[r2:OCCURS_IN]->(c)
+            OPTIONAL MATCH (a)-[r3:DETECTED_BY]->(d)
+            OPTIONAL MATCH (a)-[r4:FIXED_BY]->(f)
+            WITH a,
+                [x IN collect({n:s, r:r1}) WHERE x.r IS NOT NULL AND coalesce(x.r.confidence,1.0) >= $min_conf] AS symptoms,
+                [x IN collect({n:c, r:r2}) WHERE x.r IS NOT NULL AND coalesce(x.r.confidence,1.0) >= $min_conf] AS suspects,
+                [x IN collect({n:d, r:r3}) WHERE x.r IS NOT NULL AND coalesce(x.r.confidence,1.0) >= $min_conf] AS detections,
+                [x IN collect({n:f, r:r4}) WHERE x.r IS NOT NULL AND coalesce(x.r.confidence,1.0) >= $min_conf] AS fixes
+            RETURN a AS a, symptoms, suspects, detections, fixes
+            """
+            rec = await graph_db.fetch_one(q, aid=anomaly_id, min_conf=min_confidence)
+        else:
+            q = """
+            MATCH (a:Anomaly {name:$name})
+            OPTIONAL MATCH (a)-[r1:HAS_SYMPTOM]->(s:Symptom)
+            OPTIONAL MATCH (a)-[r2:OCCURS_IN]->(c)
+            OPTIONAL MATCH (a)-[r3:DETECTED_BY]->(d)
+            OPTIONAL MATCH (a)-[r4:FIXED_BY]->(f)
+            WITH a,
+                [x IN collect({n:s, r:r1}) WHERE x.r IS NOT NULL AND coalesce(x.r.confidence,1.0) >= $min_conf] AS symptoms,
+                [x IN collect({n:c, r:r2}) WHERE x.r IS NOT NULL AND coalesce(x.r.confidence,1.0) >= $min_conf] AS suspects,
+                [x IN collect({n:d, r:r3}) WHERE x.r IS NOT NULL AND coalesce(x.r.confidence,1.0) >= $min_conf] AS detections,
+                [x IN collect({n:f, r:r4}) WHERE x.r IS NOT NULL AND coalesce(x.r.confidence,1.0) >= $min_conf] AS fixes
+            RETURN a AS a, symptoms, suspects, detections, fixes
+            """
+            rec = await graph_db.fetch_one(q, name=anomaly, min_conf=min_confidence)
+        if not rec or not rec.get("a"):
+            return {"ok": True, "success": True, "data": None, "message": "未找到异常"}
+
+        def pack(items):
+            out = []
+            for it in items:
+                n = it['n']
+                r = it['r']
+                if n is None or r is None:
+                    continue
+                out.append({
+                    "id": None,  # placeholder, avoid extra calls
+                    "labels": n.get("labels", None),
+                    "name": n.get("name", None),
+                    "type": r.type if hasattr(r, 'type') else None,
+                    "rel": {k:v for k,v in (r.items() if hasattr(r,'items') else {}).items()}
+                })
+            return out
+
+        a = rec["a"]
+        data = {
+            "anomaly": {"canonical_id": a.get("canonical_id"), "name": a.get("name")},
+            "symptoms": pack(rec["symptoms"]),
+            "suspects": pack(rec["suspects"]),
+            "detections": pack(rec["detections"]),
+            "fixes": pack(rec["fixes"]),
+        }
+        return {"ok": True, "success": True, "data": data}
     except Exception as e:
         logger.error(f"获取异常概览失败: {e}")
         raise HTTPException(status_code=500, detail=f"获取异常概览失败: {str(e)}")
@@ -2556,26 +2372,25 @@ async def component_top_anomalies(
     try:
         if not driver:
             return {"ok": True, "success": True, "data": []}
-        with driver.session() as session:
-            if component_id:
-                q = """
-                MATCH (c:Component {canonical_id:$cid})<- [r:OCCURS_IN]- (a:Anomaly)
-                WHERE coalesce(r.confidence,1.0) >= $min_conf
-                RETURN a.name AS anomaly, count(*) AS cnt
-                ORDER BY cnt DESC
-                LIMIT $limit
-                """
-                rs = session.run(q, cid=component_id, min_conf=min_confidence, limit=limit).data()
-            else:
-                q = """
-                MATCH (c:Component {name:$name})<- [r:OCCURS_IN]- (a:Anomaly)
-                WHERE coalesce(r.confidence,1.0) >= $min_conf
-                RETURN a.name AS anomaly, count(*) AS cnt
-                ORDER BY cnt DESC
-                LIMIT $limit
-                """
-                rs = session.run(q, name=component, min_conf=min_confidence, limit=limit).data()
-            return {"ok": True, "success": True, "data": rs}
+        if component_id:
+            q = """
+            MATCH (c:Component {canonical_id:$cid})<- [r:OCCURS_IN]- (a:Anomaly)
+            WHERE coalesce(r.confidence,1.0) >= $min_conf
+            RETURN a.name AS anomaly, count(*) AS cnt
+            ORDER BY cnt DESC
+            LIMIT $limit
+            """
+            rs = await graph_db.fetch_data(q, cid=component_id, min_conf=min_confidence, limit=limit)
+        else:
+            q = """
+            MATCH (c:Component {name:$name})<- [r:OCCURS_IN]- (a:Anomaly)
+            WHERE coalesce(r.confidence,1.0) >= $min_conf
+            RETURN a.name AS anomaly, count(*) AS cnt
+            ORDER BY cnt DESC
+            LIMIT $limit
+            """
+            rs = await graph_db.fetch_data(q, name=component, min_conf=min_confidence, limit=limit)
+        return {"ok": True, "success": True, "data": rs}
     except Exception as e:
         logger.error(f"获取组件异常排行失败: {e}")
         raise HTTPException(status_code=500, detail=f"获取组件异常排行失败: {str(e)}")
@@ -2607,57 +2422,72 @@ async def validate_relation(relation: RelationInput):
 
 
 @app.post("/kg/relations/import")
-async def import_relations(batch: RelationBatch):
+async def import_relations(batch: RelationBatch, service: KGRelationService = Depends(get_relation_service)):
     """批量导入关系"""
     try:
         if not driver:
             raise HTTPException(status_code=503, detail="Neo4j连接不可用")
 
-        # 创建服务实例
-        service = KGRelationService(NEO4J_URI, NEO4J_USER, NEO4J_PASS)
+        # 批量导入
+        result = await graph_db.run_sync(service.batch_upsert_relations, [r.dict() for r in batch.relations])
+        if result['success']:
+            graph_stats.mark_dirty("relations imported")
+            # 关系两端均为 Term 节点
+            await QueryCache.invalidate(labels=["Term"], rel_types={r.relation_type for r in batch.relations})
 
-        try:
-            # 批量导入
-            result = service.batch_upsert_relations([r.dict() for r in batch.relations])
-
-            return {
-                "ok": True,
-                "success": True,
-                "data": {
-                    "success_count": result['success'],
-                    "failed_count": result['failed'],
-                    "errors": result['errors'][:10],  # 只返回前10个错误
-                    "created_ids": result['created_ids']
-                },
-                "message": f"成功导入 {result['success']} 个关系，失败 {result['failed']} 个"
-            }
-        finally:
-            service.close()
+        return {
+            "ok": True,
+            "success": True,
+            "data": {
+                "success_count": result['success'],
+                "failed_count": result['failed'],
+                "errors": result['errors'][:10],  # 只返回前10个错误
+                "created_ids": result['created_ids']
+            },
+            "message": f"成功导入 {result['success']} 个关系，失败 {result['failed']} 个"
+        }
 
     except Exception as e:
         logger.error(f"批量导入关系失败: {e}")
         raise HTTPException(status_code=500, detail=f"批量导入关系失败: {str(e)}")
 
 
+@app.post("/kg/relations/import/stream")
+async def import_relations_stream(batch: RelationBulkBatch, service: KGRelationService = Depends(get_relation_service)):
+    """大批量导入关系，以NDJSON逐块返回进度"""
+    if not driver:
+        raise HTTPException(status_code=503, detail="Neo4j连接不可用")
+
+    def on_success():
+        graph_stats.mark_dirty("relations imported (stream)")
+        cache_versions.bump_sync(labels=["Term"], rel_types={r.relation_type for r in batch.relations})
+
+    lines = service.iter_import_ndjson([r.dict() for r in batch.relations], chunk_size=batch.chunk_size,
+                                       on_success=on_success)
+    # 同步生成器由Starlette在线程池中迭代，不阻塞事件循环
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
 @app.get("/kg/relations/stats")
-async def get_relation_stats():
+async def get_relation_stats(service: KGRelationService = Depends(get_relation_service)):
     """获取关系统计"""
     try:
         if not driver:
             raise HTTPException(status_code=503, detail="Neo4j连接不可用")
 
-        service = KGRelationService(NEO4J_URI, NEO4J_USER, NEO4J_PASS)
-
-        try:
-            stats = service.get_relation_stats()
-            return {
-                "ok": True,
-                "success": True,
-                "data": stats,
-                "message": "获取关系统计成功"
-            }
-        finally:
-            service.close()
+        stats, source = await QueryCache.stats_data(
+            "relation_stats", lambda: graph_db.run_sync(service.get_relation_stats), labels=[]
+        )
+        if source in ("computed", "coalesced"):
+            CACHE_MISSES.labels(cache_type="relation_stats").inc()
+        else:
+            CACHE_HITS.labels(cache_type="relation_stats").inc()
+        return {
+            "ok": True,
+            "success": True,
+            "data": stats,
+            "message": "获取关系统计成功"
+        }
 
     except Exception as e:
         logger.error(f"获取关系统计失败: {e}")
@@ -2667,26 +2497,23 @@ async def get_relation_stats():
 @app.get("/kg/diagnose")
 async def diagnose_symptom(
     symptom: str,
-    max_depth: int = 3,
-    min_confidence: float = 0.6
+    max_depth: int = Query(3, ge=1, le=MAX_PATH_DEPTH),
+    min_confidence: float = 0.6,
+    service: KGQueryService = Depends(get_query_service)
 ):
     """故障诊断：查找症状的根因和解决方案"""
     try:
         if not driver:
             raise HTTPException(status_code=503, detail="Neo4j连接不可用")
 
-        service = KGQueryService(NEO4J_URI, NEO4J_USER, NEO4J_PASS)
-
-        try:
-            result = service.diagnose(symptom, max_depth, min_confidence)
-            return {
-                "ok": True,
-                "success": True,
-                "data": result,
-                "message": "诊断完成"
-            }
-        finally:
-            service.close()
+        path_index = await _get_path_index()
+        result = await graph_db.run_sync(service.diagnose, symptom, max_depth, min_confidence, path_index)
+        return {
+            "ok": True,
+            "success": True,
+            "data": result,
+            "message": "诊断完成"
+        }
 
     except Exception as e:
         logger.error(f"故障诊断失败: {e}")
@@ -2696,25 +2523,21 @@ async def diagnose_symptom(
 @app.get("/kg/prevent")
 async def get_prevention(
     symptom: str,
-    min_confidence: float = 0.6
+    min_confidence: float = 0.6,
+    service: KGQueryService = Depends(get_query_service)
 ):
     """获取预防措施"""
     try:
         if not driver:
             raise HTTPException(status_code=503, detail="Neo4j连接不可用")
 
-        service = KGQueryService(NEO4J_URI, NEO4J_USER, NEO4J_PASS)
-
-        try:
-            result = service.get_prevention_measures(symptom, min_confidence)
-            return {
-                "ok": True,
-                "success": True,
-                "data": result,
-                "message": "获取预防措施成功"
-            }
-        finally:
-            service.close()
+        result = await graph_db.run_sync(service.get_prevention_measures, symptom, min_confidence)
+        return {
+            "ok": True,
+            "success": True,
+            "data": result,
+            "message": "获取预防措施成功"
+        }
 
     except Exception as e:
         logger.error(f"获取预防措施失败: {e}")
@@ -2725,25 +2548,21 @@ async def get_prevention(
 async def get_test_path(
     target: str,
     target_category: str,
-    min_confidence: float = 0.6
+    min_confidence: float = 0.6,
+    service: KGQueryService = Depends(get_query_service)
 ):
     """获取测试路径"""
     try:
         if not driver:
             raise HTTPException(status_code=503, detail="Neo4j连接不可用")
 
-        service = KGQueryService(NEO4J_URI, NEO4J_USER, NEO4J_PASS)
-
-        try:
-            result = service.get_test_path(target, target_category, min_confidence)
-            return {
-                "ok": True,
-                "success": True,
-                "data": result,
-                "message": "获取测试路径成功"
-            }
-        finally:
-            service.close()
+        result = await graph_db.run_sync(service.get_test_path, target, target_category, min_confidence)
+        return {
+            "ok": True,
+            "success": True,
+            "data": result,
+            "message": "获取测试路径成功"
+        }
 
     except Exception as e:
         logger.error(f"获取测试路径失败: {e}")
@@ -2754,26 +2573,29 @@ async def get_test_path(
 async def get_dependencies(
     component: str,
     direction: str = 'both',
-    max_depth: int = 2,
-    min_confidence: float = 0.6
+    max_depth: int = Query(2, ge=1, le=MAX_PATH_DEPTH),
+    min_confidence: float = 0.6,
+    service: KGQueryService = Depends(get_query_service)
 ):
     """获取组件依赖关系"""
     try:
         if not driver:
             raise HTTPException(status_code=503, detail="Neo4j连接不可用")
 
-        service = KGQueryService(NEO4J_URI, NEO4J_USER, NEO4J_PASS)
-
-        try:
-            result = service.get_dependencies(component, direction, max_depth, min_confidence)
-            return {
-                "ok": True,
-                "success": True,
-                "data": result,
-                "message": "获取依赖关系成功"
-            }
-        finally:
-            service.close()
+        path_index = await _get_path_index()
+        if path_index is not None:
+            # 内存搜索不占用Neo4j线程池，但仍是CPU计算，放到线程中避免阻塞事件循环
+            result = await run_in_threadpool(
+                service.get_dependencies, component, direction, max_depth, min_confidence, path_index
+            )
+        else:
+            result = await graph_db.run_sync(service.get_dependencies, component, direction, max_depth, min_confidence)
+        return {
+            "ok": True,
+            "success": True,
+            "data": result,
+            "message": "获取依赖关系成功"
+        }
 
     except Exception as e:
         logger.error(f"获取依赖关系失败: {e}")
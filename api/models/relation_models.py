@@ -320,3 +320,9 @@ class RelationBatch(BaseModel):
             }
         }
 
+
+
+class RelationBulkBatch(BaseModel):
+    """大批量关系输入（流式进度导入）"""
+    relations: List[RelationInput] = Field(..., min_items=1, max_items=20000, description="关系列表")
+    chunk_size: int = Field(default=500, ge=1, le=5000, description="每个写事务的关系数")
@@ -6,8 +6,9 @@
 
 import logging
 import re
+import time
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import pandas as pd
 
 logger = logging.getLogger(__name__)
@@ -79,7 +80,6 @@ class EnhancedDocumentParser:
         """增强的PDF解析"""
         try:
             import pdfplumber
-            import PyPDF2
             
             raw_data = []
             entities = []
@@ -90,48 +90,10 @@ class EnhancedDocumentParser:
                 metadata['total_pages'] = len(pdf.pages)
                 
                 for page_num, page in enumerate(pdf.pages, 1):
-                    # 提取文本
-                    text = page.extract_text()
-                    if text:
-                        # 清理文本
-                        cleaned_text = self._clean_pdf_text(text)
-                        if cleaned_text:
-                            paragraphs = self._split_into_paragraphs(cleaned_text)
-                            for para_num, para in enumerate(paragraphs, 1):
-                                if para.strip() and len(para.strip()) > 3:  # 过滤太短的段落
-                                    record = {
-                                        '_row_number': len(raw_data) + 1,
-                                        'page_number': page_num,
-                                        'paragraph_number': para_num,
-                                        'content_type': 'text',
-                                        'content': para.strip(),
-                                        'word_count': len(para.split()),
-                                        'char_count': len(para)
-                                    }
-                                    raw_data.append(record)
-                    
-                    # 提取表格
-                    tables = page.extract_tables()
-                    for table_num, table in enumerate(tables, 1):
-                        if table:
-                            # 处理表格数据
-                            headers = table[0] if table else []
-                            for row_num, row in enumerate(table[1:], 1):
-                                if row and any(cell for cell in row if cell):
-                                    record = {
-                                        '_row_number': len(raw_data) + 1,
-                                        'page_number': page_num,
-                                        'table_number': table_num,
-                                        'row_number': row_num,
-                                        'content_type': 'table',
-                                        'content': ' | '.join(str(cell) if cell else '' for cell in row)
-                                    }
-                                    # 添加表格列数据
-                                    for col_num, (header, cell) in enumerate(zip(headers, row), 1):
-                                        if header and cell:
-                                            record[f'column_{col_num}_{header}'] = str(cell)
-                                    
-                                    raw_data.append(record)
+                    for record in self.extract_pdf_page_records(page, page_num):
+                        raw_data.append({'_row_number': len(raw_data) + 1, **record})
+                    # 释放该页解析出的字符/版面对象缓存
+                    page.flush_cache()
             
             # 提取实体
             entities = self._extract_entities_from_text_data(raw_data)
@@ -144,12 +106,58 @@ class EnhancedDocumentParser:
             }
             
         except ImportError:
-            logger.error("PDF解析依赖未安装，请安装: pip install pdfplumber PyPDF2")
+            logger.error("PDF解析依赖未安装，请安装: pip install pdfplumber")
             raise Exception("PDF解析依赖未安装")
         except Exception as e:
             logger.error(f"PDF解析失败: {e}")
             raise
     
+    def extract_pdf_page_records(self, page, page_num: int) -> List[Dict[str, Any]]:
+        """提取单页的段落和表格行记录（不含_row_number，由调用方按全局顺序编号）"""
+        records = []
+        
+        # 提取文本
+        text = page.extract_text()
+        if text:
+            # 清理文本
+            cleaned_text = self._clean_pdf_text(text)
+            if cleaned_text:
+                paragraphs = self._split_into_paragraphs(cleaned_text)
+                for para_num, para in enumerate(paragraphs, 1):
+                    if para.strip() and len(para.strip()) > 3:  # 过滤太短的段落
+                        records.append({
+                            'page_number': page_num,
+                            'paragraph_number': para_num,
+                            'content_type': 'text',
+                            'content': para.strip(),
+                            'word_count': len(para.split()),
+                            'char_count': len(para)
+                        })
+        
+        # 提取表格
+        tables = page.extract_tables()
+        for table_num, table in enumerate(tables, 1):
+            if table:
+                # 处理表格数据
+                headers = table[0] if table else []
+                for row_num, row in enumerate(table[1:], 1):
+                    if row and any(cell for cell in row if cell):
+                        record = {
+                            'page_number': page_num,
+                            'table_number': table_num,
+                            'row_number': row_num,
+                            'content_type': 'table',
+                            'content': ' | '.join(str(cell) if cell else '' for cell in row)
+                        }
+                        # 添加表格列数据
+                        for col_num, (header, cell) in enumerate(zip(headers, row), 1):
+                            if header and cell:
+                                record[f'column_{col_num}_{header}'] = str(cell)
+                        
+                        records.append(record)
+        
+        return records
+    
     def parse_docx_enhanced(self, file_path: Path) -> Dict[str, Any]:
         """增强的Word文档解析"""
         try:
@@ -477,3 +485,33 @@ def parse_document_enhanced(file_path: Path) -> Dict[str, Any]:
     """
     parser = EnhancedDocumentParser()
     return parser.parse_document(file_path)
+
+
+def iter_pdf_pages(file_path: str, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, List[Dict[str, Any]], float]]:
+    """
+    逐页解析PDF（第 start+1 ~ end 页），每页处理完即释放该页缓存
+
+    Yields:
+        (页码, 该页记录列表, 耗时ms)
+    """
+    import pdfplumber
+
+    parser = EnhancedDocumentParser()
+    with pdfplumber.open(str(file_path)) as pdf:
+        end = len(pdf.pages) if end is None else end
+        for idx in range(start, end):
+            started = time.perf_counter()
+            page = pdf.pages[idx]
+            records = parser.extract_pdf_page_records(page, idx + 1)
+            page.flush_cache()
+            yield idx + 1, records, (time.perf_counter() - started) * 1000
+
+
+def parse_pdf_page_range(file_path: str, start: int, end: int) -> List[Tuple[int, List[Dict[str, Any]], float]]:
+    """
+    解析PDF第 start+1 ~ end 页（并行解析的进程池入口）
+
+    Returns:
+        [(页码, 该页记录列表, 耗时ms)]
+    """
+    return list(iter_pdf_pages(file_path, start, end))
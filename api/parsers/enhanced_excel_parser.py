@@ -4,13 +4,17 @@
 使用多种解析库确保最佳解析效果
 """
 
+import sys
 import pandas as pd
 import openpyxl
 import yaml
 import logging
 import hashlib
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from etl.tabular_stream import iter_table_batches, STREAMING_EXCEL_SUFFIXES
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +37,18 @@ class EnhancedExcelParser:
         """
         logger.info(f"开始增强解析Excel文件: {file_path}")
         
+        # xlsx按批次流式读取（openpyxl read_only），不整表载入内存
+        if Path(file_path).suffix.lower() in STREAMING_EXCEL_SUFFIXES:
+            try:
+                items = []
+                for batch_items in self.iter_parsed_batches(file_path, mapping_yaml):
+                    items.extend(batch_items)
+                if items:
+                    logger.info(f"Excel解析完成，共解析 {len(items)} 条记录")
+                    return items
+            except Exception as e:
+                logger.warning(f"流式读取失败，改用整表读取: {e}")
+        
         # 尝试多种解析引擎
         for engine in self.supported_engines:
             try:
@@ -59,6 +75,21 @@ class EnhancedExcelParser:
         logger.info(f"Excel解析完成，共解析 {len(items)} 条记录")
         return items
     
+    def iter_parsed_batches(self, file_path: Path, mapping_yaml: Path = None,
+                            batch_rows: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        按行批次流式解析Excel，每批产出解析后的记录列表
+        
+        列名映射只根据表头计算一次；行号（_row_number）为整个工作表中的行号
+        """
+        mapping = self._load_mapping_config(mapping_yaml)
+        column_mapping = None
+        for df in iter_table_batches(file_path, batch_rows=batch_rows):
+            if column_mapping is None:
+                logger.info(f"流式读取: 列名 {list(df.columns)}")
+                column_mapping = self._smart_column_mapping(df.columns, mapping)
+            yield self._parse_dataframe(df, column_mapping)
+    
     def _read_excel_with_engine(self, file_path: Path, engine: str) -> Optional[pd.DataFrame]:
         """使用指定引擎读取Excel"""
         try:
@@ -11,26 +11,31 @@ from pptx import Presentation
 from pptx.enum.shapes import MSO_SHAPE_TYPE
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
+import os
+import time
 import hashlib
 import logging
 from .ir_core import DocumentIR, IRBlock, BlockType, create_paragraph_block, create_table_block, create_figure_block
 from .ocr_engine import get_ocr_engine
+from .parallel_pages import resolve_workers, map_page_ranges
 
 logger = logging.getLogger(__name__)
 
 class EnhancedPPTXParser:
     """增强PPTX解析器"""
     
-    def __init__(self, use_ocr: bool = True, ocr_confidence: float = 0.5):
+    def __init__(self, use_ocr: bool = True, ocr_confidence: float = 0.5, workers: Optional[int] = None):
         """
         初始化解析器
         
         Args:
             use_ocr: 是否启用OCR
             ocr_confidence: OCR置信度阈值
+            workers: 并行解析幻灯片的进程数，默认读取 IR_PARSE_WORKERS，1为顺序解析
         """
         self.use_ocr = use_ocr
         self.ocr_confidence = ocr_confidence
+        self.workers = workers
         self.ocr_engine = get_ocr_engine() if use_ocr else None
     
     def parse(self, file_path: Path, output_dir: Path) -> DocumentIR:
@@ -63,40 +68,37 @@ class EnhancedPPTXParser:
                 "created": self._extract_created_time(prs)
             }
             
-            logger.info(f"PPTX基本信息: {len(prs.slides)}张幻灯片")
+            slide_count = len(prs.slides)
+            logger.info(f"PPTX基本信息: {slide_count}张幻灯片")
             
-            # 解析所有幻灯片
-            blocks = []
-            block_id_counter = 0
+            # 解析所有幻灯片：大文件按幻灯片分段并行，结果为 (页码, 块列表, 耗时ms)
+            workers = resolve_workers(self.workers, slide_count)
+            pages = None
+            if workers > 1:
+                try:
+                    pages = map_page_ranges(_parse_slide_range, slide_count, workers,
+                                            str(file_path), str(output_dir))
+                except Exception as e:
+                    logger.warning(f"幻灯片并行解析失败，改为顺序解析: {e}")
+            if pages is None:
+                workers = 1
+                pages = []
+                for slide_idx, slide in enumerate(prs.slides, start=1):
+                    started = time.perf_counter()
+                    slide_blocks = self._parse_slide(slide, slide_idx, output_dir)
+                    pages.append((slide_idx, slide_blocks, (time.perf_counter() - started) * 1000))
             
-            for slide_idx, slide in enumerate(prs.slides, start=1):
-                logger.debug(f"解析第{slide_idx}张幻灯片")
-                
-                # 处理文本框
-                text_blocks, block_id_counter = self._extract_text_blocks(
-                    slide, slide_idx, block_id_counter
-                )
-                blocks.extend(text_blocks)
-                
-                # 处理表格
-                table_blocks, block_id_counter = self._extract_table_blocks(
-                    slide, slide_idx, block_id_counter
-                )
-                blocks.extend(table_blocks)
-                
-                # 处理图表（核心突破功能）
-                chart_blocks, block_id_counter = self._extract_chart_blocks(
-                    slide, slide_idx, block_id_counter
-                )
-                blocks.extend(chart_blocks)
-                
-                # 处理图片
-                image_blocks, block_id_counter = self._extract_image_blocks(
-                    slide, slide_idx, block_id_counter, output_dir
-                )
-                blocks.extend(image_blocks)
+            blocks = self._merge_pages(pages)
             
-            logger.info(f"PPTX解析完成: 共{len(blocks)}个内容块")
+            # 图片OCR在所有幻灯片解析完成后批量执行
+            if self.use_ocr and self.ocr_engine:
+                self._apply_ocr([b for b in blocks if b.type == BlockType.FIGURE and b.image])
+            
+            meta["parse_mode"] = "parallel" if workers > 1 else "sequential"
+            meta["workers"] = workers
+            meta["page_timings"] = [{"page": page, "ms": round(ms, 2)} for page, _, ms in pages]
+            
+            logger.info(f"PPTX解析完成: 共{len(blocks)}个内容块（{meta['parse_mode']}, {workers}进程）")
             
             return DocumentIR(meta=meta, blocks=blocks)
             
@@ -104,6 +106,45 @@ class EnhancedPPTXParser:
             logger.error(f"PPTX解析失败: {e}")
             raise
     
+    def _parse_slide(self, slide, page: int, output_dir: Path) -> List[IRBlock]:
+        """
+        解析单张幻灯片（文本框、表格、图表、图片），不执行OCR
+
+        块ID从1开始编号，合并时按全局顺序重新编号
+        """
+        logger.debug(f"解析第{page}张幻灯片")
+        blocks = []
+        block_id = 0
+        
+        # 处理文本框
+        text_blocks, block_id = self._extract_text_blocks(slide, page, block_id)
+        blocks.extend(text_blocks)
+        
+        # 处理表格
+        table_blocks, block_id = self._extract_table_blocks(slide, page, block_id)
+        blocks.extend(table_blocks)
+        
+        # 处理图表（核心突破功能）
+        chart_blocks, block_id = self._extract_chart_blocks(slide, page, block_id)
+        blocks.extend(chart_blocks)
+        
+        # 处理图片（OCR由调用方批量执行）
+        image_blocks, block_id = self._extract_image_blocks(slide, page, block_id, output_dir, [])
+        blocks.extend(image_blocks)
+        
+        return blocks
+    
+    @staticmethod
+    def _merge_pages(pages: List[Tuple[int, List[IRBlock], float]]) -> List[IRBlock]:
+        """按页码顺序合并各幻灯片的块，块ID按全局顺序重新编号（与顺序解析结果一致）"""
+        blocks = []
+        for _, slide_blocks, _ in sorted(pages, key=lambda item: item[0]):
+            for block in slide_blocks:
+                prefix = block.id.rsplit("_", 1)[0]
+                block.id = f"{prefix}_{len(blocks) + 1}"
+                blocks.append(block)
+        return blocks
+    
     def _extract_title(self, prs: Presentation) -> str:
         """提取演示文稿标题"""
         try:
@@ -242,10 +283,16 @@ class EnhancedPPTXParser:
         
         return blocks, block_id
     
-    def _extract_image_blocks(self, slide, page: int, start_id: int, output_dir: Path) -> Tuple[List[IRBlock], int]:
-        """提取图片并进行OCR识别"""
+    def _extract_image_blocks(self, slide, page: int, start_id: int, output_dir: Path,
+                              pending_ocr: Optional[List[IRBlock]] = None) -> Tuple[List[IRBlock], int]:
+        """
+        提取图片并进行OCR识别
+
+        传入 pending_ocr 时只保存图片并登记待识别的图片块，由调用方统一批量识别
+        """
         blocks = []
         block_id = start_id
+        deferred = []
         
         for shape in slide.shapes:
             if self._is_image_shape(shape):
@@ -255,38 +302,52 @@ class EnhancedPPTXParser:
                     if not image_path:
                         continue
                     
-                    # OCR识别
-                    ocr_text = ""
-                    confidence = 0.0
-                    
-                    if self.use_ocr and self.ocr_engine:
-                        ocr_text = self.ocr_engine.extract_text(str(image_path), self.ocr_confidence)
-                        confidence = self.ocr_engine.get_text_confidence(str(image_path))
-                    
-                    # 判断图片类型
-                    figure_type = self._classify_figure_type(shape, ocr_text)
-                    
                     block_id += 1
                     
                     block = create_figure_block(
                         block_id=f"figure_{block_id}",
                         page=page,
                         image_path=str(image_path),
-                        ocr_text=ocr_text,
-                        figure_type=figure_type,
-                        confidence=confidence
+                        ocr_text="",
+                        figure_type=self._classify_figure_type(shape, ""),
+                        confidence=0.0
                     )
                     
                     blocks.append(block)
+                    if self.use_ocr and self.ocr_engine:
+                        deferred.append(block)
                     
-                    logger.debug(f"提取图片: {image_path.name}, OCR: {len(ocr_text)}字符")
+                    logger.debug(f"提取图片: {image_path.name}")
                     
                 except Exception as e:
                     logger.warning(f"图片处理失败: {e}")
                     continue
         
+        if pending_ocr is None:
+            self._apply_ocr(deferred)
+        else:
+            pending_ocr.extend(deferred)
+        
         return blocks, block_id
     
+    def _apply_ocr(self, pending: List[IRBlock]):
+        """批量识别图片块（每张图片只识别一次），回填OCR文本、置信度和图片类型"""
+        if not pending:
+            return
+        try:
+            results = self.ocr_engine.recognize_batch([block.image for block in pending])
+        except Exception as e:
+            logger.warning(f"图片OCR失败: {e}")
+            return
+        
+        for block, result in zip(pending, results):
+            block.ocr_text = result.text(self.ocr_confidence)
+            block.confidence = result.confidence
+            # 尺寸比例已判定为图表的保持不变，其余按OCR文本再判断
+            if block.figure_type == "photo":
+                block.figure_type = self._classify_figure_by_text(block.ocr_text) or "photo"
+            logger.debug(f"图片OCR: {Path(block.image).name}, {len(block.ocr_text)}字符")
+    
     def _extract_chart_data(self, chart) -> List[List[str]]:
         """
         从图表对象提取原始数据
@@ -439,7 +500,10 @@ class EnhancedPPTXParser:
                 image_blob = shape.image.blob
                 image_hash = hashlib.md5(image_blob).hexdigest()[:8]
                 image_path = output_dir / f"slide_{page}_{image_hash}.png"
-                image_path.write_bytes(image_blob)
+                # 并行解析时多个进程可能写同一张图片，先写临时文件再原子替换
+                tmp_path = image_path.with_suffix(f".{os.getpid()}.tmp")
+                tmp_path.write_bytes(image_blob)
+                os.replace(tmp_path, image_path)
                 return image_path
             return None
         except Exception as e:
@@ -456,16 +520,34 @@ class EnhancedPPTXParser:
                     return "chart"
             
             # 基于OCR文本内容判断
-            if ocr_text:
-                chart_keywords = ["图", "表", "数据", "统计", "分析", "趋势", "%", "比例"]
-                if any(keyword in ocr_text for keyword in chart_keywords):
-                    return "chart"
-                
-                diagram_keywords = ["流程", "架构", "结构", "示意", "框图"]
-                if any(keyword in ocr_text for keyword in diagram_keywords):
-                    return "diagram"
-            
-            return "photo"
+            return self._classify_figure_by_text(ocr_text) or "photo"
             
         except:
             return "unknown"
+    
+    @staticmethod
+    def _classify_figure_by_text(ocr_text: str) -> Optional[str]:
+        """根据OCR文本判断图片类型，无法判断时返回None"""
+        if ocr_text:
+            chart_keywords = ["图", "表", "数据", "统计", "分析", "趋势", "%", "比例"]
+            if any(keyword in ocr_text for keyword in chart_keywords):
+                return "chart"
+            
+            diagram_keywords = ["流程", "架构", "结构", "示意", "框图"]
+            if any(keyword in ocr_text for keyword in diagram_keywords):
+                return "diagram"
+        
+        return None
+
+
+def _parse_slide_range(file_path: str, output_dir: str, start: int, end: int) -> List[Tuple[int, List[IRBlock], float]]:
+    """进程池入口：解析第 start+1 ~ end 张幻灯片（不执行OCR）"""
+    parser = EnhancedPPTXParser(use_ocr=False, workers=1)
+    prs = Presentation(file_path)
+    slides = prs.slides
+    pages = []
+    for idx in range(start, end):
+        started = time.perf_counter()
+        blocks = parser._parse_slide(slides[idx], idx + 1, Path(output_dir))
+        pages.append((idx + 1, blocks, (time.perf_counter() - started) * 1000))
+    return pages
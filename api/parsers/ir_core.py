@@ -130,9 +130,20 @@ class DocumentIR:
         with open(file_path, 'w', encoding='utf-8') as f:
             f.write(self.to_json())
     
+    def save_stream(self, file_path: Union[str, Path]) -> None:
+        """以IR流格式（JSON Lines，每行一个块）保存，可用 IRStreamReader 按页读取"""
+        from .ir_stream import IRStreamWriter
+        
+        with IRStreamWriter(file_path, self.meta) as writer:
+            writer.write_blocks(self.blocks)
+    
     @classmethod
     def load(cls, file_path: Union[str, Path]) -> 'DocumentIR':
-        """从文件加载"""
+        """从文件加载（兼容IR流格式）"""
+        from .ir_stream import IRStreamReader
+        
+        if IRStreamReader.is_stream(file_path):
+            return IRStreamReader(file_path).to_document()
         with open(file_path, 'r', encoding='utf-8') as f:
             return cls.from_json(f.read())
     
@@ -269,58 +280,61 @@ class IRConverter:
             "title": file_info.get("filename", "")
         }
         
-        blocks = []
-        for record in legacy_data.get("raw_data", []):
-            content_type = record.get("content_type", "paragraph")
+        blocks = [IRConverter.block_from_record(record) for record in legacy_data.get("raw_data", [])]
+        
+        return DocumentIR(meta=meta, blocks=blocks)
 
-            # 映射旧版格式的content_type到新的BlockType
-            if content_type in ["text", "paragraph"]:
-                block = IRBlock(
-                    id=record.get("block_id", f"b_{record.get('_row_number', 1)}"),
-                    type=BlockType.PARAGRAPH,
-                    page=record.get("page_number", 1),
-                    text=record.get("content", ""),
-                    style=record.get("style")
-                )
-            elif content_type == "table":
-                # 重建表格数据 - 从旧格式的列数据重建
-                cells = []
-                content = record.get("content", "")
-                if content and "|" in content:
-                    # 简单的表格行解析
-                    row = [cell.strip() for cell in content.split("|")]
-                    cells = [row]
+    @staticmethod
+    def block_from_record(record: Dict[str, Any]) -> IRBlock:
+        """把一条旧版格式记录转换为IR内容块"""
+        content_type = record.get("content_type", "paragraph")
 
-                block = IRBlock(
-                    id=record.get("block_id", f"t_{record.get('_row_number', 1)}"),
-                    type=BlockType.TABLE,
-                    page=record.get("page_number", 1),
-                    cells=cells
-                )
-            elif content_type == "figure":
-                block = IRBlock(
-                    id=record.get("block_id", f"f_{record.get('_row_number', 1)}"),
-                    type=BlockType.FIGURE,
-                    page=record.get("page_number", 1),
-                    image=record.get("image_path"),
-                    ocr_text=record.get("ocr_text"),
-                    caption=record.get("caption"),
-                    figure_type=record.get("figure_type"),
-                    confidence=record.get("confidence")
-                )
-            else:
-                # 默认作为段落处理
-                block = IRBlock(
-                    id=record.get("block_id", f"b_{record.get('_row_number', 1)}"),
-                    type=BlockType.PARAGRAPH,
-                    page=record.get("page_number", 1),
-                    text=record.get("content", ""),
-                    style=record.get("style")
-                )
+        # 映射旧版格式的content_type到新的BlockType
+        if content_type in ["text", "paragraph"]:
+            block = IRBlock(
+                id=record.get("block_id", f"b_{record.get('_row_number', 1)}"),
+                type=BlockType.PARAGRAPH,
+                page=record.get("page_number", 1),
+                text=record.get("content", ""),
+                style=record.get("style")
+            )
+        elif content_type == "table":
+            # 重建表格数据 - 从旧格式的列数据重建
+            cells = []
+            content = record.get("content", "")
+            if content and "|" in content:
+                # 简单的表格行解析
+                row = [cell.strip() for cell in content.split("|")]
+                cells = [row]
 
-            blocks.append(block)
-        
-        return DocumentIR(meta=meta, blocks=blocks)
+            block = IRBlock(
+                id=record.get("block_id", f"t_{record.get('_row_number', 1)}"),
+                type=BlockType.TABLE,
+                page=record.get("page_number", 1),
+                cells=cells
+            )
+        elif content_type == "figure":
+            block = IRBlock(
+                id=record.get("block_id", f"f_{record.get('_row_number', 1)}"),
+                type=BlockType.FIGURE,
+                page=record.get("page_number", 1),
+                image=record.get("image_path"),
+                ocr_text=record.get("ocr_text"),
+                caption=record.get("caption"),
+                figure_type=record.get("figure_type"),
+                confidence=record.get("confidence")
+            )
+        else:
+            # 默认作为段落处理
+            block = IRBlock(
+                id=record.get("block_id", f"b_{record.get('_row_number', 1)}"),
+                type=BlockType.PARAGRAPH,
+                page=record.get("page_number", 1),
+                text=record.get("content", ""),
+                style=record.get("style")
+            )
+
+        return block
 
 # 工具函数
 def create_paragraph_block(block_id: str, page: int, text: str, style: str = None) -> IRBlock:
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+IR流式读写（JSON Lines）
+大文档逐页写出内容块，不在内存中累积完整的 DocumentIR
+
+文件格式（每行一个紧凑JSON）：
+    {"kind": "header", "format": "kg-ir-stream", "version": 1, "meta": {...}}
+    {"id": ..., "type": ..., "page": ..., ...}      # IRBlock.to_dict()，每行一个块
+    {"kind": "footer", "blocks": N, "meta": {...}, "type_counts": {...}, "page_index": {...}}
+
+page_index 记录每页内容块所在的字节区间 [offset, length, count]，
+读取时按页直接seek，无需扫描整个文件。
+"""
+
+import os
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+from .ir_core import DocumentIR, IRBlock, BlockType
+
+STREAM_FORMAT = "kg-ir-stream"
+STREAM_VERSION = 1
+
+
+def _dumps(obj: Dict[str, Any]) -> bytes:
+    return (json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+class IRStreamWriter:
+    """逐块写出IR，内存占用只与页数相关（页索引），与块数无关"""
+
+    def __init__(self, file_path: Union[str, Path], meta: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            file_path: 输出文件路径（写入临时文件，close时原子替换）
+            meta: 文档元信息，可在close时补充
+        """
+        self.file_path = Path(file_path)
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        self.meta = dict(meta or {})
+        self.block_count = 0
+        self.type_counts: Dict[str, int] = {}
+        self._page_index: Dict[int, List[List[int]]] = {}
+        self._tmp_path = self.file_path.with_name(f"{self.file_path.name}.{os.getpid()}.tmp")
+        self._file = open(self._tmp_path, "wb")
+        self._offset = self._file.write(_dumps({
+            "kind": "header", "format": STREAM_FORMAT, "version": STREAM_VERSION, "meta": self.meta
+        }))
+
+    def write_block(self, block: IRBlock) -> None:
+        """写出一个内容块"""
+        line = _dumps(block.to_dict())
+        ranges = self._page_index.setdefault(block.page, [])
+        # 同一页连续写出的块合并为一个区间
+        if ranges and ranges[-1][0] + ranges[-1][1] == self._offset:
+            ranges[-1][1] += len(line)
+            ranges[-1][2] += 1
+        else:
+            ranges.append([self._offset, len(line), 1])
+        self._file.write(line)
+        self._offset += len(line)
+        self.block_count += 1
+        block_type = block.type.value if isinstance(block.type, BlockType) else block.type
+        self.type_counts[block_type] = self.type_counts.get(block_type, 0) + 1
+
+    def write_blocks(self, blocks: Iterable[IRBlock]) -> None:
+        for block in blocks:
+            self.write_block(block)
+
+    def close(self, meta: Optional[Dict[str, Any]] = None) -> Path:
+        """写出footer并替换为正式文件"""
+        if self._file.closed:
+            return self.file_path
+        if meta:
+            self.meta.update(meta)
+        self._file.write(_dumps({
+            "kind": "footer",
+            "blocks": self.block_count,
+            "meta": self.meta,
+            "type_counts": self.type_counts,
+            "page_index": {str(page): ranges for page, ranges in self._page_index.items()}
+        }))
+        self._file.close()
+        os.replace(self._tmp_path, self.file_path)
+        return self.file_path
+
+    def abort(self) -> None:
+        """放弃写入，删除临时文件"""
+        if not self._file.closed:
+            self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+    def __enter__(self) -> 'IRStreamWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class IRStreamReader:
+    """按需读取IR流文件：元信息和页索引常驻内存，内容块按页seek或逐行扫描"""
+
+    def __init__(self, file_path: Union[str, Path]):
+        self.file_path = Path(file_path)
+        with open(self.file_path, "rb") as f:
+            header = json.loads(f.readline())
+            if header.get("kind") != "header" or header.get("format") != STREAM_FORMAT:
+                raise ValueError(f"不是IR流文件: {self.file_path}")
+            self._blocks_start = f.tell()
+            footer_line = self._read_last_line(f)
+        footer = json.loads(footer_line)
+        if footer.get("kind") != "footer":
+            raise ValueError(f"IR流文件不完整（缺少footer）: {self.file_path}")
+        self.meta: Dict[str, Any] = footer.get("meta") or header.get("meta", {})
+        self.block_count: int = footer["blocks"]
+        self.type_counts: Dict[str, int] = footer.get("type_counts", {})
+        self.page_index: Dict[int, List[List[int]]] = {
+            int(page): ranges for page, ranges in footer.get("page_index", {}).items()
+        }
+
+    @staticmethod
+    def _read_last_line(f, chunk_size: int = 64 * 1024) -> bytes:
+        """从文件末尾向前查找最后一行（footer大小与页数成正比）"""
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        buffer = b""
+        position = end
+        while position > 0:
+            step = min(chunk_size, position)
+            position -= step
+            f.seek(position)
+            buffer = f.read(step) + buffer
+            newline = buffer.rstrip(b"\n").rfind(b"\n")
+            if newline >= 0:
+                return buffer[newline + 1:]
+        return buffer
+
+    @classmethod
+    def is_stream(cls, file_path: Union[str, Path]) -> bool:
+        """文件是否为IR流格式"""
+        try:
+            with open(file_path, "rb") as f:
+                header = json.loads(f.readline())
+            return isinstance(header, dict) and header.get("format") == STREAM_FORMAT
+        except (OSError, ValueError):
+            return False
+
+    @property
+    def pages(self) -> List[int]:
+        return sorted(self.page_index)
+
+    def iter_blocks(self) -> Iterator[IRBlock]:
+        """按写入顺序逐个读取内容块"""
+        with open(self.file_path, "rb") as f:
+            f.seek(self._blocks_start)
+            for _ in range(self.block_count):
+                yield IRBlock.from_dict(json.loads(f.readline()))
+
+    def get_blocks_by_page(self, page: int) -> List[IRBlock]:
+        """按页面获取内容块（通过页索引直接定位）"""
+        blocks = []
+        with open(self.file_path, "rb") as f:
+            for offset, length, _ in self.page_index.get(page, []):
+                f.seek(offset)
+                for line in f.read(length).splitlines():
+                    blocks.append(IRBlock.from_dict(json.loads(line)))
+        return blocks
+
+    def get_blocks_by_type(self, block_type: BlockType) -> Iterator[IRBlock]:
+        """按类型获取内容块（逐行扫描，不加载整个文档）"""
+        type_value = block_type.value if isinstance(block_type, BlockType) else block_type
+        if not self.type_counts.get(type_value):
+            return
+        marker = f'"type":"{type_value}"'.encode("utf-8")
+        with open(self.file_path, "rb") as f:
+            f.seek(self._blocks_start)
+            for _ in range(self.block_count):
+                line = f.readline()
+                # 先做字节级预筛选，命中后再解析JSON
+                if marker in line:
+                    block = IRBlock.from_dict(json.loads(line))
+                    if block.type.value == type_value:
+                        yield block
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """块数统计（来自footer，无需读取内容块）"""
+        return {
+            "total_blocks": self.block_count,
+            "paragraphs": self.type_counts.get(BlockType.PARAGRAPH.value, 0),
+            "tables": self.type_counts.get(BlockType.TABLE.value, 0),
+            "figures": self.type_counts.get(BlockType.FIGURE.value, 0),
+            "pages": self.meta.get("pages", len(self.page_index) or 1),
+            "file_type": self.meta.get("type", "unknown"),
+            "page_blocks": {page: sum(r[2] for r in ranges) for page, ranges in sorted(self.page_index.items())}
+        }
+
+    def to_document(self) -> DocumentIR:
+        """加载为完整的DocumentIR（小文档或需要兼容旧接口时使用）"""
+        return DocumentIR(meta=dict(self.meta), blocks=list(self.iter_blocks()))
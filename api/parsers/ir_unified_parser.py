@@ -11,25 +11,53 @@ from typing import Dict, Any, Optional
 import logging
 from .ir_core import DocumentIR, IRConverter
 from .enhanced_pptx_parser import EnhancedPPTXParser
+from .parallel_pages import resolve_workers, map_page_ranges
+from cache.parse_cache import parse_cache, file_sha256, config_fingerprint
 
 logger = logging.getLogger(__name__)
 
+# IR解析逻辑或IR结构变化时递增，使已缓存的IR失效
+IR_PARSER_VERSION = "2"
+
+def _relative_assets(ir_dict: Dict[str, Any], output_dir: Path) -> Dict[str, Any]:
+    """缓存前把图片路径改为相对输出目录的路径（缓存不依赖首次上传的目录）"""
+    for block in ir_dict["blocks"]:
+        image = block.get("image")
+        if image:
+            try:
+                block["image"] = Path(image).relative_to(output_dir).as_posix()
+            except ValueError:
+                pass
+    return ir_dict
+
+
+def _bind_assets(document_ir: DocumentIR, file_path: Path, output_dir: Path) -> DocumentIR:
+    """缓存命中时把相对路径还原到本次上传的输出目录，并更新文件标识"""
+    for block in document_ir.blocks:
+        if block.image:
+            block.image = str(output_dir / block.image)
+    document_ir.meta["file_id"] = file_path.stem
+    return document_ir
+
+
 class IRUnifiedParser:
     """统一IR解析器"""
     
-    def __init__(self, use_ocr: bool = True, ocr_confidence: float = 0.5):
+    def __init__(self, use_ocr: bool = True, ocr_confidence: float = 0.5, workers: Optional[int] = None):
         """
         初始化统一解析器
         
         Args:
             use_ocr: 是否启用OCR
             ocr_confidence: OCR置信度阈值
+            workers: PPTX/PDF按页并行解析的进程数，默认读取 IR_PARSE_WORKERS，1为顺序解析
         """
         self.use_ocr = use_ocr
         self.ocr_confidence = ocr_confidence
+        self.workers = workers
         
         # 初始化各格式解析器
-        self.pptx_parser = EnhancedPPTXParser(use_ocr=use_ocr, ocr_confidence=ocr_confidence)
+        self.pptx_parser = EnhancedPPTXParser(use_ocr=use_ocr, ocr_confidence=ocr_confidence, workers=workers)
         
         # TODO: 后续添加其他格式解析器
         # self.docx_parser = EnhancedDOCXParser(use_ocr=use_ocr, ocr_confidence=ocr_confidence)
@@ -49,9 +77,23 @@ class IRUnifiedParser:
         try:
             logger.info(f"开始IR解析: {file_path} (格式: {file_ext})")
             
+            # 相同内容 + 相同OCR配置已解析过时直接返回缓存的IR
+            cache_key = parse_cache.make_key(
+                file_sha256(file_path), "ir_unified", IR_PARSER_VERSION,
+                config_fingerprint(file_ext.lower(), self.use_ocr, self.ocr_confidence))
             # 创建输出目录
             output_dir = file_path.parent / f"{file_path.stem}_assets"
             
+            cached = parse_cache.get(cache_key, "ir_unified")
+            if cached is not None:
+                # 图片从缓存复制到本次上传的输出目录，路径指向本次的文件
+                parse_cache.copy_assets(cache_key, output_dir)
+                return {
+                    'success': True,
+                    'ir': _bind_assets(DocumentIR.from_dict(cached), file_path, output_dir),
+                    'error': None
+                }
+            
             # 根据文件类型选择解析器
             if file_ext.lower() in {'.pptx', '.ppt'}:
                 document_ir = self._parse_pptx(file_path, output_dir)
@@ -71,6 +113,7 @@ class IRUnifiedParser:
                 }
             
             logger.info(f"IR解析成功: {len(document_ir.blocks)}个内容块")
+            parse_cache.put(cache_key, _relative_assets(document_ir.to_dict(), output_dir), assets_dir=output_dir)
             
             return {
                 'success': True,
@@ -132,36 +175,44 @@ class IRUnifiedParser:
             )
     
     def _parse_pdf(self, file_path: Path, output_dir: Path) -> DocumentIR:
-        """解析PDF文件（暂时使用旧版解析器）"""
+        """解析PDF文件（按页提取段落和表格行，页数较多时按页段并行）"""
         logger.info("使用PDF解析器（兼容模式）")
         
-        # 暂时使用旧版解析器，后续替换为增强版本
         try:
-            from .enhanced_document_parser import EnhancedDocumentParser
+            import pdfplumber
+            from .enhanced_document_parser import parse_pdf_page_range
             
-            # 临时重命名文件以便旧解析器识别
-            temp_path = file_path.with_suffix('.pdf')
-            file_path.rename(temp_path)
+            with pdfplumber.open(str(file_path)) as pdf:
+                page_count = len(pdf.pages)
             
-            try:
-                parser = EnhancedDocumentParser()
-                result = parser.parse_document(temp_path)
-                
-                if result['success']:
-                    # 转换旧格式为IR
-                    file_info = {
-                        'id': file_path.stem,
-                        'filename': file_path.name,
-                        'file_type': 'pdf'
-                    }
-                    return IRConverter.from_legacy_format(result['data'], file_info)
-                else:
-                    raise Exception(result.get('error', '解析失败'))
-                    
-            finally:
-                # 恢复原文件名
-                if temp_path.exists():
-                    temp_path.rename(file_path)
+            workers = resolve_workers(self.workers, page_count)
+            pages = None
+            if workers > 1:
+                try:
+                    pages = map_page_ranges(parse_pdf_page_range, page_count, workers, str(file_path))
+                except Exception as e:
+                    logger.warning(f"PDF并行解析失败，改为顺序解析: {e}")
+            if pages is None:
+                workers = 1
+                pages = parse_pdf_page_range(str(file_path), 0, page_count)
+            
+            # 按页顺序合并并统一编号，与逐页顺序解析的结果一致
+            raw_data = []
+            for _, records, _ in sorted(pages, key=lambda item: item[0]):
+                for record in records:
+                    raw_data.append({'_row_number': len(raw_data) + 1, **record})
+            
+            file_info = {
+                'id': file_path.stem,
+                'filename': file_path.name,
+                'file_type': 'pdf'
+            }
+            document_ir = IRConverter.from_legacy_format(
+                {'raw_data': raw_data, 'metadata': {'total_pages': page_count}}, file_info)
+            document_ir.meta["parse_mode"] = "parallel" if workers > 1 else "sequential"
+            document_ir.meta["workers"] = workers
+            document_ir.meta["page_timings"] = [{"page": page, "ms": round(ms, 2)} for page, _, ms in pages]
+            return document_ir
                     
         except Exception as e:
             logger.error(f"PDF解析失败: {e}")
@@ -265,7 +316,7 @@ class IRUnifiedParser:
             return {
                 'parser': 'EnhancedPPTXParser',
                 'version': '2.0',
-                'features': ['图表数据直取', 'OCR兜底', '文本提取', '表格提取', '图片提取'],
+                'features': ['图表数据直取', 'OCR兜底', '文本提取', '表格提取', '图片提取', '按幻灯片并行解析'],
                 'quality': 'enhanced'
             }
         elif file_ext in {'.docx', '.doc'}:
@@ -279,7 +330,7 @@ class IRUnifiedParser:
             return {
                 'parser': 'EnhancedDocumentParser',
                 'version': '1.0',
-                'features': ['文本提取', '表格提取'],
+                'features': ['文本提取', '表格提取', '按页并行解析'],
                 'quality': 'compatible'
             }
         elif file_ext == '.csv':
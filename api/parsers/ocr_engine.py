@@ -4,34 +4,94 @@
 """
 OCR引擎模块
 基于PaddleOCR实现文本和表格识别
+
+每张图片只识别一次，得到 OCRResult（文本行、坐标框、逐行置信度），
+文本提取和置信度都从同一结果派生；结果按图片内容SHA-256缓存
+（进程内LRU + 解析结果磁盘缓存），跨幻灯片/文档复用重复的Logo和模板图片。
 """
 
 import os
-import cv2
-import numpy as np
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Tuple, Dict, Any, Optional
+from typing import List, Tuple, Dict, Any, Optional, Sequence, Union
 import logging
 
+from cache.parse_cache import parse_cache, config_fingerprint
+
 # 设置日志
 logger = logging.getLogger(__name__)
 
+# 识别结果格式变化时递增，使磁盘缓存失效
+OCR_ENGINE_VERSION = "1"
+
+
+@dataclass
+class OCRLine:
+    """单行识别结果"""
+    text: str
+    confidence: float
+    box: List[List[float]] = field(default_factory=list)
+
+
+@dataclass
+class OCRResult:
+    """单张图片的识别结果"""
+    lines: List[OCRLine] = field(default_factory=list)
+    image_hash: str = ""
+    cached: bool = False
+
+    @property
+    def confidence(self) -> float:
+        """所有文本行的平均置信度"""
+        if not self.lines:
+            return 0.0
+        return sum(line.confidence for line in self.lines) / len(self.lines)
+
+    def text(self, confidence_threshold: float = 0.5) -> str:
+        """置信度高于阈值的文本行，按行拼接"""
+        return "\n".join(line.text for line in self.lines if line.confidence > confidence_threshold)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "image_hash": self.image_hash,
+            "lines": [{"text": l.text, "confidence": l.confidence, "box": l.box} for l in self.lines]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], cached: bool = False) -> 'OCRResult':
+        return cls(
+            lines=[OCRLine(text=l["text"], confidence=l["confidence"], box=l.get("box", []))
+                   for l in data.get("lines", [])],
+            image_hash=data.get("image_hash", ""),
+            cached=cached
+        )
+
+
 class OCREngine:
     """OCR识别引擎"""
     
-    def __init__(self, use_gpu: bool = False, lang: str = 'ch'):
+    def __init__(self, use_gpu: bool = False, lang: str = 'ch', cache_size: Optional[int] = None):
         """
         初始化OCR引擎
         
         Args:
             use_gpu: 是否使用GPU
             lang: 语言设置，'ch'为中文，'en'为英文
+            cache_size: 进程内识别结果缓存条数，默认读取 OCR_CACHE_SIZE
         """
         self.use_gpu = use_gpu
         self.lang = lang
         self._text_ocr = None
         self._table_ocr = None
         self._initialized = False
+        self.cache_size = cache_size if cache_size is not None else int(os.getenv("OCR_CACHE_SIZE", "1024"))
+        self._results: "OrderedDict[str, OCRResult]" = OrderedDict()
+        self._results_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
     
     def _init_engines(self):
         """延迟初始化OCR引擎"""
@@ -93,6 +153,117 @@ class OCREngine:
             self._init_engines()
         return self._table_ocr
     
+    def recognize(self, img_path: Union[str, Path]) -> OCRResult:
+        """
+        识别单张图片（命中缓存时不重复识别）
+
+        Args:
+            img_path: 图片路径
+
+        Returns:
+            OCRResult，图片不存在或OCR不可用时为空结果
+        """
+        return self.recognize_batch([img_path])[0]
+
+    def recognize_batch(self, img_paths: Sequence[Union[str, Path]]) -> List[OCRResult]:
+        """
+        批量识别图片，返回与输入顺序一致的结果
+
+        同一批次内内容相同的图片只识别一次；已缓存的图片直接复用。
+
+        Args:
+            img_paths: 图片路径列表
+
+        Returns:
+            OCRResult列表
+        """
+        results: List[Optional[OCRResult]] = [None] * len(img_paths)
+        pending: Dict[str, List[int]] = {}
+        first_path: Dict[str, str] = {}
+
+        for idx, img_path in enumerate(img_paths):
+            try:
+                image_hash = hashlib.sha256(Path(img_path).read_bytes()).hexdigest()
+            except OSError:
+                logger.error(f"图片文件不存在: {img_path}")
+                results[idx] = OCRResult()
+                continue
+            cached = self._cache_get(image_hash)
+            if cached is not None:
+                results[idx] = cached
+                continue
+            pending.setdefault(image_hash, []).append(idx)
+            first_path.setdefault(image_hash, str(img_path))
+
+        if pending:
+            if not self.text_ocr:
+                logger.warning(f"OCR引擎不可用，跳过{len(pending)}张图片的文本识别")
+            for image_hash, indices in pending.items():
+                result = self._run_ocr(first_path[image_hash], image_hash) if self.text_ocr else None
+                if result is None:
+                    result = OCRResult(image_hash=image_hash)
+                else:
+                    self._cache_put(result)
+                for idx in indices:
+                    results[idx] = result
+            logger.info(f"OCR批量识别完成: {len(img_paths)}张图片, 实际识别{len(pending)}张")
+
+        return results
+
+    def _run_ocr(self, img_path: str, image_hash: str) -> Optional[OCRResult]:
+        """执行一次OCR识别，失败返回None（不缓存）"""
+        try:
+            raw = self.text_ocr.ocr(img_path, cls=True)
+        except Exception as e:
+            logger.error(f"OCR识别失败 {img_path}: {e}")
+            return None
+
+        lines = []
+        for line in (raw[0] if raw and raw[0] else []):
+            if len(line) >= 2:
+                text, confidence = line[1]
+                box = [[float(x), float(y)] for x, y in line[0]] if line[0] is not None else []
+                lines.append(OCRLine(text=str(text), confidence=float(confidence), box=box))
+        if not lines:
+            logger.warning(f"OCR未识别到文本: {img_path}")
+        return OCRResult(lines=lines, image_hash=image_hash)
+
+    def _disk_key(self, image_hash: str) -> str:
+        return parse_cache.make_key(image_hash, "ocr", OCR_ENGINE_VERSION, config_fingerprint(self.lang))
+
+    def _cache_get(self, image_hash: str) -> Optional[OCRResult]:
+        """进程内LRU -> 磁盘缓存"""
+        with self._results_lock:
+            result = self._results.get(image_hash)
+            if result is not None:
+                self._results.move_to_end(image_hash)
+                self.cache_hits += 1
+                return result
+
+        data = parse_cache.get(self._disk_key(image_hash), "ocr")
+        if data is None:
+            with self._results_lock:
+                self.cache_misses += 1
+            return None
+        result = OCRResult.from_dict(data, cached=True)
+        self._remember(result)
+        with self._results_lock:
+            self.cache_hits += 1
+        return result
+
+    def _cache_put(self, result: OCRResult):
+        self._remember(result)
+        parse_cache.put(self._disk_key(result.image_hash), result.to_dict())
+
+    def _remember(self, result: OCRResult):
+        if self.cache_size <= 0:
+            return
+        with self._results_lock:
+            self._results[result.image_hash] = result
+            self._results.move_to_end(result.image_hash)
+            while len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+
     def extract_text(self, img_path: str, confidence_threshold: float = 0.5) -> str:
         """
         提取图片中的文本
@@ -104,40 +275,7 @@ class OCREngine:
         Returns:
             识别出的文本
         """
-        try:
-            if not Path(img_path).exists():
-                logger.error(f"图片文件不存在: {img_path}")
-                return ""
-
-            # 检查OCR引擎是否可用
-            if not self.text_ocr:
-                logger.warning(f"OCR引擎不可用，跳过文本提取: {img_path}")
-                return ""
-
-            # 执行OCR识别
-            results = self.text_ocr.ocr(img_path, cls=True)
-
-            if not results or not results[0]:
-                logger.warning(f"OCR未识别到文本: {img_path}")
-                return ""
-
-            # 提取文本行
-            lines = []
-            for line in results[0]:
-                if len(line) >= 2:
-                    text, confidence = line[1]
-                    if confidence > confidence_threshold:
-                        lines.append(text)
-                    else:
-                        logger.debug(f"低置信度文本被过滤: {text} (置信度: {confidence:.2f})")
-
-            result_text = "\n".join(lines)
-            logger.info(f"OCR文本提取成功: {len(lines)}行, {len(result_text)}字符")
-            return result_text
-
-        except Exception as e:
-            logger.error(f"OCR文本提取失败 {img_path}: {e}")
-            return ""
+        return self.recognize(img_path).text(confidence_threshold)
     
     def extract_table(self, img_path: str, confidence_threshold: float = 0.5) -> List[List[str]]:
         """
@@ -255,28 +393,7 @@ class OCREngine:
         Returns:
             平均置信度
         """
-        try:
-            # 检查OCR引擎是否可用
-            if not self.text_ocr:
-                logger.warning("OCR引擎不可用，返回0置信度")
-                return 0.0
-
-            results = self.text_ocr.ocr(img_path, cls=True)
-
-            if not results or not results[0]:
-                return 0.0
-
-            confidences = []
-            for line in results[0]:
-                if len(line) >= 2:
-                    _, confidence = line[1]
-                    confidences.append(confidence)
-
-            return sum(confidences) / len(confidences) if confidences else 0.0
-
-        except Exception as e:
-            logger.error(f"获取置信度失败 {img_path}: {e}")
-            return 0.0
+        return self.recognize(img_path).confidence
     
     def preprocess_image(self, img_path: str, output_path: str = None) -> str:
         """
@@ -290,6 +407,8 @@ class OCREngine:
             处理后的图片路径
         """
         try:
+            import cv2
+
             # 读取图片
             img = cv2.imread(img_path)
             if img is None:
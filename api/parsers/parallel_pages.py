@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+按页/幻灯片并行解析
+PPTX幻灯片、PDF页面之间相互独立，大文件按连续页段拆分到进程池解析，
+结果按页段顺序合并，块顺序与顺序解析一致
+"""
+
+import os
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 每个工作进程分到的页段数：页段越多负载越均衡，但每个页段都要重新打开一次文件
+CHUNKS_PER_WORKER = 2
+
+
+def default_workers() -> int:
+    """并行解析进程数，读取 IR_PARSE_WORKERS（默认 min(4, CPU核数)）"""
+    return int(os.getenv("IR_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+def resolve_workers(workers: Optional[int], total_pages: int) -> int:
+    """
+    实际使用的进程数
+
+    页数少于 IR_PARSE_PARALLEL_MIN_PAGES（默认16）时进程启动开销大于收益，返回1（顺序解析）
+    """
+    min_pages = int(os.getenv("IR_PARSE_PARALLEL_MIN_PAGES", "16"))
+    workers = default_workers() if workers is None else workers
+    if workers <= 1 or total_pages < max(min_pages, 2):
+        return 1
+    return min(workers, total_pages)
+
+
+def split_ranges(total: int, chunks: int) -> List[Tuple[int, int]]:
+    """把 [0, total) 切成最多 chunks 个连续的 [start, end) 页段"""
+    chunks = max(1, min(chunks, total))
+    size, extra = divmod(total, chunks)
+    ranges = []
+    start = 0
+    for i in range(chunks):
+        end = start + size + (1 if i < extra else 0)
+        if end > start:
+            ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def iter_page_ranges(func: Callable[..., List[Any]], total_pages: int, workers: int, *args) -> Iterator[Any]:
+    """
+    在进程池中按页段执行 func(*args, start, end)，按页段顺序逐项产出结果
+
+    同时在途的页段不超过 workers * CHUNKS_PER_WORKER，消费方处理慢时不会堆积全部结果
+
+    Args:
+        func: 模块级函数（需可pickle），返回该页段内逐页的结果列表
+        total_pages: 总页数
+        workers: 进程数
+    """
+    ranges = deque(split_ranges(total_pages, workers * CHUNKS_PER_WORKER))
+    logger.info(f"并行解析: {total_pages}页, {workers}个进程, {len(ranges)}个页段")
+    # spawn：与解析任务进程池一致，子进程不继承父进程的线程和连接状态
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=multiprocessing.get_context("spawn")) as executor:
+        in_flight = deque()
+        while ranges or in_flight:
+            while ranges and len(in_flight) < workers * CHUNKS_PER_WORKER:
+                start, end = ranges.popleft()
+                in_flight.append(executor.submit(func, *args, start, end))
+            yield from in_flight.popleft().result()
+
+
+def map_page_ranges(func: Callable[..., List[Any]], total_pages: int, workers: int, *args) -> List[Any]:
+    """
+    在进程池中按页段执行 func(*args, start, end)，按页段顺序拼接各段返回的列表
+
+    Args:
+        func: 模块级函数（需可pickle），返回该页段内逐页的结果列表
+        total_pages: 总页数
+        workers: 进程数
+    """
+    return list(iter_page_ranges(func, total_pages, workers, *args))
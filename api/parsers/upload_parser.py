@@ -0,0 +1,652 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+上传文件解析任务
+
+/kg/files/{upload_id}/parse 的实际解析逻辑（txt/csv/Excel/PDF/Word/PPTX + 词典实体识别），
+在解析任务进程池中执行，不占用API事件循环。进度和状态通过 files.manager.set_status
+写入文件元数据；取消请求以标记文件传递，解析过程在页/行之间检查。
+解析结果按文件内容寻址缓存，同一文件重复上传时不再重新解析。
+"""
+
+import sys
+import json
+import importlib.util
+import time
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from files.manager import FileStatus, set_status, is_cancel_requested
+from cache.parse_cache import parse_cache, file_sha256, config_fingerprint
+
+# 与ETL/抽取器共用的词典匹配器（services/nlp，仅依赖标准库）
+sys.path.append(str(Path(__file__).resolve().parents[2] / "services" / "nlp"))
+from dictionary_matcher import get_dictionary_matcher
+
+logger = logging.getLogger(__name__)
+
+DICTIONARY_FILE = Path(__file__).resolve().parent.parent / "data" / "dictionary.json"
+
+# 解析逻辑或结果格式变化时递增，使已缓存的结果失效
+UPLOAD_PARSER_VERSION = "2"
+
+# IR内容块类型 -> 原始内容类型
+PPT_BLOCK_TYPES = {"paragraph": "PPT段落", "table": "PPT表格", "figure": "PPT图片"}
+
+# 进度写入元数据的最小间隔（秒）
+PROGRESS_INTERVAL = 1.0
+# 检查取消标记的最小间隔（秒）
+CANCEL_CHECK_INTERVAL = 0.2
+
+
+class ParseCancelled(BaseException):
+    """解析被取消（继承BaseException，不会被各格式解析分支的 except Exception 吞掉）"""
+
+
+class ParseProgress:
+    """解析进度上报：节流写入文件元数据，并在上报点检查取消请求"""
+
+    def __init__(self, upload_id: Optional[str] = None, interval: float = PROGRESS_INTERVAL):
+        """
+        Args:
+            upload_id: 上传ID，为None时不上报（直接调用解析函数时）
+            interval: 进度写入最小间隔，阶段变化时立即写入
+        """
+        self.upload_id = upload_id
+        self.interval = interval
+        self.percent = 0
+        self.stage = None
+        self._last_write = 0.0
+        self._last_check = 0.0
+
+    def __call__(self, percent: float, stage: str = "extracting") -> None:
+        if self.upload_id is None:
+            return
+        now = time.monotonic()
+        stage_changed = stage != self.stage
+        if not stage_changed and now - self._last_check < CANCEL_CHECK_INTERVAL:
+            return
+        self._last_check = now
+        if is_cancel_requested(self.upload_id):
+            raise ParseCancelled(self.upload_id)
+
+        percent = max(self.percent, min(int(percent), 99))
+        if stage_changed or (percent > self.percent and now - self._last_write >= self.interval):
+            self.percent, self.stage, self._last_write = percent, stage, now
+            set_status(self.upload_id, FileStatus.parsing, progress=percent, stage=stage)
+
+
+def extract_raw_content(file_path: Path, progress: Callable[..., None]) -> List[Dict[str, Any]]:
+    """按文件类型抽取原始内容块（占总进度0-80%）"""
+    file_ext = file_path.suffix.lower()
+    raw_content = []
+
+    try:
+        logger.info(f"开始解析文件: {file_path}, 类型: {file_ext}")
+
+        if file_ext == '.txt':
+            # 解析文本文件
+            logger.info(f"解析文本文件: {file_path}")
+            with open(file_path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+            logger.info(f"文本文件包含 {len(lines)} 行")
+
+            for i, line in enumerate(lines):
+                if line.strip():  # 跳过空行
+                    raw_content.append({
+                        "id": i + 1,
+                        "content": line.strip(),
+                        "type": "文本行",
+                        "line_number": i + 1
+                    })
+            logger.info(f"提取了 {len(raw_content)} 行有效内容")
+
+        elif file_ext in ['.csv']:
+            # 解析CSV文件
+            import csv
+            with open(file_path, 'r', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                for i, row in enumerate(reader):
+                    progress(progress.percent)
+                    raw_content.append({
+                        "id": i + 1,
+                        "content": str(row),
+                        "type": "CSV行",
+                        "row_number": i + 1,
+                        "data": row
+                    })
+
+        elif file_ext in ['.xlsx', '.xls']:
+            # 解析Excel文件
+            try:
+                if importlib.util.find_spec("pandas") is None:
+                    raise ImportError("No module named 'pandas'")
+                from etl.columnar import normalize_frame, join_columns
+                from etl.tabular_stream import iter_table_batches, estimate_rows
+                logger.info(f"按批次流式解析Excel文件: {file_path}")
+                total = estimate_rows(file_path) or 0
+                progress(10)
+
+                row_count = 0
+                for batch in iter_table_batches(file_path):
+                    # 按列转换：空值为None，时间戳转ISO格式，其余去除首尾空白
+                    frame = normalize_frame(batch)
+                    # 创建更友好的内容显示（跳过None值）
+                    contents = join_columns(frame)
+                    for content_str, row_dict in zip(contents, frame.to_dict("records")):
+                        row_count += 1
+                        raw_content.append({
+                            "id": row_count,
+                            "content": content_str,
+                            "type": "Excel行",
+                            "row_number": row_count,
+                            "data": row_dict
+                        })
+                    if total:
+                        progress(10 + 70 * min(row_count / total, 1))
+                logger.info(f"Excel文件包含 {row_count} 行数据")
+                progress(80)
+
+            except ImportError as e:
+                logger.warning(f"pandas未安装，无法解析Excel文件: {e}")
+                # 如果没有pandas，尝试使用openpyxl
+                try:
+                    import openpyxl
+                    logger.info(f"使用openpyxl解析Excel文件: {file_path}")
+                    wb = openpyxl.load_workbook(file_path)
+                    ws = wb.active
+
+                    # 获取表头
+                    headers = []
+                    for cell in ws[1]:
+                        headers.append(cell.value if cell.value else f"列{cell.column}")
+
+                    # 读取数据行
+                    for row_idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), 1):
+                        progress(80 * row_idx / max(ws.max_row - 1, 1))
+                        row_data = dict(zip(headers, row))
+                        content_parts = []
+                        for col, val in row_data.items():
+                            if val is not None:
+                                content_parts.append(f"{col}: {val}")
+                        content_str = " | ".join(content_parts)
+
+                        raw_content.append({
+                            "id": row_idx,
+                            "content": content_str,
+                            "type": "Excel行",
+                            "row_number": row_idx,
+                            "data": row_data
+                        })
+
+                except ImportError:
+                    logger.warning("openpyxl也未安装，将Excel文件作为二进制处理")
+                    with open(file_path, 'rb') as f:
+                        content = f.read()
+                    raw_content.append({
+                        "id": 1,
+                        "content": f"Excel文件 ({len(content)} 字节) - 需要安装pandas或openpyxl来解析内容",
+                        "type": "Excel文件",
+                        "size": len(content),
+                        "note": "请安装 pip install pandas openpyxl 来支持Excel解析"
+                    })
+            except Exception as e:
+                logger.error(f"Excel文件解析失败: {e}")
+                raw_content.append({
+                    "id": 1,
+                    "content": f"Excel解析失败: {str(e)}",
+                    "type": "错误",
+                    "error": str(e)
+                })
+
+        elif file_ext == '.pdf':
+            # 解析PDF文件
+            try:
+                logger.info(f"解析PDF文件: {file_path}")
+                import pdfplumber
+
+                with pdfplumber.open(str(file_path)) as pdf:
+                    logger.info(f"PDF包含 {len(pdf.pages)} 页")
+
+                    for page_num, page in enumerate(pdf.pages, 1):
+                        progress(80 * (page_num - 1) / max(len(pdf.pages), 1))
+                        text = page.extract_text()
+                        if text:
+                            # 将页面文本分割成段落
+                            paragraphs = [p.strip() for p in text.split('\n') if p.strip()]
+                            for para_num, para in enumerate(paragraphs, 1):
+                                if len(para) > 10:  # 过滤太短的段落
+                                    raw_content.append({
+                                        "id": len(raw_content) + 1,
+                                        "content": para,
+                                        "type": "PDF段落",
+                                        "page_number": page_num,
+                                        "paragraph_number": para_num,
+                                        "data": {
+                                            "页码": page_num,
+                                            "段落": para_num,
+                                            "内容": para
+                                        }
+                                    })
+
+                        # 提取表格
+                        tables = page.extract_tables()
+                        for table_num, table in enumerate(tables, 1):
+                            if table:
+                                headers = table[0] if table else []
+                                for row_num, row in enumerate(table[1:], 1):
+                                    if row and any(cell for cell in row if cell):
+                                        content_str = " | ".join(str(cell) if cell else '' for cell in row)
+                                        raw_content.append({
+                                            "id": len(raw_content) + 1,
+                                            "content": content_str,
+                                            "type": "PDF表格",
+                                            "page_number": page_num,
+                                            "table_number": table_num,
+                                            "row_number": row_num,
+                                            "data": dict(zip(headers, row)) if headers else {"内容": content_str}
+                                        })
+
+                        # 释放该页的字符/版面对象缓存，大PDF的内存不随页数累积
+                        page.flush_cache()
+
+                logger.info(f"PDF解析完成，提取了 {len(raw_content)} 个内容块")
+
+            except ImportError:
+                logger.warning("pdfplumber未安装，无法解析PDF文件")
+                raw_content.append({
+                    "id": 1,
+                    "content": "PDF解析失败 - 需要安装pdfplumber库",
+                    "type": "错误",
+                    "note": "请安装: pip install pdfplumber"
+                })
+            except Exception as e:
+                logger.error(f"PDF解析失败: {e}")
+                raw_content.append({
+                    "id": 1,
+                    "content": f"PDF解析失败: {str(e)}",
+                    "type": "错误",
+                    "error": str(e)
+                })
+
+        elif file_ext == '.docx':
+            # 解析新版Word文档 (.docx)
+            try:
+                logger.info(f"解析DOCX文档: {file_path}")
+                import docx
+
+                doc = docx.Document(str(file_path))
+                logger.info(f"DOCX文档包含 {len(doc.paragraphs)} 个段落和 {len(doc.tables)} 个表格")
+                total_parts = max(len(doc.paragraphs) + len(doc.tables), 1)
+
+                # 提取段落
+                for para_num, para in enumerate(doc.paragraphs, 1):
+                    progress(80 * para_num / total_parts)
+                    if para.text.strip():
+                        raw_content.append({
+                            "id": len(raw_content) + 1,
+                            "content": para.text.strip(),
+                            "type": "Word段落",
+                            "paragraph_number": para_num,
+                            "style": para.style.name if para.style else 'Normal',
+                            "data": {
+                                "段落号": para_num,
+                                "样式": para.style.name if para.style else 'Normal',
+                                "内容": para.text.strip()
+                            }
+                        })
+
+                # 提取表格
+                for table_num, table in enumerate(doc.tables, 1):
+                    progress(80 * (len(doc.paragraphs) + table_num) / total_parts)
+                    headers = []
+                    if table.rows:
+                        headers = [cell.text.strip() for cell in table.rows[0].cells]
+
+                    for row_num, row in enumerate(table.rows[1:], 1):
+                        row_data = [cell.text.strip() for cell in row.cells]
+                        if any(cell for cell in row_data if cell):
+                            content_str = " | ".join(row_data)
+                            data_dict = dict(zip(headers, row_data)) if headers else {"内容": content_str}
+
+                            raw_content.append({
+                                "id": len(raw_content) + 1,
+                                "content": content_str,
+                                "type": "Word表格",
+                                "table_number": table_num,
+                                "row_number": row_num,
+                                "data": data_dict
+                            })
+
+                logger.info(f"DOCX文档解析完成，提取了 {len(raw_content)} 个内容块")
+
+            except ImportError:
+                logger.warning("python-docx未安装，无法解析DOCX文档")
+                raw_content.append({
+                    "id": 1,
+                    "content": "DOCX解析失败 - 需要安装python-docx库",
+                    "type": "错误",
+                    "note": "请安装: pip install python-docx"
+                })
+            except Exception as e:
+                logger.error(f"DOCX文档解析失败: {e}")
+                raw_content.append({
+                    "id": 1,
+                    "content": f"DOCX文档解析失败: {str(e)}",
+                    "type": "错误",
+                    "error": str(e)
+                })
+
+        elif file_ext == '.doc':
+            # 解析旧版Word文档 (.doc)
+            try:
+                logger.info(f"解析DOC文档: {file_path}")
+
+                # 尝试使用docx2txt库
+                try:
+                    import docx2txt
+                    text = docx2txt.process(str(file_path))
+
+                    if text:
+                        # 将文本分割成段落
+                        paragraphs = [p.strip() for p in text.split('\n') if p.strip()]
+                        logger.info(f"DOC文档提取了 {len(paragraphs)} 个段落")
+
+                        for para_num, para in enumerate(paragraphs, 1):
+                            if len(para) > 5:  # 过滤太短的段落
+                                raw_content.append({
+                                    "id": len(raw_content) + 1,
+                                    "content": para,
+                                    "type": "DOC段落",
+                                    "paragraph_number": para_num,
+                                    "data": {
+                                        "段落号": para_num,
+                                        "内容": para
+                                    }
+                                })
+                    else:
+                        raw_content.append({
+                            "id": 1,
+                            "content": "DOC文档内容为空或无法提取",
+                            "type": "警告"
+                        })
+
+                except ImportError:
+                    # 如果docx2txt不可用，尝试使用python-docx（可能会失败）
+                    logger.warning("docx2txt未安装，尝试使用python-docx处理DOC文件")
+                    try:
+                        import docx
+                        doc = docx.Document(str(file_path))
+
+                        # 提取段落
+                        for para_num, para in enumerate(doc.paragraphs, 1):
+                            if para.text.strip():
+                                raw_content.append({
+                                    "id": len(raw_content) + 1,
+                                    "content": para.text.strip(),
+                                    "type": "DOC段落",
+                                    "paragraph_number": para_num,
+                                    "data": {
+                                        "段落号": para_num,
+                                        "内容": para.text.strip()
+                                    }
+                                })
+                    except Exception as docx_error:
+                        logger.error(f"python-docx处理DOC文件失败: {docx_error}")
+                        # 最后尝试作为文本文件读取
+                        try:
+                            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                                content = f.read()
+                            raw_content.append({
+                                "id": 1,
+                                "content": content[:1000] + ("..." if len(content) > 1000 else ""),
+                                "type": "DOC文本",
+                                "note": "作为文本文件读取，可能包含格式字符"
+                            })
+                        except Exception:
+                            raw_content.append({
+                                "id": 1,
+                                "content": "DOC文件解析失败 - 建议转换为DOCX格式",
+                                "type": "错误",
+                                "note": "旧版DOC格式需要特殊处理，建议安装: pip install docx2txt"
+                            })
+
+                logger.info(f"DOC文档解析完成，提取了 {len(raw_content)} 个内容块")
+
+            except Exception as e:
+                logger.error(f"DOC文档解析失败: {e}")
+                raw_content.append({
+                    "id": 1,
+                    "content": f"DOC文档解析失败: {str(e)}",
+                    "type": "错误",
+                    "error": str(e),
+                    "note": "建议将DOC文件转换为DOCX格式"
+                })
+
+        elif file_ext in ['.pptx', '.ppt']:
+            # 解析PPT文档（统一IR解析器，含图片OCR）
+            try:
+                logger.info(f"使用统一IR解析器解析PPT文档: {file_path}")
+                from parsers.ir_unified_parser import IRUnifiedParser
+
+                ir_result = IRUnifiedParser().parse_document(file_path, file_ext)
+                if not ir_result['success']:
+                    raise Exception(ir_result.get('error') or "IR解析失败")
+
+                for block in ir_result['ir'].blocks:
+                    if block.cells:
+                        content_str = "\n".join(" | ".join(str(cell) for cell in row) for row in block.cells)
+                    else:
+                        content_str = block.text or block.ocr_text or block.caption or ""
+                    if content_str.strip():
+                        raw_content.append({
+                            "id": len(raw_content) + 1,
+                            "content": content_str.strip(),
+                            "type": PPT_BLOCK_TYPES.get(block.type.value, "PPT内容"),
+                            "page_number": block.page,
+                            "data": {"页码": block.page, "内容": content_str.strip()}
+                        })
+
+                logger.info(f"PPT文档解析完成，提取了 {len(raw_content)} 个内容块")
+
+            except Exception as e:
+                logger.error(f"PPT文档解析失败: {e}")
+                raw_content.append({
+                    "id": 1,
+                    "content": f"PPT文档解析失败: {str(e)}",
+                    "type": "错误",
+                    "error": str(e)
+                })
+
+        else:
+            # 其他文件类型，尝试读取为文本
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+                raw_content.append({
+                    "id": 1,
+                    "content": content[:1000] + ("..." if len(content) > 1000 else ""),
+                    "type": f"{file_ext}文件",
+                    "full_length": len(content)
+                })
+            except UnicodeDecodeError:
+                # 二进制文件
+                with open(file_path, 'rb') as f:
+                    content = f.read()
+                raw_content.append({
+                    "id": 1,
+                    "content": f"二进制文件 ({len(content)} 字节)",
+                    "type": f"{file_ext}文件",
+                    "size": len(content)
+                })
+
+    except Exception as e:
+        logger.error(f"文件解析失败: {e}")
+        raw_content = [{
+            "id": 1,
+            "content": f"解析失败: {str(e)}",
+            "type": "错误",
+            "error": str(e)
+        }]
+
+    return raw_content
+
+
+def recognize_entities(raw_content: List[Dict[str, Any]], progress: Callable[..., None]) -> List[Dict[str, Any]]:
+    """实体识别（占总进度80-95%）：先用词典自动机一次扫描匹配术语/别名，再用通用关键词补充，按名称去重"""
+    entities = []
+
+    # 硬件质量相关关键词
+    component_keywords = ["屏幕", "电池", "摄像头", "充电", "接口", "处理器", "内存", "存储", "扬声器", "麦克风"]
+    symptom_keywords = ["故障", "异常", "错误", "失效", "损坏", "不良", "缺陷", "问题"]
+    test_keywords = ["测试", "检测", "验证", "检查", "评估", "测量"]
+
+    try:
+        matcher = get_dictionary_matcher(DICTIONARY_FILE)
+    except Exception as e:
+        logger.warning(f"词典匹配器不可用，仅使用关键词识别: {e}")
+        matcher = None
+
+    entity_id = 1
+    for index, item in enumerate(raw_content, 1):
+        progress(80 + 15 * index / len(raw_content), "recognizing")
+        content = item.get("content", "")
+
+        # 词典术语/别名（最左最长、互不重叠）
+        if matcher is not None:
+            for match in matcher.find_all(content):
+                entities.append({
+                    "id": entity_id,
+                    "name": match.term,
+                    "type": match.category,
+                    "confidence": 0.85 if match.alias else 0.9,
+                    "source_line": item.get("line_number", item.get("row_number", 1)),
+                    "context": content[:100],
+                    "matched_text": match.text,
+                    "span": [match.start, match.end]
+                })
+                entity_id += 1
+
+        # 检测组件
+        for keyword in component_keywords:
+            if keyword in content:
+                entities.append({
+                    "id": entity_id,
+                    "name": keyword,
+                    "type": "Component",
+                    "confidence": 0.8,
+                    "source_line": item.get("line_number", item.get("row_number", 1)),
+                    "context": content[:100]
+                })
+                entity_id += 1
+
+        # 检测症状
+        for keyword in symptom_keywords:
+            if keyword in content:
+                entities.append({
+                    "id": entity_id,
+                    "name": keyword,
+                    "type": "Symptom",
+                    "confidence": 0.7,
+                    "source_line": item.get("line_number", item.get("row_number", 1)),
+                    "context": content[:100]
+                })
+                entity_id += 1
+
+        # 检测测试
+        for keyword in test_keywords:
+            if keyword in content:
+                entities.append({
+                    "id": entity_id,
+                    "name": keyword,
+                    "type": "TestCase",
+                    "confidence": 0.6,
+                    "source_line": item.get("line_number", item.get("row_number", 1)),
+                    "context": content[:100]
+                })
+                entity_id += 1
+
+    # 去重实体
+    unique_entities = []
+    seen_names = set()
+    for entity in entities:
+        if entity["name"] not in seen_names:
+            unique_entities.append(entity)
+            seen_names.add(entity["name"])
+
+    return unique_entities
+
+
+def upload_cache_key(file_path: Path) -> str:
+    """解析结果缓存键：文件内容 + 解析器版本 + 扩展名（决定解析分支）+ 词典（决定实体识别）"""
+    return parse_cache.make_key(file_sha256(file_path), "upload_parser", UPLOAD_PARSER_VERSION,
+                                config_fingerprint(file_path.suffix.lower(), DICTIONARY_FILE))
+
+
+def _write_result(parse_result: Dict[str, Any], result_path: str) -> None:
+    # 先写临时文件再替换，状态接口不会读到半个结果；紧凑格式，大文件的结果体积和写入时间明显减少
+    logger.info(f"准备保存解析结果到: {result_path}")
+    tmp_path = Path(f"{result_path}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(parse_result, f, ensure_ascii=False, separators=(",", ":"))
+    tmp_path.replace(result_path)
+    logger.info(f"解析结果已保存到: {result_path}")
+
+
+def restore_cached_result(file_path: str, result_path: str, cache_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    相同内容的文件已解析过时，直接把缓存结果写为本次的解析结果
+
+    Returns:
+        命中时返回解析结果的统计信息，未命中返回None
+    """
+    cached = parse_cache.get(cache_key or upload_cache_key(Path(file_path)), "upload_parser")
+    if cached is None:
+        return None
+    cached["metadata"]["cache_hit"] = True
+    _write_result(cached, result_path)
+    return cached["metadata"]
+
+
+def parse_upload(upload_id: str, file_path: str, result_path: str) -> Dict[str, Any]:
+    """
+    解析上传文件并写入结果JSON（进程池入口，参数和返回值均可pickle）
+
+    Returns:
+        解析结果的统计信息
+    """
+    file_path = Path(file_path)
+    cache_key = upload_cache_key(file_path)
+    metadata = restore_cached_result(str(file_path), result_path, cache_key)
+    if metadata is not None:
+        return metadata
+
+    progress = ParseProgress(upload_id)
+    progress(0, "extracting")
+
+    file_ext = file_path.suffix.lower()
+    raw_content = extract_raw_content(file_path, progress)
+    progress(80, "recognizing")
+    unique_entities = recognize_entities(raw_content, progress)
+    relations = []
+    progress(95, "saving")
+
+    parse_result = {
+        "raw_data": raw_content,
+        "entities": unique_entities,
+        "relations": relations,
+        "metadata": {
+            "total_records": len(raw_content),
+            "total_entities": len(unique_entities),
+            "total_relations": len(relations),
+            "file_type": file_ext,
+            "file_size": file_path.stat().st_size,
+            "parse_time": datetime.now().isoformat()
+        }
+    }
+
+    _write_result(parse_result, result_path)
+    parse_cache.put(cache_key, parse_result)
+    return parse_result["metadata"]
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+因果链路内存邻接快照
+
+把因果/依赖类关系（CAUSES、DEPENDS_ON 及异常指导路径上的关系）一次性载入内存，
+按关系类型分别建立正向/反向CSR数组（offsets + 目标节点 + 边下标），
+在内存中做最优优先搜索，按链路置信度（各边置信度之积）降序返回前k条链路，
+替代每次请求在Cypher中展开 [:CAUSES*1..3] / [:DEPENDS_ON*1..N]。
+
+快照与图谱统计快照版本绑定，图谱有写入后重建；不可用时调用方退回Cypher查询。
+"""
+
+import os
+import math
+import time
+import heapq
+import asyncio
+import logging
+from array import array
+from itertools import count
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 载入快照的关系类型
+SNAPSHOT_REL_TYPES = ["CAUSES", "DEPENDS_ON", "HAS_SYMPTOM", "HAS_ROOTCAUSE", "RESOLVED_BY"]
+
+OUT = "out"
+IN = "in"
+
+
+class _CSR:
+    """单一关系类型、单一方向的CSR邻接"""
+
+    __slots__ = ("offsets", "targets", "edges")
+
+    def __init__(self, node_count: int, pairs: List[Tuple[int, int, int]]):
+        """pairs: (起点, 终点, 边下标)"""
+        counts = [0] * (node_count + 1)
+        for source, _, _ in pairs:
+            counts[source + 1] += 1
+        for i in range(node_count):
+            counts[i + 1] += counts[i]
+        self.offsets = array('l', counts)
+        cursor = list(counts[:node_count])
+        targets = [0] * len(pairs)
+        edges = [0] * len(pairs)
+        for source, target, edge in pairs:
+            slot = cursor[source]
+            targets[slot] = target
+            edges[slot] = edge
+            cursor[source] += 1
+        self.targets = array('l', targets)
+        self.edges = array('l', edges)
+
+    def neighbors(self, node: int):
+        """(相邻节点, 边下标) 迭代"""
+        start, end = self.offsets[node], self.offsets[node + 1]
+        for slot in range(start, end):
+            yield self.targets[slot], self.edges[slot]
+
+
+class AdjacencySnapshot:
+    """不可变邻接快照"""
+
+    def __init__(self, version: int, node_rows: List[Dict[str, Any]], edge_rows: List[Dict[str, Any]]):
+        self.version = version
+        self.built_at = time.time()
+
+        self.node_ids: List[str] = []
+        self.node_labels: List[Tuple[str, ...]] = []
+        self.node_props: List[Dict[str, Any]] = []
+        self._node_index: Dict[str, int] = {}
+        self._name_index: Dict[Tuple[str, str], List[int]] = {}
+        for row in node_rows:
+            if row['id'] in self._node_index:
+                continue
+            index = len(self.node_ids)
+            self._node_index[row['id']] = index
+            self.node_ids.append(row['id'])
+            labels = tuple(row.get('labels') or ())
+            props = row.get('props') or {}
+            self.node_labels.append(labels)
+            self.node_props.append(props)
+            name = props.get('name')
+            if name is not None:
+                for label in labels:
+                    self._name_index.setdefault((label, name), []).append(index)
+
+        self.edge_ids: List[str] = []
+        self.edge_types: List[str] = []
+        self.edge_props: List[Dict[str, Any]] = []
+        sources, targets, confidences = [], [], []
+        by_type: Dict[str, List[Tuple[int, int, int]]] = {}
+        for row in edge_rows:
+            source = self._node_index.get(row['source'])
+            target = self._node_index.get(row['target'])
+            if source is None or target is None:
+                continue
+            edge = len(self.edge_ids)
+            props = row.get('props') or {}
+            confidence = props.get('confidence')
+            self.edge_ids.append(row['id'])
+            self.edge_types.append(row['type'])
+            self.edge_props.append(props)
+            sources.append(source)
+            targets.append(target)
+            confidences.append(float(confidence) if isinstance(confidence, (int, float)) else math.nan)
+            by_type.setdefault(row['type'], []).append((source, target, edge))
+        self.edge_sources = array('l', sources)
+        self.edge_targets = array('l', targets)
+        self.edge_confidence = array('d', confidences)
+
+        node_count = len(self.node_ids)
+        self._csr: Dict[Tuple[str, str], _CSR] = {}
+        for rel_type, pairs in by_type.items():
+            self._csr[(rel_type, OUT)] = _CSR(node_count, pairs)
+            self._csr[(rel_type, IN)] = _CSR(node_count, [(t, s, e) for s, t, e in pairs])
+
+    @property
+    def node_count(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.edge_ids)
+
+    def find_nodes(self, label: str, name: str) -> List[int]:
+        """按标签+名称查找节点"""
+        return self._name_index.get((label, name), [])
+
+    def top_chains(self, starts: Sequence[int], rel_type: str, direction: str, max_depth: int,
+                   min_confidence: float, k: int, min_chain_confidence: Optional[float] = None,
+                   end_label: Optional[str] = None) -> List[Tuple[float, List[int], List[int]]]:
+        """
+        最优优先搜索置信度最高的k条链路
+
+        每条边置信度需 >= min_confidence（缺失置信度的边不参与），链路置信度为各边之积；
+        同一链路内关系不重复（与Cypher变长匹配语义一致），end_label限定终点标签。
+        置信度不超过1时，弹出顺序即链路置信度降序，找到k条即可停止。
+
+        Returns:
+            [(链路置信度, 节点下标序列, 边下标序列)]，节点序列从起点开始
+        """
+        csr = self._csr.get((rel_type, direction))
+        if csr is None or k <= 0 or max_depth <= 0:
+            return []
+        floor = min_chain_confidence if min_chain_confidence is not None else 0.0
+        tie = count()
+        heap = [(-1.0, next(tie), (start,), ()) for start in starts]
+        heapq.heapify(heap)
+        results = []
+        while heap and len(results) < k:
+            neg_score, _, nodes, edges = heapq.heappop(heap)
+            score = -neg_score
+            if edges and (end_label is None or end_label in self.node_labels[nodes[-1]]):
+                results.append((score, list(nodes), list(edges)))
+            if len(edges) >= max_depth:
+                continue
+            for neighbor, edge in csr.neighbors(nodes[-1]):
+                confidence = self.edge_confidence[edge]
+                # NaN 比较恒为False，缺失置信度的边被剪掉
+                if not confidence >= min_confidence or edge in edges:
+                    continue
+                next_score = score * confidence
+                if next_score < floor:
+                    continue
+                heapq.heappush(heap, (-next_score, next(tie), nodes + (neighbor,), edges + (edge,)))
+        return results
+
+    def match_pattern(self, start_label: str, start_name: str,
+                      steps: Sequence[Tuple[str, str, str]], limit: int) -> List[Tuple[List[int], List[int]]]:
+        """
+        固定模式匹配
+
+        Args:
+            steps: [(关系类型, 方向 out/in, 目标标签)]
+        Returns:
+            [(节点下标序列, 边下标序列)]，最多limit条
+        """
+        paths: List[Tuple[List[int], List[int]]] = []
+
+        def walk(nodes: List[int], edges: List[int]):
+            if len(paths) >= limit:
+                return
+            depth = len(edges)
+            if depth == len(steps):
+                paths.append((list(nodes), list(edges)))
+                return
+            rel_type, direction, label = steps[depth]
+            csr = self._csr.get((rel_type, direction))
+            if csr is None:
+                return
+            for neighbor, edge in csr.neighbors(nodes[-1]):
+                if label in self.node_labels[neighbor] and edge not in edges:
+                    nodes.append(neighbor)
+                    edges.append(edge)
+                    walk(nodes, edges)
+                    nodes.pop()
+                    edges.pop()
+
+        for start in self.find_nodes(start_label, start_name):
+            walk([start], [])
+        return paths[:limit]
+
+
+class AdjacencySnapshotService:
+    """邻接快照加载与刷新"""
+
+    def __init__(self, graph_db, version_source: Optional[Callable[[], int]] = None,
+                 rel_types: Optional[List[str]] = None, enabled: Optional[bool] = None):
+        self.graph_db = graph_db
+        self.version_source = version_source or (lambda: 0)
+        self.rel_types = rel_types or SNAPSHOT_REL_TYPES
+        if enabled is None:
+            enabled = os.getenv("GRAPH_SNAPSHOT_ENABLED", "true").lower() != "false"
+        self.enabled = enabled
+        self._snapshot: Optional[AdjacencySnapshot] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def snapshot(self) -> Optional[AdjacencySnapshot]:
+        return self._snapshot
+
+    async def _load(self, version: int) -> AdjacencySnapshot:
+        rel_pattern = "|".join(self.rel_types)
+        node_rows = await self.graph_db.fetch_data(f"""
+            MATCH (n)-[:{rel_pattern}]-()
+            WITH DISTINCT n
+            RETURN elementId(n) AS id, labels(n) AS labels, properties(n) AS props
+        """)
+        edge_rows = await self.graph_db.fetch_data(f"""
+            MATCH (a)-[r:{rel_pattern}]->(b)
+            RETURN elementId(r) AS id, type(r) AS type, properties(r) AS props,
+                   elementId(a) AS source, elementId(b) AS target
+        """)
+        return await asyncio.to_thread(AdjacencySnapshot, version, node_rows, edge_rows)
+
+    async def get_snapshot(self) -> Optional[AdjacencySnapshot]:
+        """获取与当前图谱版本一致的快照；未启用或加载失败时返回None（调用方退回Cypher）"""
+        if not self.enabled:
+            return None
+        version = self.version_source()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        async with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.version == version:
+                return snapshot
+            try:
+                started = time.perf_counter()
+                snapshot = await self._load(version)
+            except Exception as e:
+                logger.error(f"加载因果链路邻接快照失败，退回Cypher查询: {e}")
+                return None
+            self._snapshot = snapshot
+            logger.info(f"因果链路邻接快照已构建 v{version}: {snapshot.node_count} 节点, "
+                        f"{snapshot.edge_count} 关系, 耗时 {time.perf_counter() - started:.2f}s")
+            return snapshot
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分页游标的公共部分
+
+游标是URL安全的base64（无填充）编码的JSON对象，内容对客户端不透明。
+图谱分层分页（graph_tile_service）与列表接口的keyset分页（keyset_pagination）共用，
+游标无效或过期时统一抛出 CursorError，接口层转换为 409。
+"""
+
+import json
+import base64
+import binascii
+from typing import Any, Dict, Mapping
+
+
+class CursorError(ValueError):
+    """分页游标无效或已过期"""
+
+
+def pack_cursor(payload: Mapping[str, Any]) -> str:
+    """JSON对象 → 游标"""
+    raw = json.dumps(dict(payload), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def unpack_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    游标 → JSON对象
+
+    Raises:
+        CursorError: 不是合法的base64/JSON，或解码结果不是对象
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw.decode("utf-8"))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise CursorError(f"无效的分页游标: {e}")
+    if not isinstance(payload, dict):
+        raise CursorError("无效的分页游标")
+    return payload
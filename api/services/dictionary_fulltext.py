@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+词典术语的Neo4j全文索引
+
+启动时自动创建 term_alias_fulltext 全文索引（Term / Alias 的 name、description，
+cjk 分析器按二字组切分中文），/kg/dictionary/entries 的搜索改为
+db.index.fulltext.queryNodes 按相关度返回，不再用 toLower(...) CONTAINS 逐个节点扫描。
+
+setup_graph_constraints.py 另建有只含 Term、默认分析器的 term_fulltext，因此使用独立的索引名；
+同名索引的标签、属性或分析器与定义不一致时删除重建，索引上线后才启用全文检索。
+"""
+
+import re
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+TERM_FULLTEXT_INDEX = "term_alias_fulltext"
+TERM_FULLTEXT_LABELS = ("Term", "Alias")
+TERM_FULLTEXT_PROPERTIES = ("name", "description")
+TERM_FULLTEXT_ANALYZER = "cjk"
+
+# 等待索引填充完成的最长时间（秒）
+INDEX_ONLINE_TIMEOUT = 120
+
+CREATE_TERM_FULLTEXT_INDEX = f"""
+CREATE FULLTEXT INDEX {TERM_FULLTEXT_INDEX} IF NOT EXISTS
+FOR (n:{'|'.join(TERM_FULLTEXT_LABELS)}) ON EACH [{', '.join('n.' + p for p in TERM_FULLTEXT_PROPERTIES)}]
+OPTIONS {{indexConfig: {{`fulltext.analyzer`: '{TERM_FULLTEXT_ANALYZER}'}}}}
+"""
+
+SHOW_TERM_FULLTEXT_INDEX = """
+SHOW FULLTEXT INDEXES YIELD name, labelsOrTypes, properties, options
+WHERE name = $name
+RETURN labelsOrTypes, properties, options
+"""
+
+DROP_TERM_FULLTEXT_INDEX = f"DROP INDEX {TERM_FULLTEXT_INDEX} IF EXISTS"
+
+AWAIT_TERM_FULLTEXT_INDEX = "CALL db.awaitIndex($name, $timeout)"
+
+# 命中别名时归到所属术语；同一术语取最高得分
+_SEARCH_MATCH = """
+CALL db.index.fulltext.queryNodes($index, $query) YIELD node, score
+OPTIONAL MATCH (node)-[:ALIAS_OF]->(owner:Term)
+WITH CASE WHEN node:Term THEN node ELSE owner END AS t, score
+WHERE t IS NOT NULL
+WITH t, max(score) AS score
+OPTIONAL MATCH (t)-[:BELONGS_TO]->(c:Category)
+WITH t, c, score
+WHERE $category IS NULL OR c.name = $category
+"""
+
+SEARCH_COUNT_QUERY = _SEARCH_MATCH + "RETURN count(DISTINCT t) AS total"
+
+# 按 (score DESC, name, elementId) 游标分页，分页在收集标签、别名之前完成
+SEARCH_PAGE_QUERY = _SEARCH_MATCH + """
+  AND ($after_score IS NULL
+       OR score < $after_score
+       OR (score = $after_score AND (t.name > $after_name
+                                     OR (t.name = $after_name AND elementId(t) > $after_id))))
+WITH t, c, score
+ORDER BY score DESC, t.name, elementId(t)
+SKIP $skip
+LIMIT $limit
+OPTIONAL MATCH (t)-[:HAS_TAG]->(tag:Tag)
+OPTIONAL MATCH (a:Alias)-[:ALIAS_OF]->(t)
+WITH t, c, score,
+     collect(DISTINCT tag.name) as tags,
+     collect(DISTINCT a.name) as aliases
+RETURN t.name as term,
+       elementId(t) as id,
+       score,
+       t.description as description,
+       c.name as category,
+       tags,
+       aliases
+ORDER BY score DESC, term, id
+"""
+
+SEARCH_CURSOR_FIELDS = ("score", "name", "id")
+
+_LUCENE_PHRASE_ESCAPE = re.compile(r'(["\\])')
+_ALNUM_WORD = re.compile(r'[0-9A-Za-z]+')
+
+
+def lucene_query(search: str) -> Optional[str]:
+    """
+    用户输入 → Lucene查询
+
+    空白分隔的每个词都须命中：中文等按短语匹配（cjk分析器切成二字组，近似子串），
+    纯字母数字词按前缀匹配；无有效内容时返回None。
+    """
+    clauses = []
+    for word in search.split():
+        if _ALNUM_WORD.fullmatch(word):
+            clauses.append(f"+({word.lower()}* OR \"{word.lower()}\")")
+        else:
+            clauses.append('+"' + _LUCENE_PHRASE_ESCAPE.sub(r'\\\1', word) + '"')
+    return " ".join(clauses) or None
+
+
+def search_params(search: str, category: Optional[str], skip: int, limit: int,
+                  after: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    全文检索参数；after 为上一页最后一行的 (score, name, id)，给出时忽略 skip
+
+    limit 按原值传入查询，调用方需要判断是否有下一页时自行多取一行。
+    """
+    return {
+        "index": TERM_FULLTEXT_INDEX,
+        "query": lucene_query(search),
+        "category": category,
+        "after_score": after["score"] if after else None,
+        "after_name": after["name"] if after else None,
+        "after_id": after["id"] if after else None,
+        "skip": 0 if after else skip,
+        "limit": limit,
+    }
+
+
+def search_cursor(record) -> Dict[str, Any]:
+    return {"score": record["score"], "name": record["term"], "id": record["id"]}
+
+
+def index_matches(row: Dict[str, Any]) -> bool:
+    """SHOW INDEXES 返回的已有索引与定义是否一致（标签、属性、分析器）"""
+    config = (row.get("options") or {}).get("indexConfig") or {}
+    return (sorted(row.get("labelsOrTypes") or []) == sorted(TERM_FULLTEXT_LABELS)
+            and sorted(row.get("properties") or []) == sorted(TERM_FULLTEXT_PROPERTIES)
+            and config.get("fulltext.analyzer") == TERM_FULLTEXT_ANALYZER)
+
+
+class TermFulltextIndex:
+    """全文索引的创建状态；创建失败（如Neo4j未连接）时接口退回 CONTAINS 查询"""
+
+    def __init__(self):
+        self.ready = False
+
+    async def ensure(self, graph_db) -> bool:
+        """创建全文索引：同名索引定义不一致时删除重建，等待索引上线后标记为可用"""
+        self.ready = False
+        try:
+            existing = await graph_db.fetch_data(SHOW_TERM_FULLTEXT_INDEX, {"name": TERM_FULLTEXT_INDEX})
+            if existing and not index_matches(existing[0]):
+                logger.warning(f"全文索引 {TERM_FULLTEXT_INDEX} 的定义与预期不一致，删除重建: {existing[0]}")
+                await graph_db.fetch(DROP_TERM_FULLTEXT_INDEX)
+                existing = []
+            if not existing:
+                await graph_db.fetch(CREATE_TERM_FULLTEXT_INDEX)
+            await graph_db.fetch(AWAIT_TERM_FULLTEXT_INDEX,
+                                 {"name": TERM_FULLTEXT_INDEX, "timeout": INDEX_ONLINE_TIMEOUT})
+            self.ready = True
+            logger.info(f"Neo4j全文索引已就绪: {TERM_FULLTEXT_INDEX}")
+        except Exception as e:
+            logger.warning(f"Neo4j全文索引不可用，词典搜索使用CONTAINS查询: {e}")
+        return self.ready
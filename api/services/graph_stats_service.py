@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图谱统计快照服务
+
+一次刷新用一条查询（五个聚合子查询，一次往返）算出 /kg/stats、/kg/real-stats、
+/system/status、/kg/governance-data、/kg/graph-data 需要的全部统计，
+保存为带版本号的不可变快照，接口直接读内存。
+
+刷新时机：
+- 后台定时刷新（GRAPH_STATS_REFRESH_INTERVAL）
+- 本进程内的写入流程调用 mark_dirty()
+- 其他进程的写入（ETL、upsert、脚本）递增Redis中的缓存写版本号（CacheVersions），
+  后台任务每 GRAPH_STATS_CHANGE_POLL 秒比较一次 change_token，变化后刷新
+"""
+
+import os
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 全部统计一次往返：每个子查询各自聚合后 collect 成一行
+STATS_QUERY = """
+CALL {
+    MATCH (n)
+    WITH labels(n) AS labels, count(*) AS count
+    RETURN collect({labels: labels, count: count}) AS label_rows
+}
+CALL {
+    MATCH ()-[r]->()
+    WITH type(r) AS type, count(*) AS count
+    RETURN collect({type: type, count: count}) AS rel_rows
+}
+CALL {
+    MATCH (t:Term)
+    WITH t.category AS category, count(t) AS count
+    ORDER BY count DESC
+    RETURN collect({category: category, count: count}) AS term_categories
+}
+CALL {
+    MATCH (d:Dictionary)
+    WITH d.category AS category,
+         count(d) AS total,
+         sum(CASE WHEN d.description IS NULL OR d.description = '' OR d.description = 'N/A'
+                  THEN 1 ELSE 0 END) AS missing_desc,
+         sum(CASE WHEN NOT (d)-[:HAS_TAG]->() THEN 1 ELSE 0 END) AS missing_tags,
+         sum(CASE WHEN NOT (d)-[:HAS_ALIAS]->() THEN 1 ELSE 0 END) AS missing_aliases
+    ORDER BY total DESC
+    RETURN collect({category: category, total: total, missing_desc: missing_desc,
+                    missing_tags: missing_tags, missing_aliases: missing_aliases}) AS dictionary_rows
+}
+CALL {
+    MATCH (d:Dictionary)-[:HAS_TAG]->(t:Tag)
+    WITH t.name AS tag, count(d) AS count
+    ORDER BY count DESC
+    LIMIT 20
+    RETURN collect({tag: tag, count: count}) AS top_tags
+}
+RETURN label_rows, rel_rows, term_categories, dictionary_rows, top_tags
+"""
+
+
+@dataclass(frozen=True)
+class GraphStatsSnapshot:
+    """统计快照（只读）"""
+    version: int
+    computed_at: str
+    compute_seconds: float
+    total_nodes: int
+    total_relations: int
+    primary_label_counts: Dict[str, int]      # 按 labels(n)[0] 统计
+    label_counts: Dict[str, int]              # 按每个标签统计（多标签节点重复计入）
+    relation_type_counts: Dict[str, int]
+    term_categories: List[Dict[str, Any]]
+    dictionary: Dict[str, Any] = field(default_factory=dict)
+    label_set_counts: Dict[Tuple[str, ...], int] = field(default_factory=dict)  # 按 labels(n) 组合统计
+
+    def count(self, label: str) -> int:
+        """某标签的节点数"""
+        return self.label_counts.get(label, 0)
+
+    def count_any(self, labels: Iterable[str]) -> int:
+        """带有 labels 中任一标签的节点数（多标签节点只计一次）"""
+        wanted = set(labels)
+        return sum(count for combo, count in self.label_set_counts.items() if wanted.intersection(combo))
+
+    def primary_counts(self, labels: Iterable[str]) -> Dict[str, int]:
+        """带有 labels 中任一标签的节点按 labels(n)[0] 统计，数量降序"""
+        wanted = set(labels)
+        counts: Dict[str, int] = {}
+        for combo, count in self.label_set_counts.items():
+            if combo and wanted.intersection(combo):
+                counts[combo[0]] = counts.get(combo[0], 0) + count
+        return dict(sorted(counts.items(), key=lambda x: -x[1]))
+
+    def relation_count(self, types: Optional[Iterable[str]] = None) -> int:
+        """关系数；types 为None时为全部关系"""
+        if types is None:
+            return self.total_relations
+        return sum(self.relation_type_counts.get(rel_type, 0) for rel_type in set(types))
+
+
+class GraphStatsService:
+    """图谱统计服务"""
+
+    def __init__(self, graph_db, refresh_interval: Optional[float] = None, min_refresh_gap: float = 5.0,
+                 change_token: Optional[Callable[[], Awaitable[str]]] = None,
+                 change_poll_interval: Optional[float] = None):
+        """
+        Args:
+            change_token: 返回图谱写版本号的协程函数（跨进程写入检测），None表示只依赖 mark_dirty
+            change_poll_interval: 比较写版本号的间隔（秒），默认 GRAPH_STATS_CHANGE_POLL（10）
+        """
+        self.graph_db = graph_db
+        self.refresh_interval = refresh_interval or float(os.getenv("GRAPH_STATS_REFRESH_INTERVAL", "300"))
+        self.min_refresh_gap = min_refresh_gap
+        self.change_token = change_token
+        self.change_poll_interval = change_poll_interval or float(os.getenv("GRAPH_STATS_CHANGE_POLL", "10"))
+        self._token: Optional[str] = None
+        self._snapshot: Optional[GraphStatsSnapshot] = None
+        self._version = 0
+        self._dirty = False
+        self._refreshed_at = 0.0
+        self._lock = asyncio.Lock()
+        self._dirty_event: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def snapshot(self) -> Optional[GraphStatsSnapshot]:
+        """当前快照（可能为None）"""
+        return self._snapshot
+
+    async def _compute(self) -> GraphStatsSnapshot:
+        """计算全部统计（单条查询）"""
+        started = time.perf_counter()
+        rows = await self.graph_db.fetch_data(STATS_QUERY)
+        row = rows[0] if rows else {}
+
+        # 节点：按标签组合单次扫描，同时得到总数、首标签统计和各标签统计
+        total_nodes = 0
+        primary_label_counts: Dict[str, int] = {}
+        label_counts: Dict[str, int] = {}
+        label_set_counts: Dict[Tuple[str, ...], int] = {}
+        for item in row.get('label_rows') or []:
+            labels, count = item['labels'] or [], item['count']
+            total_nodes += count
+            label_set_counts[tuple(labels)] = label_set_counts.get(tuple(labels), 0) + count
+            if labels:
+                primary_label_counts[labels[0]] = primary_label_counts.get(labels[0], 0) + count
+            for label in labels:
+                label_counts[label] = label_counts.get(label, 0) + count
+
+        # 关系：按类型统计，总数由各类型求和
+        relation_type_counts = {item['type']: item['count'] for item in row.get('rel_rows') or []}
+
+        return GraphStatsSnapshot(
+            version=self._version + 1,
+            computed_at=datetime.now().isoformat(),
+            compute_seconds=round(time.perf_counter() - started, 4),
+            total_nodes=total_nodes,
+            total_relations=sum(relation_type_counts.values()),
+            primary_label_counts=dict(sorted(primary_label_counts.items(), key=lambda x: -x[1])),
+            label_counts=label_counts,
+            relation_type_counts=dict(sorted(relation_type_counts.items(), key=lambda x: -x[1])),
+            term_categories=list(row.get('term_categories') or []),
+            dictionary=self._dictionary_quality(row.get('dictionary_rows') or [], row.get('top_tags') or []),
+            label_set_counts=label_set_counts
+        )
+
+    @staticmethod
+    def _dictionary_quality(rows: List[Dict[str, Any]], top_tags: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Dictionary节点的分类分布与缺失项统计"""
+        categories: Dict[str, int] = {}
+        for row in rows:
+            category = row['category'] or 'Unknown'
+            categories[category] = categories.get(category, 0) + row['total']
+
+        return {
+            'total': sum(row['total'] for row in rows),
+            'missing_desc': sum(row['missing_desc'] for row in rows),
+            'missing_tags': sum(row['missing_tags'] for row in rows),
+            'missing_aliases': sum(row['missing_aliases'] for row in rows),
+            'categories': categories,
+            'top_tags': {row['tag']: row['count'] for row in top_tags}
+        }
+
+    async def _changed_elsewhere(self) -> bool:
+        """其他进程是否有写入（写版本号与上次刷新时不同）"""
+        if self.change_token is None:
+            return False
+        try:
+            return await self.change_token() != self._token
+        except Exception as e:
+            logger.debug(f"读取图谱写版本号失败: {e}")
+            return False
+
+    async def refresh(self, force: bool = False) -> GraphStatsSnapshot:
+        """刷新快照；并发调用合并为一次计算"""
+        requested_at = time.monotonic()
+        async with self._lock:
+            current = self._snapshot
+            # 等锁期间已有其他协程完成刷新
+            if current is not None and not force and not self._dirty and self._refreshed_at >= requested_at:
+                return current
+            self._dirty = False
+            if self.change_token is not None:
+                # 先记录版本号：计算期间的写入会在下次比较时再触发刷新
+                try:
+                    self._token = await self.change_token()
+                except Exception as e:
+                    logger.debug(f"读取图谱写版本号失败: {e}")
+            try:
+                snapshot = await self._compute()
+            except Exception:
+                self._dirty = True
+                raise
+            self._version = snapshot.version
+            self._snapshot = snapshot
+            self._refreshed_at = time.monotonic()
+            logger.info(f"图谱统计快照已刷新 v{snapshot.version}，耗时 {snapshot.compute_seconds}s")
+            return snapshot
+
+    async def get_snapshot(self) -> GraphStatsSnapshot:
+        """获取快照；尚无快照或已标记变更且后台任务未运行时同步刷新"""
+        snapshot = self._snapshot
+        if snapshot is None or (self._dirty and self._task is None):
+            return await self.refresh()
+        return snapshot
+
+    def mark_dirty(self, reason: str = ""):
+        """写入流程通知图谱已变更，后台任务将尽快刷新（可在工作线程中调用）"""
+        self._dirty = True
+        if self._dirty_event is not None and self._loop is not None:
+            try:
+                in_loop = asyncio.get_running_loop() is self._loop
+            except RuntimeError:
+                in_loop = False
+            if in_loop:
+                self._dirty_event.set()
+            else:
+                self._loop.call_soon_threadsafe(self._dirty_event.set)
+        logger.debug(f"图谱统计标记为待刷新: {reason}")
+
+    async def _refresh_loop(self):
+        """后台刷新：到期、收到变更通知或其他进程的写版本号变化时刷新"""
+        due = time.monotonic() + self.refresh_interval
+        while True:
+            timeout = max(0.0, due - time.monotonic())
+            if self.change_token is not None:
+                timeout = min(timeout, self.change_poll_interval)
+            try:
+                await asyncio.wait_for(self._dirty_event.wait(), timeout=timeout)
+                # 合并短时间内的连续写入
+                await asyncio.sleep(self.min_refresh_gap)
+            except asyncio.TimeoutError:
+                if time.monotonic() < due and not await self._changed_elsewhere():
+                    continue
+            self._dirty_event.clear()
+            try:
+                await self.refresh(force=True)
+            except Exception as e:
+                logger.error(f"后台刷新图谱统计失败: {e}")
+            due = time.monotonic() + self.refresh_interval
+
+    def start(self):
+        """启动后台刷新任务（需在事件循环中调用）"""
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._dirty_event = asyncio.Event()
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        """停止后台刷新任务"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._dirty_event = None
+            self._loop = None
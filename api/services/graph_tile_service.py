@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图谱分层浏览（LOD）服务
+
+一次性拉取精简的节点/边列表，用标签传播算法预计算社区，得到：
+- 顶层：社区节点（含规模、主分类、代表节点）及社区间连边权重
+- 下钻：按社区id分页返回成员节点及其内部连边
+- 展开：按节点id分页返回邻居
+
+索引与图谱统计快照版本绑定，统计快照刷新（图谱有写入）后自动重建。
+分页游标携带索引版本，索引重建后旧游标失效。
+"""
+
+import math
+import time
+import random
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.cursors import CursorError, pack_cursor, unpack_cursor
+
+logger = logging.getLogger(__name__)
+
+# 参与可视化的节点标签
+GRAPH_LABELS = ["Term", "Category", "Tag", "Component", "Symptom", "Tool",
+                "Process", "TestCase", "Material", "Role", "Metric"]
+
+# 标签映射：将Neo4j标签映射为前端期望的英文分类
+GRAPH_LABEL_MAPPING = {
+    'Term': 'Component',      # 术语 -> 组件
+    'Tag': 'Metric',          # 标签 -> 指标
+    'Category': 'Process',    # 分类 -> 流程
+    'Product': 'Component',   # 产品 -> 组件
+    'Component': 'Component', # 组件 -> 组件
+    'Anomaly': 'Symptom',     # 异常 -> 症状
+    'TestCase': 'TestCase',   # 测试用例 -> 测试用例
+    'Symptom': 'Symptom',     # 症状 -> 症状
+    'Tool': 'Tool',           # 工具 -> 工具
+    'Process': 'Process',     # 流程 -> 流程
+    'Metric': 'Metric',       # 指标 -> 指标
+    'Role': 'Role',           # 角色 -> 角色
+    'Material': 'Material'    # 材料 -> 材料
+}
+
+
+@dataclass
+class GraphTileIndex:
+    """预计算的分层索引"""
+    version: int
+    built_at: float
+    nodes: Dict[str, Dict[str, Any]]                 # id -> {id, name, category, description, degree, cluster}
+    edges: List[Tuple[str, str, str, float]]         # (source, target, type, confidence)
+    adjacency: Dict[str, List[int]]                  # id -> 边下标（按对端度数降序）
+    clusters: Dict[str, Dict[str, Any]]              # cluster_id -> 摘要
+    cluster_members: Dict[str, List[str]]            # cluster_id -> 成员id（按度数降序）
+    cluster_links: List[Dict[str, Any]]
+
+
+def encode_cursor(version: int, offset: int) -> str:
+    """编码分页游标"""
+    return pack_cursor({"v": version, "o": offset})
+
+
+def decode_cursor(cursor: Optional[str], version: int) -> int:
+    """解码分页游标，返回偏移量"""
+    if not cursor:
+        return 0
+    data = unpack_cursor(cursor)
+    try:
+        cursor_version, offset = int(data["v"]), int(data["o"])
+    except (KeyError, TypeError, ValueError):
+        raise CursorError("无效的分页游标")
+    if cursor_version != version:
+        raise CursorError("图谱已更新，分页游标已过期，请重新加载")
+    return max(0, offset)
+
+
+def label_propagation(node_ids: List[str], edges: List[Tuple[str, str, str, float]],
+                      degree: Dict[str, int], max_iterations: int = 20, seed: int = 42) -> Dict[str, str]:
+    """
+    标签传播社区发现（固定随机种子，结果可复现）
+
+    边权按对端度数做对数衰减，避免Tag/Category等枢纽节点把整张图并成一个社区。
+    """
+    neighbors: Dict[str, List[str]] = defaultdict(list)
+    for source, target, _, _ in edges:
+        if source != target:
+            neighbors[source].append(target)
+            neighbors[target].append(source)
+
+    labels = {node_id: node_id for node_id in node_ids}
+    order = sorted(node_ids)
+    rng = random.Random(seed)
+    for _ in range(max_iterations):
+        rng.shuffle(order)
+        changed = 0
+        for node_id in order:
+            adjacent = neighbors.get(node_id)
+            if not adjacent:
+                continue
+            weights: Dict[str, float] = defaultdict(float)
+            for other in adjacent:
+                weights[labels[other]] += 1.0 / math.log(2 + degree.get(other, 0))
+            top = max(weights.values())
+            candidates = sorted(label for label, weight in weights.items() if top - weight < 1e-9)
+            # 并列时保持原标签，否则随机选取（固定种子保证结果可复现）
+            if labels[node_id] in candidates:
+                continue
+            labels[node_id] = rng.choice(candidates)
+            changed += 1
+        if changed == 0:
+            break
+    return labels
+
+
+def build_tile_index(version: int, node_rows: List[Dict[str, Any]], edge_rows: List[Dict[str, Any]],
+                     min_cluster_size: int = 3, top_members: int = 5) -> GraphTileIndex:
+    """根据节点/边列表构建分层索引（纯计算，可在线程池中执行）"""
+    nodes: Dict[str, Dict[str, Any]] = {}
+    for row in node_rows:
+        desc = row.get('description') or ''
+        nodes[row['id']] = {
+            "id": row['id'],
+            "name": row.get('name') or 'Unknown',
+            "category": GRAPH_LABEL_MAPPING.get(row.get('label'), 'Component'),
+            "description": desc[:200] + "..." if len(desc) > 200 else desc,
+            "degree": 0
+        }
+
+    edges = [(row['source'], row['target'], row['type'], row.get('confidence') or 1.0)
+             for row in edge_rows if row['source'] in nodes and row['target'] in nodes]
+    for source, target, _, _ in edges:
+        nodes[source]["degree"] += 1
+        nodes[target]["degree"] += 1
+    degree = {node_id: node["degree"] for node_id, node in nodes.items()}
+
+    community = label_propagation(list(nodes), edges, degree)
+
+    # 过小的社区按分类归并，孤立节点不单独成簇
+    groups: Dict[str, List[str]] = defaultdict(list)
+    for node_id, label in community.items():
+        groups[label].append(node_id)
+    merged: Dict[str, List[str]] = defaultdict(list)
+    for label, members in groups.items():
+        if len(members) >= min_cluster_size:
+            merged[label] = members
+        else:
+            for node_id in members:
+                merged[f"misc:{nodes[node_id]['category']}"].append(node_id)
+
+    # 按规模排序分配稳定的簇id
+    ordered = sorted(merged.items(), key=lambda x: (-len(x[1]), x[0]))
+    clusters: Dict[str, Dict[str, Any]] = {}
+    cluster_members: Dict[str, List[str]] = {}
+    for index, (label, members) in enumerate(ordered):
+        cluster_id = f"c{index}"
+        members.sort(key=lambda node_id: (-degree[node_id], node_id))
+        for node_id in members:
+            nodes[node_id]["cluster"] = cluster_id
+        categories = Counter(nodes[node_id]["category"] for node_id in members)
+        representative = nodes[members[0]]["name"]
+        clusters[cluster_id] = {
+            "id": cluster_id,
+            "name": f"其他{categories.most_common(1)[0][0]}" if label.startswith("misc:") else representative,
+            "size": len(members),
+            "category": categories.most_common(1)[0][0],
+            "categories": dict(categories.most_common()),
+            "top_nodes": [{"id": node_id, "name": nodes[node_id]["name"]} for node_id in members[:top_members]],
+            "internal_relations": 0,
+            "external_relations": 0
+        }
+        cluster_members[cluster_id] = members
+
+    # 社区内/间连边统计与邻接表
+    link_weights: Counter = Counter()
+    adjacency: Dict[str, List[int]] = defaultdict(list)
+    for edge_index, (source, target, _, _) in enumerate(edges):
+        adjacency[source].append(edge_index)
+        if target != source:
+            adjacency[target].append(edge_index)
+        source_cluster, target_cluster = nodes[source]["cluster"], nodes[target]["cluster"]
+        if source_cluster == target_cluster:
+            clusters[source_cluster]["internal_relations"] += 1
+        else:
+            clusters[source_cluster]["external_relations"] += 1
+            clusters[target_cluster]["external_relations"] += 1
+            link_weights[tuple(sorted((source_cluster, target_cluster)))] += 1
+
+    def other_end(node_id: str, edge_index: int) -> str:
+        source, target = edges[edge_index][0], edges[edge_index][1]
+        return target if source == node_id else source
+
+    for node_id, edge_indexes in adjacency.items():
+        edge_indexes.sort(key=lambda i: (-degree[other_end(node_id, i)], i))
+
+    cluster_links = [{"source": a, "target": b, "weight": weight}
+                     for (a, b), weight in link_weights.most_common()]
+
+    return GraphTileIndex(
+        version=version,
+        built_at=time.time(),
+        nodes=nodes,
+        edges=edges,
+        adjacency=dict(adjacency),
+        clusters=clusters,
+        cluster_members=cluster_members,
+        cluster_links=cluster_links
+    )
+
+
+class GraphTileService:
+    """图谱分层浏览服务"""
+
+    def __init__(self, graph_db, graph_stats=None, min_cluster_size: int = 3):
+        self.graph_db = graph_db
+        self.graph_stats = graph_stats
+        self.min_cluster_size = min_cluster_size
+        self._index: Optional[GraphTileIndex] = None
+        self._lock = asyncio.Lock()
+
+    def _current_version(self) -> int:
+        """与统计快照版本对齐；没有统计服务时只构建一次"""
+        snapshot = self.graph_stats.snapshot if self.graph_stats else None
+        return snapshot.version if snapshot else 0
+
+    async def _load(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """拉取精简的节点与边列表"""
+        label_filter = ' OR '.join(f"n:{label}" for label in GRAPH_LABELS)
+        node_rows = await self.graph_db.fetch_data(f"""
+            MATCH (n)
+            WHERE {label_filter}
+            RETURN elementId(n) AS id,
+                   labels(n)[0] AS label,
+                   coalesce(n.name, n.term, 'Unknown') AS name,
+                   coalesce(n.description, n.definition, '') AS description
+        """)
+        edge_rows = await self.graph_db.fetch_data(f"""
+            MATCH (n)-[r]->(m)
+            WHERE ({label_filter}) AND ({label_filter.replace('n:', 'm:')})
+            RETURN elementId(n) AS source, elementId(m) AS target,
+                   type(r) AS type, coalesce(r.confidence, 1.0) AS confidence
+        """)
+        return node_rows, edge_rows
+
+    async def get_index(self) -> GraphTileIndex:
+        """获取分层索引，版本落后时重建"""
+        if self.graph_stats is not None and self.graph_stats.snapshot is None:
+            await self.graph_stats.get_snapshot()
+        version = self._current_version()
+        index = self._index
+        if index is not None and index.version == version:
+            return index
+
+        async with self._lock:
+            index = self._index
+            if index is not None and index.version == version:
+                return index
+            started = time.perf_counter()
+            node_rows, edge_rows = await self._load()
+            index = await asyncio.to_thread(
+                build_tile_index, version, node_rows, edge_rows, self.min_cluster_size
+            )
+            self._index = index
+            logger.info(f"图谱分层索引已构建 v{version}: {len(index.nodes)} 节点, "
+                        f"{len(index.edges)} 关系, {len(index.clusters)} 社区, "
+                        f"耗时 {time.perf_counter() - started:.2f}s")
+            return index
+
+    async def get_overview(self, max_clusters: int = 200, min_link_weight: int = 1) -> Dict[str, Any]:
+        """顶层社区概览"""
+        index = await self.get_index()
+        cluster_ids = list(index.clusters)[:max_clusters]
+        visible = set(cluster_ids)
+        links = [link for link in index.cluster_links
+                 if link["weight"] >= min_link_weight and link["source"] in visible and link["target"] in visible]
+        return {
+            "version": index.version,
+            "stats": {
+                "totalNodes": len(index.nodes),
+                "totalRelations": len(index.edges),
+                "totalClusters": len(index.clusters)
+            },
+            "clusters": [index.clusters[cluster_id] for cluster_id in cluster_ids],
+            "links": links
+        }
+
+    async def get_cluster(self, cluster_id: str, cursor: Optional[str] = None,
+                          limit: int = 200) -> Optional[Dict[str, Any]]:
+        """下钻社区：分页返回成员节点及已返回节点之间的内部关系"""
+        index = await self.get_index()
+        members = index.cluster_members.get(cluster_id)
+        if members is None:
+            return None
+        offset = decode_cursor(cursor, index.version)
+        page = members[offset:offset + limit]
+        # 关系只返回当前页节点与此前各页节点之间的边，逐页加载不会重复
+        loaded = set(members[:offset + len(page)])
+        page_ids = set(page)
+
+        relations = []
+        for node_id in page:
+            for edge_index in index.adjacency.get(node_id, []):
+                source, target, rel_type, confidence = index.edges[edge_index]
+                other = target if source == node_id else source
+                if other not in loaded:
+                    continue
+                # 两端都在当前页时只由源节点记录一次
+                if other in page_ids and source != node_id:
+                    continue
+                relations.append({"source": source, "target": target,
+                                  "type": rel_type, "confidence": confidence})
+
+        next_offset = offset + len(page)
+        return {
+            "version": index.version,
+            "cluster": index.clusters[cluster_id],
+            "nodes": [index.nodes[node_id] for node_id in page],
+            "relations": relations,
+            "next_cursor": encode_cursor(index.version, next_offset) if next_offset < len(members) else None
+        }
+
+    async def get_neighbors(self, node_id: str, cursor: Optional[str] = None, limit: int = 50,
+                            rel_types: Optional[List[str]] = None,
+                            min_confidence: float = 0.0) -> Optional[Dict[str, Any]]:
+        """展开节点：分页返回邻居节点及连边"""
+        index = await self.get_index()
+        node = index.nodes.get(node_id)
+        if node is None:
+            return None
+        offset = decode_cursor(cursor, index.version)
+
+        edge_indexes = index.adjacency.get(node_id, [])
+        if rel_types or min_confidence > 0:
+            type_set = set(rel_types or [])
+            edge_indexes = [i for i in edge_indexes
+                            if (not type_set or index.edges[i][2] in type_set)
+                            and index.edges[i][3] >= min_confidence]
+        page = edge_indexes[offset:offset + limit]
+
+        neighbors = {}
+        relations = []
+        for edge_index in page:
+            source, target, rel_type, confidence = index.edges[edge_index]
+            other = target if source == node_id else source
+            neighbors[other] = index.nodes[other]
+            relations.append({"source": source, "target": target,
+                              "type": rel_type, "confidence": confidence})
+
+        next_offset = offset + len(page)
+        return {
+            "version": index.version,
+            "node": node,
+            "total": len(edge_indexes),
+            "nodes": list(neighbors.values()),
+            "relations": relations,
+            "next_cursor": encode_cursor(index.version, next_offset) if next_offset < len(edge_indexes) else None
+        }
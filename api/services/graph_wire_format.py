@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图谱数据紧凑传输格式
+
+- compact：列式数组 + 字符串表，节点/关系各只出现一次，关系端点以节点下标引用；
+  固定列以外的字段放在 extra 列中原样保存，端点不在节点列表中的关系计入 dropped_links
+- 编码协商：Accept 含 application/x-msgpack 且已安装 msgpack 时返回 msgpack，
+  否则返回 JSON；Accept-Encoding 含 gzip 时对较大的响应体做 gzip 压缩
+- ndjson：逐行输出 meta / node / link / done 事件，边从 Neo4j 游标取出即发送；
+  中途出错时输出 error 事件并结束（不再输出 done）
+"""
+
+import gzip
+import json
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+GZIP_MIN_SIZE = 1024
+COMPACT_FORMAT_VERSION = 2
+
+NODE_COLUMNS = ("id", "name", "category", "description")
+LINK_COLUMNS = ("source", "target", "type", "confidence", "inferred")
+
+
+class StringTable:
+    """字符串表：相同字符串只保存一次，列中存下标"""
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self._index: Dict[str, int] = {}
+
+    def add(self, value: Optional[str]) -> int:
+        """返回字符串下标；None 记为 -1"""
+        if value is None:
+            return -1
+        index = self._index.get(value)
+        if index is None:
+            index = len(self.strings)
+            self._index[value] = index
+            self.strings.append(value)
+        return index
+
+
+def _extra_columns(rows: List[Dict[str, Any]], fixed) -> Dict[str, List[Any]]:
+    """固定列以外的字段按出现顺序各成一列，值原样保存，缺失记为 None"""
+    names: Dict[str, None] = {}
+    for row in rows:
+        for name in row:
+            if name not in fixed:
+                names.setdefault(name)
+    return {name: [row.get(name) for row in rows] for name in names}
+
+
+def to_compact_graph(nodes: List[Dict[str, Any]], links: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    将节点/关系列表编码为列式结构
+
+    Returns:
+        {"v", "strings", "nodes": {id, name, category, description, extra},
+         "links": {source, target, type, confidence, inferred, extra}, "dropped_links"}
+        其中字符串列存 strings 下标，links.source/target 存节点下标；
+        extra 为 {字段名: 值列}，保存固定列以外的字段（如 common_count、common_tags）；
+        dropped_links 为端点不在节点列表中而无法编码的关系数
+    """
+    table = StringTable()
+    position: Dict[str, int] = {}
+    node_columns = {name: [] for name in NODE_COLUMNS}
+    for node in nodes:
+        position[node["id"]] = len(node_columns["id"])
+        node_columns["id"].append(table.add(node["id"]))
+        node_columns["name"].append(table.add(node.get("name")))
+        node_columns["category"].append(table.add(node.get("category")))
+        node_columns["description"].append(table.add(node.get("description") or None))
+    node_columns["extra"] = _extra_columns(nodes, NODE_COLUMNS)
+
+    link_columns = {name: [] for name in LINK_COLUMNS}
+    kept = []
+    for link in links:
+        source, target = position.get(link["source"]), position.get(link["target"])
+        if source is None or target is None:
+            continue
+        kept.append(link)
+        link_columns["source"].append(source)
+        link_columns["target"].append(target)
+        link_columns["type"].append(table.add(link.get("type")))
+        link_columns["confidence"].append(link.get("confidence"))
+        link_columns["inferred"].append(link.get("inferred"))
+    link_columns["extra"] = _extra_columns(kept, LINK_COLUMNS)
+
+    dropped = len(links) - len(kept)
+    if dropped:
+        logger.warning(f"紧凑格式跳过 {dropped} 条端点不在节点列表中的关系")
+    return {
+        "v": COMPACT_FORMAT_VERSION,
+        "strings": table.strings,
+        "nodes": node_columns,
+        "links": link_columns,
+        "dropped_links": dropped
+    }
+
+
+def from_compact_graph(compact: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """解码列式结构（主要用于测试和Python客户端）"""
+    strings = compact["strings"]
+
+    def text(index: int) -> Optional[str]:
+        return strings[index] if index >= 0 else None
+
+    columns = compact["nodes"]
+    extra = columns.get("extra", {})
+    nodes = [{
+        "id": text(columns["id"][i]),
+        "name": text(columns["name"][i]),
+        "category": text(columns["category"][i]),
+        "description": text(columns["description"][i]) or "",
+        **{name: values[i] for name, values in extra.items()}
+    } for i in range(len(columns["id"]))]
+
+    columns = compact["links"]
+    extra = columns.get("extra", {})
+    links = [{
+        "source": nodes[columns["source"][i]]["id"],
+        "target": nodes[columns["target"][i]]["id"],
+        "type": text(columns["type"][i]),
+        "confidence": columns["confidence"][i],
+        "inferred": columns["inferred"][i],
+        **{name: values[i] for name, values in extra.items()}
+    } for i in range(len(columns["source"]))]
+    return {"nodes": nodes, "links": links}
+
+
+def _accepts(request: Optional[Request], header: str, token: str) -> bool:
+    if request is None:
+        return False
+    return token in request.headers.get(header, "").lower()
+
+
+def negotiated_response(payload: Dict[str, Any], request: Optional[Request]) -> Response:
+    """按 Accept / Accept-Encoding 选择 msgpack 或 JSON，并按需 gzip"""
+    if MSGPACK_AVAILABLE and _accepts(request, "accept", MSGPACK_MEDIA_TYPE):
+        body = msgpack.packb(payload, use_bin_type=True)
+        media_type = MSGPACK_MEDIA_TYPE
+    else:
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode("utf-8")
+        media_type = "application/json"
+
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if len(body) >= GZIP_MIN_SIZE and _accepts(request, "accept-encoding", "gzip"):
+        body = gzip.compress(body, compresslevel=5)
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def ndjson_line(event: Dict[str, Any]) -> bytes:
+    """单行NDJSON"""
+    return (json.dumps(event, ensure_ascii=False, separators=(',', ':')) + "\n").encode("utf-8")
+
+
+async def iter_graph_ndjson(meta: Dict[str, Any], rows: AsyncIterator[Dict[str, Any]],
+                            row_nodes: Callable[[Dict[str, Any]], Iterable[Tuple[str, Dict[str, Any]]]],
+                            row_link: Callable[[Dict[str, Any]], Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """
+    NDJSON事件流：meta → (node* link)* → done；节点首次出现时输出node事件
+
+    Args:
+        meta: meta事件的字段
+        rows: 关系行（每行含两端节点）
+        row_nodes: 行 → [(节点id, 节点字段)]
+        row_link: 行 → 关系字段
+    """
+    yield ndjson_line({"type": "meta", **meta})
+    seen_nodes = set()
+    link_count = 0
+    try:
+        async for row in rows:
+            for nid, node in row_nodes(row):
+                if nid not in seen_nodes:
+                    seen_nodes.add(nid)
+                    yield ndjson_line({"type": "node", **node})
+            link_count += 1
+            yield ndjson_line({"type": "link", **row_link(row)})
+    except Exception as e:
+        logger.error(f"流式输出图谱数据失败: {e}")
+        yield ndjson_line({"type": "error", "message": str(e)})
+        return
+    yield ndjson_line({"type": "done", "nodes": len(seen_nodes), "links": link_count})
+
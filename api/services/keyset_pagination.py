@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列表接口的游标（keyset）分页
+
+游标是不透明字符串，编码上一页最后一行的排序键（索引属性 key + elementId），
+下一页用 WHERE key >= 上次的 key 直接从索引位置继续，同 key 的行再按 elementId 排除已返回的行，
+不再 SKIP 前面的全部行；标签、别名等聚合只对本页的行计算。
+
+每页多取一行判断是否还有下一页，因此不需要为了翻页先 count 全部数据；
+总数由调用方按需单独计算并缓存。
+
+排序键所在的属性有索引时，key 非空的行按索引顺序读取：
+- 词典条目按 Term.name（term_name 索引）
+- 按标签列出节点按 name（Term 有 term_name 索引，Component、Symptom 等有 name 唯一约束）
+- 按类型列出关系按 source_hash（graph/neo4j_constraints.cypher 中的关系索引）
+key 为空的行（没有名称的节点、ETL写入的无 source_hash 关系）排在最后，按 elementId 排序，
+这一段每页仍需扫描这些行（O(N)）。游标中 key 为 None 表示已翻到这一段。
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from services.cursors import CursorError, pack_cursor, unpack_cursor
+
+CURSOR_VERSION = 2
+
+MAX_PAGE_SIZE = 1000
+
+# 游标中的排序键字段
+KEYSET_CURSOR_FIELDS = ("key", "id")
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def encode_cursor(values: Mapping[str, Any]) -> str:
+    """排序键 → 不透明游标（URL安全的base64，无填充）"""
+    return pack_cursor({"v": CURSOR_VERSION, **values})
+
+
+def decode_cursor(cursor: Optional[str], fields: Sequence[str]) -> Optional[Dict[str, Any]]:
+    """
+    游标 → 排序键；cursor 为空时返回None（第一页）
+
+    Raises:
+        CursorError: 游标格式错误、版本不符或缺少 fields 中的字段
+    """
+    if not cursor:
+        return None
+    values = unpack_cursor(cursor)
+    if values.get("v") != CURSOR_VERSION:
+        raise CursorError("无效的分页游标: 版本不匹配")
+    missing = [name for name in fields if name not in values]
+    if missing:
+        raise CursorError(f"无效的分页游标: 缺少字段 {', '.join(missing)}")
+    return {name: values[name] for name in fields}
+
+
+def clamp_page_size(page_size: int, maximum: int = MAX_PAGE_SIZE) -> int:
+    return max(1, min(int(page_size), maximum))
+
+
+def split_page(rows: Sequence[Any], limit: int,
+               cursor_of: Callable[[Any], Mapping[str, Any]]) -> Tuple[List[Any], Optional[str]]:
+    """
+    查询按 limit + 1 取数，多出的一行说明还有下一页
+
+    Returns:
+        (本页行, 下一页游标；没有下一页时为None)
+    """
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(cursor_of(rows[-1]))
+
+
+def cypher_identifier(name: str) -> str:
+    """
+    校验标签/关系类型名（无法参数化，只能拼入查询）并加反引号
+
+    Raises:
+        ValueError: 名称含字母、数字、下划线以外的字符
+    """
+    if not name or not _IDENTIFIER.match(name):
+        raise ValueError(f"无效的名称: {name!r}")
+    return f"`{name}`"
+
+
+@dataclass(frozen=True)
+class KeysetQueries:
+    """按 (key, elementId) 分页的三段查询"""
+    first: str    # 第一页：key IS NOT NULL，按 key 索引顺序读取
+    after: str    # 游标之后：key 上单独的范围谓词走索引查找
+    nulls: str    # key 为空的行：按 elementId 排序（$after_id 为空时从头开始）
+
+
+Fetch = Callable[[str, Dict[str, Any]], Awaitable[Sequence[Any]]]
+
+
+async def fetch_keyset_page(fetch: Fetch, queries: KeysetQueries, params: Dict[str, Any],
+                            after: Optional[Dict[str, Any]], limit: int) -> List[Any]:
+    """
+    按游标取 limit + 1 行：先取 key 非空的行，不足时接着从 key 为空的行补足
+
+    Args:
+        fetch: 执行查询的协程函数 (query, params) -> rows
+        params: 查询的其余参数（过滤条件等）
+        after: decode_cursor(cursor, KEYSET_CURSOR_FIELDS) 的结果，第一页为None
+    """
+    rows: List[Any] = []
+    null_after_id = None
+    if after is None or after["key"] is not None:
+        query = queries.first if after is None else queries.after
+        rows = list(await fetch(query, {
+            **params,
+            "after_key": after["key"] if after else None,
+            "after_id": after["id"] if after else None,
+            "limit": limit + 1
+        }))
+        if len(rows) > limit:
+            return rows
+    else:
+        null_after_id = after["id"]
+    rows += await fetch(queries.nulls, {**params, "after_key": None, "after_id": null_after_id,
+                                        "limit": limit + 1 - len(rows)})
+    return rows
+
+
+def _keyset_queries(match: str, key: str, element: str, body: str) -> KeysetQueries:
+    """match 后分别接三段游标条件，body 负责排序、LIMIT 和返回"""
+    return KeysetQueries(
+        first=f"""
+{match}
+WHERE {key} IS NOT NULL""" + body,
+        after=f"""
+{match}
+WHERE {key} >= $after_key
+  AND ({key} > $after_key OR {element} > $after_id)""" + body,
+        nulls=f"""
+{match}
+WHERE {key} IS NULL
+  AND ($after_id IS NULL OR {element} > $after_id)""" + body,
+    )
+
+
+# ---- 词典条目（按 name, elementId 排序）----
+
+# 过滤与分页在收集标签、别名之前完成；ORDER BY 中 name 为空的词条排在最后
+_DICTIONARY_PAGE_BODY = """
+OPTIONAL MATCH (t)-[:BELONGS_TO]->(c:Category)
+WITH t, c
+WHERE ($search IS NULL
+       OR toLower(t.name) CONTAINS toLower($search)
+       OR toLower(t.description) CONTAINS toLower($search))
+  AND ($category IS NULL OR c.name = $category)
+WITH t, c
+ORDER BY t.name, elementId(t)
+SKIP $skip
+LIMIT $limit
+OPTIONAL MATCH (t)-[:HAS_TAG]->(tag:Tag)
+OPTIONAL MATCH (a:Alias)-[:ALIAS_OF]->(t)
+WITH t, c,
+     collect(DISTINCT tag.name) as tags,
+     collect(DISTINCT a.name) as aliases
+RETURN t.name as term,
+       elementId(t) as id,
+       t.description as description,
+       c.name as category,
+       tags,
+       aliases
+ORDER BY term, id
+"""
+
+DICTIONARY_QUERIES = _keyset_queries("MATCH (t:Term)", "t.name", "elementId(t)", _DICTIONARY_PAGE_BODY)
+
+# 按 page 偏移分页（未传游标）：SKIP 本身需要逐行跳过，不区分 name 是否为空
+DICTIONARY_OFFSET_PAGE_QUERY = """
+MATCH (t:Term)""" + _DICTIONARY_PAGE_BODY
+
+DICTIONARY_COUNT_QUERY = """
+MATCH (t:Term)
+OPTIONAL MATCH (t)-[:BELONGS_TO]->(c:Category)
+WITH t, c
+WHERE ($search IS NULL
+       OR toLower(t.name) CONTAINS toLower($search)
+       OR toLower(t.description) CONTAINS toLower($search))
+  AND ($category IS NULL OR c.name = $category)
+RETURN count(t) as total
+"""
+
+
+def dictionary_filter_params(search: Optional[str], category: Optional[str]) -> Dict[str, Any]:
+    return {"search": search or None, "category": category}
+
+
+async def fetch_dictionary_page(fetch: Fetch, search: Optional[str], category: Optional[str],
+                                after: Optional[Dict[str, Any]], skip: int, limit: int) -> List[Any]:
+    """有游标或第一页时按 (name, elementId) 游标取数，否则按偏移取数；均多取一行"""
+    params = dictionary_filter_params(search, category)
+    if after is None and skip > 0:
+        return list(await fetch(DICTIONARY_OFFSET_PAGE_QUERY, {**params, "skip": skip, "limit": limit + 1}))
+    return await fetch_keyset_page(fetch, DICTIONARY_QUERIES, {**params, "skip": 0}, after, limit)
+
+
+def dictionary_cursor(record: Mapping[str, Any]) -> Dict[str, Any]:
+    return {"key": record["term"], "id": record["id"]}
+
+
+# ---- 按标签列出节点（按 name）/ 按类型列出关系（按 source_hash）----
+
+LABEL_PAGE_KEY = "name"
+RELATION_PAGE_KEY = "source_hash"
+
+
+def label_page_queries(label: str) -> KeysetQueries:
+    """按标签列出节点"""
+    return _keyset_queries(f"MATCH (n:{cypher_identifier(label)})", f"n.{LABEL_PAGE_KEY}", "elementId(n)", f"""
+WITH n
+ORDER BY n.{LABEL_PAGE_KEY}, elementId(n)
+LIMIT $limit
+RETURN elementId(n) as id, labels(n) as labels, properties(n) as properties
+""")
+
+
+def relation_page_queries(rel_type: str) -> KeysetQueries:
+    """按类型列出关系（含两端节点名称）"""
+    return _keyset_queries(f"MATCH (a)-[r:{cypher_identifier(rel_type)}]->(b)", f"r.{RELATION_PAGE_KEY}",
+                           "elementId(r)", f"""
+WITH a, r, b
+ORDER BY r.{RELATION_PAGE_KEY}, elementId(r)
+LIMIT $limit
+RETURN elementId(r) as id, type(r) as type,
+       elementId(a) as source_id, a.name as source,
+       elementId(b) as target_id, b.name as target,
+       properties(r) as properties
+""")
+
+
+def element_cursor(key: str) -> Callable[[Mapping[str, Any]], Dict[str, Any]]:
+    """排序键取自返回行的 properties[key]"""
+    def cursor_of(record: Mapping[str, Any]) -> Dict[str, Any]:
+        return {"key": record["properties"].get(key), "id": record["id"]}
+    return cursor_of
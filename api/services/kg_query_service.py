@@ -14,15 +14,41 @@ logger = logging.getLogger(__name__)
 class KGQueryService:
     """知识图谱查询服务"""
     
-    def __init__(self, uri: str, user: str, password: str):
-        """初始化"""
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+    def __init__(self, uri: str = None, user: str = None, password: str = None, driver=None):
+        """
+        初始化
+
+        Args:
+            driver: 共享驱动（由调用方管理生命周期）；未提供时按uri/user/password自建驱动
+        """
+        self._owns_driver = driver is None
+        self.driver = driver if driver is not None else GraphDatabase.driver(uri, auth=(user, password))
     
     def close(self):
-        """关闭连接"""
-        self.driver.close()
+        """关闭连接（共享驱动不关闭）"""
+        if self._owns_driver:
+            self.driver.close()
     
-    def diagnose(self, symptom: str, max_depth: int = 3, min_confidence: float = 0.6) -> Dict:
+    @staticmethod
+    def _snapshot_chains(path_index, chains, node_fields, relation_fields, reverse: bool = False) -> List[Dict]:
+        """把快照搜索结果转换为与Cypher查询一致的链路结构"""
+        formatted = []
+        for confidence, nodes, edges in chains:
+            if reverse:
+                nodes, edges = nodes[::-1], edges[::-1]
+            formatted.append({
+                'nodes': [{field: path_index.node_props[n].get(field) for field in node_fields} for n in nodes],
+                'relations': [
+                    {field: (path_index.edge_types[e] if field == 'type' else path_index.edge_props[e].get(field))
+                     for field in relation_fields}
+                    for e in edges
+                ],
+                'confidence': round(confidence, 3)
+            })
+        return formatted
+
+    def diagnose(self, symptom: str, max_depth: int = 3, min_confidence: float = 0.6,
+                 path_index=None) -> Dict:
         """
         故障诊断：查找症状的根因链路
         
@@ -30,39 +56,24 @@ class KGQueryService:
             symptom: 症状名称
             max_depth: 最大深度
             min_confidence: 最小置信度
+            path_index: 内存邻接快照（AdjacencySnapshot），提供时在内存中搜索因果链路
         
         Returns:
             诊断结果
         """
         with self.driver.session() as session:
-            # 查找因果链路
-            result = session.run("""
-                MATCH path = (symptom:Term {name: $symptom})<-[:CAUSES*1..3]-(cause:Term)
-                WHERE all(r in relationships(path) WHERE r.confidence >= $min_conf)
-                WITH path, 
-                     reduce(conf = 1.0, r in relationships(path) | conf * r.confidence) as chain_confidence
-                WHERE chain_confidence >= $min_conf
-                RETURN [n in nodes(path) | {name: n.name, category: n.category}] as nodes,
-                       [r in relationships(path) | {
-                           type: type(r), 
-                           confidence: r.confidence, 
-                           evidence: r.evidence,
-                           severity: r.severity,
-                           phase: r.phase
-                       }] as relations,
-                       chain_confidence
-                ORDER BY chain_confidence DESC
-                LIMIT 10
-            """, symptom=symptom, min_conf=min_confidence)
-            
-            causal_chains = []
-            for record in result:
-                causal_chains.append({
-                    'nodes': record['nodes'],
-                    'relations': record['relations'],
-                    'confidence': round(record['chain_confidence'], 3)
-                })
-            
+            if path_index is not None:
+                chains = path_index.top_chains(
+                    path_index.find_nodes('Term', symptom), 'CAUSES', 'in', 3,
+                    min_confidence, 10, min_chain_confidence=min_confidence, end_label='Term'
+                )
+                causal_chains = self._snapshot_chains(
+                    path_index, chains, ('name', 'category'),
+                    ('type', 'confidence', 'evidence', 'severity', 'phase')
+                )
+            else:
+                causal_chains = self._cypher_causal_chains(session, symptom, min_confidence)
+
             # 查找解决方案
             result = session.run("""
                 MATCH (symptom:Term {name: $symptom})-[r:RESOLVED_BY]->(solution:Term)
@@ -99,6 +110,36 @@ class KGQueryService:
                 'total_chains': len(causal_chains),
                 'total_solutions': len(solutions)
             }
+
+    def _cypher_causal_chains(self, session, symptom: str, min_confidence: float) -> List[Dict]:
+        """Cypher变长路径查询因果链路"""
+        result = session.run("""
+            MATCH path = (symptom:Term {name: $symptom})<-[:CAUSES*1..3]-(cause:Term)
+            WHERE all(r in relationships(path) WHERE r.confidence >= $min_conf)
+            WITH path, 
+                 reduce(conf = 1.0, r in relationships(path) | conf * r.confidence) as chain_confidence
+            WHERE chain_confidence >= $min_conf
+            RETURN [n in nodes(path) | {name: n.name, category: n.category}] as nodes,
+                   [r in relationships(path) | {
+                       type: type(r), 
+                       confidence: r.confidence, 
+                       evidence: r.evidence,
+                       severity: r.severity,
+                       phase: r.phase
+                   }] as relations,
+                   chain_confidence
+            ORDER BY chain_confidence DESC
+            LIMIT 10
+        """, symptom=symptom, min_conf=min_confidence)
+        
+        causal_chains = []
+        for record in result:
+            causal_chains.append({
+                'nodes': record['nodes'],
+                'relations': record['relations'],
+                'confidence': round(record['chain_confidence'], 3)
+            })
+        return causal_chains
     
     def get_prevention_measures(self, symptom: str, min_confidence: float = 0.6) -> Dict:
         """
@@ -215,7 +256,7 @@ class KGQueryService:
             }
     
     def get_dependencies(self, component: str, direction: str = 'both', 
-                        max_depth: int = 2, min_confidence: float = 0.6) -> Dict:
+                        max_depth: int = 2, min_confidence: float = 0.6, path_index=None) -> Dict:
         """
         获取组件依赖关系
         
@@ -224,74 +265,105 @@ class KGQueryService:
             direction: 方向 (upstream/downstream/both)
             max_depth: 最大深度
             min_confidence: 最小置信度
+            path_index: 内存邻接快照（AdjacencySnapshot），提供时在内存中搜索依赖链路
         
         Returns:
             依赖关系
         """
-        with self.driver.session() as session:
-            dependencies = {}
-            
-            # 上游依赖（当前组件依赖的其他组件）
-            if direction in ['upstream', 'both']:
-                result = session.run(f"""
-                    MATCH path = (comp:Term {{name: $component}})-[:DEPENDS_ON*1..{max_depth}]->(dep:Term)
-                    WHERE all(r in relationships(path) WHERE r.confidence >= $min_conf)
-                    WITH path,
-                         reduce(conf = 1.0, r in relationships(path) | conf * r.confidence) as chain_confidence
-                    RETURN [n in nodes(path) | {{name: n.name, category: n.category}}] as nodes,
-                           [r in relationships(path) | {{
-                               criticality: r.criticality,
-                               interface: r.interface,
-                               confidence: r.confidence,
-                               evidence: r.evidence
-                           }}] as relations,
-                           chain_confidence
-                    ORDER BY chain_confidence DESC
-                    LIMIT 20
-                """, component=component, min_conf=min_confidence)
-                
-                upstream = []
-                for record in result:
-                    upstream.append({
-                        'nodes': record['nodes'],
-                        'relations': record['relations'],
-                        'confidence': round(record['chain_confidence'], 3)
-                    })
-                dependencies['upstream'] = upstream
+        if path_index is not None:
+            dependencies = self._snapshot_dependencies(path_index, component, direction, max_depth, min_confidence)
+        else:
+            with self.driver.session() as session:
+                dependencies = self._cypher_dependencies(session, component, direction, max_depth, min_confidence)
+
+        return {
+            'component': component,
+            'direction': direction,
+            'dependencies': dependencies,
+            'total_upstream': len(dependencies.get('upstream', [])),
+            'total_downstream': len(dependencies.get('downstream', []))
+        }
+
+    def _snapshot_dependencies(self, path_index, component: str, direction: str,
+                               max_depth: int, min_confidence: float) -> Dict:
+        """内存快照中搜索依赖链路"""
+        starts = path_index.find_nodes('Term', component)
+        relation_fields = ('criticality', 'interface', 'confidence', 'evidence')
+        dependencies = {}
+        # 上游依赖（当前组件依赖的其他组件）
+        if direction in ['upstream', 'both']:
+            chains = path_index.top_chains(starts, 'DEPENDS_ON', 'out', max_depth, min_confidence, 20,
+                                           end_label='Term')
+            dependencies['upstream'] = self._snapshot_chains(
+                path_index, chains, ('name', 'category'), relation_fields
+            )
+        # 下游依赖（依赖当前组件的其他组件），路径方向为 dep -> comp
+        if direction in ['downstream', 'both']:
+            chains = path_index.top_chains(starts, 'DEPENDS_ON', 'in', max_depth, min_confidence, 20,
+                                           end_label='Term')
+            dependencies['downstream'] = self._snapshot_chains(
+                path_index, chains, ('name', 'category'), relation_fields, reverse=True
+            )
+        return dependencies
+
+    def _cypher_dependencies(self, session, component: str, direction: str,
+                             max_depth: int, min_confidence: float) -> Dict:
+        """Cypher变长路径查询依赖链路"""
+        dependencies = {}
+        # 上游依赖（当前组件依赖的其他组件）
+        if direction in ['upstream', 'both']:
+            result = session.run(f"""
+                MATCH path = (comp:Term {{name: $component}})-[:DEPENDS_ON*1..{max_depth}]->(dep:Term)
+                WHERE all(r in relationships(path) WHERE r.confidence >= $min_conf)
+                WITH path,
+                     reduce(conf = 1.0, r in relationships(path) | conf * r.confidence) as chain_confidence
+                RETURN [n in nodes(path) | {{name: n.name, category: n.category}}] as nodes,
+                       [r in relationships(path) | {{
+                           criticality: r.criticality,
+                           interface: r.interface,
+                           confidence: r.confidence,
+                           evidence: r.evidence
+                       }}] as relations,
+                       chain_confidence
+                ORDER BY chain_confidence DESC
+                LIMIT 20
+            """, component=component, min_conf=min_confidence)
             
-            # 下游依赖（依赖当前组件的其他组件）
-            if direction in ['downstream', 'both']:
-                result = session.run(f"""
-                    MATCH path = (dep:Term)-[:DEPENDS_ON*1..{max_depth}]->(comp:Term {{name: $component}})
-                    WHERE all(r in relationships(path) WHERE r.confidence >= $min_conf)
-                    WITH path,
-                         reduce(conf = 1.0, r in relationships(path) | conf * r.confidence) as chain_confidence
-                    RETURN [n in nodes(path) | {{name: n.name, category: n.category}}] as nodes,
-                           [r in relationships(path) | {{
-                               criticality: r.criticality,
-                               interface: r.interface,
-                               confidence: r.confidence,
-                               evidence: r.evidence
-                           }}] as relations,
-                           chain_confidence
-                    ORDER BY chain_confidence DESC
-                    LIMIT 20
-                """, component=component, min_conf=min_confidence)
-                
-                downstream = []
-                for record in result:
-                    downstream.append({
-                        'nodes': record['nodes'],
-                        'relations': record['relations'],
-                        'confidence': round(record['chain_confidence'], 3)
-                    })
-                dependencies['downstream'] = downstream
+            upstream = []
+            for record in result:
+                upstream.append({
+                    'nodes': record['nodes'],
+                    'relations': record['relations'],
+                    'confidence': round(record['chain_confidence'], 3)
+                })
+            dependencies['upstream'] = upstream
+        
+        # 下游依赖（依赖当前组件的其他组件）
+        if direction in ['downstream', 'both']:
+            result = session.run(f"""
+                MATCH path = (dep:Term)-[:DEPENDS_ON*1..{max_depth}]->(comp:Term {{name: $component}})
+                WHERE all(r in relationships(path) WHERE r.confidence >= $min_conf)
+                WITH path,
+                     reduce(conf = 1.0, r in relationships(path) | conf * r.confidence) as chain_confidence
+                RETURN [n in nodes(path) | {{name: n.name, category: n.category}}] as nodes,
+                       [r in relationships(path) | {{
+                           criticality: r.criticality,
+                           interface: r.interface,
+                           confidence: r.confidence,
+                           evidence: r.evidence
+                       }}] as relations,
+                       chain_confidence
+                ORDER BY chain_confidence DESC
+                LIMIT 20
+            """, component=component, min_conf=min_confidence)
             
-            return {
-                'component': component,
-                'direction': direction,
-                'dependencies': dependencies,
-                'total_upstream': len(dependencies.get('upstream', [])),
-                'total_downstream': len(dependencies.get('downstream', []))
-            }
+            downstream = []
+            for record in result:
+                downstream.append({
+                    'nodes': record['nodes'],
+                    'relations': record['relations'],
+                    'confidence': round(record['chain_confidence'], 3)
+                })
+            dependencies['downstream'] = downstream
 
+        return dependencies
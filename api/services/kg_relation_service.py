@@ -5,8 +5,10 @@
 """
 
 from neo4j import GraphDatabase
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from collections import defaultdict
 import hashlib
+import json
 from datetime import datetime
 import logging
 
@@ -15,14 +17,29 @@ logger = logging.getLogger(__name__)
 
 class KGRelationService:
     """知识图谱关系服务"""
+
+    # 可选关系属性
+    OPTIONAL_FIELDS = [
+        'doc_id', 'chunk_id', 'severity', 'phase',
+        'effectiveness', 'risk', 'cost_level', 'evidence_level',
+        'criticality', 'interface', 'mode', 'direction',
+        'coverage', 'env', 'method', 'threshold'
+    ]
     
-    def __init__(self, uri: str, user: str, password: str):
-        """初始化"""
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+    def __init__(self, uri: str = None, user: str = None, password: str = None, driver=None):
+        """
+        初始化
+
+        Args:
+            driver: 共享驱动（由调用方管理生命周期）；未提供时按uri/user/password自建驱动
+        """
+        self._owns_driver = driver is None
+        self.driver = driver if driver is not None else GraphDatabase.driver(uri, auth=(user, password))
     
     def close(self):
-        """关闭连接"""
-        self.driver.close()
+        """关闭连接（共享驱动不关闭）"""
+        if self._owns_driver:
+            self.driver.close()
     
     def _generate_source_hash(self, source_name: str, target_name: str, 
                              evidence: str, source: str) -> str:
@@ -90,13 +107,7 @@ class KGRelationService:
                 }
                 
                 # 添加可选属性
-                optional_fields = [
-                    'doc_id', 'chunk_id', 'severity', 'phase',
-                    'effectiveness', 'risk', 'cost_level', 'evidence_level',
-                    'criticality', 'interface', 'mode', 'direction',
-                    'coverage', 'env', 'method', 'threshold'
-                ]
-                for field in optional_fields:
+                for field in self.OPTIONAL_FIELDS:
                     if field in props:
                         rel_props[field] = props[field]
                 
@@ -120,44 +131,175 @@ class KGRelationService:
                 logger.error(f"创建关系失败: {str(e)}")
                 return (False, f"创建关系失败: {str(e)}", None)
     
-    def batch_upsert_relations(self, relations: List[Dict]) -> Dict:
+    def _build_rel_props(self, props: Dict, source_hash: str, now: str) -> Dict:
+        """构建关系属性（与upsert_relation一致）"""
+        rel_props = {
+            'confidence': props.get('confidence', 0.7),
+            'evidence': props.get('evidence', ''),
+            'source': props.get('source', 'manual'),
+            'source_hash': source_hash,
+            'status': self._determine_status(props.get('confidence', 0.7)),
+            'created_at': now,
+            'updated_at': now
+        }
+        for field in self.OPTIONAL_FIELDS:
+            if field in props:
+                rel_props[field] = props[field]
+        return rel_props
+
+    def batch_upsert_relations(self, relations: List[Dict], chunk_size: int = 500) -> Dict:
         """
-        批量插入关系
+        批量插入关系（集合式：一次查询预检已存在关系，按类型分块UNWIND写入）
         
         Args:
             relations: 关系列表
+            chunk_size: 每个写事务的关系数
         
         Returns:
-            {success: int, failed: int, errors: List[str]}
+            {success: int, failed: int, errors: List[str], created_ids: List[str]}
+        """
+        result = None
+        for event in self.iter_batch_upsert_relations(relations, chunk_size):
+            if event['event'] == 'done':
+                result = event['result']
+        return result
+
+    def iter_batch_upsert_relations(self, relations: List[Dict], chunk_size: int = 500) -> Iterator[Dict]:
         """
-        success_count = 0
-        failed_count = 0
-        errors = []
-        created_ids = []
+        批量插入关系并逐块产出进度事件
         
+        事件: checked（预检完成）、progress（每个写入块完成）、done（最终结果）
+        """
+        total = len(relations)
+        errors: Dict[int, str] = {}
+        created: Dict[int, str] = {}
+        now = datetime.now().isoformat()
+
+        # 1. 客户端计算source_hash，批内重复视为已存在
+        rows = []
+        seen = set()
         for i, rel in enumerate(relations):
-            success, message, rel_id = self.upsert_relation(
-                rel['relation_type'],
-                rel['source'],
-                rel['target'],
-                rel['props']
+            source, target, props = rel['source'], rel['target'], rel['props']
+            source_hash = self._generate_source_hash(
+                source['name'], target['name'],
+                props.get('evidence', ''), props.get('source', '')
             )
-            
-            if success:
-                success_count += 1
-                if rel_id:
-                    created_ids.append(rel_id)
-            else:
-                failed_count += 1
-                errors.append(f"关系 {i+1}: {message}")
-        
-        return {
-            'success': success_count,
-            'failed': failed_count,
-            'errors': errors,
-            'created_ids': created_ids
+            dedup_key = (source['name'], source['category'], target['name'], target['category'], source_hash)
+            if dedup_key in seen:
+                errors[i] = f"关系已存在: {rel['relation_type']}"
+                continue
+            seen.add(dedup_key)
+            rows.append({
+                'idx': i,
+                'relation_type': rel['relation_type'],
+                'source_name': source['name'],
+                'source_cat': source['category'],
+                'target_name': target['name'],
+                'target_cat': target['category'],
+                'source_hash': source_hash,
+                'props': self._build_rel_props(props, source_hash, now)
+            })
+
+        # 2. 一次UNWIND查询预检已存在的关系
+        with self.driver.session() as session:
+            try:
+                existing = session.run("""
+                    UNWIND $rows AS row
+                    MATCH (s:Term {name: row.source_name, category: row.source_cat})
+                          -[r]->
+                          (t:Term {name: row.target_name, category: row.target_cat})
+                    WHERE r.source_hash = row.source_hash
+                    RETURN row.idx as idx, type(r) as rel_type
+                """, rows=[{k: row[k] for k in ('idx', 'source_name', 'source_cat', 'target_name',
+                                                'target_cat', 'source_hash')} for row in rows]).data()
+            except Exception as e:
+                logger.error(f"预检已存在关系失败: {str(e)}")
+                for row in rows:
+                    errors[row['idx']] = f"创建关系失败: {str(e)}"
+                rows, existing = [], []
+
+            for record in existing:
+                errors.setdefault(record['idx'], f"关系已存在: {record['rel_type']}")
+            new_rows = [row for row in rows if row['idx'] not in errors]
+
+            yield {'event': 'checked', 'total': total, 'existing': len(errors), 'to_write': len(new_rows)}
+
+            # 3. 按关系类型分块写入，每块一个写事务
+            rows_by_type = defaultdict(list)
+            for row in new_rows:
+                rows_by_type[row['relation_type']].append(row)
+
+            processed = total - len(new_rows)
+            for relation_type, type_rows in rows_by_type.items():
+                for start in range(0, len(type_rows), chunk_size):
+                    chunk = type_rows[start:start + chunk_size]
+                    try:
+                        records = session.execute_write(
+                            lambda tx: tx.run(f"""
+                                UNWIND $rows AS row
+                                MERGE (s:Term {{name: row.source_name, category: row.source_cat}})
+                                MERGE (t:Term {{name: row.target_name, category: row.target_cat}})
+                                CREATE (s)-[r:{relation_type}]->(t)
+                                SET r = row.props
+                                RETURN row.idx as idx, id(r) as rel_id
+                            """, rows=chunk).data()
+                        )
+                        for record in records:
+                            created[record['idx']] = str(record['rel_id'])
+                        logger.info(f"批量创建关系: {relation_type} {len(records)} 条")
+                    except Exception as e:
+                        logger.error(f"批量创建关系失败 {relation_type}: {str(e)}")
+                        for row in chunk:
+                            errors[row['idx']] = f"创建关系失败: {str(e)}"
+
+                    processed += len(chunk)
+                    yield {
+                        'event': 'progress',
+                        'relation_type': relation_type,
+                        'processed': processed,
+                        'total': total,
+                        'success': len(created),
+                        'failed': len(errors)
+                    }
+
+        yield {
+            'event': 'done',
+            'result': {
+                'success': len(created),
+                'failed': len(errors),
+                'errors': [f"关系 {i+1}: {errors[i]}" for i in sorted(errors)],
+                'created_ids': [created[i] for i in sorted(created)]
+            }
         }
     
+    def iter_import_ndjson(self, relations: List[Dict], chunk_size: int = 500,
+                           on_success: Optional[Callable[[], None]] = None) -> Iterator[str]:
+        """
+        流式导入的NDJSON输出：每个进度事件一行，done行只带前10个错误；异常时输出error行
+
+        Args:
+            on_success: 有关系写入成功时在输出done行之前调用（刷新统计快照、递增写版本号）
+        """
+        try:
+            for event in self.iter_batch_upsert_relations(relations, chunk_size=chunk_size):
+                if event['event'] == 'done':
+                    result = event['result']
+                    if result['success'] and on_success is not None:
+                        on_success()
+                    event = {
+                        "event": "done",
+                        "data": {
+                            "success_count": result['success'],
+                            "failed_count": result['failed'],
+                            "errors": result['errors'][:10],  # 只返回前10个错误
+                            "created_ids": result['created_ids']
+                        }
+                    }
+                yield json.dumps(event, ensure_ascii=False) + "\n"
+        except Exception as e:
+            logger.error(f"流式导入关系失败: {e}")
+            yield json.dumps({"event": "error", "message": str(e)}, ensure_ascii=False) + "\n"
+
     def detect_conflicts(self, relation_type: str, source: Dict, target: Dict) -> List[Dict]:
         """
         检测冲突关系
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件解析任务队列
+
+/kg/files/{upload_id}/parse 只负责入队并立即返回，解析在独立的进程池中执行
+（pdfplumber、pandas/openpyxl、IRUnifiedParser 都是CPU密集的同步调用，不能放在事件循环里）。
+并发数由信号量限制，等待中的任务状态为 queued，取得执行槽位后为 parsing；
+状态和进度通过 files.manager.set_status 持久化（在线程中写文件，不阻塞事件循环），
+/kg/files/{upload_id}/status 直接读取。
+
+取消：排队中的任务直接取消；执行中的任务写入取消标记，解析进程在页/行之间检查后退出，
+取消标记在解析函数返回后才清除。
+"""
+
+import os
+import time
+import asyncio
+import logging
+import multiprocessing
+from dataclasses import dataclass, field
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from files.manager import FileStatus, set_status, request_cancel, clear_cancel
+from parsers.upload_parser import ParseCancelled
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(RuntimeError):
+    """等待中的任务数已达上限"""
+
+
+@dataclass
+class ParseJob:
+    """单个解析任务"""
+    upload_id: str
+    file_path: str
+    result_path: str
+    status: FileStatus = FileStatus.queued
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "upload_id": self.upload_id,
+            "status": self.status.value,
+            "submitted_at": int(self.submitted_at),
+            "started_at": int(self.started_at) if self.started_at else None
+        }
+
+
+class ParseJobQueue:
+    """有界并发的解析任务队列"""
+
+    def __init__(self, worker: Callable[[str, str, str], Dict[str, Any]], max_workers: Optional[int] = None,
+                 max_pending: Optional[int] = None, executor_type: Optional[str] = None):
+        """
+        Args:
+            worker: 解析函数 (upload_id, file_path, result_path) -> metadata，需可pickle
+            max_workers: 同时执行的解析任务数，默认读取 PARSE_JOB_WORKERS
+            max_pending: 排队任务上限，默认读取 PARSE_JOB_MAX_PENDING
+            executor_type: process（默认）或 thread，默认读取 PARSE_JOB_EXECUTOR
+        """
+        self.worker = worker
+        self.max_workers = max_workers or int(os.getenv("PARSE_JOB_WORKERS", "2"))
+        self.max_pending = max_pending if max_pending is not None else int(os.getenv("PARSE_JOB_MAX_PENDING", "100"))
+        self.executor_type = (executor_type or os.getenv("PARSE_JOB_EXECUTOR", "process")).lower()
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._jobs: Dict[str, ParseJob] = {}
+
+    def _create_executor(self) -> Executor:
+        if self.executor_type == "thread":
+            return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="parse-job")
+        # spawn：子进程不继承父进程中的驱动连接和线程状态
+        return ProcessPoolExecutor(max_workers=self.max_workers,
+                                   mp_context=multiprocessing.get_context("spawn"))
+
+    def start(self):
+        """创建执行器（在事件循环内调用）"""
+        if self._executor is None:
+            self._executor = self._create_executor()
+            self._slots = asyncio.Semaphore(self.max_workers)
+            logger.info(f"解析任务队列已启动: {self.executor_type} x {self.max_workers}")
+
+    async def stop(self):
+        """取消未完成的任务并关闭执行器"""
+        tasks = [job.task for job in self._jobs.values() if job.task is not None]
+        for job in list(self._jobs.values()):
+            request_cancel(job.upload_id)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @property
+    def active_count(self) -> int:
+        return len(self._jobs)
+
+    def get(self, upload_id: str) -> Optional[ParseJob]:
+        """进行中（排队或执行中）的任务；已结束的任务从元数据读取状态"""
+        return self._jobs.get(upload_id)
+
+    def submit(self, upload_id: str, file_path: str, result_path: str) -> ParseJob:
+        """
+        提交解析任务；同一文件已有进行中的任务时直接返回该任务
+
+        Raises:
+            QueueFullError: 排队任务数已达上限
+        """
+        job = self._jobs.get(upload_id)
+        if job is not None:
+            return job
+        if self.active_count >= self.max_workers + self.max_pending:
+            raise QueueFullError(f"解析任务排队已满（{self.max_pending}），请稍后重试")
+
+        self.start()
+        clear_cancel(upload_id)
+        job = ParseJob(upload_id=upload_id, file_path=str(file_path), result_path=str(result_path))
+        set_status(upload_id, FileStatus.queued, progress=0, stage="queued",
+                   submitted=int(job.submitted_at))
+        self._jobs[upload_id] = job
+        job.task = asyncio.get_running_loop().create_task(self._run(job))
+        logger.info(f"解析任务已入队: {upload_id}（进行中 {self.active_count}）")
+        return job
+
+    def cancel(self, upload_id: str) -> Optional[ParseJob]:
+        """取消任务，没有进行中的任务时返回None"""
+        job = self._jobs.get(upload_id)
+        if job is None:
+            return None
+        request_cancel(upload_id)
+        if job.status == FileStatus.queued and job.task is not None:
+            job.task.cancel()
+        return job
+
+    async def _run(self, job: ParseJob):
+        upload_id = job.upload_id
+        future: Optional[Future] = None
+        try:
+            async with self._slots:
+                job.status = FileStatus.parsing
+                job.started_at = time.time()
+                await asyncio.to_thread(set_status, upload_id, FileStatus.parsing, progress=0, stage="starting",
+                                        started=int(job.started_at))
+                future = self._executor.submit(self.worker, upload_id, job.file_path, job.result_path)
+                metadata = await asyncio.wrap_future(future)
+        except (asyncio.CancelledError, ParseCancelled):
+            job.status = FileStatus.cancelled
+            await asyncio.to_thread(set_status, upload_id, FileStatus.cancelled, stage="cancelled")
+            logger.info(f"解析任务已取消: {upload_id}")
+        except BrokenProcessPool as e:
+            job.status = FileStatus.failed
+            await asyncio.to_thread(set_status, upload_id, FileStatus.failed,
+                                    error=f"解析进程异常退出: {e}", stage="failed")
+            # 进程池损坏后后续任务都会失败，重建执行器
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._create_executor()
+        except Exception as e:
+            job.status = FileStatus.failed
+            await asyncio.to_thread(set_status, upload_id, FileStatus.failed, error=str(e), stage="failed")
+        else:
+            job.status = FileStatus.parsed
+            await asyncio.to_thread(set_status, upload_id, FileStatus.parsed, progress=100, stage="done",
+                                    finished=int(time.time()),
+                                    entity_count=metadata.get("total_entities", 0),
+                                    record_count=metadata.get("total_records", 0))
+            logger.info(f"解析任务完成: {upload_id}, 耗时 {time.time() - job.started_at:.1f}s")
+        finally:
+            self._jobs.pop(upload_id, None)
+            if future is None or future.done():
+                clear_cancel(upload_id)
+            else:
+                # stop() 取消任务时解析仍在执行：保留取消标记，等解析函数检查到标记退出后再清除
+                future.add_done_callback(lambda _: clear_cancel(upload_id))
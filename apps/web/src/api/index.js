@@ -111,6 +111,49 @@ const kgApi = {
     return api.get('/kg/graph', { params })
   },
 
+  // 获取紧凑格式图谱数据（列式 + 字符串表，浏览器自动处理gzip），返回 { stats, categories, nodes, links }
+  async getGraphVisualizationDataCompact(params = {}) {
+    const response = await api.get('/kg/graph-data', { params: { ...params, format: 'compact' } })
+    const payload = response.data ?? response
+    const { graph, ...rest } = payload.data
+    const text = i => (i >= 0 ? graph.strings[i] : null)
+    // extra 列保存固定列以外的字段（如关系的 common_count、common_tags）
+    const extra = (columns, i) => Object.fromEntries(
+      Object.entries(columns.extra || {}).map(([name, values]) => [name, values[i]])
+    )
+    const nodes = graph.nodes.id.map((id, i) => ({
+      id: text(id),
+      name: text(graph.nodes.name[i]),
+      category: text(graph.nodes.category[i]),
+      description: text(graph.nodes.description[i]) || '',
+      ...extra(graph.nodes, i)
+    }))
+    const links = graph.links.source.map((s, i) => ({
+      source: nodes[s].id,
+      target: nodes[graph.links.target[i]].id,
+      type: text(graph.links.type[i]),
+      confidence: graph.links.confidence[i],
+      inferred: graph.links.inferred[i],
+      ...extra(graph.links, i)
+    }))
+    return { ...rest, nodes, links, droppedLinks: graph.dropped_links || 0 }
+  },
+
+  // 图谱分层浏览：顶层社区概览
+  getGraphOverview(params = {}) {
+    return api.get('/kg/graph/lod', { params })
+  },
+
+  // 图谱分层浏览：下钻社区（cursor 为上一页返回的 next_cursor）
+  getGraphCluster(clusterId, cursor = null, limit = 200) {
+    return api.get(`/kg/graph/lod/clusters/${encodeURIComponent(clusterId)}`, { params: { cursor, limit } })
+  },
+
+  // 图谱分层浏览：展开节点邻居
+  getGraphNeighbors(nodeId, cursor = null, limit = 50, relTypes = null) {
+    return api.get('/kg/graph/lod/neighbors', { params: { node_id: nodeId, cursor, limit, rel_types: relTypes } })
+  },
+
   // 获取数据治理信息
   getGovernanceData() {
     return api.get('/kg/governance-data')
@@ -211,6 +254,11 @@ const kgApi = {
     return api.get('/kg/dictionary/entries', { params })
   },
 
+  // 词典术语联想（前缀匹配术语/别名）
+  suggestDictionary(q, params = {}) {
+    return api.get('/kg/dictionary/suggest', { params: { q, ...params } })
+  },
+
   getDictionaryLabels() {
     return api.get('/api/dictionary/labels')
   },
@@ -3,18 +3,25 @@
 自动建立语义关系脚本
 基于词条描述、标签、别名自动匹配并建立关系
 """
+import sys
 import json
 import re
 from collections import defaultdict
+from pathlib import Path
 from neo4j import GraphDatabase
 
+sys.path.append(str(Path(__file__).resolve().parent / "services" / "nlp"))
+from dictionary_matcher import get_dictionary_matcher
+from relation_inference import RelationInference
+
 # Neo4j连接配置
 NEO4J_URI = "bolt://localhost:7687"
 NEO4J_USER = "neo4j"
 NEO4J_PASSWORD = "password123"
 
 # 加载词典数据
-with open('api/data/dictionary.json', 'r', encoding='utf-8') as f:
+DICTIONARY_PATH = 'api/data/dictionary.json'
+with open(DICTIONARY_PATH, 'r', encoding='utf-8') as f:
     dictionary = json.load(f)
 
 # 按分类组织数据
@@ -29,6 +36,60 @@ for entry in dictionary:
     for alias in entry.get('aliases', []):
         alias_index[alias.lower()] = entry['term']
 
+# 每条描述只用词典自动机扫描一次，记录其中提到的术语/别名，
+# 下面的两两匹配只做集合查找，不再逐个 term/alias 做子串搜索
+matcher = get_dictionary_matcher(DICTIONARY_PATH)
+_mention_cache = {}
+
+
+def mentions(text):
+    """文本中经术语命中、经别名命中的 (分类, 术语) 集合"""
+    if text not in _mention_cache:
+        _mention_cache[text] = matcher.match_terms(text)
+    return _mention_cache[text]
+
+def mentioned(category, target_category, alias=False):
+    """{category 词条: 其描述中经术语（alias=True 时经别名）提到的 target_category 词条}"""
+    result = {}
+    for entry in data_by_category[category]:
+        terms, aliases = mentions(entry.get('description', ''))
+        result[entry['term']] = [term for cat, term in (aliases if alias else terms) if cat == target_category]
+    return result
+
+
+def category_tags(category):
+    return {entry['term']: entry.get('tags', []) for entry in data_by_category[category]}
+
+
+def infer(source_category, target_category, mention_rules):
+    """
+    候选对只来自描述提及与标签倒排索引，不再对两个分类做双重循环
+
+    Args:
+        mention_rules: [(提及字典, 分数, 是否为目标提到源)]
+    """
+    inference = RelationInference(category_tags(source_category), category_tags(target_category))
+    inference.add_tag_overlap(weight=2)
+    for mention_map, weight, reverse in mention_rules:
+        inference.add_mentions(mention_map, weight, reason="描述匹配", reverse=reverse)
+    return [
+        {
+            'from': relation.source,
+            'to': relation.target,
+            'score': relation.score,
+            'reason': f"描述匹配 + {relation.common_count}个共同标签"
+        }
+        for relation in inference.results(min_score=8)
+    ]
+
+
+def report(relations, rel_type):
+    print(f"发现 {len(relations)} 条潜在关系")
+    print(f"Top 10 高分关系:")
+    for rel in sorted(relations, key=lambda x: x['score'], reverse=True)[:10]:
+        print(f"  {rel['from']:20s} -[{rel_type}]-> {rel['to']:20s} (分数:{rel['score']}, {rel['reason']})")
+
+
 print("=" * 80)
 print("🔗 自动建立语义关系")
 print("=" * 80)
@@ -37,186 +98,45 @@ print("=" * 80)
 print("\n1️⃣ 建立 Symptom → Component (AFFECTS) 关系")
 print("-" * 80)
 
-symptom_component_relations = []
-
-for symptom in data_by_category['Symptom']:
-    symptom_term = symptom['term']
-    symptom_desc = symptom.get('description', '').lower()
-    symptom_tags = set(symptom.get('tags', []))
-    
-    # 在描述中查找组件名称
-    for component in data_by_category['Component']:
-        component_term = component['term']
-        component_tags = set(component.get('tags', []))
-        
-        # 匹配条件
-        match_score = 0
-        
-        # 1. 描述中直接提到组件名称
-        if component_term.lower() in symptom_desc:
-            match_score += 10
-        
-        # 2. 描述中提到组件别名
-        for alias in component.get('aliases', []):
-            if alias.lower() in symptom_desc:
-                match_score += 8
-                break
-        
-        # 3. 标签重叠度
-        common_tags = symptom_tags & component_tags
-        if common_tags:
-            match_score += len(common_tags) * 2
-        
-        # 如果匹配分数足够高，建立关系
-        if match_score >= 8:
-            symptom_component_relations.append({
-                'from': symptom_term,
-                'to': component_term,
-                'score': match_score,
-                'reason': f"描述匹配 + {len(common_tags)}个共同标签"
-            })
-
-print(f"发现 {len(symptom_component_relations)} 条潜在关系")
-print(f"Top 10 高分关系:")
-for rel in sorted(symptom_component_relations, key=lambda x: x['score'], reverse=True)[:10]:
-    print(f"  {rel['from']:20s} -[AFFECTS]-> {rel['to']:20s} (分数:{rel['score']}, {rel['reason']})")
+# 描述中直接提到组件名称 10 分，提到组件别名 8 分，每个共同标签 2 分
+symptom_component_relations = infer('Symptom', 'Component', [
+    (mentioned('Symptom', 'Component'), 10, False),
+    (mentioned('Symptom', 'Component', alias=True), 8, False),
+])
+report(symptom_component_relations, 'AFFECTS')
 
 # 2. TestCase → Component (TESTS)
 print("\n2️⃣ 建立 TestCase → Component (TESTS) 关系")
 print("-" * 80)
 
-testcase_component_relations = []
-
-for testcase in data_by_category['TestCase']:
-    testcase_term = testcase['term']
-    testcase_desc = testcase.get('description', '').lower()
-    testcase_tags = set(testcase.get('tags', []))
-    
-    for component in data_by_category['Component']:
-        component_term = component['term']
-        component_tags = set(component.get('tags', []))
-        
-        match_score = 0
-        
-        # 描述匹配
-        if component_term.lower() in testcase_desc:
-            match_score += 10
-        
-        for alias in component.get('aliases', []):
-            if alias.lower() in testcase_desc:
-                match_score += 8
-                break
-        
-        # 标签匹配
-        common_tags = testcase_tags & component_tags
-        if common_tags:
-            match_score += len(common_tags) * 2
-        
-        if match_score >= 8:
-            testcase_component_relations.append({
-                'from': testcase_term,
-                'to': component_term,
-                'score': match_score,
-                'reason': f"描述匹配 + {len(common_tags)}个共同标签"
-            })
-
-print(f"发现 {len(testcase_component_relations)} 条潜在关系")
-print(f"Top 10 高分关系:")
-for rel in sorted(testcase_component_relations, key=lambda x: x['score'], reverse=True)[:10]:
-    print(f"  {rel['from']:20s} -[TESTS]-> {rel['to']:20s} (分数:{rel['score']}, {rel['reason']})")
+testcase_component_relations = infer('TestCase', 'Component', [
+    (mentioned('TestCase', 'Component'), 10, False),
+    (mentioned('TestCase', 'Component', alias=True), 8, False),
+])
+report(testcase_component_relations, 'TESTS')
 
 # 3. Tool → TestCase (USED_IN)
 print("\n3️⃣ 建立 Tool → TestCase (USED_IN) 关系")
 print("-" * 80)
 
-tool_testcase_relations = []
-
-for tool in data_by_category['Tool']:
-    tool_term = tool['term']
-    tool_desc = tool.get('description', '').lower()
-    tool_tags = set(tool.get('tags', []))
-    
-    for testcase in data_by_category['TestCase']:
-        testcase_term = testcase['term']
-        testcase_desc = testcase.get('description', '').lower()
-        testcase_tags = set(testcase.get('tags', []))
-        
-        match_score = 0
-        
-        # 测试用例描述中提到工具
-        if tool_term.lower() in testcase_desc:
-            match_score += 10
-        
-        for alias in tool.get('aliases', []):
-            if alias.lower() in testcase_desc:
-                match_score += 8
-                break
-        
-        # 工具描述中提到测试
-        if testcase_term.lower() in tool_desc:
-            match_score += 10
-        
-        # 标签匹配
-        common_tags = tool_tags & testcase_tags
-        if common_tags:
-            match_score += len(common_tags) * 2
-        
-        if match_score >= 8:
-            tool_testcase_relations.append({
-                'from': tool_term,
-                'to': testcase_term,
-                'score': match_score,
-                'reason': f"描述匹配 + {len(common_tags)}个共同标签"
-            })
-
-print(f"发现 {len(tool_testcase_relations)} 条潜在关系")
-print(f"Top 10 高分关系:")
-for rel in sorted(tool_testcase_relations, key=lambda x: x['score'], reverse=True)[:10]:
-    print(f"  {rel['from']:20s} -[USED_IN]-> {rel['to']:20s} (分数:{rel['score']}, {rel['reason']})")
+# 测试用例描述中提到工具；工具描述中提到测试
+tool_testcase_relations = infer('Tool', 'TestCase', [
+    (mentioned('TestCase', 'Tool'), 10, True),
+    (mentioned('TestCase', 'Tool', alias=True), 8, True),
+    (mentioned('Tool', 'TestCase'), 10, False),
+])
+report(tool_testcase_relations, 'USED_IN')
 
 # 4. Process → Component (PRODUCES)
 print("\n4️⃣ 建立 Process → Component (PRODUCES) 关系")
 print("-" * 80)
 
-process_component_relations = []
-
-for process in data_by_category['Process']:
-    process_term = process['term']
-    process_desc = process.get('description', '').lower()
-    process_tags = set(process.get('tags', []))
-    
-    for component in data_by_category['Component']:
-        component_term = component['term']
-        component_desc = component.get('description', '').lower()
-        component_tags = set(component.get('tags', []))
-        
-        match_score = 0
-        
-        # 工艺描述中提到组件
-        if component_term.lower() in process_desc:
-            match_score += 10
-        
-        # 组件描述中提到工艺
-        if process_term.lower() in component_desc:
-            match_score += 10
-        
-        # 标签匹配
-        common_tags = process_tags & component_tags
-        if common_tags:
-            match_score += len(common_tags) * 2
-        
-        if match_score >= 8:
-            process_component_relations.append({
-                'from': process_term,
-                'to': component_term,
-                'score': match_score,
-                'reason': f"描述匹配 + {len(common_tags)}个共同标签"
-            })
-
-print(f"发现 {len(process_component_relations)} 条潜在关系")
-print(f"Top 10 高分关系:")
-for rel in sorted(process_component_relations, key=lambda x: x['score'], reverse=True)[:10]:
-    print(f"  {rel['from']:20s} -[PRODUCES]-> {rel['to']:20s} (分数:{rel['score']}, {rel['reason']})")
+# 工艺描述中提到组件；组件描述中提到工艺
+process_component_relations = infer('Process', 'Component', [
+    (mentioned('Process', 'Component'), 10, False),
+    (mentioned('Component', 'Process'), 10, True),
+])
+report(process_component_relations, 'PRODUCES')
 
 # 统计总结
 print("\n" + "=" * 80)
@@ -166,6 +166,34 @@ FOR (d:Doc) ON (d.type);
 CREATE INDEX doc_created_date_index IF NOT EXISTS
 FOR (d:Doc) ON (d.created_date);
 
+// 关系 source_hash 索引（关系录入时的去重键，按类型列出关系时按其游标分页）
+CREATE INDEX rel_causes_source_hash_index IF NOT EXISTS
+FOR ()-[r:CAUSES]-() ON (r.source_hash);
+
+CREATE INDEX rel_resolved_by_source_hash_index IF NOT EXISTS
+FOR ()-[r:RESOLVED_BY]-() ON (r.source_hash);
+
+CREATE INDEX rel_prevents_source_hash_index IF NOT EXISTS
+FOR ()-[r:PREVENTS]-() ON (r.source_hash);
+
+CREATE INDEX rel_depends_on_source_hash_index IF NOT EXISTS
+FOR ()-[r:DEPENDS_ON]-() ON (r.source_hash);
+
+CREATE INDEX rel_interacts_with_source_hash_index IF NOT EXISTS
+FOR ()-[r:INTERACTS_WITH]-() ON (r.source_hash);
+
+CREATE INDEX rel_detects_source_hash_index IF NOT EXISTS
+FOR ()-[r:DETECTS]-() ON (r.source_hash);
+
+CREATE INDEX rel_tests_source_hash_index IF NOT EXISTS
+FOR ()-[r:TESTS]-() ON (r.source_hash);
+
+CREATE INDEX rel_measures_source_hash_index IF NOT EXISTS
+FOR ()-[r:MEASURES]-() ON (r.source_hash);
+
+CREATE INDEX rel_affects_source_hash_index IF NOT EXISTS
+FOR ()-[r:AFFECTS]-() ON (r.source_hash);
+
 // ============================================================================
 // 3. 复合索引 (Composite Indexes)
 // ============================================================================
@@ -2,136 +2,106 @@
 # -*- coding: utf-8 -*-
 """
 为新增 TestCase 基于标签创建低风险 RELATED_TO 关系（inferred=true），以降低孤立节点。
-- 策略：按标签交集创建 RELATED_TO，带证据字段（source/rule/build_id/created_at/common_tags/common_count/confidence）
+- 策略：按标签交集创建 RELATED_TO，带证据字段（source/rule/build_id/created_at/common_tags/common_count/confidence/jaccard）
+- 候选：只读取带标签的节点，用 标签 → 节点 倒排索引生成共享标签的候选对（services/nlp/relation_inference.py），
+  不再在Cypher中对 TestCase × 目标 做笛卡尔积
 - 置信度：common_count / max(1, size(t.tags))
-- 去重：MERGE 幂等，重复执行安全
+- 写入：每个 TestCase 取 top-k 后用 UNWIND 分批 MERGE
+- 去重：MERGE 幂等，重复执行安全；按 build_id 回滚（scripts/rollback_auto_tag_relations.py）
 """
 
+import sys
+from pathlib import Path
 from neo4j import GraphDatabase
 from datetime import datetime
 
+sys.path.append(str(Path(__file__).resolve().parents[1] / "services" / "nlp"))
+from relation_inference import RelationInference, chunked
+from write_versions import bump_write_versions
+
 URI = "bolt://localhost:7687"
 AUTH = ("neo4j", "password123")
 
 BUILD_ID = f"auto-tag-relations-{datetime.utcnow().strftime('%Y%m%d')}"
 
-CY_LIST = [
-    {
-        "name": "TestCase->Metric",
-        "cypher": """
-        MATCH (t:TestCase) WHERE t.tags IS NOT NULL AND size(t.tags) > 0
-        MATCH (m:Metric)   WHERE m.tags IS NOT NULL AND size(m.tags) > 0
-        WITH t, m, [x IN t.tags WHERE x IN m.tags] AS common, size(t.tags) AS tsize
-        WITH t, m, common, size(common) AS score, toFloat(size(common))/toFloat( CASE WHEN tsize=0 THEN 1 ELSE tsize END ) AS conf
-        WHERE score >= 2 AND conf >= 0.4
-        ORDER BY t.name, score DESC
-        WITH t, collect({node:m, common:common, score:score, conf:conf})[0..5] AS best
-        UNWIND best AS b
-        WITH t, b.node AS n, b.common AS common, b.score AS score, b.conf AS conf
-        MERGE (t)-[r:RELATED_TO]->(n)
-        ON CREATE SET r.inferred = true,
-                      r.source = 'tag_similarity',
-                      r.rule = 'tag_overlap',
-                      r.build_id = $build_id,
-                      r.created_at = datetime(),
-                      r.common_tags = common,
-                      r.common_count = score,
-                      r.confidence = conf
-        RETURN count(r) AS created
-        """
-    },
-    {
-        "name": "TestCase->Symptom",
-        "cypher": """
-        MATCH (t:TestCase) WHERE t.tags IS NOT NULL AND size(t.tags) > 0
-        MATCH (s:Symptom)  WHERE s.tags IS NOT NULL AND size(s.tags) > 0
-        WITH t, s, [x IN t.tags WHERE x IN s.tags] AS common, size(t.tags) AS tsize
-        WITH t, s, common, size(common) AS score, toFloat(size(common))/toFloat( CASE WHEN tsize=0 THEN 1 ELSE tsize END ) AS conf
-        WHERE score >= 2 AND conf >= 0.4
-        ORDER BY t.name, score DESC
-        WITH t, collect({node:s, common:common, score:score, conf:conf})[0..5] AS best
-        UNWIND best AS b
-        WITH t, b.node AS n, b.common AS common, b.score AS score, b.conf AS conf
-        MERGE (t)-[r:RELATED_TO]->(n)
-        ON CREATE SET r.inferred = true,
-                      r.source = 'tag_similarity',
-                      r.rule = 'tag_overlap',
-                      r.build_id = $build_id,
-                      r.created_at = datetime(),
-                      r.common_tags = common,
-                      r.common_count = score,
-                      r.confidence = conf
-        RETURN count(r) AS created
-        """
-    },
-    {
-        "name": "TestCase->Component",
-        "cypher": """
-        MATCH (t:TestCase) WHERE t.tags IS NOT NULL AND size(t.tags) > 0
-        MATCH (c:Component) WHERE c.tags IS NOT NULL AND size(c.tags) > 0
-        WITH t, c, [x IN t.tags WHERE x IN c.tags] AS common, size(t.tags) AS tsize
-        WITH t, c, common, size(common) AS score, toFloat(size(common))/toFloat( CASE WHEN tsize=0 THEN 1 ELSE tsize END ) AS conf
-        WHERE score >= 2 AND conf >= 0.4
-        ORDER BY t.name, score DESC
-        WITH t, collect({node:c, common:common, score:score, conf:conf})[0..5] AS best
-        UNWIND best AS b
-        WITH t, b.node AS n, b.common AS common, b.score AS score, b.conf AS conf
-        MERGE (t)-[r:RELATED_TO]->(n)
-        ON CREATE SET r.inferred = true,
-                      r.source = 'tag_similarity',
-                      r.rule = 'tag_overlap',
-                      r.build_id = $build_id,
-                      r.created_at = datetime(),
-                      r.common_tags = common,
-                      r.common_count = score,
-                      r.confidence = conf
-        RETURN count(r) AS created
-        """
-    },
-    {
-        "name": "TestCase->Tool",
-        "cypher": """
-        MATCH (t:TestCase) WHERE t.tags IS NOT NULL AND size(t.tags) > 0
-        MATCH (l:Tool)     WHERE l.tags IS NOT NULL AND size(l.tags) > 0
-        WITH t, l, [x IN t.tags WHERE x IN l.tags] AS common, size(t.tags) AS tsize
-        WITH t, l, common, size(common) AS score, toFloat(size(common))/toFloat( CASE WHEN tsize=0 THEN 1 ELSE tsize END ) AS conf
-        WHERE score >= 3 AND conf >= 0.5
-        ORDER BY t.name, score DESC
-        WITH t, collect({node:l, common:common, score:score, conf:conf})[0..3] AS best
-        UNWIND best AS b
-        WITH t, b.node AS n, b.common AS common, b.score AS score, b.conf AS conf
-        MERGE (t)-[r:RELATED_TO]->(n)
-        ON CREATE SET r.inferred = true,
-                      r.source = 'tag_similarity',
-                      r.rule = 'tag_overlap',
-                      r.build_id = $build_id,
-                      r.created_at = datetime(),
-                      r.common_tags = common,
-                      r.common_count = score,
-                      r.confidence = conf
-        RETURN count(r) AS created
-        """
-    }
+BATCH_SIZE = 1000
+
+# 每类目标的阈值：至少 min_common 个共同标签、置信度不低于 min_conf，每个 TestCase 保留 top_k 条
+RULES = [
+    {"name": "TestCase->Metric", "label": "Metric", "min_common": 2, "min_conf": 0.4, "top_k": 5},
+    {"name": "TestCase->Symptom", "label": "Symptom", "min_common": 2, "min_conf": 0.4, "top_k": 5},
+    {"name": "TestCase->Component", "label": "Component", "min_common": 2, "min_conf": 0.4, "top_k": 5},
+    # 工具阈值稍高，避免泛化
+    {"name": "TestCase->Tool", "label": "Tool", "min_common": 3, "min_conf": 0.5, "top_k": 3},
 ]
 
+TAGGED_NODES = """
+MATCH (n:{label}) WHERE n.tags IS NOT NULL AND size(n.tags) > 0
+RETURN elementId(n) AS id, n.tags AS tags
+"""
+
+MERGE_RELATED = """
+UNWIND $rows AS row
+MATCH (t) WHERE elementId(t) = row.source
+MATCH (n) WHERE elementId(n) = row.target
+MERGE (t)-[r:RELATED_TO]->(n)
+ON CREATE SET r.inferred = true,
+              r.source = 'tag_similarity',
+              r.rule = 'tag_overlap',
+              r.build_id = $build_id,
+              r.created_at = datetime(),
+              r.common_tags = row.common_tags,
+              r.common_count = row.common_count,
+              r.confidence = row.confidence,
+              r.jaccard = row.jaccard
+RETURN count(r) AS created
+"""
+
+
+def tagged_nodes(session, label):
+    """{elementId: 标签列表}"""
+    result = session.run(TAGGED_NODES.format(label=label))
+    return {record["id"]: record["tags"] for record in result}
+
+
+def infer_rows(testcases, targets, rule):
+    inference = RelationInference(testcases, targets)
+    inference.add_tag_overlap(weight=1)
+    return [
+        {
+            "source": relation.source,
+            "target": relation.target,
+            "common_tags": relation.common_tags,
+            "common_count": relation.common_count,
+            "confidence": relation.confidence,
+            "jaccard": relation.jaccard,
+        }
+        for relation in inference.results(min_common=rule["min_common"],
+                                          min_confidence=rule["min_conf"],
+                                          top_k=rule["top_k"])
+    ]
+
 
 def main():
     driver = GraphDatabase.driver(URI, auth=AUTH)
     with driver.session() as session:
+        testcases = tagged_nodes(session, "TestCase")
         total_created = 0
-        for item in CY_LIST:
-            name = item["name"]
-            cypher = item["cypher"]
-            # 将注释风格 // 替换为 /* */ 以兼容 Neo4j
-            cypher = cypher.replace("// 工具阈值稍高，避免泛化", "/* 工具阈值稍高，避免泛化 */")
-            result = session.run(cypher, build_id=BUILD_ID)
-            record = result.single()
-            created = record["created"] if record else 0
-            print(f"✅ {name}: 新建/幂等 {created} 条")
+        for rule in RULES:
+            rows = infer_rows(testcases, tagged_nodes(session, rule["label"]), rule)
+            created = 0
+            for batch in chunked(rows, BATCH_SIZE):
+                record = session.run(MERGE_RELATED, rows=batch, build_id=BUILD_ID).single()
+                created += record["created"] if record else 0
+            print(f"✅ {rule['name']}: 新建/幂等 {created} 条")
             total_created += created
 
         print(f"\n[OK] 标签相似度建边完成，合计新建/幂等 {total_created} 条 (build_id={BUILD_ID})")
+    driver.close()
+
+    if total_created:
+        # 只新增关系、不改节点：递增 RELATED_TO 的缓存版本，API的查询缓存与统计快照随之刷新
+        bump_write_versions(rel_types=["RELATED_TO"])
 
 if __name__ == "__main__":
     main()
-
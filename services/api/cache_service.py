@@ -4,11 +4,16 @@
 提供内存缓存和Redis缓存支持
 """
 
+import os
+import sys
 import json
 import time
+import heapq
 import hashlib
 import logging
-from typing import Any, Optional, Dict, List
+import itertools
+from collections import OrderedDict
+from typing import Any, Optional, Dict, List, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 import threading
@@ -22,6 +27,28 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# 内存缓存默认字节预算（MB）
+DEFAULT_MEMORY_CACHE_MAX_MB = 256
+
+
+def estimate_size(value: Any) -> int:
+    """估算缓存值占用的字节数（按JSON序列化长度，与写入Redis时的体积一致）"""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    try:
+        return len(json.dumps(value, ensure_ascii=False, default=str).encode('utf-8'))
+    except (TypeError, ValueError):
+        return sys.getsizeof(value)
+
+
+def key_namespace(key: str) -> str:
+    """键的命名空间：第一个冒号之前的部分（cached 装饰器的 key_prefix）"""
+    namespace, sep, _ = key.partition(':')
+    return namespace if sep and namespace else 'default'
+
+
 @dataclass
 class CacheItem:
     """缓存项"""
@@ -30,6 +57,7 @@ class CacheItem:
     created_at: datetime
     expires_at: Optional[datetime] = None
     hit_count: int = 0
+    size: int = 0
     
     def is_expired(self) -> bool:
         """检查是否过期"""
@@ -44,62 +72,139 @@ class CacheItem:
             'value': self.value,
             'created_at': self.created_at.isoformat(),
             'expires_at': self.expires_at.isoformat() if self.expires_at else None,
-            'hit_count': self.hit_count
+            'hit_count': self.hit_count,
+            'size': self.size
         }
 
 class MemoryCache:
-    """内存缓存实现"""
+    """
+    内存缓存实现
     
-    def __init__(self, max_size: int = 1000):
+    - LRU：OrderedDict按访问顺序排列，命中时移到末尾，淘汰时弹出头部，均为O(1)
+    - TTL：过期时间放入最小堆，每次读写先清理堆顶已过期的项，过期项不会一直占用内存
+    - 容量：同时限制条目数（max_size）和估算字节数（max_bytes），超出任一限制即按LRU淘汰；
+      单个值超过字节预算时不缓存
+    - 统计：整体统计之外按命名空间（键的第一个冒号之前部分）统计命中、条目和字节数
+    """
+    
+    def __init__(self, max_size: int = 1000, max_bytes: Optional[int] = None):
+        """
+        Args:
+            max_size: 最大条目数
+            max_bytes: 字节预算，默认读取 MEMORY_CACHE_MAX_MB（256MB）
+        """
         self.max_size = max_size
-        self._cache: Dict[str, CacheItem] = {}
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv('MEMORY_CACHE_MAX_MB', DEFAULT_MEMORY_CACHE_MAX_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self._cache: 'OrderedDict[str, CacheItem]' = OrderedDict()
+        self._expiry_heap: List[Tuple[float, int, str]] = []    # (过期时间戳, 序号, 键)
+        self._heap_seq = itertools.count()
+        self._bytes = 0
         self._lock = threading.RLock()
         self._stats = {
             'hits': 0,
             'misses': 0,
             'sets': 0,
             'deletes': 0,
-            'evictions': 0
+            'evictions': 0,
+            'expirations': 0,
+            'rejected': 0
         }
+        self._namespaces: Dict[str, Dict[str, int]] = {}
+    
+    def _ns(self, key: str) -> Dict[str, int]:
+        namespace = key_namespace(key)
+        stats = self._namespaces.get(namespace)
+        if stats is None:
+            stats = self._namespaces[namespace] = {
+                'hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0, 'entries': 0, 'bytes': 0
+            }
+        return stats
+    
+    def _remove(self, key: str) -> CacheItem:
+        """移除缓存项并更新字节/条目统计（堆中的旧记录在弹出时跳过）"""
+        item = self._cache.pop(key)
+        self._bytes -= item.size
+        ns = self._ns(key)
+        ns['entries'] -= 1
+        ns['bytes'] -= item.size
+        return item
+    
+    def _purge_expired(self) -> None:
+        """清理堆顶所有已过期的项"""
+        now = time.time()
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_ts, _, key = heapq.heappop(heap)
+            item = self._cache.get(key)
+            # 键已被删除或重新设置过（过期时间不同）时，堆中的记录已失效
+            if item is not None and item.expires_at is not None and item.expires_at.timestamp() == expires_ts:
+                self._remove(key)
+                self._stats['expirations'] += 1
+        # 覆盖写入留下的失效记录过多时重建堆
+        if len(heap) > 2 * len(self._cache) + 64:
+            self._expiry_heap = [(item.expires_at.timestamp(), next(self._heap_seq), key)
+                                 for key, item in self._cache.items() if item.expires_at is not None]
+            heapq.heapify(self._expiry_heap)
     
     def get(self, key: str) -> Optional[Any]:
         """获取缓存值"""
         with self._lock:
-            if key not in self._cache:
+            self._purge_expired()
+            item = self._cache.get(key)
+            if item is None or item.is_expired():
+                if item is not None:
+                    self._remove(key)
+                    self._stats['expirations'] += 1
                 self._stats['misses'] += 1
+                self._ns(key)['misses'] += 1
                 return None
             
-            item = self._cache[key]
-            
-            # 检查是否过期
-            if item.is_expired():
-                del self._cache[key]
-                self._stats['misses'] += 1
-                return None
-            
-            # 更新命中统计
+            # 更新命中统计和LRU顺序
+            self._cache.move_to_end(key)
             item.hit_count += 1
             self._stats['hits'] += 1
+            self._ns(key)['hits'] += 1
             
             return item.value
     
     def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
         """设置缓存值"""
+        size = estimate_size(value)
         with self._lock:
-            # 检查缓存大小限制
-            if len(self._cache) >= self.max_size and key not in self._cache:
+            self._purge_expired()
+            if key in self._cache:
+                self._remove(key)
+            
+            if self.max_bytes and size > self.max_bytes:
+                self._stats['rejected'] += 1
+                logger.warning(f"缓存值过大未缓存: {key} ({size} 字节 > 预算 {self.max_bytes} 字节)")
+                return False
+            
+            # 检查条目数和字节预算，按LRU淘汰
+            while self._cache and (len(self._cache) >= self.max_size or
+                                   (self.max_bytes and self._bytes + size > self.max_bytes)):
                 self._evict_lru()
             
+            now = datetime.now()
             expires_at = None
             if ttl is not None:
-                expires_at = datetime.now() + timedelta(seconds=ttl)
+                expires_at = now + timedelta(seconds=ttl)
+                heapq.heappush(self._expiry_heap, (expires_at.timestamp(), next(self._heap_seq), key))
             
             self._cache[key] = CacheItem(
                 key=key,
                 value=value,
-                created_at=datetime.now(),
-                expires_at=expires_at
+                created_at=now,
+                expires_at=expires_at,
+                size=size
             )
+            self._bytes += size
+            ns = self._ns(key)
+            ns['entries'] += 1
+            ns['bytes'] += size
+            ns['sets'] += 1
             
             self._stats['sets'] += 1
             return True
@@ -108,7 +213,7 @@ class MemoryCache:
         """删除缓存值"""
         with self._lock:
             if key in self._cache:
-                del self._cache[key]
+                self._remove(key)
                 self._stats['deletes'] += 1
                 return True
             return False
@@ -117,16 +222,22 @@ class MemoryCache:
         """清空缓存"""
         with self._lock:
             self._cache.clear()
+            self._expiry_heap.clear()
+            self._bytes = 0
+            for ns in self._namespaces.values():
+                ns['entries'] = ns['bytes'] = 0
     
     def exists(self, key: str) -> bool:
         """检查键是否存在"""
         with self._lock:
-            if key not in self._cache:
+            self._purge_expired()
+            item = self._cache.get(key)
+            if item is None:
                 return False
             
-            item = self._cache[key]
             if item.is_expired():
-                del self._cache[key]
+                self._remove(key)
+                self._stats['expirations'] += 1
                 return False
             
             return True
@@ -134,6 +245,7 @@ class MemoryCache:
     def keys(self, pattern: str = "*") -> List[str]:
         """获取所有键"""
         with self._lock:
+            self._purge_expired()
             # 简单的模式匹配
             if pattern == "*":
                 return list(self._cache.keys())
@@ -145,28 +257,35 @@ class MemoryCache:
     def get_stats(self) -> Dict[str, Any]:
         """获取缓存统计"""
         with self._lock:
+            self._purge_expired()
             total_requests = self._stats['hits'] + self._stats['misses']
             hit_rate = self._stats['hits'] / total_requests if total_requests > 0 else 0
             
+            namespaces = {}
+            for name, ns in self._namespaces.items():
+                requests = ns['hits'] + ns['misses']
+                namespaces[name] = {**ns, 'hit_rate': ns['hits'] / requests if requests > 0 else 0}
+            
             return {
                 **self._stats,
                 'total_requests': total_requests,
                 'hit_rate': hit_rate,
                 'cache_size': len(self._cache),
-                'max_size': self.max_size
+                'max_size': self.max_size,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'namespaces': namespaces
             }
     
     def _evict_lru(self) -> None:
-        """LRU淘汰策略"""
+        """LRU淘汰策略：淘汰最久未访问的项"""
         if not self._cache:
             return
         
-        # 找到最少使用的项
-        lru_key = min(self._cache.keys(), 
-                     key=lambda k: (self._cache[k].hit_count, self._cache[k].created_at))
-        
-        del self._cache[lru_key]
+        lru_key = next(iter(self._cache))
+        self._remove(lru_key)
         self._stats['evictions'] += 1
+        self._ns(lru_key)['evictions'] += 1
 
 class RedisCache:
     """Redis缓存实现"""
@@ -1,4 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import sys
+from pathlib import Path
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response
 from typing import List, Optional, Dict, Any
 from database.neo4j_client import Neo4jClient
 from models.schemas import (
@@ -12,41 +15,41 @@ from models.schemas import (
 from dependencies import get_neo4j_client
 from datetime import datetime
 
+# 词典内存快照（services/nlp，仅依赖标准库）
+sys.path.append(str(Path(__file__).resolve().parents[2] / "nlp"))
+from dictionary_store import get_dictionary_store, etag_matches
+from dictionary_search import build_entry_index
+
+# 词典分类名称映射为中文
+DICTIONARY_CATEGORY_ZH = {
+    "Symptom": "症状",
+    "Component": "组件",
+    "Tool": "工具",
+    "Process": "流程",
+    "TestCase": "测试用例",
+    "Metric": "指标",
+    "Role": "角色",
+    "Material": "材料"
+}
+
+
+def _dictionary_path() -> Path:
+    """API服务运行在services/api目录，需要向上两级到项目根目录"""
+    dict_path = Path("../../api/data/dictionary.json")
+    if not dict_path.exists():
+        # 备用路径：使用绝对路径计算
+        project_root = Path(__file__).parent.parent.parent
+        dict_path = project_root / "api" / "data" / "dictionary.json"
+    return dict_path
+
+
 def get_dictionary_stats():
     """获取词典数据统计"""
-    import json
-    from pathlib import Path
-    from collections import Counter
-
     try:
-        # 读取词典数据
-        dict_path = Path("../../api/data/dictionary.json")
-        if not dict_path.exists():
-            current_file = Path(__file__)
-            project_root = current_file.parent.parent.parent
-            dict_path = project_root / "api" / "data" / "dictionary.json"
-
-        with open(dict_path, 'r', encoding='utf-8') as f:
-            all_entries = json.load(f)
-
-        # 统计分类
-        categories = Counter(entry.get('category', 'Unknown') for entry in all_entries)
-
-        # 统计标签
-        all_tags = set()
-        for entry in all_entries:
-            tags = entry.get('tags', [])
-            if isinstance(tags, list):
-                all_tags.update(tags)
-            elif isinstance(tags, str):
-                all_tags.update(tags.split())
-
-        return {
-            'total_entries': len(all_entries),
-            'total_categories': len(categories),
-            'total_tags': len(all_tags),
-            'categories': dict(categories)
-        }
+        snapshot = get_dictionary_store(_dictionary_path()).snapshot()
+        stats = dict(snapshot.stats)
+        stats['categories'] = dict(stats['categories'])
+        return stats
     except Exception as e:
         return {
             'total_entries': 0,
@@ -55,6 +58,34 @@ def get_dictionary_stats():
             'categories': {}
         }
 
+
+def _formatted_dictionary(snapshot) -> Dict[str, Any]:
+    """/dictionary/entries 的条目格式及全文检索索引（每个词典快照构建一次）"""
+    entries = []
+    for i, entry in enumerate(snapshot.entries):
+        formatted = {
+            "id": f"entry_{i+1:04d}",
+            "term": entry.get("term", ""),
+            "definition": entry.get("description", ""),
+            "category": DICTIONARY_CATEGORY_ZH.get(entry.get("category", ""), entry.get("category", "其他")),
+            "aliases": entry.get("aliases", []),
+            "tags": entry.get("tags", []),
+            "created_at": entry.get("created_at", "2025-09-27T10:00:00Z"),
+            "updated_at": entry.get("updated_at", "2025-09-27T10:00:00Z"),
+            "source": entry.get("source", "业务词典"),
+            "sub_category": entry.get("sub_category", ""),
+            "status": entry.get("status", "active"),
+            "original_category": entry.get("original_category", "")
+        }
+        entries.append(formatted)
+    return {
+        "entries": entries,
+        "index": build_entry_index(snapshot.entries),
+        "categories": sorted({e['category'] for e in entries}),
+        "total_tags": len({tag for e in entries for tag in e['tags'] if tag})
+    }
+
+
 router = APIRouter()
 
 @router.get("/products", response_model=ProductListResponse)
@@ -360,75 +391,36 @@ async def get_files():
 
 @router.get("/dictionary/entries")
 async def get_dictionary_entries(
+    request: Request,
     page: int = Query(1, ge=1),
     size: int = Query(20, ge=1, le=10000),
     search: Optional[str] = Query(None),
     category: Optional[str] = Query(None)
 ):
-    """获取词典条目"""
-    import json
-    import os
-    from pathlib import Path
-
+    """获取词典条目（读取内存快照；词典未变化时按ETag返回304）"""
     try:
-        # 读取完整的词典数据 - 1124条真实业务术语
-        # API服务运行在services/api目录，需要向上两级到项目根目录
-        dict_path = Path("../../api/data/dictionary.json")
-        if not dict_path.exists():
-            # 备用路径：使用绝对路径计算
-            current_file = Path(__file__)
-            project_root = current_file.parent.parent.parent
-            dict_path = project_root / "api" / "data" / "dictionary.json"
-
-        with open(dict_path, 'r', encoding='utf-8') as f:
-            all_entries = json.load(f)
-
-        # 转换为前端期望的格式
-        formatted_entries = []
-        for i, entry in enumerate(all_entries):
-            # 映射分类名称为中文
-            category_mapping = {
-                "Symptom": "症状",
-                "Component": "组件",
-                "Tool": "工具",
-                "Process": "流程",
-                "TestCase": "测试用例",
-                "Metric": "指标",
-                "Role": "角色",
-                "Material": "材料"
-            }
-
-            formatted_entries.append({
-                "id": f"entry_{i+1:04d}",
-                "term": entry.get("term", ""),
-                "definition": entry.get("description", ""),
-                "category": category_mapping.get(entry.get("category", ""), entry.get("category", "其他")),
-                "aliases": entry.get("aliases", []),
-                "tags": entry.get("tags", []),
-                "created_at": entry.get("created_at", "2025-09-27T10:00:00Z"),
-                "updated_at": entry.get("updated_at", "2025-09-27T10:00:00Z"),
-                "source": entry.get("source", "业务词典"),
-                "sub_category": entry.get("sub_category", ""),
-                "status": entry.get("status", "active"),
-                "original_category": entry.get("original_category", "")
-            })
-
-        # 应用搜索过滤
-        if search:
-            search_lower = search.lower()
-            formatted_entries = [
-                e for e in formatted_entries
-                if search_lower in e['term'].lower() or
-                   search_lower in e['definition'].lower() or
-                   any(search_lower in alias.lower() for alias in e['aliases'])
-            ]
-
-        # 应用分类过滤
-        if category:
-            formatted_entries = [e for e in formatted_entries if e['category'] == category]
-
-        # 获取所有分类
-        all_categories = {e['category'] for e in formatted_entries}
+        snapshot = get_dictionary_store(_dictionary_path()).snapshot()
+        headers = {"ETag": f'"{snapshot.etag}"', "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+            return Response(status_code=304, headers=headers)
+
+        view = snapshot.view("kg_router.dictionary_entries", _formatted_dictionary)
+        formatted_entries = view["entries"]
+
+        if search or category:
+            selected = range(len(formatted_entries))
+            # 应用搜索过滤（全文检索，按相关度排序）
+            if search:
+                selected = view["index"].search_ids(search)
+            # 应用分类过滤
+            if category:
+                selected = [i for i in selected if formatted_entries[i]['category'] == category]
+            formatted_entries = [formatted_entries[i] for i in selected]
+            all_categories = sorted({e['category'] for e in formatted_entries})
+            total_tags = len({tag for entry in formatted_entries for tag in entry['tags'] if tag})
+        else:
+            all_categories = view["categories"]
+            total_tags = view["total_tags"]
 
         # 分页
         total_entries = len(formatted_entries)
@@ -436,7 +428,7 @@ async def get_dictionary_entries(
         end = start + size
         page_entries = formatted_entries[start:end]
 
-        return {
+        return JSONResponse({
             "success": True,
             "data": {
                 "entries": page_entries,
@@ -446,10 +438,10 @@ async def get_dictionary_entries(
                     "total": total_entries,
                     "pages": (total_entries + size - 1) // size
                 },
-                "categories": sorted(list(all_categories)),
-                "total_tags": len({tag for entry in formatted_entries for tag in entry['tags'] if tag})
+                "categories": all_categories,
+                "total_tags": total_tags
             }
-        }
+        }, headers=headers)
 
     except Exception as e:
         # 如果读取文件失败，返回空数据
@@ -18,6 +18,10 @@ from dataclasses import dataclass, asdict
 sys.path.append(str(Path(__file__).parent.parent / "api"))
 
 from database.neo4j_client import Neo4jClient
+
+# 表格流式读取器（api/etl/tabular_stream.py，仅依赖pandas/openpyxl）按目录引入，避免与 services/api/etl 重名
+sys.path.append(str(Path(__file__).resolve().parents[2] / "api" / "etl"))
+from tabular_stream import read_table
 from dotenv import load_dotenv
 
 # 加载环境变量
@@ -139,7 +143,9 @@ class DataQualityChecker:
         try:
             ext = Path(file_path).suffix.lower()
             if ext in ['.xlsx', '.xls']:
-                return pd.read_excel(file_path)
+                # 与导入流程使用同一读取器（openpyxl read_only 逐行读取），再按列推断类型；
+                # 重复行、空值等检查需要全表，这里仍然整表拼接
+                return read_table(file_path).infer_objects()
             elif ext == '.csv':
                 return pd.read_csv(file_path, encoding='utf-8-sig')
             elif ext == '.json':
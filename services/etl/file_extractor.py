@@ -6,6 +6,7 @@
 
 import os
 import re
+import sys
 import json
 import logging
 from typing import Dict, List, Any, Optional, Tuple
@@ -17,6 +18,9 @@ from docx import Document
 import openpyxl
 from openpyxl.utils import get_column_letter
 
+sys.path.append(str(Path(__file__).resolve().parent.parent / "nlp"))
+from term_index import TermIndex
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -107,6 +111,10 @@ class FileExtractor:
                 self.cause_std = [str(x).strip() for x in dfcau['name'].dropna().tolist()]
         except Exception as e:
             logger.warning(f"加载根因词表失败: {e}")
+        # 解析索引：标准化时O(1)查表，不再逐个遍历词表
+        self.comp_index = TermIndex.from_mapping(self.comp_alias2std)
+        self.symptom_index = TermIndex.from_terms(self.symptom_std)
+        self.cause_index = TermIndex.from_terms(self.cause_std)
 
     def _standardize_name(self, entity_type: str, name: str) -> str:
         """根据词表标准化名称（中英别名兜底）"""
@@ -114,19 +122,14 @@ class FileExtractor:
             return name
         n = name.strip()
         t = (entity_type or '').lower()
-        if t == 'component' and self.comp_alias2std:
-            return self.comp_alias2std.get(n.lower(), n)
-        if t == 'symptom' and self.symptom_std:
-            for std in self.symptom_std:
-                if n.lower() == std.lower():
-                    return std
-            return n
-        if t == 'root_cause' and self.cause_std:
-            for std in self.cause_std:
-                if n.lower() == std.lower():
-                    return std
+        index = {
+            'component': self.comp_index,
+            'symptom': self.symptom_index,
+            'root_cause': self.cause_index
+        }.get(t)
+        if index is None:
             return n
-        return n
+        return index.get(n, n)
 
     def _make_key(self, label: str, name: str, extra: Optional[Dict[str, Any]] = None) -> str:
         """生成统一业务主键 key"""
@@ -6,15 +6,22 @@
 
 import logging
 import os
+import sys
+import time
 
 from typing import Dict, List, Any, Optional, Set
 from dataclasses import dataclass
 import hashlib
 from collections import defaultdict, Counter
+from pathlib import Path
 
 from neo4j import GraphDatabase
 from file_extractor import ExtractedEntity, ExtractedRelation, ExtractionResult
 
+sys.path.append(str(Path(__file__).resolve().parents[1] / "nlp"))
+from entity_dedup import NearDuplicateIndex, char_shingles, jaccard
+from write_versions import bump_write_versions
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -26,19 +33,57 @@ class GraphStats:
     relationship_types: Dict[str, int]
     source_files: List[str]
 
+# 关系类型标准化映射
+REL_MAP = {
+    'CONTAINS': 'INCLUDES',
+    'TESTS': 'RESULT_OF',
+    'AFFECTS': 'AFFECTS',
+    'BELONGS_TO': 'BELONGS_TO',
+    'CO_OCCURS': 'DOCUMENTED_IN',
+    'RELATED_TO': 'DOCUMENTED_IN',
+    'HAS_SYMPTOM': 'HAS_SYMPTOM',
+    'CAUSES': 'CAUSES',
+    'RESOLVED_BY': 'RESOLVED_BY',
+    'DUPLICATE_OF': 'DUPLICATE_OF',
+    'SUPPLIED_BY': 'SUPPLIED_BY',
+    'OWNED_BY': 'OWNED_BY',
+    'DOCUMENTED_IN': 'DOCUMENTED_IN',
+    'INCLUDES': 'INCLUDES',
+}
+
 class KnowledgeGraphBuilder:
     """知识图谱构建器"""
 
     def __init__(self, neo4j_uri: str = "bolt://localhost:7687",
                  neo4j_user: str = "neo4j",
-                 neo4j_password: str = "password"):
+                 neo4j_password: str = "password",
+                 write_mode: str = "batch",
+                 batch_size: Optional[int] = None,
+                 merge_thresholds: Optional[Dict[str, float]] = None,
+                 incremental_dedup: bool = False):
         self.neo4j_uri = neo4j_uri
         self.neo4j_user = neo4j_user
         self.neo4j_password = neo4j_password
         self.driver = None
 
+        # 写入模式：batch 按标签/关系类型分组后 UNWIND 批量写入；single 逐条 MERGE
+        self.write_mode = write_mode
+        self.batch_size = batch_size or int(os.getenv("ETL_BATCH_SIZE", "1000"))
+        self.last_write_stats: Dict[str, Any] = {}
+        # initialize_schema 后记录 entity_key 约束是否生效（库中有重复 key 时不创建）
+        self.entity_key_constraint: Optional[bool] = None
+
         # 实体去重和合并配置
         self.entity_similarity_threshold = 0.8
+        # 按实体类型的名称相似度阈值（字符二元组Jaccard），未配置的类型使用 entity_similarity_threshold
+        self.merge_thresholds = {'product': 0.9, 'component': 0.8, 'anomaly': 0.85}
+        self.merge_thresholds.update(merge_thresholds or {})
+        # 增量去重：保留已写入实体的名称索引，后续文件中的近重复实体并入已有节点（沿用其 key）
+        self.incremental_dedup = incremental_dedup
+        self.dedup_indexes: Dict[str, NearDuplicateIndex] = {}
+        self._dedup_entities: Dict[str, Dict[str, ExtractedEntity]] = {}
+        # 本次构建中被合并掉的实体id → 保留实体的key（关系端点据此改连）
+        self.merged_id_to_key: Dict[str, str] = {}
         self.merge_strategies = {
             'product': self._merge_product_entities,
             'component': self._merge_component_entities,
@@ -67,8 +112,15 @@ class KnowledgeGraphBuilder:
             self.driver.close()
 
     def initialize_schema(self):
-        """初始化图谱模式"""
+        """
+        初始化图谱模式
+
+        entity_key（Entity.key 唯一）是批量写入按 key 匹配端点的前提。库中已有重复 key 时约束无法创建，
+        这里先检查重复并以错误级别报告样例，不创建该约束；需先合并或删除重复节点后重新初始化。
+        """
         with self.driver.session() as session:
+            self.entity_key_constraint = self._ensure_entity_key_constraint(session)
+
             # 创建约束和索引
             constraints = [
                 "CREATE CONSTRAINT entity_id IF NOT EXISTS FOR (e:Entity) REQUIRE e.id IS UNIQUE",
@@ -99,6 +151,25 @@ class KnowledgeGraphBuilder:
                 except Exception as e:
                     logger.warning(f"索引创建失败 (可能已存在): {e}")
 
+    def _ensure_entity_key_constraint(self, session) -> bool:
+        """检查 Entity.key 重复后创建唯一约束，返回约束是否生效"""
+        record = session.run("""
+            MATCH (e:Entity) WHERE e.key IS NOT NULL
+            WITH e.key AS key, count(*) AS c WHERE c > 1
+            RETURN count(key) AS duplicates, collect(key)[..10] AS samples
+        """).single()
+        if record and record['duplicates']:
+            logger.error(f"Entity.key 存在 {record['duplicates']} 个重复值（样例: {record['samples']}），"
+                         f"未创建 entity_key 约束；请先合并重复节点，否则按 key 写入会匹配到多个节点")
+            return False
+        try:
+            session.run("CREATE CONSTRAINT entity_key IF NOT EXISTS FOR (e:Entity) REQUIRE e.key IS UNIQUE")
+            logger.info("创建约束: entity_key")
+            return True
+        except Exception as e:
+            logger.error(f"entity_key 约束创建失败，按 key 写入不受唯一性保护: {e}")
+            return False
+
     def build_graph_from_extraction(self, extraction_result: ExtractionResult) -> Dict[str, Any]:
         """从抽取结果构建知识图谱"""
         if not self.driver:
@@ -109,26 +180,41 @@ class KnowledgeGraphBuilder:
         cleaned_relations = self._clean_and_deduplicate_relations(extraction_result.relations)
 
         # 构建图谱
-        id_to_key = {e.id: getattr(e, 'key', None) for e in cleaned_entities}
+        id_to_key = dict(self.merged_id_to_key)
+        id_to_key.update({e.id: getattr(e, 'key', None) for e in cleaned_entities})
+        self.last_write_stats = {'mode': self.write_mode, 'batch_size': self.batch_size, 'batches': []}
         with self.driver.session() as session:
-            # 创建实体节点（按 key 幂等）
-            created_nodes = self._create_entities(session, cleaned_entities)
+            if self.write_mode == "batch":
+                # 按标签组 UNWIND 批量写入实体，按关系类型批量写入关系
+                created_nodes = self._create_entities_batch(session, cleaned_entities)
+                created_relationships = self._create_relationships_batch(session, cleaned_relations, id_to_key)
+            else:
+                # 创建实体节点（按 key 幂等）
+                created_nodes = self._create_entities(session, cleaned_entities)
 
-            # 创建关系（按 key 连接）
-            created_relationships = self._create_relationships(session, cleaned_relations, id_to_key)
+                # 创建关系（按 key 连接）
+                created_relationships = self._create_relationships(session, cleaned_relations, id_to_key)
 
             # 更新文件元数据
             self._update_file_metadata(session, extraction_result)
 
+        # 递增写入涉及的标签/关系类型的缓存版本，API进程的查询缓存与统计快照随之刷新
+        bump_write_versions(
+            labels={'Entity', 'File'} | {self._entity_label(e) for e in cleaned_entities},
+            rel_types={self._relation_type_and_properties(r)[0] for r in cleaned_relations}
+        )
+
         return {
             'created_nodes': created_nodes,
             'created_relationships': created_relationships,
             'source_file': extraction_result.file_path,
-            'processing_errors': extraction_result.errors
+            'processing_errors': extraction_result.errors,
+            'write_stats': self.last_write_stats
         }
 
     def _clean_and_deduplicate_entities(self, entities: List[ExtractedEntity]) -> List[ExtractedEntity]:
         """清洗和去重实体"""
+        self.merged_id_to_key = {}
         # 按类型分组
         entities_by_type = defaultdict(list)
         for entity in entities:
@@ -175,24 +261,7 @@ class KnowledgeGraphBuilder:
         created_count = 0
 
         for entity in entities:
-            # 构建节点标签：通用 Entity + 具体业务标签
-            label = entity.properties.get('label') if isinstance(entity.properties, dict) else None
-            label = label or entity.type.title()
-            labels = ['Entity', label]
-            labels_str = ':'.join(labels)
-
-            # 元数据与属性
-            properties = {
-                'key': getattr(entity, 'key', None),
-                'id': entity.id,
-                'name': entity.name,
-                'type': label,
-                'source': entity.source_file,
-                'doc_id': os.path.basename(entity.source_file) if entity.source_file else None,
-                'source_location': entity.source_location,
-                'created_by': 'etl',
-                **(entity.properties or {})
-            }
+            labels_str, properties = self._entity_labels_and_properties(entity)
 
             # 创建或更新（按 key）
             cypher = f"""
@@ -213,64 +282,219 @@ class KnowledgeGraphBuilder:
         logger.info(f"创建了 {created_count} 个实体节点")
         return created_count
 
-    def _create_relationships(self, session, relations: List[ExtractedRelation], id_to_key: Dict[str, str]) -> int:
-        """创建关系（按 key 匹配节点，标准化关系类型）"""
-        created_count = 0
-        REL_MAP = {
-            'CONTAINS': 'INCLUDES',
-            'TESTS': 'RESULT_OF',
-            'AFFECTS': 'AFFECTS',
-            'BELONGS_TO': 'BELONGS_TO',
-            'CO_OCCURS': 'DOCUMENTED_IN',
-            'RELATED_TO': 'DOCUMENTED_IN',
-            'HAS_SYMPTOM': 'HAS_SYMPTOM',
-            'CAUSES': 'CAUSES',
-            'RESOLVED_BY': 'RESOLVED_BY',
-            'DUPLICATE_OF': 'DUPLICATE_OF',
-            'SUPPLIED_BY': 'SUPPLIED_BY',
-            'OWNED_BY': 'OWNED_BY',
-            'DOCUMENTED_IN': 'DOCUMENTED_IN',
-            'INCLUDES': 'INCLUDES',
+    @staticmethod
+    def _entity_label(entity: ExtractedEntity) -> str:
+        """具体业务标签（属性中的 label，默认为实体类型）"""
+        label = entity.properties.get('label') if isinstance(entity.properties, dict) else None
+        return label or entity.type.title()
+
+    def _entity_labels_and_properties(self, entity: ExtractedEntity):
+        """构建节点标签串和写入属性"""
+        # 构建节点标签：通用 Entity + 具体业务标签
+        label = self._entity_label(entity)
+        labels = ['Entity', label]
+        labels_str = ':'.join(labels)
+
+        # 元数据与属性
+        properties = {
+            'key': getattr(entity, 'key', None),
+            'id': entity.id,
+            'name': entity.name,
+            'type': label,
+            'source': entity.source_file,
+            'doc_id': os.path.basename(entity.source_file) if entity.source_file else None,
+            'source_location': entity.source_location,
+            'created_by': 'etl',
+            **(entity.properties or {})
+        }
+        return labels_str, properties
+
+    def _relation_type_and_properties(self, relation: ExtractedRelation):
+        """标准化关系类型并构建关系属性"""
+        rtype = REL_MAP.get(relation.relation_type.upper(), relation.relation_type.upper())
+        properties = {
+            'confidence': relation.confidence,
+            'source': relation.source_file,
+            **(relation.properties or {})
         }
+        return rtype, properties
 
+    def _write_batches(self, session, kind: str, group: str, cypher: str, rows: List[Dict[str, Any]], fallback) -> int:
+        """
+        分块执行 UNWIND 写入，每块一个显式事务，并记录吞吐量
+
+        Args:
+            kind: 'node' 或 'relationship'
+            group: 标签串或关系类型
+            cypher: 以 UNWIND $rows AS row 开头、返回 count 列 c 的语句
+            rows: 行参数
+            fallback: 批次失败时对该批逐条写入的回调 (rows) -> int
+        """
+        written = 0
+        for start in range(0, len(rows), self.batch_size):
+            chunk = rows[start:start + self.batch_size]
+            began = time.perf_counter()
+            try:
+                count = session.execute_write(lambda tx: tx.run(cypher, rows=chunk).single()['c'])
+            except Exception as e:
+                logger.error(f"批量写入失败 {kind}:{group} 第{start // self.batch_size + 1}批，改为逐条写入: {e}")
+                count = fallback(chunk)
+            elapsed = time.perf_counter() - began
+            written += count
+            self.last_write_stats['batches'].append({
+                'kind': kind,
+                'group': group,
+                'rows': len(chunk),
+                'written': count,
+                'seconds': round(elapsed, 4),
+                'rows_per_sec': round(len(chunk) / elapsed, 1) if elapsed > 0 else None
+            })
+            logger.info(f"批量写入 {kind}:{group} {count}/{len(chunk)} 行，耗时 {elapsed:.3f}s")
+        return written
+
+    def _create_entities_batch(self, session, entities: List[ExtractedEntity]) -> int:
+        """
+        按标签组分批 UNWIND 创建实体节点（按 key 幂等）
+
+        同一 key 出现在不同标签组时只写入最先出现的一组：否则另一组的 MERGE 找不到带其标签的节点而新建，
+        违反 entity_key 约束，导致整批失败并退回逐条写入。冲突数记入 last_write_stats['key_collisions']。
+        """
+        rows_by_labels = defaultdict(list)
+        key_labels: Dict[str, str] = {}
+        collisions = 0
+        for entity in entities:
+            labels_str, properties = self._entity_labels_and_properties(entity)
+            key = properties['key']
+            if key is None:
+                logger.error(f"创建实体节点失败 key=None: {entity.name}")
+                continue
+            first_labels = key_labels.setdefault(key, labels_str)
+            if first_labels != labels_str:
+                collisions += 1
+                logger.warning(f"实体 key 跨标签冲突，跳过 {labels_str} key={key}（已按 {first_labels} 写入）")
+                continue
+            rows_by_labels[labels_str].append({'key': key, 'properties': properties})
+        self.last_write_stats['key_collisions'] = collisions
+
+        created_count = 0
+        for labels_str, rows in rows_by_labels.items():
+            cypher = f"""
+            UNWIND $rows AS row
+            MERGE (e:{labels_str} {{key: row.key}})
+            SET e += row.properties,
+                e.created_at = coalesce(e.created_at, datetime()),
+                e.updated_at = datetime()
+            RETURN count(e) AS c
+            """
+            created_count += self._write_batches(
+                session, 'node', labels_str, cypher, rows,
+                lambda chunk, labels_str=labels_str: self._write_entity_rows_single(session, labels_str, chunk)
+            )
+
+        logger.info(f"创建了 {created_count} 个实体节点")
+        return created_count
+
+    def _write_entity_rows_single(self, session, labels_str: str, rows: List[Dict[str, Any]]) -> int:
+        """批次失败时的逐条写入（与单条模式语义一致）"""
+        cypher = f"""
+        MERGE (e:{labels_str} {{key: $key}})
+        SET e += $properties,
+            e.created_at = coalesce(e.created_at, datetime()),
+            e.updated_at = datetime()
+        RETURN e
+        """
+        count = 0
+        for row in rows:
+            try:
+                if session.run(cypher, key=row['key'], properties=row['properties']).single():
+                    count += 1
+            except Exception as e:
+                logger.error(f"创建实体节点失败 key={row['key']}: {e}")
+        return count
+
+    def _create_relationships_batch(self, session, relations: List[ExtractedRelation], id_to_key: Dict[str, str]) -> int:
+        """按关系类型分批 UNWIND 创建关系（按 Entity.key 索引匹配端点）"""
+        rows_by_type = defaultdict(list)
         for relation in relations:
             source_key = id_to_key.get(relation.source_entity)
             target_key = id_to_key.get(relation.target_entity)
             if not source_key or not target_key:
                 continue
-            rtype = REL_MAP.get(relation.relation_type.upper(), relation.relation_type.upper())
-
-            properties = {
-                'confidence': relation.confidence,
-                'source': relation.source_file,
-                **(relation.properties or {})
-            }
+            rtype, properties = self._relation_type_and_properties(relation)
+            rows_by_type[rtype].append({
+                'source_key': source_key,
+                'target_key': target_key,
+                'properties': properties
+            })
 
+        created_count = 0
+        for rtype, rows in rows_by_type.items():
             cypher = f"""
-            MATCH (source {{key: $source_key}})
-            MATCH (target {{key: $target_key}})
+            UNWIND $rows AS row
+            MATCH (source:Entity {{key: row.source_key}})
+            MATCH (target:Entity {{key: row.target_key}})
             MERGE (source)-[r:{rtype}]->(target)
-            SET r += $properties,
+            SET r += row.properties,
                 r.created_at = coalesce(r.created_at, datetime()),
                 r.updated_at = datetime()
-            RETURN r
+            RETURN count(r) AS c
             """
+            created_count += self._write_batches(
+                session, 'relationship', rtype, cypher, rows,
+                lambda chunk, rtype=rtype: self._write_relationship_rows_single(session, rtype, chunk)
+            )
 
-            try:
-                result = session.run(
-                    cypher,
-                    source_key=source_key,
-                    target_key=target_key,
-                    properties=properties
-                )
-                if result.single():
-                    created_count += 1
-            except Exception as e:
-                logger.error(f"创建关系失败 {source_key}->{target_key}: {e}")
+        logger.info(f"创建了 {created_count} 个关系")
+        return created_count
+
+    def _write_relationship_rows_single(self, session, rtype: str, rows: List[Dict[str, Any]]) -> int:
+        """批次失败时的逐条关系写入"""
+        count = 0
+        for row in rows:
+            count += self._merge_relationship(session, rtype, row['source_key'], row['target_key'], row['properties'])
+        return count
+
+    def _create_relationships(self, session, relations: List[ExtractedRelation], id_to_key: Dict[str, str]) -> int:
+        """创建关系（按 key 匹配节点，标准化关系类型）"""
+        created_count = 0
+
+        for relation in relations:
+            source_key = id_to_key.get(relation.source_entity)
+            target_key = id_to_key.get(relation.target_entity)
+            if not source_key or not target_key:
+                continue
+            rtype, properties = self._relation_type_and_properties(relation)
+            created_count += self._merge_relationship(session, rtype, source_key, target_key, properties)
 
         logger.info(f"创建了 {created_count} 个关系")
         return created_count
 
+    def _merge_relationship(self, session, rtype: str, source_key: str, target_key: str,
+                            properties: Dict[str, Any]) -> int:
+        """按 key 合并单条关系，成功返回1"""
+        cypher = f"""
+        MATCH (source:Entity {{key: $source_key}})
+        MATCH (target:Entity {{key: $target_key}})
+        MERGE (source)-[r:{rtype}]->(target)
+        SET r += $properties,
+            r.created_at = coalesce(r.created_at, datetime()),
+            r.updated_at = datetime()
+        RETURN r
+        """
+
+        try:
+            result = session.run(
+                cypher,
+                source_key=source_key,
+                target_key=target_key,
+                properties=properties
+            )
+            if result.single():
+                return 1
+        except Exception as e:
+            logger.error(f"创建关系失败 {source_key}->{target_key}: {e}")
+        return 0
+
     def _update_file_metadata(self, session, extraction_result: ExtractionResult):
         """更新文件元数据"""
         metadata = {
@@ -298,11 +522,11 @@ class KnowledgeGraphBuilder:
 
     def _merge_product_entities(self, entities: List[ExtractedEntity]) -> List[ExtractedEntity]:
         """合并产品实体"""
-        return self._merge_by_name_similarity(entities, threshold=0.9)
+        return self._merge_by_name_similarity(entities, threshold=self._merge_threshold('product'))
 
     def _merge_component_entities(self, entities: List[ExtractedEntity]) -> List[ExtractedEntity]:
         """合并组件实体"""
-        return self._merge_by_name_similarity(entities, threshold=0.8)
+        return self._merge_by_name_similarity(entities, threshold=self._merge_threshold('component'))
 
     def _merge_test_case_entities(self, entities: List[ExtractedEntity]) -> List[ExtractedEntity]:
         """合并测试用例实体"""
@@ -311,41 +535,73 @@ class KnowledgeGraphBuilder:
 
     def _merge_anomaly_entities(self, entities: List[ExtractedEntity]) -> List[ExtractedEntity]:
         """合并异常实体"""
-        return self._merge_by_name_similarity(entities, threshold=0.85)
+        return self._merge_by_name_similarity(entities, threshold=self._merge_threshold('anomaly'))
 
     def _default_merge_entities(self, entities: List[ExtractedEntity]) -> List[ExtractedEntity]:
         """默认实体合并策略"""
-        return self._merge_by_name_similarity(entities, threshold=0.8)
+        return self._merge_by_name_similarity(entities, threshold=self.entity_similarity_threshold)
 
-    def _merge_by_name_similarity(self, entities: List[ExtractedEntity], threshold: float = 0.8) -> List[ExtractedEntity]:
-        """基于名称相似度合并实体"""
-        if not entities:
-            return []
+    def _merge_threshold(self, entity_type: str) -> float:
+        return self.merge_thresholds.get(entity_type, self.entity_similarity_threshold)
 
-        merged = []
-        used_indices = set()
+    def _dedup_index(self, entity_type: str, threshold: float) -> NearDuplicateIndex:
+        """增量模式下按类型复用的名称索引；非增量模式每批新建"""
+        if not self.incremental_dedup:
+            return NearDuplicateIndex(threshold=threshold)
+        index = self.dedup_indexes.get(entity_type)
+        if index is None or index.threshold != threshold:
+            index = self.dedup_indexes[entity_type] = NearDuplicateIndex(threshold=threshold)
+            self._dedup_entities[entity_type] = {}
+        return index
 
-        for i, entity1 in enumerate(entities):
-            if i in used_indices:
-                continue
-
-            # 找到相似的实体
-            similar_entities = [entity1]
-            used_indices.add(i)
+    def _merge_by_name_similarity(self, entities: List[ExtractedEntity], threshold: float = 0.8) -> List[ExtractedEntity]:
+        """
+        基于名称相似度合并实体
 
-            for j, entity2 in enumerate(entities[i+1:], i+1):
-                if j in used_indices:
-                    continue
+        字符二元组 MinHash/LSH 生成候选、Jaccard 校验、并查集合簇（services/nlp/entity_dedup.py）。
+        增量模式下与此前文件中同簇的实体并入其已写入的节点（沿用其 key 和名称）。
+        """
+        if not entities:
+            return []
 
-                similarity = self._calculate_name_similarity(entity1.name, entity2.name)
-                if similarity >= threshold:
-                    similar_entities.append(entity2)
-                    used_indices.add(j)
+        entity_type = entities[0].type
+        index = self._dedup_index(entity_type, threshold)
+        # 增量模式下此前各批实体的索引键 → 其实际写入的节点
+        known = self._dedup_entities.setdefault(entity_type, {}) if self.incremental_dedup else {}
+
+        # 同一id（同名同类型）在批内重复出现时使用不同的索引键
+        keys = [f"{len(known)}:{i}" for i in range(len(entities))]
+        by_key = dict(zip(keys, entities))
+        anchors: Dict[str, str] = {}  # 本批实体 → 相似度最高的已写入实体
+        for key, entity in by_key.items():
+            for other, _ in index.add(key, entity.name):
+                if other in known:
+                    anchors[key] = other
+                    break
+
+        clusters: Dict[Any, List[str]] = {}
+        for key in keys:
+            clusters.setdefault(index.root(key), []).append(key)
 
-            # 合并相似实体
-            merged_entity = self._merge_similar_entities(similar_entities)
+        merged = []
+        for members in clusters.values():
+            group = [by_key[k] for k in members]
+            original_ids = [entity.id for entity in group]
+            merged_entity = self._merge_similar_entities(group)
+            anchor = next((anchors[k] for k in members if k in anchors), None)
+            if anchor is not None:
+                # 并入此前已写入的节点
+                existing = known[anchor]
+                merged_entity.id = existing.id
+                merged_entity.key = existing.key
+                merged_entity.name = existing.name
+            for entity_id in original_ids:
+                if entity_id != merged_entity.id:
+                    self.merged_id_to_key.setdefault(entity_id, merged_entity.key)
             merged.append(merged_entity)
-
+            if self.incremental_dedup:
+                # 簇内每个成员都指向实际写入的节点
+                known.update((k, merged_entity) for k in members)
         return merged
 
     def _merge_by_exact_name(self, entities: List[ExtractedEntity]) -> List[ExtractedEntity]:
@@ -363,18 +619,8 @@ class KnowledgeGraphBuilder:
         return merged
 
     def _calculate_name_similarity(self, name1: str, name2: str) -> float:
-        """计算名称相似度"""
-        # 简单的Jaccard相似度
-        set1 = set(name1.lower().split())
-        set2 = set(name2.lower().split())
-
-        if not set1 and not set2:
-            return 1.0
-
-        intersection = len(set1.intersection(set2))
-        union = len(set1.union(set2))
-
-        return intersection / union if union > 0 else 0.0
+        """计算名称相似度（字符二元组Jaccard，对中文名同样有效）"""
+        return jaccard(char_shingles(name1), char_shingles(name2))
 
     def _merge_similar_entities(self, entities: List[ExtractedEntity]) -> ExtractedEntity:
         """合并相似实体"""
@@ -397,6 +643,7 @@ class KnowledgeGraphBuilder:
         # 创建合并后的实体
         merged_entity = ExtractedEntity(
             id=base_entity.id,
+            key=base_entity.key,
             name=base_entity.name,
             type=base_entity.type,
             properties={
@@ -3,6 +3,7 @@
 数据治理体系
 建立异常标签、组件词典、供应商管理等数据治理机制，支持持续优化和维护
 """
+import sys
 import json
 import pandas as pd
 from typing import Dict, List, Any, Optional, Set
@@ -12,6 +13,9 @@ import logging
 from dataclasses import dataclass, asdict
 from enum import Enum
 
+sys.path.append(str(Path(__file__).parent.parent / "nlp"))
+from dictionary_search import DictionarySearchIndex, DocumentFields, IndexedMapping
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -87,6 +91,11 @@ class DataQualityMetrics:
     quality_level: str
     last_check: str
 
+# 各集合条目 → 全文检索文档
+LABEL_SEARCH_FIELDS = DocumentFields(term='name', tags='keywords', definition='description')
+COMPONENT_SEARCH_FIELDS = DocumentFields(term='name', aliases='aliases', tags=('category',))
+SUPPLIER_SEARCH_FIELDS = DocumentFields(term='name', tags='business_scope')
+
 class DataGovernanceSystem:
     """数据治理系统"""
     
@@ -94,10 +103,17 @@ class DataGovernanceSystem:
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
         
+        # 各集合的全文检索索引，写入集合时同步更新
+        self.label_index = DictionarySearchIndex()
+        self.component_index = DictionarySearchIndex()
+        self.supplier_index = DictionarySearchIndex()
+        
         # 初始化各个治理组件
-        self.anomaly_labels: Dict[str, AnomalyLabel] = {}
-        self.component_dict: Dict[str, ComponentDictionary] = {}
-        self.supplier_profiles: Dict[str, SupplierProfile] = {}
+        self.anomaly_labels: Dict[str, AnomalyLabel] = IndexedMapping(self.label_index, LABEL_SEARCH_FIELDS)
+        self.component_dict: Dict[str, ComponentDictionary] = IndexedMapping(self.component_index,
+                                                                             COMPONENT_SEARCH_FIELDS)
+        self.supplier_profiles: Dict[str, SupplierProfile] = IndexedMapping(self.supplier_index,
+                                                                            SUPPLIER_SEARCH_FIELDS)
         self.quality_metrics: Dict[str, DataQualityMetrics] = {}
         
         # 加载现有数据
@@ -111,21 +127,24 @@ class DataGovernanceSystem:
             if labels_file.exists():
                 with open(labels_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    self.anomaly_labels = {k: AnomalyLabel(**v) for k, v in data.items()}
+                    self.anomaly_labels.clear()
+                    self.anomaly_labels.update({k: AnomalyLabel(**v) for k, v in data.items()})
             
             # 加载组件词典
             components_file = self.data_dir / "component_dictionary.json"
             if components_file.exists():
                 with open(components_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    self.component_dict = {k: ComponentDictionary(**v) for k, v in data.items()}
+                    self.component_dict.clear()
+                    self.component_dict.update({k: ComponentDictionary(**v) for k, v in data.items()})
             
             # 加载供应商档案
             suppliers_file = self.data_dir / "supplier_profiles.json"
             if suppliers_file.exists():
                 with open(suppliers_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    self.supplier_profiles = {k: SupplierProfile(**v) for k, v in data.items()}
+                    self.supplier_profiles.clear()
+                    self.supplier_profiles.update({k: SupplierProfile(**v) for k, v in data.items()})
             
             logger.info(f"加载治理数据完成: {len(self.anomaly_labels)}个标签, {len(self.component_dict)}个组件, {len(self.supplier_profiles)}个供应商")
             
@@ -408,42 +427,16 @@ class DataGovernanceSystem:
         return supplier_id
     
     def search_anomaly_labels(self, keyword: str) -> List[AnomalyLabel]:
-        """搜索异常标签"""
-        results = []
-        keyword_lower = keyword.lower()
-        
-        for label in self.anomaly_labels.values():
-            if (keyword_lower in label.name.lower() or
-                keyword_lower in label.description.lower() or
-                any(keyword_lower in kw.lower() for kw in label.keywords)):
-                results.append(label)
-        
-        return results
+        """搜索异常标签（名称、描述、关键词全文检索，按相关度排序）"""
+        return [self.anomaly_labels[i] for i in self.label_index.search_ids(keyword)]
     
     def search_components(self, keyword: str) -> List[ComponentDictionary]:
-        """搜索组件"""
-        results = []
-        keyword_lower = keyword.lower()
-        
-        for component in self.component_dict.values():
-            if (keyword_lower in component.name.lower() or
-                keyword_lower in component.category.lower() or
-                any(keyword_lower in alias.lower() for alias in component.aliases)):
-                results.append(component)
-        
-        return results
+        """搜索组件（名称、别名、分类全文检索，按相关度排序）"""
+        return [self.component_dict[i] for i in self.component_index.search_ids(keyword)]
     
     def search_suppliers(self, keyword: str) -> List[SupplierProfile]:
-        """搜索供应商"""
-        results = []
-        keyword_lower = keyword.lower()
-        
-        for supplier in self.supplier_profiles.values():
-            if (keyword_lower in supplier.name.lower() or
-                any(keyword_lower in scope.lower() for scope in supplier.business_scope)):
-                results.append(supplier)
-        
-        return results
+        """搜索供应商（名称、业务范围全文检索，按相关度排序）"""
+        return [self.supplier_profiles[i] for i in self.supplier_index.search_ids(keyword)]
     
     def check_data_quality(self) -> Dict[str, DataQualityMetrics]:
         """检查数据质量"""
@@ -7,17 +7,25 @@
 import csv
 import json
 import re
+import sys
 import logging
 from pathlib import Path
 from typing import Dict, List, Set, Optional, Tuple, Any
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from datetime import datetime
-import difflib
+
+sys.path.append(str(Path(__file__).parent.parent / "nlp"))
+from term_index import TermIndex
+from dictionary_search import DictionarySearchIndex, DocumentFields, IndexedMapping, fold
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 词典条目 → 全文检索文档（原术语按别名检索）
+ENTRY_SEARCH_FIELDS = DocumentFields(term="canonical_name", aliases=("term", "aliases"), tags="tags",
+                                     definition="description", category="category")
+
 @dataclass
 class DictionaryEntry:
     """词典条目"""
@@ -65,6 +73,9 @@ class DictionaryService:
         self.dictionaries: Dict[str, Dict[str, DictionaryEntry]] = {}
         self.alias_mapping: Dict[str, str] = {}  # alias -> canonical_name
         self.category_mapping: Dict[str, str] = {}  # term -> category
+        self.alias_index = TermIndex()  # 别名解析索引（模糊匹配候选生成）
+        self.term_indexes: Dict[str, TermIndex] = {}  # category -> 术语索引
+        self.search_index = DictionarySearchIndex()  # 全文检索索引，写入词典时同步更新
         
         # 配置
         self.similarity_threshold = 0.8
@@ -87,7 +98,7 @@ class DictionaryService:
                 self._load_dictionary_file(category, dict_file)
             else:
                 logger.warning(f"Dictionary file not found: {dict_file}")
-                self.dictionaries[category] = {}
+                self._new_category(category)
         
         self._build_mappings()
         logger.info(f"Loaded {len(self.alias_mapping)} aliases across {len(self.dictionaries)} categories")
@@ -95,7 +106,7 @@ class DictionaryService:
     def _load_dictionary_file(self, category: str, file_path: Path):
         """加载单个词典文件"""
         try:
-            entries = {}
+            entries = self._new_category(category)
             with open(file_path, 'r', encoding='utf-8') as f:
                 reader = csv.DictReader(f)
                 for row in reader:
@@ -119,12 +130,20 @@ class DictionaryService:
                         )
                         entries[term] = entry
             
-            self.dictionaries[category] = entries
             logger.info(f"Loaded {len(entries)} entries from {category} dictionary")
             
         except Exception as e:
             logger.error(f"Failed to load dictionary {file_path}: {e}")
-            self.dictionaries[category] = {}
+            self._new_category(category)
+
+    def _new_category(self, category: str) -> IndexedMapping:
+        """创建（或清空重建）某个分类的词条集合，写入时同步更新全文检索索引"""
+        old = self.dictionaries.get(category)
+        if old is not None:
+            old.clear()
+        entries = self.dictionaries[category] = IndexedMapping(self.search_index, ENTRY_SEARCH_FIELDS,
+                                                               scope=category)
+        return entries
     
     def _build_mappings(self):
         """构建别名映射和分类映射"""
@@ -147,6 +166,13 @@ class DictionaryService:
                 if term != entry.canonical_name:
                     self.alias_mapping[term.lower()] = entry.canonical_name
                     self.category_mapping[term] = category
+        
+        # 重建解析索引
+        self.alias_index = TermIndex.from_mapping(self.alias_mapping)
+        self.term_indexes = {
+            category: TermIndex.from_terms(entries.keys())
+            for category, entries in self.dictionaries.items()
+        }
     
     def normalize(self, term: str) -> str:
         """标准化术语"""
@@ -172,20 +198,9 @@ class DictionaryService:
         return cleaned_term
     
     def _fuzzy_match(self, term: str) -> Optional[str]:
-        """模糊匹配"""
-        term_lower = term.lower()
-        best_match = None
-        best_score = 0
-        
-        for alias, canonical in self.alias_mapping.items():
-            # 计算相似度
-            score = difflib.SequenceMatcher(None, term_lower, alias).ratio()
-            
-            if score > best_score and score >= self.similarity_threshold:
-                best_score = score
-                best_match = canonical
-        
-        return best_match
+        """模糊匹配（索引生成候选，仅对候选计算相似度）"""
+        matched = self.alias_index.match(term, self.similarity_threshold)
+        return matched[1] if matched else None
     
     def get_category(self, term: str) -> Optional[str]:
         """获取术语的分类"""
@@ -216,7 +231,7 @@ class DictionaryService:
         
         # 添加到词典
         if category not in self.dictionaries:
-            self.dictionaries[category] = {}
+            self._new_category(category)
         
         self.dictionaries[category][term] = entry
         
@@ -283,16 +298,11 @@ class DictionaryService:
     
     def _find_similar_terms(self, term: str, category: str, threshold: float = 0.7) -> List[str]:
         """查找相似术语"""
-        similar_terms = []
-        term_lower = term.lower()
-        
-        if category in self.dictionaries:
-            for existing_term in self.dictionaries[category].keys():
-                score = difflib.SequenceMatcher(None, term_lower, existing_term.lower()).ratio()
-                if score >= threshold and score < 1.0:  # 相似但不完全相同
-                    similar_terms.append(existing_term)
-        
-        return similar_terms
+        index = self.term_indexes.get(category)
+        if index is None:
+            return []
+        # 相似但不完全相同
+        return [existing_term for existing_term, _, score in index.similar(term, threshold) if score < 1.0]
     
     def detect_conflicts(self) -> List[Dict[str, Any]]:
         """检测词典冲突"""
@@ -415,44 +425,19 @@ class DictionaryService:
         return stats
     
     def search(self, query: str, category: str = None, limit: int = 10) -> List[Dict[str, Any]]:
-        """搜索词典条目"""
+        """搜索词典条目（标准名、术语、别名、标签、描述全文检索，按相关度排序）"""
+        query_folded = fold(query)
         results = []
-        query_lower = query.lower()
-        
-        categories_to_search = [category] if category else self.dictionaries.keys()
-        
-        for cat in categories_to_search:
-            if cat not in self.dictionaries:
-                continue
-                
-            for entry in self.dictionaries[cat].values():
-                score = 0
-                
-                # 精确匹配
-                if query_lower == entry.canonical_name.lower():
-                    score = 1.0
-                elif query_lower in [alias.lower() for alias in entry.aliases]:
-                    score = 0.9
-                elif query_lower == entry.term.lower():
-                    score = 0.8
-                # 部分匹配
-                elif query_lower in entry.canonical_name.lower():
-                    score = 0.6
-                elif any(query_lower in alias.lower() for alias in entry.aliases):
-                    score = 0.5
-                elif query_lower in entry.description.lower():
-                    score = 0.3
-                
-                if score > 0:
-                    results.append({
-                        "entry": asdict(entry),
-                        "score": score,
-                        "match_type": "exact" if score >= 0.8 else "partial"
-                    })
-        
-        # 排序并限制结果
-        results.sort(key=lambda x: x["score"], reverse=True)
-        return results[:limit]
+        for (cat, key), score in self.search_index.search(query, category, limit)[1]:
+            entry = self.dictionaries[cat][key]
+            exact = query_folded in {fold(entry.canonical_name), fold(entry.term)} | \
+                {fold(alias) for alias in entry.aliases}
+            results.append({
+                "entry": asdict(entry),
+                "score": round(score, 4),
+                "match_type": "exact" if exact else "partial"
+            })
+        return results
 
 def main():
     """主函数用于测试"""
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+词典多模式匹配器
+用 api/data/dictionary.json 中全部术语和别名编译一个 Aho–Corasick 自动机，
+对文本做一次线性扫描即可找出所有命中的词条及其字符偏移，
+替代"逐个关键词 in 文本"的嵌套循环。
+
+编译结果按词典文件的 SHA-256 缓存到磁盘，词典未变化时直接加载，变化后自动重建。
+仅依赖标准库，供 api/main.py、EnhancedDocumentExtractor、build_semantic_relationships.py 共用。
+"""
+
+import os
+import json
+import pickle
+import hashlib
+import logging
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 自动机结构变化时递增，使旧缓存失效
+CACHE_FORMAT_VERSION = 1
+CACHE_FILE_NAME = "dictionary_matcher.pkl"
+
+
+class DictionaryMatch(NamedTuple):
+    """一次词典命中"""
+    start: int          # 起始偏移（含）
+    end: int            # 结束偏移（不含）
+    text: str           # 原文片段
+    term: str           # 规范术语
+    category: str       # 词条分类
+    alias: bool         # 是否经别名命中
+
+
+def fold_case(text: str) -> str:
+    """忽略大小写的比较形式，保证与原文逐字符对齐"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+def _is_word_char(char: str) -> bool:
+    """ASCII字母数字（中文之间不存在词边界问题）"""
+    return char.isascii() and char.isalnum()
+
+
+class AhoCorasick:
+    """Aho–Corasick 自动机（goto表 + 失败指针 + 输出链接）"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[int] = [-1]      # 状态对应的模式下标，-1表示非终止状态
+        self._dict_link: List[int] = [0]    # 沿失败链最近的终止状态，0表示无
+        self.patterns: List[str] = []
+        self._built = False
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def add(self, pattern: str) -> int:
+        """添加模式（调用方负责规范化），返回模式下标；重复模式返回已有下标"""
+        if not pattern:
+            raise ValueError("模式不能为空")
+        state = 0
+        for char in pattern:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(-1)
+                self._dict_link.append(0)
+            state = nxt
+        if self._output[state] < 0:
+            self._output[state] = len(self.patterns)
+            self.patterns.append(pattern)
+            self._built = False
+        return self._output[state]
+
+    def build(self) -> "AhoCorasick":
+        """按BFS计算失败指针和输出链接"""
+        goto, fail, output, dict_link = self._goto, self._fail, self._output, self._dict_link
+        queue = deque()
+        for child in goto[0].values():
+            fail[child] = 0
+            dict_link[child] = 0
+            queue.append(child)
+        while queue:
+            state = queue.popleft()
+            for char, child in goto[state].items():
+                f = fail[state]
+                while f and char not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(char, 0)
+                fail[child] = target if target != child else 0
+                dict_link[child] = fail[child] if output[fail[child]] >= 0 else dict_link[fail[child]]
+                queue.append(child)
+        self._built = True
+        return self
+
+    def iter_matches(self, text: str):
+        """
+        单次扫描产出全部（可重叠的）命中
+
+        Yields:
+            (起始偏移, 结束偏移, 模式下标)
+        """
+        if not self._built:
+            self.build()
+        goto, fail, output, dict_link, patterns = (
+            self._goto, self._fail, self._output, self._dict_link, self.patterns)
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            hit = state if output[state] >= 0 else dict_link[state]
+            while hit:
+                pattern = output[hit]
+                end = position + 1
+                yield end - len(patterns[pattern]), end, pattern
+                hit = dict_link[hit]
+
+
+class DictionaryMatcher:
+    """基于词典术语/别名的实体匹配器"""
+
+    def __init__(self, entries: Iterable[Dict[str, Any]], fingerprint: Optional[str] = None):
+        """
+        Args:
+            entries: 词典条目（term / aliases / category）
+            fingerprint: 词典内容指纹，用于判断磁盘缓存是否过期
+        """
+        self.fingerprint = fingerprint
+        self.terms: List[Tuple[str, str]] = []              # 条目下标 -> (术语, 分类)
+        self._payloads: List[List[Tuple[int, bool]]] = []   # 模式下标 -> [(条目下标, 是否别名)]
+        self._boundaries: List[Tuple[bool, bool]] = []      # 模式首/尾是否为ASCII字母数字
+        self._automaton = AhoCorasick()
+
+        for entry in entries:
+            term = str(entry.get('term') or '').strip()
+            if not term:
+                continue
+            index = len(self.terms)
+            self.terms.append((term, entry.get('category') or ''))
+            self._add(term, index, False)
+            for alias in entry.get('aliases') or []:
+                alias = str(alias).strip()
+                if alias:
+                    self._add(alias, index, True)
+        self._automaton.build()
+
+    def _add(self, surface: str, entry: int, alias: bool) -> None:
+        pattern = fold_case(surface)
+        pid = self._automaton.add(pattern)
+        if pid == len(self._payloads):
+            self._payloads.append([])
+            self._boundaries.append((_is_word_char(pattern[0]), _is_word_char(pattern[-1])))
+        if (entry, alias) not in self._payloads[pid]:
+            self._payloads[pid].append((entry, alias))
+
+    @property
+    def pattern_count(self) -> int:
+        return len(self._automaton)
+
+    def _on_boundary(self, folded: str, start: int, end: int, pid: int) -> bool:
+        """英文/数字模式要求两侧不是ASCII字母数字，避免 PA 命中 PAD"""
+        left, right = self._boundaries[pid]
+        if left and start > 0 and _is_word_char(folded[start - 1]):
+            return False
+        if right and end < len(folded) and _is_word_char(folded[end]):
+            return False
+        return True
+
+    def find_all(self, text: str, longest: bool = True, word_boundary: bool = True) -> List[DictionaryMatch]:
+        """
+        扫描文本中的词典命中
+
+        Args:
+            longest: True时按"最左最长"取互不重叠的命中，同一片段既是某词条术语又是其他词条别名时
+                只保留术语命中；False时返回全部命中（可重叠）
+            word_boundary: 是否对英文/数字模式做词边界检查
+        Returns:
+            按起始偏移排序的命中列表；同一模式对应多个词条时每个词条各一条
+        """
+        if not text:
+            return []
+        folded = fold_case(text)
+        spans = [(start, end, pid) for start, end, pid in self._automaton.iter_matches(folded)
+                 if not word_boundary or self._on_boundary(folded, start, end, pid)]
+        spans.sort(key=lambda s: (s[0], -s[1]))
+        if longest:
+            selected, last_end = [], 0
+            for span in spans:
+                if span[0] >= last_end:
+                    selected.append(span)
+                    last_end = span[1]
+            spans = selected
+
+        matches = []
+        for start, end, pid in spans:
+            payloads = self._payloads[pid]
+            if longest and len(payloads) > 1 and any(not alias for _, alias in payloads):
+                payloads = [p for p in payloads if not p[1]]
+            for entry, alias in payloads:
+                term, category = self.terms[entry]
+                matches.append(DictionaryMatch(start, end, text[start:end], term, category, alias))
+        return matches
+
+    def match_terms(self, text: str, word_boundary: bool = False) -> Tuple[set, set]:
+        """
+        文本中经术语本身命中、经别名命中的 (分类, 术语) 集合（允许重叠，等价于逐个 in 判断）
+
+        Returns:
+            (术语命中集合, 别名命中集合)
+        """
+        by_term, by_alias = set(), set()
+        for match in self.find_all(text, longest=False, word_boundary=word_boundary):
+            (by_alias if match.alias else by_term).add((match.category, match.term))
+        return by_term, by_alias
+
+    # ---- 磁盘缓存 ----
+
+    @staticmethod
+    def file_fingerprint(path: Path) -> str:
+        """词典文件内容指纹"""
+        digest = hashlib.sha256(f"v{CACHE_FORMAT_VERSION}:".encode("utf-8"))
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 16), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @classmethod
+    def from_file(cls, dictionary_path, cache_dir=None, use_cache: bool = True) -> "DictionaryMatcher":
+        """
+        从词典文件构建匹配器；指纹与磁盘缓存一致时直接加载缓存
+
+        Args:
+            cache_dir: 缓存目录，默认为词典文件同级的 .cache 目录
+        """
+        path = Path(dictionary_path)
+        fingerprint = cls.file_fingerprint(path)
+        cache_file = Path(cache_dir) if cache_dir else path.parent / ".cache"
+        cache_file = cache_file / CACHE_FILE_NAME
+
+        if use_cache and cache_file.exists():
+            try:
+                with open(cache_file, 'rb') as f:
+                    cached = pickle.load(f)
+                if isinstance(cached, cls) and cached.fingerprint == fingerprint:
+                    logger.info(f"加载词典匹配器缓存: {cache_file} ({cached.pattern_count} 个模式)")
+                    return cached
+            except Exception as e:
+                logger.warning(f"词典匹配器缓存不可用，重新构建: {e}")
+
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get('entries') or data.get('terms') or []
+        matcher = cls(data, fingerprint=fingerprint)
+        logger.info(f"构建词典匹配器: {len(matcher.terms)} 个词条, {matcher.pattern_count} 个模式")
+
+        if use_cache:
+            try:
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+                with open(tmp_file, 'wb') as f:
+                    pickle.dump(matcher, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_file, cache_file)
+            except Exception as e:
+                logger.warning(f"写入词典匹配器缓存失败: {e}")
+        return matcher
+
+
+_matchers: Dict[str, Tuple[Tuple[int, int], DictionaryMatcher]] = {}
+_matchers_lock = threading.Lock()
+
+
+def get_dictionary_matcher(dictionary_path, cache_dir=None) -> DictionaryMatcher:
+    """
+    进程内共享的匹配器；词典文件的修改时间或大小变化后重新加载（内容未变时命中磁盘缓存）
+    """
+    path = Path(dictionary_path).resolve()
+    stat = path.stat()
+    signature = (stat.st_mtime_ns, stat.st_size)
+    key = str(path)
+    cached = _matchers.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    with _matchers_lock:
+        cached = _matchers.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        matcher = DictionaryMatcher.from_file(path, cache_dir=cache_dir)
+        _matchers[key] = (signature, matcher)
+        return matcher
@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+词典全文检索索引
+对术语、别名、标签、定义建立倒排索引，替代逐条 "query in 文本" 的线性子串匹配。
+
+- 分词：中文连续片段拆为单字 + 相邻二字组（bigram），字母数字按词，统一转小写
+- 拼音：安装了 pypinyin 时为术语和别名加入全拼、首字母，字母查询可按拼音命中
+- 排序：按字段加权的 BM25；查询与术语/别名完全相同时额外加分（别名直接定位到所属词条）
+- 前缀联想：suggest() 在术语/别名/拼音的有序表上二分查找前缀
+- 增量更新：add / remove / sync 只处理变化的条目；IndexedMapping 在写入集合时同步更新索引，
+  搜索时不再遍历全部条目
+
+仅依赖标准库（pypinyin 可选），供 DictionaryManager、DictionaryService、
+DataGovernanceSystem 及词典接口共用。
+"""
+
+import re
+import math
+import bisect
+import logging
+import threading
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+try:
+    from pypinyin import lazy_pinyin
+    PINYIN_AVAILABLE = True
+except ImportError:
+    lazy_pinyin = None
+    PINYIN_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# 字段权重；pinyin 字段由 term / aliases 自动生成
+DEFAULT_FIELD_WEIGHTS = {"term": 3.0, "aliases": 2.5, "tags": 1.5, "definition": 1.0, "pinyin": 1.5}
+BM25_K1 = 1.2
+BM25_B = 0.75
+# 查询与术语 / 别名完全相同时的加分
+EXACT_TERM_BOOST = 10.0
+EXACT_ALIAS_BOOST = 8.0
+
+_CJK = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+_TOKEN_RE = re.compile(f'[{_CJK}]+|[0-9a-z]+')
+_CJK_RUN_RE = re.compile(f'[{_CJK}]+')
+
+# suggest 有序表中来源的优先级
+_KIND_TERM, _KIND_ALIAS, _KIND_PINYIN = 0, 1, 2
+
+
+def fold(text: Any) -> str:
+    """比较形式：转小写，去除首尾空白"""
+    if text is None:
+        return ""
+    return str(text).casefold().strip()
+
+
+def _is_cjk(run: str) -> bool:
+    return not run[0].isascii()
+
+
+def tokenize(text: Any) -> List[str]:
+    """索引分词：中文片段输出单字和二字组，字母数字按词"""
+    tokens = []
+    for run in _TOKEN_RE.findall(fold(text)):
+        if _is_cjk(run):
+            tokens.extend(run)
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def query_tokens(text: Any) -> List[Tuple[str, bool]]:
+    """
+    查询分词，返回 (token, 是否按前缀匹配)
+
+    中文片段两字及以上用二字组（要求全部命中，近似子串匹配），单字用单字；字母数字词按前缀匹配。
+    """
+    tokens = []
+    for run in _TOKEN_RE.findall(fold(text)):
+        if not _is_cjk(run):
+            tokens.append((run, True))
+        elif len(run) == 1:
+            tokens.append((run, False))
+        else:
+            tokens.extend((run[i:i + 2], False) for i in range(len(run) - 1))
+    # 去重并保持顺序
+    return list(dict.fromkeys(tokens))
+
+
+def pinyin_forms(text: Any) -> List[str]:
+    """中文片段的全拼和首字母（未安装 pypinyin 时为空）"""
+    if not PINYIN_AVAILABLE:
+        return []
+    forms = []
+    for run in _CJK_RUN_RE.findall(str(text or "")):
+        syllables = lazy_pinyin(run, errors='ignore')
+        if syllables:
+            forms.append("".join(syllables).lower())
+            forms.append("".join(s[0] for s in syllables if s).lower())
+    return forms
+
+
+def _as_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return [v for v in value if v]
+
+
+class DictionarySearchIndex:
+    """
+    词条倒排索引
+
+    文档为 {字段名: 文本或文本列表}，常用字段 term / aliases / tags / definition；
+    另可传 category 用于过滤。doc_id 可以是任意可哈希值。
+    """
+
+    def __init__(self, field_weights: Optional[Mapping[str, float]] = None):
+        self.field_weights = dict(field_weights or DEFAULT_FIELD_WEIGHTS)
+        self._postings: Dict[str, Dict[Hashable, float]] = {}
+        self._vocab: List[str] = []                                   # 有序词表，用于前缀展开
+        self._doc_tokens: Dict[Hashable, Dict[str, float]] = {}
+        self._doc_len: Dict[Hashable, float] = {}
+        self._doc_category: Dict[Hashable, Any] = {}
+        self._doc_order: Dict[Hashable, int] = {}
+        self._doc_surfaces: Dict[Hashable, List[Tuple[str, int, int]]] = {}
+        self._doc_signature: Dict[Hashable, Any] = {}
+        self._surfaces: List[Tuple[str, int, int]] = []              # (文本, 来源, 顺序号) 有序表
+        self._order_doc: Dict[int, Hashable] = {}
+        self._exact: Dict[str, Dict[Hashable, float]] = {}
+        self._total_len = 0.0
+        self._seq = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self._doc_len
+
+    # ---- 构建与增量更新 ----
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[Tuple[Hashable, Mapping[str, Any]]],
+                       field_weights: Optional[Mapping[str, float]] = None) -> "DictionarySearchIndex":
+        index = cls(field_weights)
+        with index._lock:
+            for doc_id, doc in documents:
+                index._add(doc_id, doc, None, bulk=True)
+            # 批量构建时有序表最后统一排序
+            index._vocab.sort()
+            index._surfaces.sort()
+        return index
+
+    def add(self, doc_id: Hashable, doc: Mapping[str, Any], signature: Any = None) -> None:
+        """加入或替换一个文档"""
+        self._add(doc_id, doc, signature, bulk=False)
+
+    def _add(self, doc_id: Hashable, doc: Mapping[str, Any], signature: Any, bulk: bool) -> None:
+        with self._lock:
+            if doc_id in self._doc_len:
+                self.remove(doc_id)
+
+            weighted: Dict[str, float] = {}
+            length = 0.0
+            fields = {name: _as_list(doc.get(name)) for name in self.field_weights if name != "pinyin"}
+            names = fields.get("term", []) + fields.get("aliases", [])
+            if "pinyin" in self.field_weights:
+                fields["pinyin"] = [form for name in names for form in pinyin_forms(name)]
+            for name, values in fields.items():
+                weight = self.field_weights[name]
+                for value in values:
+                    for token in tokenize(value):
+                        weighted[token] = weighted.get(token, 0.0) + weight
+                        length += weight
+
+            order = self._seq
+            self._seq += 1
+            for token, tf in weighted.items():
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = {}
+                    if bulk:
+                        self._vocab.append(token)
+                    else:
+                        bisect.insort(self._vocab, token)
+                postings[doc_id] = tf
+            self._doc_tokens[doc_id] = weighted
+            self._doc_len[doc_id] = length
+            self._total_len += length
+            self._doc_category[doc_id] = doc.get("category")
+            self._doc_order[doc_id] = order
+            self._order_doc[order] = doc_id
+            self._doc_signature[doc_id] = signature
+
+            surfaces = []
+            for kind, values, boost in ((_KIND_TERM, fields.get("term", []), EXACT_TERM_BOOST),
+                                        (_KIND_ALIAS, fields.get("aliases", []), EXACT_ALIAS_BOOST)):
+                for value in values:
+                    folded = fold(value)
+                    if folded:
+                        surfaces.append((folded, kind, order))
+                        bucket = self._exact.setdefault(folded, {})
+                        bucket[doc_id] = max(bucket.get(doc_id, 0.0), boost)
+            surfaces.extend((form, _KIND_PINYIN, order) for form in fields.get("pinyin", []))
+            surfaces = sorted(set(surfaces))
+            if bulk:
+                self._surfaces.extend(surfaces)
+            else:
+                for item in surfaces:
+                    bisect.insort(self._surfaces, item)
+            self._doc_surfaces[doc_id] = surfaces
+
+    def remove(self, doc_id: Hashable) -> bool:
+        """移除一个文档"""
+        with self._lock:
+            weighted = self._doc_tokens.pop(doc_id, None)
+            if weighted is None:
+                return False
+            for token in weighted:
+                postings = self._postings[token]
+                del postings[doc_id]
+                if not postings:
+                    del self._postings[token]
+                    del self._vocab[bisect.bisect_left(self._vocab, token)]
+            self._total_len -= self._doc_len.pop(doc_id)
+            self._doc_category.pop(doc_id, None)
+            self._doc_signature.pop(doc_id, None)
+            self._order_doc.pop(self._doc_order.pop(doc_id), None)
+            for item in self._doc_surfaces.pop(doc_id, []):
+                del self._surfaces[bisect.bisect_left(self._surfaces, item)]
+                if item[1] != _KIND_PINYIN:
+                    bucket = self._exact.get(item[0])
+                    if bucket is not None:
+                        bucket.pop(doc_id, None)
+                        if not bucket:
+                            del self._exact[item[0]]
+            return True
+
+    def sync(self, items: Mapping[Hashable, Any], to_document: Callable[[Any], Mapping[str, Any]],
+             signature: Callable[[Any], Any]) -> Tuple[int, int]:
+        """
+        与一组对象同步：只重建签名变化的对象，移除已不存在的对象
+
+        Returns:
+            (新增或更新数, 移除数)
+        """
+        with self._lock:
+            removed = [doc_id for doc_id in self._doc_len if doc_id not in items]
+            for doc_id in removed:
+                self.remove(doc_id)
+            changed = 0
+            for doc_id, item in items.items():
+                sig = signature(item)
+                if doc_id in self._doc_len and self._doc_signature.get(doc_id) == sig:
+                    continue
+                self.add(doc_id, to_document(item), signature=sig)
+                changed += 1
+            return changed, len(removed)
+
+    # ---- 查询 ----
+
+    def _expand(self, token: str, prefix: bool) -> List[str]:
+        if not prefix:
+            return [token] if token in self._postings else []
+        start = bisect.bisect_left(self._vocab, token)
+        end = start
+        while end < len(self._vocab) and self._vocab[end].startswith(token):
+            end += 1
+        return self._vocab[start:end]
+
+    def _scores(self, query: str) -> Dict[Hashable, float]:
+        groups = []
+        for token, prefix in query_tokens(query):
+            expanded = self._expand(token, prefix)
+            if not expanded:
+                groups = []
+                break
+            groups.append(expanded)
+
+        scores: Dict[Hashable, float] = {}
+        if groups:
+            total_docs = len(self._doc_len)
+            avg_len = (self._total_len / total_docs) if total_docs else 1.0
+            for i, group in enumerate(groups):
+                group_scores: Dict[Hashable, float] = {}
+                for token in group:
+                    postings = self._postings[token]
+                    df = len(postings)
+                    idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+                    for doc_id, tf in postings.items():
+                        if i and doc_id not in scores:
+                            continue
+                        norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_len[doc_id] / avg_len)
+                        score = idf * tf * (BM25_K1 + 1) / (tf + norm)
+                        if score > group_scores.get(doc_id, 0.0):
+                            group_scores[doc_id] = score
+                scores = group_scores if i == 0 else {d: scores[d] + s for d, s in group_scores.items()}
+                if not scores:
+                    break
+
+        # 查询即某个术语/别名时直接命中所属词条
+        for doc_id, boost in self._exact.get(fold(query), {}).items():
+            scores[doc_id] = scores.get(doc_id, 0.0) + boost
+        return scores
+
+    def search(self, query: str, category: Any = None, limit: Optional[int] = None,
+               offset: int = 0) -> Tuple[int, List[Tuple[Hashable, float]]]:
+        """
+        排序检索：查询中的每个词（中文二字组 / 字母数字前缀）都须命中
+
+        Returns:
+            (命中总数, 本页 [(doc_id, score)])，按得分降序，同分按加入顺序
+        """
+        with self._lock:
+            scores = self._scores(query)
+            if category is not None:
+                scores = {d: s for d, s in scores.items() if self._doc_category.get(d) == category}
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], self._doc_order[item[0]]))
+        end = None if limit is None else offset + limit
+        return len(ranked), ranked[offset:end]
+
+    def search_ids(self, query: str, category: Any = None, limit: Optional[int] = None) -> List[Hashable]:
+        return [doc_id for doc_id, _ in self.search(query, category, limit)[1]]
+
+    def suggest(self, prefix: str, limit: int = 10, category: Any = None,
+                scan_limit: int = 2000) -> List[Tuple[Hashable, str]]:
+        """
+        前缀联想：术语、别名（及拼音）以 prefix 开头的词条
+
+        排序：术语优先于别名、拼音，较短的文本优先，其余按加入顺序。
+
+        Returns:
+            [(doc_id, 命中的文本)]，每个词条只出现一次
+        """
+        folded = fold(prefix)
+        if not folded:
+            return []
+        with self._lock:
+            start = bisect.bisect_left(self._surfaces, (folded,))
+            candidates = []
+            for surface, kind, order in self._surfaces[start:start + scan_limit]:
+                if not surface.startswith(folded):
+                    break
+                doc_id = self._order_doc[order]
+                if category is None or self._doc_category.get(doc_id) == category:
+                    candidates.append((kind, len(surface), order, doc_id, surface))
+        candidates.sort(key=lambda c: c[:3])
+        results, seen = [], set()
+        for _, _, _, doc_id, surface in candidates:
+            if doc_id not in seen:
+                seen.add(doc_id)
+                results.append((doc_id, surface))
+                if len(results) >= limit:
+                    break
+        return results
+
+
+class DocumentFields:
+    """
+    对象属性 → 索引文档字段的映射
+
+    每个索引字段对应一个属性名，或多个属性名（各属性的值依次拼成列表）。
+    例如 DocumentFields(term="canonical_name", aliases=("term", "aliases"))。
+    """
+
+    def __init__(self, **fields: Union[str, Sequence[str]]):
+        self.fields = fields
+
+    def document(self, item: Any) -> Dict[str, Any]:
+        doc = {}
+        for name, attrs in self.fields.items():
+            if isinstance(attrs, str):
+                doc[name] = getattr(item, attrs)
+                continue
+            values = []
+            for attr in attrs:
+                value = getattr(item, attr)
+                if isinstance(value, (list, tuple)):
+                    values.extend(value)
+                elif value is not None:
+                    values.append(value)
+            doc[name] = values
+        return doc
+
+    def signature(self, item: Any) -> Tuple:
+        """文档内容的签名（列表转为元组），供 sync 判断是否需要重建"""
+        return tuple(tuple(v) if isinstance(v, list) else v for v in self.document(item).values())
+
+
+class IndexedMapping(MutableMapping):
+    """
+    写入时同步更新全文索引的映射
+
+    新增、替换、删除键时立即更新索引，搜索直接查询索引；对象被原地修改后需调用 reindex(key)。
+    scope 不为 None 时文档 id 为 (scope, key)，多个映射可共用一个索引。
+    """
+
+    def __init__(self, index: DictionarySearchIndex, fields: DocumentFields,
+                 items: Optional[Mapping[Hashable, Any]] = None, scope: Hashable = None):
+        self.index = index
+        self.fields = fields
+        self.scope = scope
+        self._data: Dict[Hashable, Any] = {}
+        if items:
+            self.update(items)
+
+    def doc_id(self, key: Hashable) -> Hashable:
+        return key if self.scope is None else (self.scope, key)
+
+    def __getitem__(self, key: Hashable) -> Any:
+        return self._data[key]
+
+    def __setitem__(self, key: Hashable, item: Any) -> None:
+        self._data[key] = item
+        self.reindex(key)
+
+    def __delitem__(self, key: Hashable) -> None:
+        del self._data[key]
+        self.index.remove(self.doc_id(key))
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._data!r})"
+
+    def clear(self) -> None:
+        for key in self._data:
+            self.index.remove(self.doc_id(key))
+        self._data.clear()
+
+    def reindex(self, key: Hashable) -> None:
+        """按对象当前内容重建其索引文档"""
+        item = self._data[key]
+        self.index.add(self.doc_id(key), self.fields.document(item), signature=self.fields.signature(item))
+
+
+def entry_document(entry: Mapping[str, Any]) -> Dict[str, Any]:
+    """dictionary.json 条目 → 索引文档（定义字段兼容 description / definition）"""
+    return {
+        "term": entry.get("term") or entry.get("name"),
+        "aliases": entry.get("aliases"),
+        "tags": entry.get("tags").split() if isinstance(entry.get("tags"), str) else entry.get("tags"),
+        "definition": entry.get("description") or entry.get("definition"),
+        "category": entry.get("category"),
+    }
+
+
+def build_entry_index(entries: Sequence[Mapping[str, Any]]) -> DictionarySearchIndex:
+    """按列表下标为 dictionary.json 的条目建立索引"""
+    return DictionarySearchIndex.from_documents((i, entry_document(e)) for i, e in enumerate(entries))
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+词典内存快照
+将 api/data/dictionary.json 读入一次，预先计算分类分组、标签集合和统计，
+各词典接口直接读取快照，不再每个请求 json.load 整个文件再分组、过滤。
+
+- 文件的修改时间或大小变化后重新加载，构建好新快照后整体替换（读方拿到的快照不会被修改）
+- 快照带内容指纹 ETag，接口据此返回 304
+- 接口特有的格式化结果通过 snapshot.view() 按快照缓存，词典变化后随快照一起失效
+
+仅依赖标准库，供 api/main.py 与 services/api/routers/kg_router.py 共用。
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _tag_list(tags: Any) -> List[str]:
+    """tags 字段可能是列表或空格分隔的字符串"""
+    if isinstance(tags, list):
+        return tags
+    if isinstance(tags, str):
+        return tags.split()
+    return []
+
+
+class DictionarySnapshot:
+    """某一版本词典文件的只读视图"""
+
+    def __init__(self, entries: List[Dict[str, Any]], etag: str, signature: Tuple[int, int]):
+        self.entries: Tuple[Dict[str, Any], ...] = tuple(entries)
+        self.etag = etag
+        self.signature = signature
+        self.loaded_at = time.time()
+
+        # /kg/dictionary 的分组（缺省分类为 other）
+        by_category: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in self.entries:
+            by_category.setdefault(entry.get('category', 'other'), []).append(entry)
+        self.by_category = by_category
+
+        categories = Counter(entry.get('category', 'Unknown') for entry in self.entries)
+        tags = set()
+        for entry in self.entries:
+            tags.update(_tag_list(entry.get('tags', [])))
+        self.tags = frozenset(tags)
+        self.stats = {
+            'total_entries': len(self.entries),
+            'total_categories': len(categories),
+            'total_tags': len(self.tags),
+            'categories': dict(categories)
+        }
+
+        self._views: Dict[str, Any] = {}
+        self._views_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def view(self, name: str, builder: Callable[["DictionarySnapshot"], Any]) -> Any:
+        """
+        按名称缓存由本快照派生的结构（格式化条目、序列化后的响应体等），每个快照只构建一次
+
+        返回值在多个请求间共享，调用方不得修改。
+        """
+        value = self._views.get(name)
+        if value is None:
+            with self._views_lock:
+                value = self._views.get(name)
+                if value is None:
+                    value = builder(self)
+                    self._views[name] = value
+        return value
+
+
+class DictionaryStore:
+    """词典文件的内存快照，文件变化后原子替换"""
+
+    def __init__(self, path, check_interval: Optional[float] = None):
+        """
+        Args:
+            check_interval: 两次检查文件修改时间的最短间隔（秒），默认 DICTIONARY_RELOAD_INTERVAL（1）
+        """
+        self.path = Path(path)
+        self.check_interval = check_interval if check_interval is not None else \
+            float(os.getenv("DICTIONARY_RELOAD_INTERVAL", "1"))
+        self._snapshot: Optional[DictionarySnapshot] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def _signature(self) -> Tuple[int, int]:
+        stat = self.path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self, signature: Tuple[int, int]) -> DictionarySnapshot:
+        with open(self.path, 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw.decode('utf-8'))
+        if isinstance(data, dict):
+            data = data.get('entries') or data.get('terms') or []
+        etag = hashlib.sha256(raw).hexdigest()[:32]
+        return DictionarySnapshot(data, etag, signature)
+
+    def snapshot(self) -> DictionarySnapshot:
+        """
+        当前快照；距上次检查超过 check_interval 时比较文件修改时间和大小，变化则重新加载
+
+        Raises:
+            FileNotFoundError: 词典文件不存在
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and time.time() - self._checked_at < self.check_interval:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and time.time() - self._checked_at < self.check_interval:
+                return snapshot
+            try:
+                signature = self._signature()
+            except FileNotFoundError:
+                self._snapshot = None
+                raise
+            if snapshot is None or snapshot.signature != signature:
+                try:
+                    snapshot = self._load(signature)
+                except (OSError, ValueError) as e:
+                    # 文件写到一半或格式错误时继续使用旧快照，下次检查再试
+                    if snapshot is None:
+                        raise
+                    logger.warning(f"重新加载词典失败，继续使用旧版本: {e}")
+                else:
+                    self._snapshot = snapshot
+                    self.reloads += 1
+                    logger.info(f"词典快照已加载: {self.path} ({len(snapshot)} 条, etag {snapshot.etag[:8]})")
+            self._checked_at = time.time()
+            return snapshot
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 请求头是否包含该ETag（忽略弱校验前缀 W/）"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate.strip('"') == etag:
+            return True
+    return False
+
+
+_stores: Dict[str, DictionaryStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_dictionary_store(path) -> DictionaryStore:
+    """进程内共享的词典快照（按文件绝对路径）"""
+    key = str(Path(path).resolve())
+    store = _stores.get(key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(key)
+            if store is None:
+                store = _stores[key] = DictionaryStore(key)
+    return store
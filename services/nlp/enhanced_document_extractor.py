@@ -5,13 +5,21 @@
 集成spaCy NLP和LLM能力进行实体关系抽取
 """
 import re
+import sys
 import json
+import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple, Optional, Any, Union
 from pathlib import Path
 import logging
 from datetime import datetime
 
+sys.path.append(str(Path(__file__).parent))
+from dictionary_matcher import get_dictionary_matcher
+
+# 词典文件（术语/别名来源）
+DICTIONARY_FILE = Path(__file__).resolve().parents[2] / "api" / "data" / "dictionary.json"
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -24,6 +32,15 @@ class EnhancedDocumentExtractor:
         self.nlp_models = {}
         self.extraction_rules = self._load_extraction_rules()
         self.vocabulary_mappings = self._load_vocabulary_mappings()
+        self.dictionary_matcher = self._load_dictionary_matcher()
+        
+    def _load_dictionary_matcher(self):
+        """加载词典匹配器（词典缺失时返回None，仅用正则规则抽取）"""
+        try:
+            return get_dictionary_matcher(DICTIONARY_FILE)
+        except Exception as e:
+            logger.warning(f"词典匹配器加载失败: {e}")
+            return None
         
     def _load_extraction_rules(self) -> Dict[str, Any]:
         """加载抽取规则"""
@@ -177,11 +194,10 @@ class EnhancedDocumentExtractor:
             entities = []
             relations = []
             
-            # 结构化数据抽取
-            for index, row in df.iterrows():
-                row_entities, row_relations = self._extract_from_structured_row(row, index)
-                entities.extend(row_entities)
-                relations.extend(row_relations)
+            # 结构化数据抽取（按列批量处理）
+            row_entities, row_relations = self._extract_from_structured_frame(df)
+            entities.extend(row_entities)
+            relations.extend(row_relations)
             
             # 文本内容抽取（从描述字段）
             text_columns = [col for col in df.columns if any(keyword in col.lower() 
@@ -325,6 +341,34 @@ class EnhancedDocumentExtractor:
                 logger.error(f"文本文件抽取失败: {e}")
                 raise
     
+    @staticmethod
+    def _classify_structured_column(col: Any) -> Optional[str]:
+        """根据列名判断该列抽取的实体类型"""
+        col_lower = str(col).lower()
+        if any(keyword in col_lower for keyword in ['异常', 'anomaly', '问题']):
+            return 'Anomaly'
+        if any(keyword in col_lower for keyword in ['组件', 'component', '模块']):
+            return 'Component'
+        if any(keyword in col_lower for keyword in ['症状', 'symptom']):
+            return 'Symptom'
+        return None
+    
+    @staticmethod
+    def _structured_entity(entity_type: str, value_str: str, row_index: Any) -> Dict:
+        if entity_type == 'Anomaly':
+            return {
+                'key': f"Anomaly:ROW-{row_index}",
+                'type': 'Anomaly',
+                'name': value_str,
+                'properties': {'title': value_str}
+            }
+        return {
+            'key': f"{entity_type}:{value_str}",
+            'type': entity_type,
+            'name': value_str,
+            'properties': {}
+        }
+    
     def _extract_from_structured_row(self, row: pd.Series, row_index: int) -> Tuple[List[Dict], List[Dict]]:
         """从结构化数据行抽取实体和关系"""
         entities = []
@@ -336,34 +380,43 @@ class EnhancedDocumentExtractor:
         for col, value in row.items():
             if pd.isna(value):
                 continue
-                
-            value_str = str(value)
             
             # 根据列名和值抽取实体
-            if any(keyword in col.lower() for keyword in ['异常', 'anomaly', '问题']):
-                entities.append({
-                    'key': f"Anomaly:ROW-{row_index}",
-                    'type': 'Anomaly',
-                    'name': value_str,
-                    'properties': {'title': value_str}
-                })
-            elif any(keyword in col.lower() for keyword in ['组件', 'component', '模块']):
-                entities.append({
-                    'key': f"Component:{value_str}",
-                    'type': 'Component',
-                    'name': value_str,
-                    'properties': {}
-                })
-            elif any(keyword in col.lower() for keyword in ['症状', 'symptom']):
-                entities.append({
-                    'key': f"Symptom:{value_str}",
-                    'type': 'Symptom',
-                    'name': value_str,
-                    'properties': {}
-                })
+            entity_type = self._classify_structured_column(col)
+            if entity_type:
+                entities.append(self._structured_entity(entity_type, str(value), row_index))
         
         return entities, relations
     
+    def _extract_from_structured_frame(self, df: pd.DataFrame) -> Tuple[List[Dict], List[Dict]]:
+        """
+        按列批量抽取结构化数据：列名只分类一次，每列只处理非空单元格
+        
+        结果与逐行调用 _extract_from_structured_row 一致（按行、列顺序排列）
+        """
+        positions, col_orders, cells = [], [], []
+        labels = df.index.to_numpy(dtype=object)
+        for col_order, col in enumerate(df.columns):
+            entity_type = self._classify_structured_column(col)
+            if entity_type is None:
+                continue
+            column = df.iloc[:, col_order]
+            present = column.notna().to_numpy()
+            if not present.any():
+                continue
+            values = [str(value) for value in column[present].tolist()]
+            rows = np.flatnonzero(present)
+            positions.append(rows)
+            col_orders.append(np.full(len(rows), col_order))
+            cells.extend(self._structured_entity(entity_type, value, label)
+                         for value, label in zip(values, labels[rows]))
+        
+        if not cells:
+            return [], []
+        # 恢复逐行处理时的顺序：先按行，同一行内按列
+        order = np.lexsort((np.concatenate(col_orders), np.concatenate(positions)))
+        return [cells[i] for i in order], []
+    
     def _extract_from_text_content(self, text: str) -> Tuple[List[Dict], List[Dict]]:
         """从文本内容抽取实体和关系"""
         entities = []
@@ -389,6 +442,20 @@ class EnhancedDocumentExtractor:
                         }
                         entities.append(entity)
         
+        # 词典术语/别名：一次线性扫描，命中即映射到规范术语
+        if self.dictionary_matcher is not None:
+            for match in self.dictionary_matcher.find_all(text):
+                entities.append({
+                    'key': f"{match.category}:{match.term}",
+                    'type': match.category,
+                    'name': match.term,
+                    'properties': {
+                        'original_text': match.text,
+                        'span': [match.start, match.end],
+                        'source': 'dictionary'
+                    }
+                })
+        
         # 抽取关系（简化版本）
         for relation_rule in self.extraction_rules['relation_patterns']:
             pattern = relation_rule['pattern']
@@ -176,7 +176,8 @@ class MaterialAnomalyExtractor:
             entities = []
             relations = []
             
-            for index, row in df.iterrows():
+            # 一次性转换为记录列表，避免 iterrows() 为每行构造 Series
+            for index, row in zip(df.index, df.to_dict('records')):
                 row_entities, row_relations = self._extract_from_row(row, index, file_path)
                 entities.extend(row_entities)
                 relations.extend(row_relations)
@@ -250,7 +251,7 @@ class MaterialAnomalyExtractor:
         
         return None
     
-    def _extract_from_row(self, row: pd.Series, row_index: int, file_path: str) -> Tuple[List[ExtractedEntity], List[ExtractedRelation]]:
+    def _extract_from_row(self, row: Dict[str, Any], row_index: int, file_path: str) -> Tuple[List[ExtractedEntity], List[ExtractedRelation]]:
         """从单行数据抽取实体和关系"""
         entities = []
         relations = []
@@ -368,7 +369,7 @@ class MaterialAnomalyExtractor:
         
         return entities, relations
     
-    def _generate_anomaly_key(self, row: pd.Series, row_index: int) -> str:
+    def _generate_anomaly_key(self, row: Dict[str, Any], row_index: int) -> str:
         """生成异常实体的唯一键"""
         # 尝试从多个字段生成键
         if 'factory_name' in row and 'anomaly_date' in row and 'material_code' in row:
@@ -391,7 +392,7 @@ class MaterialAnomalyExtractor:
             }
         )
     
-    def _extract_project(self, row: pd.Series) -> ExtractedEntity:
+    def _extract_project(self, row: Dict[str, Any]) -> ExtractedEntity:
         """抽取项目实体"""
         project_name = str(row['project_name'])
         properties = {}
@@ -406,7 +407,7 @@ class MaterialAnomalyExtractor:
             properties=properties
         )
     
-    def _extract_material(self, row: pd.Series) -> ExtractedEntity:
+    def _extract_material(self, row: Dict[str, Any]) -> ExtractedEntity:
         """抽取物料实体"""
         if 'material_code' in row and pd.notna(row['material_code']):
             material_key = str(row['material_code'])
@@ -428,7 +429,7 @@ class MaterialAnomalyExtractor:
             properties=properties
         )
     
-    def _extract_anomaly(self, row: pd.Series, anomaly_key: str) -> ExtractedEntity:
+    def _extract_anomaly(self, row: Dict[str, Any], anomaly_key: str) -> ExtractedEntity:
         """抽取异常实体"""
         properties = {}
         
@@ -452,7 +453,7 @@ class MaterialAnomalyExtractor:
             properties=properties
         )
     
-    def _extract_symptoms(self, row: pd.Series) -> List[ExtractedEntity]:
+    def _extract_symptoms(self, row: Dict[str, Any]) -> List[ExtractedEntity]:
         """抽取症状实体"""
         symptoms = []
         
@@ -486,7 +487,7 @@ class MaterialAnomalyExtractor:
             }
         )
     
-    def _extract_countermeasures(self, row: pd.Series) -> List[ExtractedEntity]:
+    def _extract_countermeasures(self, row: Dict[str, Any]) -> List[ExtractedEntity]:
         """抽取对策实体"""
         countermeasures = []
         
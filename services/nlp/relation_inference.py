@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+关系推断的相似连接引擎
+为 build_semantic_relationships.py、scripts/connect_testcases_by_tags.py 生成候选关系：
+
+- 标签重叠：建立 标签 → 目标节点 的倒排索引，每个源节点只遍历自身标签的倒排表，
+  累计得到"至少共享一个标签"的目标及共同标签，不再对 源 × 目标 做笛卡尔积
+- 描述提及：源（或目标）描述中经词典自动机命中的术语/别名，直接给出候选对
+- 评分：提及权重 + 共同标签数 × 权重，同时给出 Jaccard 与置信度（共同标签数 / 源标签数），
+  按阈值过滤后每个源保留 top-k
+
+仅依赖标准库。
+"""
+
+import heapq
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, Iterable, List, Mapping, Optional, Set, Tuple
+
+
+def invert(items: Mapping[Hashable, Iterable[Hashable]]) -> Dict[Hashable, List[Hashable]]:
+    """{节点: 标签集合} → {标签: [节点]}（倒排表按节点的给定顺序）"""
+    index: Dict[Hashable, List[Hashable]] = defaultdict(list)
+    for node, tokens in items.items():
+        for token in set(tokens):
+            index[token].append(node)
+    return dict(index)
+
+
+def shared_token_pairs(sources: Mapping[Hashable, Iterable[Hashable]],
+                       targets: Mapping[Hashable, Iterable[Hashable]],
+                       exclude_self: bool = False) -> Dict[Hashable, Dict[Hashable, Set[Hashable]]]:
+    """
+    共享至少一个标签的 (源, 目标) 及其共同标签
+
+    耗时与候选对的共同标签总数成正比，而不是 len(sources) × len(targets)。
+
+    Returns:
+        {源: {目标: 共同标签集合}}
+    """
+    index = invert(targets)
+    pairs: Dict[Hashable, Dict[Hashable, Set[Hashable]]] = {}
+    for source, tokens in sources.items():
+        hits: Dict[Hashable, Set[Hashable]] = defaultdict(set)
+        for token in set(tokens):
+            for target in index.get(token, ()):
+                if exclude_self and target == source:
+                    continue
+                hits[target].add(token)
+        if hits:
+            pairs[source] = dict(hits)
+    return pairs
+
+
+@dataclass
+class InferredRelation:
+    """一条推断出的关系及其证据"""
+    source: Hashable
+    target: Hashable
+    score: float
+    common_tags: List[str]
+    jaccard: float
+    confidence: float               # 共同标签数 / 源标签数
+    reasons: List[str] = field(default_factory=list)
+
+    @property
+    def common_count(self) -> int:
+        return len(self.common_tags)
+
+
+class RelationInference:
+    """
+    一类关系（如 Symptom → Component）的候选生成与评分
+
+    先用 add_tag_overlap / add_mentions 累计候选对的分数，再用 results() 过滤、取 top-k。
+    """
+
+    def __init__(self, source_tags: Mapping[Hashable, Iterable[str]],
+                 target_tags: Mapping[Hashable, Iterable[str]], exclude_self: bool = False):
+        """
+        Args:
+            source_tags / target_tags: {节点: 标签}，也决定了哪些节点可以作为源、目标
+            exclude_self: 源与目标是同一批节点时排除自身
+        """
+        self.exclude_self = exclude_self
+        self.source_tags: Dict[Hashable, Set[str]] = {k: set(v or ()) for k, v in source_tags.items()}
+        self.target_tags: Dict[Hashable, Set[str]] = {k: set(v or ()) for k, v in target_tags.items()}
+        self._scores: Dict[Tuple[Hashable, Hashable], float] = defaultdict(int)
+        self._common: Dict[Tuple[Hashable, Hashable], Set[str]] = {}
+        self._reasons: Dict[Tuple[Hashable, Hashable], List[str]] = defaultdict(list)
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def add_tag_overlap(self, weight: float = 2) -> int:
+        """每个共同标签加 weight 分；返回候选对数"""
+        pairs = shared_token_pairs(self.source_tags, self.target_tags, exclude_self=self.exclude_self)
+        count = 0
+        for source, hits in pairs.items():
+            for target, common in hits.items():
+                key = (source, target)
+                self._common[key] = common
+                self._scores[key] += len(common) * weight
+                count += 1
+        return count
+
+    def add_mentions(self, mentions: Mapping[Hashable, Iterable[Hashable]], weight: float,
+                     reason: str, reverse: bool = False) -> int:
+        """
+        描述提及：mentions 为 {节点: 其描述中提到的对端节点}
+
+        Args:
+            reverse: mentions 的键是目标、值是源（目标描述中提到源）
+        """
+        count = 0
+        for node, mentioned in mentions.items():
+            for other in set(mentioned):
+                source, target = (other, node) if reverse else (node, other)
+                if source not in self.source_tags or target not in self.target_tags:
+                    continue
+                if self.exclude_self and source == target:
+                    continue
+                key = (source, target)
+                self._scores[key] += weight
+                self._reasons[key].append(reason)
+                count += 1
+        return count
+
+    def _relation(self, key: Tuple[Hashable, Hashable]) -> InferredRelation:
+        source, target = key
+        common = self._common.get(key, set())
+        source_tags, target_tags = self.source_tags[source], self.target_tags[target]
+        union = len(source_tags | target_tags)
+        return InferredRelation(
+            source=source,
+            target=target,
+            score=self._scores[key],
+            common_tags=sorted(common),
+            jaccard=len(common) / union if union else 0.0,
+            confidence=len(common) / max(1, len(source_tags)),
+            reasons=list(self._reasons.get(key, ())),
+        )
+
+    def results(self, min_score: float = 0, min_common: int = 0, min_confidence: float = 0,
+                top_k: Optional[int] = None) -> List[InferredRelation]:
+        """
+        过滤后的推断关系，按源分组、每组按 (分数, Jaccard) 降序，同分按目标排序
+
+        Args:
+            top_k: 每个源最多保留的关系数（None为不限）
+        """
+        by_source: Dict[Hashable, List[InferredRelation]] = defaultdict(list)
+        for key, score in self._scores.items():
+            if score < min_score:
+                continue
+            relation = self._relation(key)
+            if relation.common_count < min_common or relation.confidence < min_confidence:
+                continue
+            by_source[key[0]].append(relation)
+
+        rank = lambda r: (-r.score, -r.jaccard, str(r.target))
+        results: List[InferredRelation] = []
+        for source in sorted(by_source, key=str):
+            group = by_source[source]
+            if top_k is not None and len(group) > top_k:
+                group = heapq.nsmallest(top_k, group, key=rank)
+            else:
+                group.sort(key=rank)
+            results.extend(group)
+        return results
+
+
+def chunked(rows: List[Any], size: int) -> Iterable[List[Any]]:
+    """批量写入时按 size 分批"""
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
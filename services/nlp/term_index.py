@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+术语解析索引
+精确匹配走哈希表；模糊匹配先用字符n-gram倒排索引 + 长度过滤生成候选短名单，
+再对短名单依次做 quick_ratio 上界过滤和 difflib.SequenceMatcher 精算，
+避免每个未命中的词都与全部别名逐一比较。
+
+仅依赖标准库，供 DictionaryService、api/etl Normalizer、FileExtractor 共用。
+"""
+
+import difflib
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+
+class TermIndex:
+    """术语/别名解析索引"""
+
+    def __init__(self, ngram_size: int = 2, shortlist_size: int = 64):
+        """
+        Args:
+            ngram_size: 字符n-gram长度（中文术语用2较合适）
+            shortlist_size: 候选短名单上限，按共享n-gram数排序截取
+        """
+        self.ngram_size = ngram_size
+        self.shortlist_size = shortlist_size
+        self._keys: List[str] = []          # 规范化后的键
+        self._labels: List[str] = []        # 原始键
+        self._values: List[Any] = []
+        self._exact: Dict[str, int] = {}    # 规范化键 -> 首个条目下标
+        self._postings: Dict[str, List[int]] = {}
+
+    @staticmethod
+    def normalize(text: Any) -> str:
+        """比较用的规范形式"""
+        if text is None:
+            return ""
+        return str(text).strip().lower()
+
+    @classmethod
+    def from_mapping(cls, mapping: Dict[str, Any], **kwargs) -> "TermIndex":
+        """由 键 -> 值 映射构建索引"""
+        index = cls(**kwargs)
+        for key, value in mapping.items():
+            index.add(key, value)
+        return index
+
+    @classmethod
+    def from_terms(cls, terms: Iterable[str], **kwargs) -> "TermIndex":
+        """由术语列表构建索引（值为术语本身）"""
+        index = cls(**kwargs)
+        for term in terms:
+            index.add(term, term)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, term: Any) -> bool:
+        return self.normalize(term) in self._exact
+
+    def _grams(self, text: str) -> Set[str]:
+        padded = f"\x02{text}\x03"
+        n = self.ngram_size
+        if len(padded) <= n:
+            return {padded}
+        return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+    def add(self, key: str, value: Any) -> None:
+        """添加条目；同一规范化键重复添加时精确匹配保留先添加的值"""
+        norm = self.normalize(key)
+        if not norm:
+            return
+        entry = len(self._keys)
+        self._keys.append(norm)
+        self._labels.append(str(key).strip())
+        self._values.append(value)
+        self._exact.setdefault(norm, entry)
+        for gram in self._grams(norm):
+            self._postings.setdefault(gram, []).append(entry)
+
+    def get(self, term: Any, default: Any = None) -> Any:
+        """精确匹配（忽略大小写和首尾空白）"""
+        entry = self._exact.get(self.normalize(term))
+        return self._values[entry] if entry is not None else default
+
+    def _candidates(self, norm: str, threshold: float) -> List[int]:
+        """n-gram倒排索引生成候选，并按长度上界过滤"""
+        counts: Counter = Counter()
+        for gram in self._grams(norm):
+            for entry in self._postings.get(gram, ()):
+                counts[entry] += 1
+        length = len(norm)
+        shortlist = []
+        for entry, shared in counts.items():
+            other = len(self._keys[entry])
+            # SequenceMatcher.ratio() <= 2*min(len)/(len_a+len_b)
+            if 2.0 * min(length, other) / (length + other) < threshold:
+                continue
+            shortlist.append((shared, entry))
+        shortlist.sort(key=lambda x: (-x[0], x[1]))
+        return [entry for _, entry in shortlist[:self.shortlist_size]]
+
+    def _scored(self, term: Any, threshold: float) -> List[Tuple[float, int]]:
+        norm = self.normalize(term)
+        if not norm:
+            return []
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(norm)
+        scored = []
+        for entry in self._candidates(norm, threshold):
+            matcher.set_seq1(self._keys[entry])
+            if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+                continue
+            score = matcher.ratio()
+            if score >= threshold:
+                scored.append((score, entry))
+        return scored
+
+    def match(self, term: Any, threshold: float = 0.8) -> Optional[Tuple[str, Any, float]]:
+        """
+        最佳模糊匹配
+
+        Returns:
+            (原始键, 值, 相似度)；同分时取先添加的条目，无匹配返回None
+        """
+        scored = self._scored(term, threshold)
+        if not scored:
+            return None
+        score, entry = max(scored, key=lambda x: (x[0], -x[1]))
+        return self._labels[entry], self._values[entry], score
+
+    def resolve(self, term: Any, threshold: Optional[float] = 0.8) -> Any:
+        """精确匹配优先，threshold不为None时退回模糊匹配；都未命中返回None"""
+        value = self.get(term)
+        if value is not None or threshold is None:
+            return value
+        matched = self.match(term, threshold)
+        return matched[1] if matched else None
+
+    def similar(self, term: Any, threshold: float = 0.7,
+                limit: Optional[int] = None) -> List[Tuple[str, Any, float]]:
+        """相似度不低于threshold的全部条目，按相似度降序"""
+        scored = sorted(self._scored(term, threshold), key=lambda x: (-x[0], x[1]))
+        if limit is not None:
+            scored = scored[:limit]
+        return [(self._labels[entry], self._values[entry], score) for score, entry in scored]
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+图谱写版本号
+Redis哈希 kg:versions 按节点标签（label:Term）、关系类型（rel:CAUSES）保存写版本号，
+任一标签/关系类型变更时同时递增 label:* / rel:*。API的查询缓存把读取范围内的版本号嵌入缓存键，
+写入方递增版本号后相关缓存键不再被命中。
+
+ETL、脚本等独立进程写入Neo4j后调用 bump_write_versions 即可，无需导入API的缓存层；
+Redis不可用（或未安装redis包）时跳过递增，连接失败后60秒内不再重试。
+供 api/cache/redis_manager.py、services/etl/knowledge_graph_builder.py 与 scripts/ 共用。
+"""
+
+import os
+import time
+import logging
+from typing import Iterable, List, Optional
+
+try:
+    from redis import Redis
+except ImportError:
+    Redis = None
+
+logger = logging.getLogger(__name__)
+
+# 写版本号存放的Redis哈希
+VERSIONS_KEY = "kg:versions"
+
+
+def write_tags(labels: Optional[Iterable[str]] = None, rel_types: Optional[Iterable[str]] = None) -> List[str]:
+    """写入涉及的标签/关系类型 → 需要递增的版本标签"""
+    labels = sorted(set(labels or ()))
+    rel_types = sorted(set(rel_types or ()))
+    tags = [f"label:{label}" for label in labels] + [f"rel:{rel}" for rel in rel_types]
+    if labels:
+        tags.append("label:*")
+    if rel_types:
+        tags.append("rel:*")
+    return tags
+
+
+def read_tags(labels: Optional[Iterable[str]] = None, rel_types: Optional[Iterable[str]] = None) -> List[str]:
+    """查询读取范围 → 依赖的版本标签；None表示不限（依赖 label:* / rel:*）"""
+    tags = ["label:*"] if labels is None else [f"label:{label}" for label in sorted(set(labels))]
+    tags += ["rel:*"] if rel_types is None else [f"rel:{rel}" for rel in sorted(set(rel_types))]
+    return tags
+
+
+class SyncVersionWriter:
+    """同步递增Redis中的写版本号"""
+
+    def __init__(self, redis_url: Optional[str] = None, retry_interval: float = 60):
+        self.redis_url = redis_url or os.getenv("REDIS_URL", "redis://localhost:6379")
+        self.retry_interval = retry_interval
+        self._client = None
+        self._retry_at = 0.0
+
+    def _get_client(self):
+        if self._client is not None or time.time() < self._retry_at:
+            return self._client
+        if Redis is None:
+            logger.warning("未安装redis包，写版本号不会同步到API进程")
+            self._retry_at = float("inf")
+            return None
+        try:
+            client = Redis.from_url(self.redis_url, socket_connect_timeout=1)
+            client.ping()
+            self._client = client
+        except Exception as e:
+            logger.warning(f"Redis不可用，写版本号未递增: {e}")
+            self._retry_at = time.time() + self.retry_interval
+        return self._client
+
+    def bump(self, tags: List[str]) -> Optional[List[int]]:
+        """递增版本标签，返回Redis中的新版本号；Redis不可用或失败时返回None"""
+        client = self._get_client()
+        if client is None or not tags:
+            return None
+        try:
+            pipe = client.pipeline(transaction=False)
+            for tag in tags:
+                pipe.hincrby(VERSIONS_KEY, tag, 1)
+            return [int(v) for v in pipe.execute()]
+        except Exception as e:
+            logger.error(f"递增写版本号失败 {tags}: {e}")
+            self._client = None
+            self._retry_at = time.time() + self.retry_interval
+            return None
+
+
+_default_writer: Optional[SyncVersionWriter] = None
+
+
+def bump_write_versions(labels: Optional[Iterable[str]] = None,
+                        rel_types: Optional[Iterable[str]] = None) -> List[str]:
+    """写入完成后调用：递增涉及的标签/关系类型的写版本号，返回递增的版本标签"""
+    global _default_writer
+    tags = write_tags(labels, rel_types)
+    if tags:
+        if _default_writer is None:
+            _default_writer = SyncVersionWriter()
+        _default_writer.bump(tags)
+    return tags
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+测试因果链路内存邻接快照 - 最优优先搜索与穷举结果一致
+"""
+
+import sys
+import os
+import random
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'api'))
+
+from services.adjacency_snapshot import AdjacencySnapshot
+
+
+def make_snapshot(seed=7, node_count=40, edge_count=160):
+    """随机因果图：Term节点 + 带置信度的CAUSES/DEPENDS_ON关系"""
+    rng = random.Random(seed)
+    nodes = [{'id': f'n{i}', 'labels': ['Term'], 'props': {'name': f'术语{i}', 'category': 'Symptom'}}
+             for i in range(node_count)]
+    edges = []
+    for i in range(edge_count):
+        props = {'confidence': round(rng.uniform(0.3, 1.0), 2)}
+        if i % 17 == 0:
+            props = {}  # 缺失置信度的边不应参与
+        edges.append({'id': f'r{i}', 'type': rng.choice(['CAUSES', 'DEPENDS_ON']),
+                      'props': props, 'source': f'n{rng.randrange(node_count)}',
+                      'target': f'n{rng.randrange(node_count)}'})
+    return AdjacencySnapshot(1, nodes, edges), edges
+
+
+def brute_force(edges, start, rel_type, reverse, max_depth, min_conf):
+    """穷举所有不重复关系的路径，返回链路置信度列表"""
+    results = []
+
+    def walk(node, used, score):
+        if len(used) >= max_depth:
+            return
+        for edge in edges:
+            if edge['type'] != rel_type or edge['id'] in used:
+                continue
+            conf = edge['props'].get('confidence')
+            if conf is None or conf < min_conf:
+                continue
+            here, there = (edge['target'], edge['source']) if reverse else (edge['source'], edge['target'])
+            if here != node:
+                continue
+            results.append(score * conf)
+            walk(there, used | {edge['id']}, score * conf)
+
+    walk(start, frozenset(), 1.0)
+    return sorted(results, reverse=True)
+
+
+def test_top_chains_match_brute_force():
+    """前k条链路置信度与穷举结果一致"""
+    snapshot, edges = make_snapshot()
+    for start in range(0, 40, 5):
+        for rel_type, direction in (('CAUSES', 'in'), ('DEPENDS_ON', 'out')):
+            expected = brute_force(edges, f'n{start}', rel_type, direction == 'in', 3, 0.5)[:10]
+            chains = snapshot.top_chains(snapshot.find_nodes('Term', f'术语{start}'), rel_type,
+                                         direction, 3, 0.5, 10)
+            actual = [score for score, _, _ in chains]
+            assert [round(x, 9) for x in actual] == [round(x, 9) for x in expected], (start, rel_type)
+            for score, nodes, chain_edges in chains:
+                assert len(nodes) == len(chain_edges) + 1
+                assert len(set(chain_edges)) == len(chain_edges)
+    print("✅ 最优优先搜索结果与穷举一致")
+
+
+def test_chain_floor_and_pattern():
+    """链路置信度下限剪枝与固定模式匹配"""
+    nodes = [
+        {'id': 's', 'labels': ['Symptom'], 'props': {'name': '屏幕闪烁'}},
+        {'id': 'a', 'labels': ['Anomaly'], 'props': {'name': '异常1'}},
+        {'id': 'rc', 'labels': ['RootCause'], 'props': {'name': '排线松动'}},
+        {'id': 'c', 'labels': ['Countermeasure'], 'props': {'name': '加固排线'}},
+    ]
+    edges = [
+        {'id': 'e1', 'type': 'HAS_SYMPTOM', 'props': {}, 'source': 'a', 'target': 's'},
+        {'id': 'e2', 'type': 'HAS_ROOTCAUSE', 'props': {}, 'source': 'a', 'target': 'rc'},
+        {'id': 'e3', 'type': 'RESOLVED_BY', 'props': {}, 'source': 'rc', 'target': 'c'},
+    ]
+    snapshot = AdjacencySnapshot(1, nodes, edges)
+    paths = snapshot.match_pattern('Symptom', '屏幕闪烁', [
+        ('HAS_SYMPTOM', 'in', 'Anomaly'),
+        ('HAS_ROOTCAUSE', 'out', 'RootCause'),
+        ('RESOLVED_BY', 'out', 'Countermeasure')
+    ], limit=5)
+    assert len(paths) == 1
+    assert [snapshot.node_ids[n] for n in paths[0][0]] == ['s', 'a', 'rc', 'c']
+
+    snapshot, _ = make_snapshot()
+    start = snapshot.find_nodes('Term', '术语0')
+    chains = snapshot.top_chains(start, 'CAUSES', 'in', 3, 0.3, 50, min_chain_confidence=0.6)
+    assert all(score >= 0.6 for score, _, _ in chains)
+    print("✅ 剪枝与模式匹配正常")
+
+
+if __name__ == "__main__":
+    test_top_chains_match_brute_force()
+    test_chain_floor_and_pattern()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+测试异步Neo4j数据访问层 - 连接池预算划分、异步会话统计、线程池回退模式
+"""
+
+import sys
+import os
+import asyncio
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'api'))
+
+import database.async_neo4j as async_neo4j
+from database.async_neo4j import AsyncGraphClient
+from database.neo4j_manager import Neo4jManager, Neo4jPoolConfig
+
+
+class FakeRecord(dict):
+    def data(self):
+        return dict(self)
+
+
+ROWS = [FakeRecord(n=1), FakeRecord(n=2), FakeRecord(n=3)]
+
+
+class FakeAsyncResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for row in self.rows:
+            yield row
+
+
+class FakeAsyncSession:
+    def __init__(self, driver):
+        self.driver = driver
+
+    async def __aenter__(self):
+        self.driver.open_sessions += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        self.driver.open_sessions -= 1
+        return False
+
+    async def run(self, query, params):
+        self.driver.queries.append((query, params))
+        return FakeAsyncResult(ROWS)
+
+
+class FakeAsyncDriver:
+    def __init__(self, options):
+        self.options = options
+        self.queries = []
+        self.open_sessions = 0
+
+    def session(self):
+        return FakeAsyncSession(self)
+
+    async def close(self):
+        pass
+
+
+class FakeAsyncGraphDatabase:
+    drivers = []
+
+    @classmethod
+    def driver(cls, uri, auth=None, **options):
+        driver = FakeAsyncDriver(options)
+        cls.drivers.append(driver)
+        return driver
+
+
+class FakeSyncResult:
+    def __init__(self, rows):
+        self.rows = list(rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def fetch(self, n):
+        batch, self.rows = self.rows[:n], self.rows[n:]
+        return batch
+
+
+class FakeSyncSession:
+    def __init__(self, threads):
+        self.threads = threads
+
+    def run(self, query, params):
+        self.threads.add(threading.current_thread().name)
+        return FakeSyncResult(ROWS)
+
+    def close(self):
+        pass
+
+
+class FakeSyncDriver:
+    def __init__(self):
+        self.threads = set()
+
+    def session(self, **kwargs):
+        return FakeSyncSession(self.threads)
+
+
+class FakeManager(Neo4jManager):
+    """不连接真实数据库，get_driver返回包装了假驱动的PooledDriver"""
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.raw = FakeSyncDriver()
+
+    def _create_driver(self, uri, user, password):
+        self.created_options = self.driver_options()
+        return self.raw
+
+
+def test_pool_budget_split():
+    """异步驱动与同步驱动按比例划分连接池，总数不超过配置上限"""
+    original = async_neo4j.AsyncGraphDatabase
+    async_neo4j.AsyncGraphDatabase = FakeAsyncGraphDatabase
+    try:
+        manager = FakeManager(Neo4jPoolConfig(max_connection_pool_size=10, async_pool_share=0.3))
+        client = AsyncGraphClient(manager, use_async=True)
+        assert client.mode == "async" and client.async_pool_size == 3
+        assert manager.sync_pool_size == 7
+
+        pooled = manager.get_driver()
+        assert manager.created_options["max_connection_pool_size"] == 7 and pooled.max_size == 7
+        assert client._get_async_driver().options["max_connection_pool_size"] == 3
+        assert client.async_pool_size + manager.sync_pool_size == 10
+
+        tiny = FakeManager(Neo4jPoolConfig(max_connection_pool_size=1))
+        AsyncGraphClient(tiny, use_async=True)
+        assert tiny.sync_pool_size == 1
+    finally:
+        async_neo4j.AsyncGraphDatabase = original
+    print("✅ 连接池预算划分")
+
+
+def test_async_session_stats():
+    """异步会话借出/归还计入统计，键带async:前缀"""
+    original = async_neo4j.AsyncGraphDatabase
+    async_neo4j.AsyncGraphDatabase = FakeAsyncGraphDatabase
+
+    async def scenario():
+        client = AsyncGraphClient(FakeManager(Neo4jPoolConfig(max_connection_pool_size=8)), use_async=True)
+        assert [r["n"] for r in await client.fetch("RETURN n", {"a": 1}, b=2)] == [1, 2, 3]
+        assert await client.fetch_data("RETURN n") == [{"n": 1}, {"n": 2}, {"n": 3}]
+        assert (await client.fetch_one("RETURN n"))["n"] == 1
+
+        streamed = []
+        async for record in client.stream("RETURN n"):
+            streamed.append(record["n"])
+            assert client.stats.snapshot()["in_use"] == 1
+        assert streamed == [1, 2, 3]
+
+        driver = client._get_async_driver()
+        assert driver.queries[0] == ("RETURN n", {"a": 1, "b": 2}) and driver.open_sessions == 0
+
+        (key, stats), = client.get_pool_stats().items()
+        assert key.startswith("async:")
+        assert stats["acquired_total"] == 4 and stats["in_use"] == 0 and stats["max_size"] == 4
+        await client.close()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        async_neo4j.AsyncGraphDatabase = original
+    print("✅ 异步会话统计")
+
+
+def test_threadpool_fallback():
+    """关闭异步驱动时不划分连接池，查询在neo4j-sync线程池中执行"""
+    async def scenario():
+        manager = FakeManager(Neo4jPoolConfig(max_connection_pool_size=6))
+        client = AsyncGraphClient(manager, max_workers=2, use_async=False)
+        assert client.mode == "threadpool" and manager.sync_pool_size == 6
+        assert client.get_pool_stats() == {}
+
+        assert [r["n"] for r in await client.fetch("RETURN n")] == [1, 2, 3]
+        streamed = [record["n"] async for record in client.stream("RETURN n", batch_size=2)]
+        assert streamed == [1, 2, 3]
+        assert all(name.startswith("neo4j-sync") for name in manager.raw.threads)
+
+        stats = manager.get_driver().get_pool_stats()
+        assert stats["acquired_total"] == 2 and stats["in_use"] == 0
+        await client.close()
+
+    asyncio.run(scenario())
+    print("✅ 线程池回退模式")
+
+
+if __name__ == "__main__":
+    test_pool_budget_split()
+    test_async_session_stats()
+    test_threadpool_fallback()
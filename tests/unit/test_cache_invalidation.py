@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+测试写版本号缓存失效 - 写入按标签/关系类型使缓存键失效、跨进程版本同步、版本号不回退、SCAN清除
+"""
+
+import sys
+import os
+import fnmatch
+import asyncio
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'api'))
+
+from cache import redis_manager as rm
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.ops = []
+
+    def hincrby(self, name, field, amount):
+        self.ops.append((name, field, amount))
+
+    async def execute(self):
+        return [await self.client.hincrby(*op) for op in self.ops]
+
+
+class FakeRedis:
+    """内存版Redis客户端：字符串键、哈希、SCAN；记录是否调用过KEYS"""
+
+    def __init__(self):
+        self.data = {}
+        self.hashes = {}
+        self.keys_called = False
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    async def delete(self, *keys):
+        return sum(self.data.pop(k, None) is not None for k in keys)
+
+    async def unlink(self, *keys):
+        return await self.delete(*keys)
+
+    async def keys(self, pattern):
+        self.keys_called = True
+        return [k for k in self.data if fnmatch.fnmatch(k, pattern)]
+
+    async def scan_iter(self, match=None, count=None):
+        for key in list(self.data):
+            if match is None or fnmatch.fnmatch(key, match):
+                yield key
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def hincrby(self, name, field, amount):
+        h = self.hashes.setdefault(name, {})
+        h[field] = h.get(field, 0) + amount
+        return h[field]
+
+    async def hgetall(self, name):
+        return {k.encode(): str(v).encode() for k, v in self.hashes.get(name, {}).items()}
+
+
+def setup_globals(client):
+    """让模块级 QueryCache 使用假Redis和新的L1/版本号"""
+    rm.redis_manager.redis_client = client
+    rm.query_cache = rm.TieredCache(rm.redis_manager, rm.L1Cache(max_entries=64, max_age=30))
+    rm.cache_versions = rm.CacheVersions(rm.redis_manager, refresh_interval=0)
+
+
+def test_write_invalidates_only_dependent_keys():
+    """写入只使读取范围内包含相关标签/关系类型的缓存失效"""
+    async def scenario():
+        setup_globals(FakeRedis())
+        calls = {"causes": 0, "all": 0, "tests": 0}
+
+        def counter(name):
+            async def compute():
+                calls[name] += 1
+                return {"n": calls[name]}
+            return compute
+
+        async def read_all():
+            await rm.QueryCache.graph_data("causes", counter("causes"), labels=["Term"], rel_types=["CAUSES"])
+            await rm.QueryCache.graph_data("all", counter("all"))
+            await rm.QueryCache.stats_data("tests", counter("tests"), labels=[], rel_types=["TESTS"])
+
+        await read_all()
+        await read_all()
+        assert calls == {"causes": 1, "all": 1, "tests": 1}
+
+        await rm.QueryCache.invalidate(labels=["Term"], rel_types=["CAUSES"])
+        await read_all()
+        assert calls == {"causes": 2, "all": 2, "tests": 1}
+
+        await rm.QueryCache.invalidate(labels=["Anomaly"])
+        await read_all()
+        assert calls == {"causes": 2, "all": 3, "tests": 1}
+
+        await rm.QueryCache.invalidate(rel_types=["TESTS"])
+        await read_all()
+        assert calls == {"causes": 2, "all": 4, "tests": 2}
+
+    asyncio.run(scenario())
+    print("✅ 写入只使依赖的缓存键失效")
+
+
+def test_versions_shared_across_processes():
+    """版本号存于Redis哈希：另一进程（含同步写入流程）递增后本进程读取到新版本"""
+    async def scenario():
+        client = FakeRedis()
+        setup_globals(client)
+        other_process = rm.CacheVersions(rm.redis_manager, refresh_interval=0)
+        tags = rm.CacheVersions.read_tags(["Term"], None)
+
+        before = await rm.cache_versions.token(tags)
+        await other_process.bump(labels=["Term"])
+        after = await rm.cache_versions.token(tags)
+        assert before == "0.0" and after == "1.0"
+        assert client.hashes[rm.VERSIONS_KEY] == {"label:Term": 1, "label:*": 1}
+
+        # Redis不可用时同步写入只在本进程内生效
+        rm.redis_manager.redis_client = None
+        local = rm.CacheVersions(rm.redis_manager, refresh_interval=0)
+        local._sync_retry_at = float("inf")
+        assert local.bump_sync(["Component"], ["AFFECTS"]) == \
+            ["label:Component", "rel:AFFECTS", "label:*", "rel:*"]
+        assert await local.token(rm.CacheVersions.read_tags(["Component"], ["AFFECTS"])) == "1.1"
+
+    asyncio.run(scenario())
+    print("✅ 版本号跨进程同步")
+
+
+def test_versions_never_decrease():
+    """Redis中的版本号低于本地（Redis重启、离线时本地递增）时不回退，旧缓存键不会重新命中"""
+    async def scenario():
+        client = FakeRedis()
+        setup_globals(client)
+        tags = rm.CacheVersions.read_tags(["Term"], None)
+
+        rm.redis_manager.redis_client = None
+        for _ in range(3):
+            await rm.cache_versions.bump(labels=["Term"])
+        assert await rm.cache_versions.token(tags) == "3.0"
+
+        # Redis恢复，其中只有其他进程的一次递增
+        rm.redis_manager.redis_client = client
+        await rm.CacheVersions(rm.redis_manager).bump(labels=["Term"])
+        assert await rm.cache_versions.token(tags) == "3.0"
+
+        # 本进程再次写入：取 Redis 返回值与本地递增值中较大者
+        await rm.cache_versions.bump(labels=["Term"])
+        assert await rm.cache_versions.token(tags) == "4.0"
+
+    asyncio.run(scenario())
+    print("✅ 版本号只增不减")
+
+
+def test_clear_pattern_uses_scan():
+    """管理清除使用SCAN+UNLINK分批删除，不调用KEYS"""
+    async def scenario():
+        client = FakeRedis()
+        setup_globals(client)
+        for i in range(1203):
+            client.data[f"kg:graph:{i}"] = b"x"
+        client.data["kg:entity:1"] = b"x"
+        deleted = await rm.redis_manager.clear_pattern("kg:graph:*")
+        assert deleted == 1203 and list(client.data) == ["kg:entity:1"]
+        assert not client.keys_called
+
+    asyncio.run(scenario())
+    print("✅ SCAN分批清除")
+
+
+if __name__ == "__main__":
+    test_write_invalidates_only_dependent_keys()
+    test_versions_shared_across_processes()
+    test_versions_never_decrease()
+    test_clear_pattern_uses_scan()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+测试按列批量导入 - 与逐行 iterrows() 处理结果一致（ETL实体/关系、行哈希、上传行转换、结构化抽取）
+"""
+
+import sys
+import os
+import random
+import logging
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'api'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'nlp'))
+
+import numpy as np
+import pandas as pd
+
+from etl.columnar import map_unique, normalize_frame, join_columns, row_hashes
+from etl.enhanced_etl_processor import EnhancedETLProcessor
+
+
+def sample_frame(rows: int = 600) -> pd.DataFrame:
+    """含空值、空白、数值版本号、时间戳和重复行的异常表"""
+    rng = random.Random(7)
+    return pd.DataFrame({
+        "产品": [rng.choice(["X1", " X2 ", "X3", None]) for _ in range(rows)],
+        "版本": [rng.choice(["v1", "v2", 3.0, None]) for _ in range(rows)],
+        "组件": [rng.choice(["电池", "屏幕", "", "  "]) for _ in range(rows)],
+        "症状": [rng.choice(["鼓包", "闪屏", np.nan]) for _ in range(rows)],
+        "异常ID": [rng.choice([f"A{i}" for i in range(40)] + [None]) for _ in range(rows)],
+        "异常描述": [rng.choice(["电池鼓包", "屏幕闪烁", None]) for _ in range(rows)],
+        "严重程度": [rng.choice(["高", "低", None]) for _ in range(rows)],
+        "发生日期": [rng.choice([pd.Timestamp("2024-03-01"), pd.NaT]) for _ in range(rows)],
+    })
+
+
+def test_map_unique_and_hashes():
+    """唯一值映射保留空值位置；行哈希与逐行哈希一致"""
+    calls = []
+    series = pd.Series(["a", None, "a", "b", np.nan])
+    result = map_unique(series, lambda v: calls.append(v) or v.upper(), "")
+    assert result.tolist() == ["A", "", "A", "B", ""] and sorted(calls) == ["a", "b"]
+    # 混合类型列不合并 1 与 1.0
+    assert map_unique(pd.Series([1, 1.0, "1"], dtype=object), str).tolist() == ["1", "1.0", "1"]
+
+    df = sample_frame()
+    processor = EnhancedETLProcessor(mapping_file="missing.yaml")
+    assert row_hashes(df) == [processor._generate_row_hash(row) for _, row in df.iterrows()]
+    print("✅ 唯一值映射与行哈希正确")
+
+
+def test_etl_frame_matches_rows():
+    """_process_frame 的实体、关系、统计和错误与逐行处理一致"""
+    logging.disable(logging.ERROR)
+    try:
+        df = sample_frame()
+        legacy = EnhancedETLProcessor(mapping_file="missing.yaml")
+        entities, relationships = [], []
+        for index, row in df.iterrows():
+            legacy._process_row(index, row, entities, relationships)
+        unique = {}
+        for entity in entities:
+            unique.setdefault(entity["id"], {**entity, "properties": {}})["properties"].update(entity["properties"])
+        seen, unique_rels = set(), []
+        for rel in relationships:
+            if (rel["source"], rel["type"], rel["target"]) not in seen:
+                seen.add((rel["source"], rel["type"], rel["target"]))
+                unique_rels.append(rel)
+
+        columnar = EnhancedETLProcessor(mapping_file="missing.yaml")
+        frame_entities, frame_relationships = columnar._process_frame(df)
+    finally:
+        logging.disable(logging.NOTSET)
+
+    assert frame_entities == list(unique.values()) and frame_relationships == unique_rels
+    for field in ("processed_rows", "success_rows", "failed_rows", "duplicate_rows", "skipped_rows"):
+        assert getattr(columnar.stats, field) == getattr(legacy.stats, field), field
+    assert [(e["row_index"], e["message"]) for e in columnar.stats.errors] == \
+           [(e["row_index"], e["message"]) for e in legacy.stats.errors]
+    assert columnar.stats.success_rows > 0 and columnar.stats.duplicate_rows > 0
+    print(f"✅ ETL按列处理与逐行处理一致（{len(frame_entities)}个实体, {len(frame_relationships)}个关系）")
+
+
+def test_upload_rows_and_structured_extraction():
+    """上传解析行转换、结构化实体抽取与逐行处理一致"""
+    df = sample_frame(200)
+    frame = normalize_frame(df)
+    contents = join_columns(frame)
+    for (_, row), content, record in zip(df.iterrows(), contents, frame.to_dict("records")):
+        expected = {col: None if pd.isna(val) else (val.isoformat() if hasattr(val, "isoformat") else str(val).strip())
+                    for col, val in row.items()}
+        assert record == expected
+        assert content == " | ".join(f"{col}: {val}" for col, val in expected.items() if val is not None)
+    assert join_columns(pd.DataFrame(index=range(3))) == ["", "", ""]
+
+    from enhanced_document_extractor import EnhancedDocumentExtractor
+    extractor = EnhancedDocumentExtractor()
+    expected = []
+    for index, row in df.iterrows():
+        expected.extend(extractor._extract_from_structured_row(row, index)[0])
+    assert extractor._extract_from_structured_frame(df)[0] == expected
+    print("✅ 上传行转换与结构化抽取按列处理结果一致")
+
+
+if __name__ == "__main__":
+    test_map_unique_and_hashes()
+    test_etl_frame_matches_rows()
+    test_upload_rows_and_structured_extraction()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+测试词典Neo4j全文索引的创建 - 独立索引名、同名索引定义不一致时删除重建、创建失败时退回CONTAINS
+"""
+
+import sys
+import os
+import asyncio
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'api'))
+
+from services.dictionary_fulltext import (TermFulltextIndex, TERM_FULLTEXT_INDEX, CREATE_TERM_FULLTEXT_INDEX,
+                                          DROP_TERM_FULLTEXT_INDEX)
+
+
+class FakeGraph:
+    """记录执行的语句；existing 为 SHOW INDEXES 返回的已有索引"""
+
+    def __init__(self, existing=None, fail=False):
+        self.existing = existing or []
+        self.fail = fail
+        self.queries = []
+
+    async def fetch_data(self, query, parameters=None):
+        if self.fail:
+            raise ConnectionError("neo4j down")
+        self.queries.append("SHOW")
+        return list(self.existing)
+
+    async def fetch(self, query, parameters=None):
+        self.queries.append(query)
+        return []
+
+
+def existing_index(labels, analyzer):
+    return {"labelsOrTypes": labels, "properties": ["name", "description"],
+            "options": {"indexConfig": {"fulltext.analyzer": analyzer}}}
+
+
+def test_index_name_and_recreate():
+    """索引名不与 setup_graph_constraints.py 的 term_fulltext 冲突；定义不一致时删除重建"""
+    assert TERM_FULLTEXT_INDEX != "term_fulltext"
+
+    async def scenario():
+        index = TermFulltextIndex()
+
+        graph = FakeGraph()
+        assert await index.ensure(graph)
+        assert graph.queries[1] == CREATE_TERM_FULLTEXT_INDEX
+
+        graph = FakeGraph([existing_index(["Alias", "Term"], "cjk")])
+        assert await index.ensure(graph)
+        assert CREATE_TERM_FULLTEXT_INDEX not in graph.queries
+
+        graph = FakeGraph([existing_index(["Term"], "standard-no-stop-words")])
+        assert await index.ensure(graph)
+        assert graph.queries[1:3] == [DROP_TERM_FULLTEXT_INDEX, CREATE_TERM_FULLTEXT_INDEX]
+
+        assert not await index.ensure(FakeGraph(fail=True)) and not index.ready
+
+    asyncio.run(scenario())
+    print("✅ 全文索引定义校验与重建")
+
+
+if __name__ == "__main__":
+    test_index_name_and_recreate()
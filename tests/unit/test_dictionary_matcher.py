@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+测试词典多模式匹配器 - 与逐个子串搜索结果一致，磁盘缓存按词典内容失效
+"""
+
+import sys
+import os
+import json
+import random
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'nlp'))
+
+from dictionary_matcher import DictionaryMatcher, get_dictionary_matcher
+
+CHARS = "摄像头模组屏幕闪烁电池鼓包充电异常主板按键ABCab"
+
+ENTRIES = [
+    {'term': '摄像头', 'aliases': ['Camera', '相机'], 'category': 'Component'},
+    {'term': '摄像头模组', 'aliases': [], 'category': 'Component'},
+    {'term': '屏幕闪烁', 'aliases': ['闪屏'], 'category': 'Symptom'},
+    {'term': '焊盘', 'aliases': ['PAD'], 'category': 'Component'},
+    {'term': '功率放大器', 'aliases': ['PA'], 'category': 'Component'},
+]
+
+
+def brute_force(entries, text):
+    """逐个术语/别名做子串搜索（允许重叠）"""
+    text = text.lower()
+    found = set()
+    for entry in entries:
+        surfaces = [(entry['term'], False)] + [(a, True) for a in entry.get('aliases', [])]
+        for surface, alias in surfaces:
+            surface = surface.strip().lower()
+            start = text.find(surface)
+            while surface and start >= 0:
+                found.add((start, start + len(surface), entry['term'], alias))
+                start = text.find(surface, start + 1)
+    return found
+
+
+def test_matches_brute_force():
+    """全部命中（含重叠）与逐个子串搜索一致"""
+    rng = random.Random(7)
+    terms = sorted({''.join(rng.choice(CHARS) for _ in range(rng.randint(1, 5))) for _ in range(200)})
+    entries = [{'term': t, 'aliases': [t[::-1]], 'category': 'Component'} for t in terms]
+    matcher = DictionaryMatcher(entries)
+    for _ in range(300):
+        text = ''.join(rng.choice(CHARS) for _ in range(rng.randint(0, 40)))
+        found = {(m.start, m.end, m.term, m.alias)
+                 for m in matcher.find_all(text, longest=False, word_boundary=False)}
+        assert found == brute_force(entries, text), text
+    print("✅ 300 段文本的命中与逐个子串搜索一致")
+
+
+def test_longest_and_boundary():
+    """最左最长不重叠、别名映射到规范术语、英文词边界"""
+    matcher = DictionaryMatcher(ENTRIES)
+    matches = matcher.find_all("摄像头模组出现闪屏，CAMERA 正常，PAD上的PA")
+    assert [(m.text, m.term, m.alias) for m in matches] == [
+        ('摄像头模组', '摄像头模组', False),
+        ('闪屏', '屏幕闪烁', True),
+        ('CAMERA', '摄像头', True),
+        ('PAD', '焊盘', True),
+        ('PA', '功率放大器', True),
+    ]
+    assert matches[0].start == 0 and matches[0].end == 5
+    # PAD 中的 PA 不算命中
+    assert [m.term for m in matcher.find_all("PADS", word_boundary=True)] == []
+    term_hits, alias_hits = matcher.match_terms("相机和摄像头")
+    assert ('Component', '摄像头') in term_hits and ('Component', '摄像头') in alias_hits
+    print("✅ 最长匹配、别名映射与词边界正常")
+
+
+def test_disk_cache():
+    """词典未变时加载缓存，内容变化后重建"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "dictionary.json"
+        path.write_text(json.dumps(ENTRIES, ensure_ascii=False), encoding='utf-8')
+        first = DictionaryMatcher.from_file(path)
+        assert (Path(tmp) / ".cache" / "dictionary_matcher.pkl").exists()
+        cached = DictionaryMatcher.from_file(path)
+        assert cached.fingerprint == first.fingerprint
+        assert [m.term for m in cached.find_all("闪屏")] == ['屏幕闪烁']
+
+        path.write_text(json.dumps(ENTRIES + [{'term': '电池', 'aliases': [], 'category': 'Component'}],
+                                   ensure_ascii=False), encoding='utf-8')
+        os.utime(path, ns=(1, 1))
+        rebuilt = get_dictionary_matcher(path)
+        assert rebuilt.fingerprint != first.fingerprint
+        assert [m.term for m in rebuilt.find_all("电池鼓包")] == ['电池']
+        assert get_dictionary_matcher(path) is rebuilt
+    print("✅ 磁盘缓存按词典内容失效")
+
+
+if __name__ == "__main__":
+    test_matches_brute_force()
+    test_longest_and_boundary()
+    test_disk_cache()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+测试词典全文检索索引 - 相关度排序、中文二字组、英文前缀、联想、增量同步、写入时更新索引、数据治理搜索
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'nlp'))
+
+from dictionary_search import DictionarySearchIndex, DocumentFields, IndexedMapping, build_entry_index, query_tokens
+
+ENTRIES = [
+    {"term": "电池膨胀", "aliases": ["鼓包"], "category": "Symptom", "tags": ["电池"],
+     "definition": "电池外壳变形"},
+    {"term": "电池", "aliases": ["Battery", "电芯"], "category": "Component", "tags": ["硬件"],
+     "definition": "为整机供电的部件"},
+    {"term": "跌落测试", "aliases": ["Drop Test"], "category": "TestCase", "tags": ["可靠性"],
+     "definition": "验证整机抗跌落能力"},
+    {"term": "BTB连接器", "aliases": [], "category": "Component", "tags": ["连接"],
+     "definition": "板对板连接器，跌落后可能松脱"},
+]
+
+
+def test_ranked_search():
+    """术语命中优先于定义命中，别名精确命中直达词条"""
+    index = build_entry_index(ENTRIES)
+    assert index.search_ids("电池")[0] == 1
+    assert index.search_ids("鼓包") == [0]
+    assert index.search_ids("跌落")[:2] == [2, 3]
+    assert index.search_ids("电池", category="Symptom") == [0]
+    total, page = index.search("电池", limit=1, offset=1)
+    assert total == 2 and len(page) == 1
+    print("✅ 相关度排序与分类过滤")
+
+
+def test_query_tokens():
+    """中文按二字组全部命中，单字按单字，英文单词按前缀"""
+    assert query_tokens("电池膨胀") == [("电池", False), ("池膨", False), ("膨胀", False)]
+    assert query_tokens("电") == [("电", False)]
+    assert query_tokens("Drop te") == [("drop", True), ("te", True)]
+    index = build_entry_index(ENTRIES)
+    assert index.search_ids("电池膨胀") == [0]
+    assert index.search_ids("池膨胀电") == []
+    assert index.search_ids("batt") == [1]
+    assert index.search_ids("btb") == [3]
+    print("✅ 查询切分")
+
+
+def test_suggest():
+    """前缀联想：术语优先，较短的文本优先，每个词条只出现一次"""
+    index = build_entry_index(ENTRIES)
+    assert index.suggest("电池") == [(1, "电池"), (0, "电池膨胀")]
+    assert index.suggest("dr") == [(2, "drop test")]
+    assert index.suggest("电", limit=1) == [(1, "电池")]
+    print("✅ 前缀联想")
+
+
+def test_incremental_sync_matches_rebuild():
+    """增量同步（新增、修改、删除）后的结果与重新构建一致"""
+    items = {i: dict(entry) for i, entry in enumerate(ENTRIES)}
+    signature = lambda e: (e["term"], tuple(e["aliases"]), e["definition"])
+    index = DictionarySearchIndex()
+    assert index.sync(items, lambda e: e, signature) == (4, 0)
+    assert index.sync(items, lambda e: e, signature) == (0, 0)
+
+    items[1]["aliases"].append("锂电池")
+    del items[2]
+    items[9] = {"term": "跌落", "aliases": [], "category": "Symptom", "tags": [], "definition": ""}
+    assert index.sync(items, lambda e: e, signature) == (2, 1)
+
+    fresh = DictionarySearchIndex.from_documents(items.items())
+    for query in ["电池", "锂电", "跌落", "连接器", "btb", "电"]:
+        assert index.search(query) == fresh.search(query), query
+    assert index.search_ids("锂电池") == [1]
+    print("✅ 增量同步")
+
+
+class Entry:
+    def __init__(self, term, aliases=(), tags=(), category="Component"):
+        self.term = term
+        self.aliases = list(aliases)
+        self.tags = list(tags)
+        self.category = category
+
+
+def test_indexed_mapping_updates_on_write():
+    """新增、替换、删除、清空时同步更新索引，搜索不再调用sync；多个映射按scope共用索引"""
+    fields = DocumentFields(term="term", aliases=("aliases",), tags="tags", category="category")
+    assert fields.document(Entry("电池", ["电芯"], ["硬件"])) == {
+        "term": "电池", "aliases": ["电芯"], "tags": ["硬件"], "category": "Component"}
+    assert fields.signature(Entry("电池", ["电芯"])) == ("电池", ("电芯",), (), "Component")
+
+    index = DictionarySearchIndex()
+    index.sync = None  # 搜索路径不应再遍历条目
+    entries = IndexedMapping(index, fields, {"a": Entry("电池", ["电芯"]), "b": Entry("屏幕", tags=["显示"])})
+    assert index.search_ids("电芯") == ["a"] and index.search_ids("显示") == ["b"]
+
+    entries["a"] = Entry("电池", ["Battery"])
+    assert index.search_ids("电芯") == [] and index.search_ids("batt") == ["a"]
+    entries["b"].tags.append("面板")
+    entries.reindex("b")
+    assert index.search_ids("面板") == ["b"]
+    del entries["b"]
+    assert index.search_ids("屏幕") == [] and len(index) == 1
+
+    other = IndexedMapping(index, fields, {"a": Entry("电池盖", category="Part")}, scope="part")
+    assert set(index.search_ids("电池")) == {"a", ("part", "a")}
+    other.clear()
+    assert index.search_ids("电池") == ["a"] and len(other) == 0 and "a" in entries
+    print("✅ 写入时更新索引")
+
+
+def test_governance_search_uses_index():
+    """数据治理的异常标签/组件/供应商搜索走全文索引，新增条目时同步更新索引"""
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'governance'))
+    from data_governance_system import DataGovernanceSystem
+
+    with tempfile.TemporaryDirectory() as tmp:
+        governance = DataGovernanceSystem(data_dir=tmp)
+        governance.add_anomaly_label("屏幕闪烁", "显示", "高", "跌落后屏幕间歇闪烁", ["BTB", "显示"])
+        governance.add_anomaly_label("电池鼓包", "电池", "高", "高温循环后电池膨胀", ["电池"])
+        governance.add_component("电池", "电源", "锂电池", ["Battery", "电芯"], {}, [])
+        governance.add_supplier("欣旺达", {}, ["电池", "电源管理"], "A", [], "低", [], {})
+
+        assert [l.name for l in governance.search_anomaly_labels("闪烁")] == ["屏幕闪烁"]
+        assert [l.name for l in governance.search_anomaly_labels("btb")] == ["屏幕闪烁"]
+        assert [c.name for c in governance.search_components("batt")] == ["电池"]
+        assert [c.name for c in governance.search_components("电源")] == ["电池"]
+        assert [s.name for s in governance.search_suppliers("电源管理")] == ["欣旺达"]
+
+        governance.add_anomaly_label("电池漏液", "电池", "高", "电池外壳破损", ["电池"])
+        assert {l.name for l in governance.search_anomaly_labels("电池")} == {"电池鼓包", "电池漏液"}
+        assert len(governance.label_index) == 3
+
+        reloaded = DataGovernanceSystem(data_dir=tmp)
+        assert [c.name for c in reloaded.search_components("电芯")] == ["电池"]
+        assert len(reloaded.label_index) == 3
+    print("✅ 数据治理搜索走全文索引")
+
+
+if __name__ == "__main__":
+    test_ranked_search()
+    test_query_tokens()
+    test_suggest()
+    test_incremental_sync_matches_rebuild()
+    test_indexed_mapping_updates_on_write()
+    test_governance_search_uses_index()
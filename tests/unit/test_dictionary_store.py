@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+测试词典内存快照 - 预计算分组/统计、按快照缓存派生视图、文件变化后原子替换、ETag匹配
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+from pathlib import Path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'nlp'))
+
+from dictionary_store import DictionaryStore, etag_matches
+
+ENTRIES = [
+    {"term": "BTB连接器", "aliases": ["板对板连接器"], "category": "Component", "tags": ["电气连接", "部件"]},
+    {"term": "虚焊", "aliases": [], "category": "Symptom", "tags": "焊接 工艺"},
+    {"term": "示波器", "aliases": ["Oscilloscope"], "tags": []},
+]
+
+
+def write_dictionary(path: Path, entries):
+    path.write_text(json.dumps(entries, ensure_ascii=False), encoding="utf-8")
+
+
+def test_snapshot_precomputes_groups_and_stats():
+    """分类分组（缺省other）、标签集合（兼容空格分隔字符串）和统计一次算好"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "dictionary.json"
+        write_dictionary(path, ENTRIES)
+        snapshot = DictionaryStore(path, check_interval=60).snapshot()
+
+    assert {k: [e["term"] for e in v] for k, v in snapshot.by_category.items()} == \
+        {"Component": ["BTB连接器"], "Symptom": ["虚焊"], "other": ["示波器"]}
+    assert snapshot.tags == {"电气连接", "部件", "焊接", "工艺"}
+    assert snapshot.stats == {"total_entries": 3, "total_categories": 3, "total_tags": 4,
+                              "categories": {"Component": 1, "Symptom": 1, "Unknown": 1}}
+    print("✅ 快照预计算分组与统计")
+
+
+def test_views_built_once_per_snapshot():
+    """派生视图每个快照只构建一次（并发访问也只构建一次）"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "dictionary.json"
+        write_dictionary(path, ENTRIES)
+        snapshot = DictionaryStore(path, check_interval=60).snapshot()
+
+    builds = []
+
+    def builder(snap):
+        builds.append(1)
+        return [e["term"] for e in snap.entries]
+
+    threads = [threading.Thread(target=snapshot.view, args=("terms", builder)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert snapshot.view("terms", builder) == ["BTB连接器", "虚焊", "示波器"] and len(builds) == 1
+    print("✅ 派生视图按快照缓存")
+
+
+def test_reload_on_change_and_keep_old_on_error():
+    """文件变化后换成新快照（旧快照不受影响）；新内容无法解析时继续使用旧快照"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "dictionary.json"
+        write_dictionary(path, ENTRIES)
+        store = DictionaryStore(path, check_interval=0)
+        first = store.snapshot()
+        assert store.snapshot() is first and store.reloads == 1
+
+        write_dictionary(path, ENTRIES + [{"term": "翘曲", "category": "Symptom", "tags": []}])
+        os.utime(path, ns=(first.signature[0] + 10**9, first.signature[0] + 10**9))
+        second = store.snapshot()
+        assert second is not first and len(second) == 4 and len(first) == 3
+        assert second.etag != first.etag and store.reloads == 2
+
+        path.write_text('[{"term": "半截', encoding="utf-8")
+        assert store.snapshot() is second
+
+        path.unlink()
+        try:
+            store.snapshot()
+            assert False, "词典文件不存在时应抛出 FileNotFoundError"
+        except FileNotFoundError:
+            pass
+    print("✅ 文件变化后原子替换快照")
+
+
+def test_etag_matches():
+    """If-None-Match 支持多个值、弱校验前缀和 *"""
+    assert etag_matches('"abc"', "abc")
+    assert etag_matches('W/"abc"', "abc")
+    assert etag_matches('"x", "abc"', "abc")
+    assert etag_matches('*', "abc")
+    assert not etag_matches('"abd"', "abc")
+    assert not etag_matches(None, "abc")
+    print("✅ ETag匹配")
+
+
+if __name__ == "__main__":
+    test_snapshot_precomputes_groups_and_stats()
+    test_views_built_once_per_snapshot()
+    test_reload_on_change_and_keep_old_on_error()
+    test_etag_matches()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+测试近重复实体检测 - 中文名称相似度、LSH候选与两两比较一致、并查集传递、增量索引、词典近重复清除
+"""
+
+import sys
+import os
+import random
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'nlp'))
+
+from entity_dedup import NearDuplicateIndex, UnionFind, char_shingles, jaccard, find_clusters
+
+
+def test_chinese_name_similarity():
+    """按字符二元组比较：中文名、全半角与分隔符差异都能识别"""
+    assert jaccard(char_shingles("电池盖板变形"), char_shingles("电池盖板变形 ")) == 1.0
+    assert jaccard(char_shingles("ＢＴＢ连接器"), char_shingles("btb-连接器")) == 1.0
+    assert jaccard(char_shingles("摄像头模组"), char_shingles("摄像头模组异常")) >= 0.6
+    assert jaccard(char_shingles("摄像头"), char_shingles("扬声器")) == 0.0
+    print("✅ 中文名称相似度")
+
+
+def test_lsh_matches_pairwise():
+    """LSH候选 + Jaccard 校验得到的簇与两两比较后并查集的簇一致"""
+    rng = random.Random(3)
+    chars = "电池摄像头屏幕模组连接器盖板主板天线马达扬声器按键"
+    base = ["".join(rng.choice(chars) for _ in range(rng.randint(3, 8))) for _ in range(150)]
+    names = {}
+    for i, name in enumerate(base):
+        names[f"e{i}"] = name
+        if i % 3 == 0:
+            names[f"e{i}v"] = name + rng.choice(chars)
+
+    expected = UnionFind()
+    keys = list(names)
+    for i, a in enumerate(keys):
+        expected.add(a)
+        for b in keys[i + 1:]:
+            if jaccard(char_shingles(names[a]), char_shingles(names[b])) >= 0.8:
+                expected.union(a, b)
+    as_sets = lambda groups: sorted(sorted(g) for g in groups)
+    assert as_sets(find_clusters(names, threshold=0.8)) == as_sets(expected.groups(keys))
+    print("✅ LSH候选与两两比较一致")
+
+
+def test_incremental_index():
+    """增量加入：新实体只与索引比较，命中已有实体时返回并合簇；相似关系可传递"""
+    index = NearDuplicateIndex(threshold=0.7)
+    index.cluster({"a": "屏幕闪烁问题", "b": "电池鼓包"})
+    hits = index.add("c", "屏幕闪烁问题A")
+    assert [key for key, _ in hits] == ["a"]
+    assert index.root("c") == index.root("a") != index.root("b")
+    assert index.add("d", "电池鼓包") == [("b", 1.0)]
+    assert len(index) == 4
+    print("✅ 增量索引")
+
+
+def test_dictionary_near_duplicates():
+    """词典近重复只在同一分类内合组；阈值须在 (0, 1]；按相似度清除只允许 merge"""
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'api'))
+    from dictionary_manager import DictionaryManager, DictionaryEntry
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DictionaryManager(Path(tmp))
+        for term, category in [("摄像头模组", "Component"), ("摄像头模组A", "Component"),
+                               ("摄像头模组异常", "Symptom"), ("电池", "Component")]:
+            manager.add_entry(DictionaryEntry(term=term, aliases=[], category=category, tags=[], definition=""))
+
+        groups = manager.find_duplicates(similarity_threshold=0.6)
+        assert [sorted(e['main_term'] for e in g['entries']) for g in groups] == [["摄像头模组", "摄像头模组A"]]
+        assert groups[0]['match_type'] == 'similar'
+
+        for bad in (0, -0.5, 1.5):
+            try:
+                manager.find_duplicates(similarity_threshold=bad)
+                assert False, bad
+            except ValueError:
+                pass
+        try:
+            manager.remove_duplicates("keep_latest", similarity_threshold=0.6)
+            assert False
+        except ValueError:
+            pass
+        assert len(manager.entries) == 4
+
+        result = manager.remove_duplicates("merge", similarity_threshold=0.6)
+        assert result['entries_merged'] == 1 and len(manager.entries) == 3
+        merged = [e for e in manager.entries.values() if e.term == "摄像头模组"][0]
+        assert merged.aliases == ["摄像头模组A"]
+    print("✅ 词典近重复按分类合并")
+
+
+if __name__ == "__main__":
+    test_chinese_name_similarity()
+    test_lsh_matches_pairwise()
+    test_incremental_index()
+    test_dictionary_near_duplicates()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+测试知识图谱批量写入 - 按标签/关系类型分组、按batch_size分块、批次失败退回逐条写入、写入统计、key跨标签冲突
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'etl'))
+
+from knowledge_graph_builder import KnowledgeGraphBuilder
+from file_extractor import ExtractedEntity, ExtractedRelation
+
+
+class FakeResult:
+    def __init__(self, record):
+        self.record = record
+
+    def single(self):
+        return self.record
+
+
+class FakeTx:
+    def __init__(self, session):
+        self.session = session
+
+    def run(self, cypher, rows):
+        self.session.batches.append((cypher, list(rows)))
+        return FakeResult({'c': len(rows)})
+
+
+class FakeSession:
+    """execute_write 记录每个批次；fail_calls 中的第N次批量写入抛出异常；run 为逐条写入"""
+
+    def __init__(self, fail_calls=(), missing_keys=()):
+        self.fail_calls = set(fail_calls)
+        self.missing_keys = set(missing_keys)
+        self.write_calls = 0
+        self.batches = []
+        self.single_rows = []
+
+    def execute_write(self, work):
+        self.write_calls += 1
+        if self.write_calls in self.fail_calls:
+            raise RuntimeError("transaction failed")
+        return work(FakeTx(self))
+
+    def run(self, cypher, **params):
+        key = params.get('key') or params.get('source_key')
+        self.single_rows.append(key)
+        return FakeResult(None if key in self.missing_keys else {'e': key})
+
+
+def make_builder(batch_size):
+    builder = KnowledgeGraphBuilder(batch_size=batch_size)
+    builder.last_write_stats = {'mode': 'batch', 'batch_size': batch_size, 'batches': []}
+    return builder
+
+
+def entity(i, label, key=None):
+    return ExtractedEntity(id=f"e{i}", key=key or f"{label}:n{i}", name=f"n{i}", type=label.lower(),
+                           properties={'label': label}, source_file="a.xlsx", source_location=f"Row{i}")
+
+
+def test_entities_grouped_and_chunked():
+    """实体按标签组分组，每组按batch_size分块，每块一个事务；统计逐块记录"""
+    builder = make_builder(batch_size=2)
+    session = FakeSession()
+    entities = [entity(i, 'Component') for i in range(5)] + [entity(10, 'Product')]
+
+    assert builder._create_entities_batch(session, entities) == 6
+    assert [len(rows) for _, rows in session.batches] == [2, 2, 1, 1]
+    assert all('MERGE (e:Entity:Component' in cypher for cypher, _ in session.batches[:3])
+    assert 'MERGE (e:Entity:Product' in session.batches[3][0]
+
+    stats = builder.last_write_stats['batches']
+    assert [(s['kind'], s['group'], s['rows'], s['written']) for s in stats] == [
+        ('node', 'Entity:Component', 2, 2), ('node', 'Entity:Component', 2, 2),
+        ('node', 'Entity:Component', 1, 1), ('node', 'Entity:Product', 1, 1)]
+    assert all(s['seconds'] >= 0 for s in stats)
+    assert builder.last_write_stats['key_collisions'] == 0
+    assert session.single_rows == []
+    print("✅ 实体分组分块写入")
+
+
+def test_failed_batch_falls_back_to_single_rows():
+    """批次事务失败时只对该批逐条写入，写入数按逐条结果统计"""
+    builder = make_builder(batch_size=2)
+    session = FakeSession(fail_calls={2}, missing_keys={'Component:n3'})
+    entities = [entity(i, 'Component') for i in range(5)]
+
+    assert builder._create_entities_batch(session, entities) == 4
+    assert session.single_rows == ['Component:n2', 'Component:n3']
+    assert [s['written'] for s in builder.last_write_stats['batches']] == [2, 1, 1]
+    print("✅ 批次失败退回逐条写入")
+
+
+def test_key_collision_across_labels_skipped():
+    """同一key出现在不同标签组时只写入先出现的一组，不让整批违反entity_key约束"""
+    builder = make_builder(batch_size=10)
+    session = FakeSession()
+    entities = [entity(1, 'Component', key='X:1'), entity(2, 'Symptom', key='X:1'), entity(3, 'Symptom')]
+
+    assert builder._create_entities_batch(session, entities) == 2
+    written = {cypher.split('{')[0].split('(e:')[1]: [r['key'] for r in rows] for cypher, rows in session.batches}
+    assert written == {'Entity:Component ': ['X:1'], 'Entity:Symptom ': ['Symptom:n3']}
+    assert builder.last_write_stats['key_collisions'] == 1
+    print("✅ key跨标签冲突跳过")
+
+
+def test_relationships_grouped_by_type():
+    """关系按标准化后的类型分组分块，端点缺失的关系跳过；失败批次逐条写入"""
+    builder = make_builder(batch_size=2)
+    session = FakeSession(fail_calls={1})
+    id_to_key = {f"e{i}": f"Component:n{i}" for i in range(4)}
+    relations = [
+        ExtractedRelation("e0", "e1", "contains", {}, "a.xlsx", 0.9),
+        ExtractedRelation("e1", "e2", "includes", {}, "a.xlsx"),
+        ExtractedRelation("e2", "e3", "CONTAINS", {}, "a.xlsx"),
+        ExtractedRelation("e0", "e3", "causes", {}, "a.xlsx"),
+        ExtractedRelation("e0", "missing", "causes", {}, "a.xlsx"),
+    ]
+
+    assert builder._create_relationships_batch(session, relations, id_to_key) == 4
+    stats = [(s['kind'], s['group'], s['rows'], s['written']) for s in builder.last_write_stats['batches']]
+    assert stats == [('relationship', 'INCLUDES', 2, 2), ('relationship', 'INCLUDES', 1, 1),
+                     ('relationship', 'CAUSES', 1, 1)]
+    assert session.single_rows == ['Component:n0', 'Component:n1']
+    assert 'MERGE (source)-[r:CAUSES]->(target)' in session.batches[-1][0]
+    assert [row['source_key'] for row in session.batches[0][1]] == ['Component:n2']
+    print("✅ 关系按类型分组写入")
+
+
+def test_entity_key_constraint_skipped_on_duplicates():
+    """库中已有重复key时不创建entity_key约束，无重复时创建"""
+    class SchemaSession:
+        def __init__(self, duplicates):
+            self.duplicates = duplicates
+            self.queries = []
+
+        def run(self, query):
+            self.queries.append(query)
+            return FakeResult({'duplicates': self.duplicates, 'samples': ['Component:A'][:self.duplicates]})
+
+    builder = KnowledgeGraphBuilder()
+    session = SchemaSession(duplicates=1)
+    assert builder._ensure_entity_key_constraint(session) is False
+    assert not any('CREATE CONSTRAINT' in q for q in session.queries)
+
+    session = SchemaSession(duplicates=0)
+    assert builder._ensure_entity_key_constraint(session) is True
+    assert 'CREATE CONSTRAINT entity_key' in session.queries[-1]
+    print("✅ entity_key约束重复检查")
+
+
+if __name__ == "__main__":
+    test_entities_grouped_and_chunked()
+    test_failed_batch_falls_back_to_single_rows()
+    test_key_collision_across_labels_skipped()
+    test_relationships_grouped_by_type()
+    test_entity_key_constraint_skipped_on_duplicates()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+测试图谱统计快照 - 一次刷新只发一条查询、按标签/关系类型取总数、其他进程写入（写版本号变化）后后台刷新
+"""
+
+import sys
+import os
+import asyncio
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'api'))
+
+from services.graph_stats_service import GraphStatsService
+
+
+class FakeGraph:
+    """返回固定聚合结果的图数据库，记录查询次数"""
+
+    def __init__(self):
+        self.queries = 0
+        self.terms = 2
+
+    async def fetch_data(self, query, parameters=None):
+        self.queries += 1
+        return [{
+            'label_rows': [
+                {'labels': ['Term'], 'count': self.terms},
+                {'labels': ['Dictionary', 'Term'], 'count': 3},
+                {'labels': ['Category'], 'count': 1},
+            ],
+            'rel_rows': [{'type': 'BELONGS_TO', 'count': 4}, {'type': 'HAS_TAG', 'count': 6}],
+            'term_categories': [{'category': '症状', 'count': 5}],
+            'dictionary_rows': [
+                {'category': '症状', 'total': 2, 'missing_desc': 1, 'missing_tags': 0, 'missing_aliases': 2},
+                {'category': None, 'total': 1, 'missing_desc': 1, 'missing_tags': 1, 'missing_aliases': 1},
+            ],
+            'top_tags': [{'tag': '显示', 'count': 2}],
+        }]
+
+
+def test_single_query_snapshot():
+    """一次刷新只发一条查询，快照字段与分项查询时一致"""
+    async def scenario():
+        graph = FakeGraph()
+        service = GraphStatsService(graph, refresh_interval=60)
+        snapshot = await service.refresh(force=True)
+        assert graph.queries == 1
+        assert snapshot.total_nodes == 6 and snapshot.total_relations == 10
+        assert snapshot.primary_label_counts == {'Dictionary': 3, 'Term': 2, 'Category': 1}
+        assert snapshot.label_counts == {'Term': 5, 'Dictionary': 3, 'Category': 1}
+        assert snapshot.dictionary['total'] == 3 and snapshot.dictionary['missing_desc'] == 2
+        assert snapshot.dictionary['categories'] == {'症状': 2, 'Unknown': 1}
+        assert snapshot.dictionary['top_tags'] == {'显示': 2}
+
+    asyncio.run(scenario())
+    print("✅ 统计快照单条查询")
+
+
+def test_graph_data_counts():
+    """/kg/graph-data 的总数与分类统计：多标签节点只计一次，分类按首标签，关系按类型过滤"""
+    async def scenario():
+        snapshot = await GraphStatsService(FakeGraph(), refresh_interval=60).refresh(force=True)
+        assert snapshot.label_set_counts == {('Term',): 2, ('Dictionary', 'Term'): 3, ('Category',): 1}
+        assert snapshot.count_any(['Term', 'Dictionary']) == 5
+        assert snapshot.count_any(['Term', 'Category', 'Tag']) == 6
+        assert snapshot.primary_counts(['Term', 'Category']) == {'Dictionary': 3, 'Term': 2, 'Category': 1}
+        assert snapshot.primary_counts(['Category']) == {'Category': 1}
+        assert snapshot.relation_count() == 10
+        assert snapshot.relation_count(['HAS_TAG', 'CAUSES']) == 6
+
+    asyncio.run(scenario())
+    print("✅ 图谱数据统计取自快照")
+
+
+def test_refresh_after_external_write():
+    """写版本号变化后后台刷新；版本号不变时不刷新"""
+    async def scenario():
+        graph = FakeGraph()
+        token = {'value': '1'}
+
+        async def change_token():
+            return token['value']
+
+        service = GraphStatsService(graph, refresh_interval=60, min_refresh_gap=0,
+                                    change_token=change_token, change_poll_interval=0.02)
+        await service.refresh(force=True)
+        service.start()
+        try:
+            await asyncio.sleep(0.1)
+            assert graph.queries == 1
+
+            graph.terms = 10
+            token['value'] = '2'
+            await asyncio.sleep(0.1)
+            assert graph.queries == 2
+            assert service.snapshot.total_nodes == 14
+        finally:
+            await service.stop()
+
+    asyncio.run(scenario())
+    print("✅ 其他进程写入后刷新统计")
+
+
+if __name__ == "__main__":
+    test_single_query_snapshot()
+    test_graph_data_counts()
+    test_refresh_after_external_write()
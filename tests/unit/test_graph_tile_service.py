@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+测试图谱分层浏览索引 - 社区划分、下钻分页与游标校验
+"""
+
+import sys
+import os
+import asyncio
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'api'))
+
+from services.graph_tile_service import (
+    GraphTileService, CursorError, build_tile_index, encode_cursor, decode_cursor
+)
+
+
+def make_graph():
+    """两个稠密社区 + 一个连接所有节点的枢纽标签"""
+    nodes = [{'id': f'n{i}', 'label': 'Term', 'name': f'术语{i}', 'description': ''} for i in range(20)]
+    nodes.append({'id': 'hub', 'label': 'Tag', 'name': '枢纽', 'description': ''})
+    edges = []
+    for group in (range(0, 10), range(10, 20)):
+        members = list(group)
+        for a in members:
+            for b in members:
+                if a < b:
+                    edges.append({'source': f'n{a}', 'target': f'n{b}', 'type': 'RELATED_TO', 'confidence': 0.9})
+    edges += [{'source': f'n{i}', 'target': 'hub', 'type': 'HAS_TAG', 'confidence': 1.0} for i in range(20)]
+    edges.append({'source': 'n0', 'target': 'n10', 'type': 'RELATED_TO', 'confidence': 0.5})
+    return nodes, edges
+
+
+class FakeGraphDB:
+    def __init__(self, nodes, edges):
+        self.nodes, self.edges = nodes, edges
+
+    async def fetch_data(self, query, parameters=None, **kwargs):
+        return self.nodes if 'labels(n)[0]' in query else self.edges
+
+
+def test_clusters_split_by_community():
+    """枢纽节点不应把两个社区合并"""
+    nodes, edges = make_graph()
+    index = build_tile_index(1, nodes, edges)
+    cluster_a = index.nodes['n1']['cluster']
+    cluster_b = index.nodes['n11']['cluster']
+    assert cluster_a != cluster_b
+    assert all(index.nodes[f'n{i}']['cluster'] == cluster_a for i in range(10))
+    assert sum(c['size'] for c in index.clusters.values()) == len(nodes)
+    print(f"✅ 社区划分: {[(c['id'], c['size']) for c in index.clusters.values()]}")
+
+
+def test_cluster_pagination_covers_all_edges():
+    """逐页下钻返回的节点和内部关系不重复、不遗漏"""
+    nodes, edges = make_graph()
+    service = GraphTileService(FakeGraphDB(nodes, edges))
+
+    async def run():
+        overview = await service.get_overview()
+        cluster = overview['clusters'][0]
+        seen, relations, cursor = [], [], None
+        while True:
+            page = await service.get_cluster(cluster['id'], cursor=cursor, limit=3)
+            seen += [n['id'] for n in page['nodes']]
+            relations += page['relations']
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        assert len(seen) == len(set(seen)) == cluster['size']
+        assert len(relations) == cluster['internal_relations']
+        print(f"✅ 下钻分页: {len(seen)} 节点, {len(relations)} 关系")
+
+    asyncio.run(run())
+
+
+def test_neighbors_and_cursor():
+    """邻居分页与过期游标"""
+    nodes, edges = make_graph()
+    service = GraphTileService(FakeGraphDB(nodes, edges))
+
+    async def run():
+        first = await service.get_neighbors('hub', limit=15)
+        second = await service.get_neighbors('hub', cursor=first['next_cursor'], limit=15)
+        assert first['total'] == 20
+        assert len(first['nodes']) + len(second['nodes']) == 20
+        assert second['next_cursor'] is None
+        assert await service.get_neighbors('missing') is None
+        print("✅ 邻居分页正常")
+
+    asyncio.run(run())
+
+    assert decode_cursor(encode_cursor(3, 40), 3) == 40
+    try:
+        decode_cursor(encode_cursor(2, 40), 3)
+        assert False, "过期游标应报错"
+    except CursorError:
+        print("✅ 过期游标被拒绝")
+
+
+if __name__ == "__main__":
+    test_clusters_split_by_community()
+    test_cluster_pagination_covers_all_edges()
+    test_neighbors_and_cursor()
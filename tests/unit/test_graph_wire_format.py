@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+测试图谱紧凑传输格式 - 列式编码往返无损（含额外字段）、丢弃关系计数、msgpack/gzip协商、NDJSON事件顺序
+"""
+
+import sys
+import os
+import gzip
+import json
+import asyncio
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'api'))
+
+from services import graph_wire_format as wire
+from services.graph_wire_format import to_compact_graph, from_compact_graph, negotiated_response, iter_graph_ndjson
+
+
+NODES = [
+    {"id": "n1", "name": "电池", "category": "Component", "description": "锂电池", "degree": 2},
+    {"id": "n2", "name": "鼓包", "category": "Symptom", "description": ""},
+    {"id": "n3", "name": "电池", "category": "Component", "description": "备用电池", "degree": 1},
+]
+LINKS = [
+    {"source": "n1", "target": "n2", "type": "CAUSES", "confidence": 0.9, "inferred": False,
+     "common_count": None, "common_tags": None},
+    {"source": "n3", "target": "n2", "type": "RELATED_TO", "confidence": 0.5, "inferred": True,
+     "common_count": 3, "common_tags": ["显示", "屏幕"]},
+    {"source": "n1", "target": "missing", "type": "CAUSES", "confidence": 0.8, "inferred": False,
+     "common_count": None, "common_tags": None},
+]
+
+
+class FakeRequest:
+    def __init__(self, **headers):
+        self.headers = {k.replace('_', '-'): v for k, v in headers.items()}
+
+
+def test_compact_round_trip():
+    """固定列以外的字段进入extra列，往返后与原数据一致；端点缺失的关系计入dropped_links"""
+    compact = to_compact_graph(NODES, LINKS)
+    assert compact["v"] == wire.COMPACT_FORMAT_VERSION
+    assert compact["strings"].count("电池") == 1
+    assert compact["dropped_links"] == 1
+    assert compact["links"]["extra"]["common_tags"] == [None, ["显示", "屏幕"]]
+
+    decoded = from_compact_graph(json.loads(json.dumps(compact)))
+    assert decoded["nodes"] == [dict(node, degree=node.get("degree")) for node in NODES]
+    assert decoded["links"] == LINKS[:2]
+    print("✅ 紧凑格式往返无损")
+
+
+def test_negotiated_response():
+    """Accept含msgpack且已安装时返回msgpack，否则JSON；Accept-Encoding含gzip且响应较大时压缩"""
+    payload = {"data": {"graph": to_compact_graph(NODES * 40, LINKS)}}
+
+    response = negotiated_response(payload, FakeRequest(accept="application/json"))
+    assert response.media_type == "application/json" and "Content-Encoding" not in response.headers
+    assert json.loads(response.body) == payload
+
+    response = negotiated_response(payload, FakeRequest(accept="application/json", accept_encoding="gzip, br"))
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(response.body)) == payload
+
+    small = negotiated_response({"ok": True}, FakeRequest(accept_encoding="gzip"))
+    assert "Content-Encoding" not in small.headers and json.loads(small.body) == {"ok": True}
+
+    response = negotiated_response(payload, FakeRequest(accept=wire.MSGPACK_MEDIA_TYPE))
+    if wire.MSGPACK_AVAILABLE:
+        assert response.media_type == wire.MSGPACK_MEDIA_TYPE
+        assert wire.msgpack.unpackb(response.body, raw=False) == payload
+    else:
+        assert response.media_type == "application/json"
+    assert response.headers["Vary"] == "Accept, Accept-Encoding"
+    print("✅ msgpack/gzip协商")
+
+
+def ndjson_events(rows):
+    async def collect():
+        lines = []
+        async for line in iter_graph_ndjson(
+            {"limit": 10}, rows(),
+            lambda row: [(row["s"], {"id": row["s"]}), (row["t"], {"id": row["t"]})],
+            lambda row: {"source": row["s"], "target": row["t"]},
+        ):
+            lines.append(json.loads(line))
+        return lines
+    return asyncio.run(collect())
+
+
+def test_ndjson_event_order():
+    """meta → 节点首次出现时node → link → done；中途出错输出error且不再输出done"""
+    async def rows():
+        for s, t in (("a", "b"), ("b", "c"), ("a", "c")):
+            yield {"s": s, "t": t}
+
+    events = ndjson_events(rows)
+    assert [(e["type"], e.get("id") or e.get("source")) for e in events] == [
+        ("meta", None), ("node", "a"), ("node", "b"), ("link", "a"), ("node", "c"), ("link", "b"),
+        ("link", "a"), ("done", None)]
+    assert events[0]["limit"] == 10 and events[-1] == {"type": "done", "nodes": 3, "links": 3}
+
+    async def failing_rows():
+        yield {"s": "a", "t": "b"}
+        raise ConnectionError("cursor lost")
+
+    events = ndjson_events(failing_rows)
+    assert [e["type"] for e in events] == ["meta", "node", "node", "link", "error"]
+    assert events[-1]["message"] == "cursor lost"
+    print("✅ NDJSON事件顺序")
+
+
+if __name__ == "__main__":
+    test_compact_round_trip()
+    test_negotiated_response()
+    test_ndjson_event_order()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+测试IR流式读写 - JSON Lines写出、按页索引读取、按类型扫描、PDF解析结果写成IR流、多页PDF逐页释放缓存
+"""
+
+import sys
+import os
+import json
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'api'))
+
+from parsers.ir_core import DocumentIR, BlockType, create_paragraph_block, create_table_block, create_figure_block
+from parsers.ir_stream import IRStreamWriter, IRStreamReader
+from parsers.ir_unified_parser import IRUnifiedParser
+
+
+def build_pdf(path: Path, pages: int):
+    """生成每页两行文本的最小PDF"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for i in range(pages):
+        stream = (f"BT /F1 14 Tf 72 720 Td (Page {i + 1} screen flicker analysis) Tj ET\n"
+                  f"BT /F1 14 Tf 72 600 Td (Root cause connector solder joint) Tj ET")
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+
+    body = b"%PDF-1.4\n"
+    offsets = []
+    for num, obj in enumerate(objects, 1):
+        offsets.append(len(body))
+        body += f"{num} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(body)
+    body += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    body += "".join(f"{off:010d} 00000 n \n" for off in offsets).encode()
+    body += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(body)
+
+
+def sample_document() -> DocumentIR:
+    blocks = []
+    for page in range(1, 6):
+        blocks.append(create_paragraph_block(f"text_{len(blocks) + 1}", page, f"第{page}页 电池鼓包"))
+        blocks.append(create_table_block(f"table_{len(blocks) + 1}", page, [["组件", "症状"], ["电池", "鼓包"]]))
+    # 第2页的图片在最后写出，该页形成两个不连续的区间
+    blocks.append(create_figure_block(f"figure_{len(blocks) + 1}", 2, "a.png", ocr_text="流程图", confidence=0.8))
+    return DocumentIR(meta={"file_id": "doc", "type": "pptx", "pages": 5}, blocks=blocks)
+
+
+def test_roundtrip_and_page_index():
+    """写出后按页/按类型读取结果与内存中的DocumentIR一致"""
+    document = sample_document()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "doc.ir.jsonl"
+        document.save_stream(path)
+
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert len(lines) == len(document.blocks) + 2 and json.loads(lines[0])["kind"] == "header"
+
+        reader = IRStreamReader(path)
+        assert reader.block_count == 11 and reader.pages == [1, 2, 3, 4, 5]
+        assert len(reader.page_index[2]) == 2
+        for page in range(1, 6):
+            assert [b.to_dict() for b in reader.get_blocks_by_page(page)] == \
+                   [b.to_dict() for b in document.get_blocks_by_page(page)]
+        assert reader.get_blocks_by_page(9) == []
+        figures = list(reader.get_blocks_by_type(BlockType.FIGURE))
+        assert len(figures) == 1 and figures[0].ocr_text == "流程图"
+        assert len(list(reader.get_blocks_by_type(BlockType.TABLE))) == 5
+
+        stats = reader.get_statistics()
+        assert stats["paragraphs"] == 5 and stats["page_blocks"][2] == 3
+        assert DocumentIR.load(path).to_dict() == document.to_dict()
+    print("✅ IR流写出/按页读取/按类型读取一致")
+
+
+def test_incomplete_stream_rejected():
+    """写入过程中异常时不留下半个文件；缺少footer的文件拒绝读取"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "broken.ir.jsonl"
+        try:
+            with IRStreamWriter(path, {"pages": 1}) as writer:
+                writer.write_block(create_paragraph_block("text_1", 1, "内容"))
+                raise RuntimeError("解析中断")
+        except RuntimeError:
+            pass
+        assert not path.exists() and list(Path(tmp).iterdir()) == []
+
+        path.write_text('{"kind":"header","format":"kg-ir-stream","version":1,"meta":{}}\n'
+                        '{"id":"text_1","type":"paragraph","page":1,"text":"x"}\n', encoding="utf-8")
+        try:
+            IRStreamReader(path)
+            raise AssertionError("应当拒绝缺少footer的文件")
+        except ValueError:
+            pass
+    print("✅ 不完整的IR流不会被读取")
+
+
+def test_pdf_ir_saved_as_stream():
+    """PDF解析结果写成IR流后与内存结果一致，可按页读取"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        pdf = tmp / "report.pdf"
+        build_pdf(pdf, 12)
+        document = IRUnifiedParser(use_ocr=False, workers=1)._parse_pdf(pdf, tmp)
+        path = tmp / "report.ir.jsonl"
+        document.save_stream(path)
+        reader = IRStreamReader(path)
+        assert [b.to_dict() for b in reader.iter_blocks()] == [b.to_dict() for b in document.blocks]
+        assert reader.meta["pages"] == 12
+        assert "Page 7 screen" in reader.get_blocks_by_page(7)[0].text
+    print("✅ PDF解析结果写成IR流后按页读取")
+
+
+def test_multipage_pdf_without_page_close():
+    """多页PDF在没有 Page.close() 的 pdfplumber（0.9.0）上也能解析：逐页释放用 flush_cache()"""
+    from pdfplumber.page import Page
+    from parsers.enhanced_document_parser import EnhancedDocumentParser, iter_pdf_pages
+    from parsers.upload_parser import extract_raw_content
+
+    close = Page.__dict__.get("close")
+
+    def pdfplumber_only_close(page):
+        # 新版 PDF.close() 内部会调用 Page.close()；解析代码直接调用时按 0.9.0 的行为报错
+        if not sys._getframe(1).f_globals.get("__name__", "").startswith("pdfplumber"):
+            raise AttributeError("'Page' object has no attribute 'close'")
+        if close is not None:
+            close(page)
+
+    Page.close = pdfplumber_only_close
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf = Path(tmp) / "two_pages.pdf"
+            build_pdf(pdf, 2)
+
+            pages = list(iter_pdf_pages(str(pdf)))
+            assert [page for page, _, _ in pages] == [1, 2]
+            assert all(records for _, records, _ in pages)
+
+            result = EnhancedDocumentParser().parse_pdf_enhanced(pdf)
+            assert result["metadata"]["total_pages"] == 2
+            assert {row["page_number"] for row in result["raw_data"]} == {1, 2}
+
+            raw_content = extract_raw_content(pdf, lambda *args, **kwargs: None)
+            assert not [item for item in raw_content if item.get("type") == "错误"]
+            assert {item["page_number"] for item in raw_content} == {1, 2}
+    finally:
+        if close is not None:
+            Page.close = close
+        else:
+            del Page.close
+    print("✅ 多页PDF逐页解析并释放缓存")
+
+
+if __name__ == "__main__":
+    test_roundtrip_and_page_index()
+    test_incomplete_stream_rejected()
+    test_pdf_ir_saved_as_stream()
+    test_multipage_pdf_without_page_close()
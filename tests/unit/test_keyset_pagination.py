@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+测试游标（keyset）分页 - 游标编解码、多取一行判断下一页、按游标逐页遍历不重不漏、name为空的行排在最后
+"""
+
+import sys
+import os
+import asyncio
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'api'))
+
+from services.keyset_pagination import (encode_cursor, decode_cursor, split_page, clamp_page_size,
+                                        cypher_identifier, fetch_dictionary_page, dictionary_cursor,
+                                        fetch_keyset_page, KEYSET_CURSOR_FIELDS, DICTIONARY_QUERIES,
+                                        DICTIONARY_OFFSET_PAGE_QUERY, label_page_queries,
+                                        relation_page_queries, element_cursor, RELATION_PAGE_KEY)
+from services.cursors import CursorError, pack_cursor
+
+
+def sort_key(row):
+    """与 ORDER BY name, elementId 一致：name 为空的行排在最后"""
+    return (row["term"] is None, row["term"] or "", row["id"])
+
+
+class FakeDictionary:
+    """按词典分页查询的语义在内存中执行：游标条件 → 过滤 → 排序 → SKIP/LIMIT"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    async def fetch(self, query, params):
+        self.queries.append(query)
+        key, eid = params.get("after_key"), params.get("after_id")
+        if query is DICTIONARY_QUERIES.first:
+            cond = lambda r: r["term"] is not None
+        elif query is DICTIONARY_QUERIES.after:
+            cond = lambda r: r["term"] is not None and (r["term"], r["id"]) > (key, eid)
+        elif query is DICTIONARY_QUERIES.nulls:
+            cond = lambda r: r["term"] is None and (eid is None or r["id"] > eid)
+        else:
+            assert query is DICTIONARY_OFFSET_PAGE_QUERY
+            cond = lambda r: True
+        selected = sorted((r for r in self.rows if cond(r)
+                           and (params["category"] is None or r["category"] == params["category"])), key=sort_key)
+        return selected[params["skip"]:params["skip"] + params["limit"]]
+
+
+ROWS = [{"term": f"词{i % 7}" if i % 5 else None, "id": f"4:x:{i:03d}",
+         "category": "Symptom" if i % 3 else "Tool"} for i in range(40)]
+
+
+def test_cursor_roundtrip():
+    """游标可往返编解码，格式错误、旧版本或缺字段时报 CursorError"""
+    cursor = encode_cursor({"key": "电池", "id": "4:abc:12"})
+    assert "=" not in cursor and "电池" not in cursor
+    assert decode_cursor(cursor, KEYSET_CURSOR_FIELDS) == {"key": "电池", "id": "4:abc:12"}
+    assert decode_cursor(encode_cursor({"key": None, "id": "1"}), KEYSET_CURSOR_FIELDS)["key"] is None
+    assert decode_cursor(None, KEYSET_CURSOR_FIELDS) is None
+    old_version = pack_cursor({"v": 1, "name": "a", "id": "1"})
+    for bad in ["!!!", encode_cursor({"key": "x"}), "e30", "WzFd", old_version]:
+        try:
+            decode_cursor(bad, KEYSET_CURSOR_FIELDS)
+            assert False, bad
+        except CursorError:
+            pass
+    assert clamp_page_size(0) == 1 and clamp_page_size(10 ** 6) == 1000
+    print("✅ 游标编解码")
+
+
+def walk(fake, category, page_size):
+    seen, cursor, pages = [], None, 0
+    while True:
+        after = decode_cursor(cursor, KEYSET_CURSOR_FIELDS)
+        result = asyncio.run(fetch_dictionary_page(fake.fetch, None, category, after, 0, page_size))
+        page, cursor = split_page(result, page_size, dictionary_cursor)
+        seen.extend(page)
+        pages += 1
+        if cursor is None:
+            return seen, pages
+
+
+def test_walk_all_pages():
+    """按 next_cursor 逐页遍历：同名词条不重不漏，name 为空的词条排在最后也能翻到"""
+    for category, page_size in (("Symptom", 6), (None, 4), ("Tool", 100)):
+        fake = FakeDictionary(ROWS)
+        expected = sorted((r for r in ROWS if category is None or r["category"] == category), key=sort_key)
+        seen, pages = walk(fake, category, page_size)
+        assert seen == expected, category
+        assert pages == (len(expected) + page_size - 1) // page_size
+        assert any(r["term"] is None for r in seen)
+    print("✅ 游标逐页遍历（含 name 为空的词条）")
+
+
+def test_null_phase_queries():
+    """有名称的行足够一页时不查 name 为空的行；不足时补足；游标 key 为空时只查空值段"""
+    fake = FakeDictionary(ROWS)
+    rows = asyncio.run(fetch_dictionary_page(fake.fetch, None, None, None, 0, 5))
+    assert len(rows) == 6 and fake.queries == [DICTIONARY_QUERIES.first]
+
+    fake = FakeDictionary(ROWS)
+    last_named = sorted((r for r in ROWS if r["term"]), key=sort_key)[-2]
+    after = {"key": last_named["term"], "id": last_named["id"]}
+    rows = asyncio.run(fetch_dictionary_page(fake.fetch, None, None, after, 0, 5))
+    assert fake.queries == [DICTIONARY_QUERIES.after, DICTIONARY_QUERIES.nulls]
+    assert rows[0]["term"] is not None and all(r["term"] is None for r in rows[1:]) and len(rows) == 6
+
+    fake = FakeDictionary(ROWS)
+    asyncio.run(fetch_dictionary_page(fake.fetch, None, None, {"key": None, "id": "4:x:010"}, 0, 5))
+    assert fake.queries == [DICTIONARY_QUERIES.nulls]
+    print("✅ 空值段查询")
+
+
+def test_offset_fallback_and_queries():
+    """未传游标且有偏移时按 SKIP 分页；后续页的游标条件是单独的范围谓词（可走索引）"""
+    fake = FakeDictionary(ROWS)
+    rows = asyncio.run(fetch_dictionary_page(fake.fetch, "", None, None, 36, 10))
+    assert fake.queries == [DICTIONARY_OFFSET_PAGE_QUERY] and rows == sorted(ROWS, key=sort_key)[36:]
+
+    assert "t.name >= $after_key" in DICTIONARY_QUERIES.after
+    assert "$after_key IS NULL" not in DICTIONARY_QUERIES.after
+    assert "t.name IS NOT NULL" in DICTIONARY_QUERIES.first and "t.name IS NULL" in DICTIONARY_QUERIES.nulls
+
+    labels = label_page_queries("Component")
+    assert "MATCH (n:`Component`)" in labels.after and "n.name >= $after_key" in labels.after
+    relations = relation_page_queries("CAUSES")
+    assert f"ORDER BY r.{RELATION_PAGE_KEY}, elementId(r)" in relations.first
+    assert element_cursor(RELATION_PAGE_KEY)({"id": "5:r:1", "properties": {"source_hash": "ab"}}) == {
+        "key": "ab", "id": "5:r:1"}
+    assert element_cursor("name")({"id": "4:n:1", "properties": {}}) == {"key": None, "id": "4:n:1"}
+
+    assert cypher_identifier("HAS_TAG") == "`HAS_TAG`"
+    for bad in ["", "Term`) DETACH DELETE n //", "a b"]:
+        try:
+            label_page_queries(bad)
+            assert False, bad
+        except ValueError:
+            pass
+    print("✅ 偏移兼容与查询结构")
+
+
+def test_element_pages_walk():
+    """按标签列节点：fetch_keyset_page 逐页遍历，无 name 的节点按 elementId 排在最后"""
+    nodes = [{"id": f"4:n:{i:02d}", "properties": {"name": f"n{i % 4}"} if i % 3 else {}} for i in range(20)]
+    queries = label_page_queries("Component")
+    key = lambda r: r["properties"].get("name")
+
+    async def fetch(query, params):
+        if query is queries.first:
+            selected = [r for r in nodes if key(r) is not None]
+        elif query is queries.after:
+            selected = [r for r in nodes if key(r) is not None and (key(r), r["id"]) > (params["after_key"],
+                                                                                        params["after_id"])]
+        else:
+            selected = [r for r in nodes if key(r) is None
+                        and (params["after_id"] is None or r["id"] > params["after_id"])]
+        return sorted(selected, key=lambda r: (key(r) is None, key(r) or "", r["id"]))[:params["limit"]]
+
+    seen, cursor = [], None
+    while True:
+        after = decode_cursor(cursor, KEYSET_CURSOR_FIELDS)
+        page, cursor = split_page(asyncio.run(fetch_keyset_page(fetch, queries, {}, after, 3)), 3,
+                                  element_cursor("name"))
+        seen.extend(page)
+        if cursor is None:
+            break
+    assert [r["id"] for r in seen] == [r["id"] for r in sorted(
+        nodes, key=lambda r: (key(r) is None, key(r) or "", r["id"]))]
+    print("✅ 按标签逐页遍历")
+
+
+if __name__ == "__main__":
+    test_cursor_roundtrip()
+    test_walk_all_pages()
+    test_null_phase_queries()
+    test_offset_fallback_and_queries()
+    test_element_pages_walk()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+测试内存缓存 - LRU淘汰顺序、TTL主动过期、字节预算、命名空间统计
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'api'))
+
+from cache_service import MemoryCache, estimate_size
+
+
+def test_lru_eviction_order():
+    """命中的键移到最近使用，淘汰最久未访问的键（与命中次数无关）"""
+    cache = MemoryCache(max_size=3, max_bytes=0)
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+    for _ in range(5):
+        cache.get("a")
+    cache.get("b")
+    cache.set("c", "c2")         # 覆盖写入也算最近使用
+    cache.get("a")
+    cache.set("d", "d")
+    assert cache.keys() == ["c", "a", "d"]
+    assert cache.get("b") is None and cache.get_stats()["evictions"] == 1
+    print("✅ LRU淘汰顺序正确")
+
+
+def test_ttl_expiry_is_proactive():
+    """过期项在任意读写时从堆顶清理，不需要被再次访问"""
+    cache = MemoryCache(max_size=100, max_bytes=0)
+    cache.set("graph:short", {"nodes": [1, 2, 3]}, ttl=0.05)
+    cache.set("graph:long", {"nodes": [1]}, ttl=60)
+    cache.set("graph:refreshed", "v1", ttl=0.05)
+    cache.set("graph:refreshed", "v2", ttl=60)
+    time.sleep(0.08)
+    cache.set("other:x", 1)
+    stats = cache.get_stats()
+    assert cache.keys() == ["graph:long", "graph:refreshed", "other:x"]
+    assert stats["expirations"] == 1 and stats["bytes"] == sum(
+        estimate_size(v) for v in ({"nodes": [1]}, "v2", 1))
+    assert cache.get("graph:refreshed") == "v2"
+    print("✅ TTL过期项主动清理")
+
+
+def test_byte_budget_and_namespaces():
+    """超过字节预算时按LRU淘汰；超大值不缓存；按命名空间统计"""
+    payload = {"edges": [{"s": i, "t": i + 1} for i in range(200)]}
+    size = estimate_size(payload)
+    cache = MemoryCache(max_size=1000, max_bytes=size * 3 + 5)
+    for i in range(5):
+        cache.set(f"graph:{i}", payload)
+    cache.set("stats:x", {"n": 1})
+    assert cache.get_stats()["bytes"] <= cache.max_bytes
+    assert cache.keys() == ["graph:3", "graph:4", "stats:x"]
+    assert cache.set("graph:huge", {"edges": [payload] * 5}) is False
+    assert cache.get_stats()["rejected"] == 1
+
+    cache.get("graph:3")
+    cache.get("graph:0")
+    cache.get("stats:x")
+    namespaces = cache.get_stats()["namespaces"]
+    assert namespaces["graph"]["entries"] == 2 and namespaces["graph"]["bytes"] == 2 * size
+    assert namespaces["graph"]["hits"] == 1 and namespaces["graph"]["misses"] == 1
+    assert namespaces["graph"]["evictions"] == 3 and namespaces["stats"]["hit_rate"] == 1
+    cache.clear()
+    assert cache.get_stats()["bytes"] == 0 and cache.get_stats()["namespaces"]["graph"]["entries"] == 0
+    print("✅ 字节预算与命名空间统计正确")
+
+
+if __name__ == "__main__":
+    test_lru_eviction_order()
+    test_ttl_expiry_is_proactive()
+    test_byte_budget_and_namespaces()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+测试Neo4j共享驱动的连接池统计 - 会话借出/归还计数、峰值、失败计数、会话占用率
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'api'))
+
+from database.neo4j_manager import Neo4jPoolConfig, PooledDriver
+
+
+class FakeSession:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeDriver:
+    """记录创建的会话；fail=True时创建会话抛出异常"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.sessions = []
+
+    def session(self, **kwargs):
+        if self.fail:
+            raise ConnectionError("pool exhausted")
+        session = FakeSession()
+        self.sessions.append(session)
+        return session
+
+
+def test_session_bookkeeping():
+    """嵌套借出时统计在用数和峰值，退出后归还并关闭会话"""
+    driver = FakeDriver()
+    pooled = PooledDriver(driver, Neo4jPoolConfig(max_connection_pool_size=4), ("bolt://x", "neo4j"))
+
+    with pooled.session(database="neo4j") as outer:
+        with pooled.session():
+            stats = pooled.get_pool_stats()
+            assert stats["in_use"] == 2 and stats["session_utilization"] == 0.5
+        assert pooled.get_pool_stats()["in_use"] == 1
+        assert not outer.closed
+
+    stats = pooled.get_pool_stats()
+    assert stats["in_use"] == 0 and stats["peak_in_use"] == 2
+    assert stats["acquired_total"] == 2 and stats["max_size"] == 4
+    assert "utilization" not in stats
+    assert all(session.closed for session in driver.sessions)
+    print("✅ 会话借出/归还统计")
+
+
+def test_release_on_error_and_failure_count():
+    """查询异常时仍归还会话；创建会话失败计入failed_total且不计入借出"""
+    pooled = PooledDriver(FakeDriver(), Neo4jPoolConfig(max_connection_pool_size=2), ("bolt://x", "neo4j"))
+    try:
+        with pooled.session():
+            raise RuntimeError("query failed")
+    except RuntimeError:
+        pass
+    assert pooled.get_pool_stats()["in_use"] == 0
+
+    broken = PooledDriver(FakeDriver(fail=True), Neo4jPoolConfig(), ("bolt://y", "neo4j"))
+    try:
+        with broken.session():
+            pass
+        assert False, "应抛出连接异常"
+    except ConnectionError:
+        pass
+    stats = broken.get_pool_stats()
+    assert stats["failed_total"] == 1 and stats["acquired_total"] == 0 and stats["in_use"] == 0
+    print("✅ 异常归还与失败计数")
+
+
+if __name__ == "__main__":
+    test_session_bookkeeping()
+    test_release_on_error_and_failure_count()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+测试OCR单次识别与结果复用 - 每张图片只识别一次、按内容哈希跨文档复用、PPTX批量识别
+"""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'api'))
+
+from PIL import Image
+from pptx import Presentation
+from pptx.util import Inches
+
+from cache.parse_cache import ParseResultCache
+import parsers.ocr_engine as ocr_module
+from parsers.ocr_engine import OCREngine, OCRResult
+
+
+class CountingOCR:
+    """记录调用次数的OCR后端，按图片尺寸返回固定文本"""
+
+    def __init__(self):
+        self.calls = []
+
+    def ocr(self, img_path, cls=True):
+        self.calls.append(img_path)
+        width, _ = Image.open(img_path).size
+        box = [[0, 0], [width, 0], [width, 10], [0, 10]]
+        return [[[box, (f"图{width}数据", 0.9)], [box, ("噪声", 0.3)]]]
+
+
+def make_engine(cache_size=16):
+    engine = OCREngine(cache_size=cache_size)
+    engine._text_ocr = CountingOCR()
+    engine._initialized = True
+    return engine
+
+
+def with_disk_cache(test):
+    def wrapper():
+        original = ocr_module.parse_cache
+        with tempfile.TemporaryDirectory() as tmp:
+            ocr_module.parse_cache = ParseResultCache(cache_dir=Path(tmp) / "c", enabled=True)
+            try:
+                test(Path(tmp))
+            finally:
+                ocr_module.parse_cache = original
+    wrapper.__name__ = test.__name__
+    wrapper.__doc__ = test.__doc__
+    return wrapper
+
+
+def save_image(path: Path, width: int) -> Path:
+    Image.new("RGB", (width, 40), "white").save(path)
+    return path
+
+
+@with_disk_cache
+def test_single_pass_result(tmp):
+    """文本、置信度、坐标框来自同一次识别"""
+    engine = make_engine()
+    img = save_image(tmp / "a.png", 120)
+    result = engine.recognize(img)
+    assert isinstance(result, OCRResult) and len(result.lines) == 2
+    assert result.text(0.5) == "图120数据" and abs(result.confidence - 0.6) < 1e-9
+    assert result.lines[0].box[1] == [120.0, 0.0]
+    assert engine.extract_text(str(img), 0.5) == "图120数据"
+    assert abs(engine.get_text_confidence(str(img)) - 0.6) < 1e-9
+    assert len(engine.text_ocr.calls) == 1
+    print("✅ 单次识别，文本与置信度共用结果")
+
+
+@with_disk_cache
+def test_batch_dedup_and_disk_reuse(tmp):
+    """批次内相同内容只识别一次；新进程（空LRU）从磁盘缓存复用"""
+    engine = make_engine()
+    logo_a = save_image(tmp / "logo_a.png", 64)
+    logo_b = save_image(tmp / "logo_b.png", 64)     # 内容相同、路径不同
+    other = save_image(tmp / "other.png", 200)
+    results = engine.recognize_batch([logo_a, other, logo_b, tmp / "missing.png"])
+    assert [r.text() for r in results] == ["图64数据", "图200数据", "图64数据", ""]
+    assert len(engine.text_ocr.calls) == 2
+
+    fresh = make_engine()
+    again = fresh.recognize_batch([other, logo_b])
+    assert fresh.text_ocr.calls == [] and all(r.cached for r in again)
+    assert again[0].text() == "图200数据"
+    print("✅ 批量识别去重，跨文档复用磁盘缓存")
+
+
+@with_disk_cache
+def test_unavailable_engine_not_cached(tmp):
+    """OCR不可用时返回空结果且不写缓存"""
+    engine = OCREngine()
+    engine._text_ocr = None
+    engine._initialized = True
+    img = save_image(tmp / "x.png", 32)
+    assert engine.recognize(img).confidence == 0.0
+    assert ocr_module.parse_cache.stats()["size_bytes"] == 0
+    print("✅ OCR不可用时不缓存空结果")
+
+
+@with_disk_cache
+def test_pptx_images_ocr_once(tmp):
+    """幻灯片中重复的Logo只识别一次，图片块回填OCR结果"""
+    from parsers.enhanced_pptx_parser import EnhancedPPTXParser
+
+    logo = save_image(tmp / "logo.png", 80)
+    chart = save_image(tmp / "chart.png", 300)
+    prs = Presentation()
+    for images in ([logo], [logo, chart], [logo]):
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        for i, img in enumerate(images):
+            slide.shapes.add_picture(str(img), Inches(1 + 3 * i), Inches(1))
+    deck = tmp / "deck.pptx"
+    prs.save(deck)
+
+    parser = EnhancedPPTXParser(use_ocr=True, ocr_confidence=0.5)
+    parser.ocr_engine = make_engine()
+    document = parser.parse(deck, tmp / "out")
+    figures = [b for b in document.blocks if b.image]
+    assert len(figures) == 4
+    assert len(parser.ocr_engine.text_ocr.calls) == 2
+    assert [b.ocr_text for b in figures] == ["图80数据", "图80数据", "图300数据", "图80数据"]
+    assert all(abs(b.confidence - 0.6) < 1e-9 for b in figures)
+    assert figures[2].figure_type == "chart"
+    print("✅ PPTX图片批量识别，重复图片只识别一次")
+
+
+if __name__ == "__main__":
+    test_single_pass_result()
+    test_batch_dedup_and_disk_reuse()
+    test_unavailable_engine_not_cached()
+    test_pptx_images_ocr_once()
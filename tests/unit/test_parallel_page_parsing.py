@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+测试按页/幻灯片并行解析 - 并行与顺序结果一致（块顺序、块ID）、逐页耗时
+"""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'api'))
+
+from PIL import Image
+from pptx import Presentation
+from pptx.util import Inches
+
+from parsers.parallel_pages import split_ranges, resolve_workers
+from parsers.enhanced_pptx_parser import EnhancedPPTXParser
+from parsers.ir_unified_parser import IRUnifiedParser
+
+
+def build_deck(path: Path, slides: int):
+    """每张幻灯片包含文本框、表格，偶数页附一张图片"""
+    img = path.parent / "logo.png"
+    Image.new("RGB", (60, 30), "white").save(img)
+    prs = Presentation()
+    for i in range(slides):
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        box = slide.shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(1))
+        box.text_frame.text = f"第{i + 1}页 电池鼓包分析"
+        table = slide.shapes.add_table(2, 2, Inches(1), Inches(3), Inches(4), Inches(1)).table
+        table.cell(0, 0).text, table.cell(0, 1).text = "组件", "症状"
+        table.cell(1, 0).text, table.cell(1, 1).text = "电池", f"鼓包{i}"
+        if i % 2 == 0:
+            slide.shapes.add_picture(str(img), Inches(6), Inches(1))
+    prs.save(path)
+
+
+def build_pdf(path: Path, pages: int):
+    """生成每页一行文本的最小PDF"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for i in range(pages):
+        stream = f"BT /F1 14 Tf 72 720 Td (Page {i + 1} battery swelling after drop test) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+
+    body = b"%PDF-1.4\n"
+    offsets = []
+    for num, obj in enumerate(objects, 1):
+        offsets.append(len(body))
+        body += f"{num} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(body)
+    body += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    body += "".join(f"{off:010d} 00000 n \n" for off in offsets).encode()
+    body += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(body)
+
+
+def test_split_and_resolve():
+    """页段连续且覆盖全部页面；页数不足阈值时顺序解析"""
+    ranges = split_ranges(10, 4)
+    assert ranges == [(0, 3), (3, 6), (6, 8), (8, 10)]
+    assert split_ranges(2, 8) == [(0, 1), (1, 2)]
+    os.environ["IR_PARSE_PARALLEL_MIN_PAGES"] = "16"
+    try:
+        assert resolve_workers(4, 10) == 1 and resolve_workers(4, 40) == 4 and resolve_workers(1, 40) == 1
+    finally:
+        os.environ.pop("IR_PARSE_PARALLEL_MIN_PAGES", None)
+    print("✅ 页段切分与进程数判断正确")
+
+
+def test_pptx_parallel_matches_sequential():
+    """并行解析的块顺序、块ID、内容与顺序解析完全一致"""
+    os.environ["IR_PARSE_PARALLEL_MIN_PAGES"] = "2"
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            deck = tmp / "review.pptx"
+            build_deck(deck, 7)
+            sequential = EnhancedPPTXParser(use_ocr=False, workers=1).parse(deck, tmp / "seq")
+            parallel = EnhancedPPTXParser(use_ocr=False, workers=2).parse(deck, tmp / "par")
+    finally:
+        os.environ.pop("IR_PARSE_PARALLEL_MIN_PAGES", None)
+
+    def normalized(doc):
+        return [{**b.to_dict(), "image": Path(b.image).name if b.image else None} for b in doc.blocks]
+
+    assert sequential.meta["parse_mode"] == "sequential"
+    assert parallel.meta["parse_mode"] == "parallel" and parallel.meta["workers"] == 2
+    assert normalized(parallel) == normalized(sequential)
+    assert [b.id for b in parallel.blocks][:3] == ["text_1", "table_2", "figure_3"]
+    assert [t["page"] for t in parallel.meta["page_timings"]] == list(range(1, 8))
+    print(f"✅ PPTX并行解析结果与顺序解析一致（{len(parallel.blocks)}个块）")
+
+
+def test_pdf_parallel_matches_sequential():
+    """PDF按页并行解析与顺序解析一致"""
+    os.environ["IR_PARSE_PARALLEL_MIN_PAGES"] = "2"
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf = Path(tmp) / "report.pdf"
+            build_pdf(pdf, 5)
+            sequential = IRUnifiedParser(use_ocr=False, workers=1)._parse_pdf(pdf, Path(tmp))
+            parallel = IRUnifiedParser(use_ocr=False, workers=3)._parse_pdf(pdf, Path(tmp))
+    finally:
+        os.environ.pop("IR_PARSE_PARALLEL_MIN_PAGES", None)
+
+    assert len(sequential.blocks) == 5 and sequential.meta["pages"] == 5
+    assert parallel.meta["parse_mode"] == "parallel"
+    assert [b.to_dict() for b in parallel.blocks] == [b.to_dict() for b in sequential.blocks]
+    assert "Page 3 battery" in parallel.blocks[2].text
+    assert len(parallel.meta["page_timings"]) == 5
+    print("✅ PDF并行解析结果与顺序解析一致")
+
+
+if __name__ == "__main__":
+    test_split_and_resolve()
+    test_pptx_parallel_matches_sequential()
+    test_pdf_parallel_matches_sequential()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+测试内容寻址解析结果缓存 - 键组成、LRU淘汰、上传解析/ETL处理命中、IR图片随缓存复制
+"""
+
+import sys
+import os
+import json
+import time
+import shutil
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'api'))
+
+import pandas as pd
+
+from cache.parse_cache import ParseResultCache, config_fingerprint
+import cache.parse_cache as parse_cache_module
+
+
+def test_key_and_lru_eviction():
+    """键随内容/版本/配置变化；超出上限时淘汰最久未使用的条目"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ParseResultCache(cache_dir=Path(tmp) / "c", max_bytes=3000, enabled=True)
+        base = cache.make_key("h", "p", "1", config_fingerprint({"a": 1}))
+        assert base != cache.make_key("h", "p", "2", config_fingerprint({"a": 1}))
+        assert base != cache.make_key("h", "p", "1", config_fingerprint({"a": 2}))
+        assert base == cache.make_key("h", "p", "1", config_fingerprint({"a": 1}))
+
+        keys = [cache.make_key(f"h{i}", "p", "1") for i in range(5)]
+        for i, key in enumerate(keys):
+            cache.put(key, {"i": i, "pad": "x" * 900})
+            time.sleep(0.01)
+            # 反复读取第一个条目，使其保持最近使用
+            assert cache.get(keys[0], "p") is not None
+        stats = cache.stats()
+        assert stats["size_bytes"] <= 3000 and stats["evictions"] >= 2
+        assert cache.get(keys[0], "p") is not None
+        assert cache.get(keys[1], "p") is None
+        assert cache.get(keys[4], "p")["i"] == 4
+    print(f"✅ 键组成与LRU淘汰正常（淘汰 {stats['evictions']} 条）")
+
+
+def test_upload_parse_reuses_result():
+    """同一内容以不同上传ID/文件名解析时直接复用结果"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        cache = ParseResultCache(cache_dir=tmp / "c", enabled=True)
+        original = parse_cache_module.parse_cache
+        import parsers.upload_parser as upload_parser
+        upload_parser.parse_cache = cache
+        try:
+            content = "BTB连接器虚焊导致屏幕闪烁\n跌落测试后电池鼓包\n"
+            (tmp / "a.txt").write_text(content, encoding="utf-8")
+            (tmp / "b.txt").write_text(content, encoding="utf-8")
+            first = upload_parser.parse_upload(None, str(tmp / "a.txt"), str(tmp / "a_result.json"))
+            second = upload_parser.parse_upload(None, str(tmp / "b.txt"), str(tmp / "b_result.json"))
+            assert not first.get("cache_hit") and second["cache_hit"]
+            a = json.loads((tmp / "a_result.json").read_text(encoding="utf-8"))
+            b = json.loads((tmp / "b_result.json").read_text(encoding="utf-8"))
+            assert a["entities"] == b["entities"] and a["raw_data"] == b["raw_data"]
+            assert cache.hits == 1
+
+            # 内容变化则重新解析
+            (tmp / "c.txt").write_text(content + "摄像头模组失效\n", encoding="utf-8")
+            third = upload_parser.parse_upload(None, str(tmp / "c.txt"), str(tmp / "c_result.json"))
+            assert not third.get("cache_hit") and third["total_records"] == 3
+        finally:
+            upload_parser.parse_cache = original
+    print("✅ 上传解析命中内容寻址缓存")
+
+
+def test_etl_processor_cache():
+    """EnhancedETLProcessor 对同一文件 + 映射命中缓存，统计信息可恢复"""
+    from etl.enhanced_etl_processor import EnhancedETLProcessor
+    import etl.enhanced_etl_processor as etl_module
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        original = etl_module.parse_cache
+        etl_module.parse_cache = ParseResultCache(cache_dir=tmp / "c", enabled=True)
+        try:
+            path = tmp / "data.xlsx"
+            pd.DataFrame({
+                "产品": ["X1", "X2"], "版本": ["v1", "v2"], "异常ID": ["A1", "A2"],
+                "组件": ["电池", "屏幕"], "症状": ["鼓包", "闪烁"]
+            }).to_excel(path, index=False)
+            processor = EnhancedETLProcessor(mapping_file=str(tmp / "missing.yaml"))
+            first = processor.process_excel(str(path))
+            second = processor.process_excel(str(path))
+            assert second["metadata"]["cache_hit"] and not first["metadata"].get("cache_hit")
+            assert len(second["entities"]) == len(first["entities"])
+            assert processor.stats.success_rows == 2 and processor.stats.duration is not None
+
+            processor.mapping["entities"].pop("Symptom")
+            third = processor.process_excel(str(path))
+            assert not third["metadata"].get("cache_hit")
+        finally:
+            etl_module.parse_cache = original
+    print("✅ ETL处理结果缓存正常")
+
+
+def test_ir_cache_hit_copies_assets():
+    """IR缓存命中时图片复制到本次上传的输出目录，首次上传的目录删除后仍可用"""
+    from parsers.ir_core import DocumentIR, create_figure_block
+    import parsers.ir_unified_parser as ir_module
+
+    class FigureParser(ir_module.IRUnifiedParser):
+        def _parse_text(self, file_path, output_dir):
+            output_dir.mkdir(parents=True, exist_ok=True)
+            (output_dir / "slide_1_x.png").write_bytes(b"png")
+            return DocumentIR(meta={"file_id": file_path.stem},
+                              blocks=[create_figure_block("b1", 1, str(output_dir / "slide_1_x.png"))])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        cache = ParseResultCache(cache_dir=tmp / "c", enabled=True)
+        original = ir_module.parse_cache
+        ir_module.parse_cache = cache
+        try:
+            parser = FigureParser(use_ocr=False)
+            (tmp / "a.txt").write_text("同一内容", encoding="utf-8")
+            (tmp / "b.txt").write_text("同一内容", encoding="utf-8")
+            first = parser.parse_document(tmp / "a.txt", ".txt")["ir"]
+            assert first.blocks[0].image == str(tmp / "a_assets" / "slide_1_x.png")
+            shutil.rmtree(tmp / "a_assets")
+
+            second = parser.parse_document(tmp / "b.txt", ".txt")["ir"]
+            assert cache.hits == 1
+            image = Path(second.blocks[0].image)
+            assert image == tmp / "b_assets" / "slide_1_x.png" and image.read_bytes() == b"png"
+            assert second.meta["file_id"] == "b"
+
+            cache.clear()
+            assert not any((tmp / "c").rglob("*.png"))
+        finally:
+            ir_module.parse_cache = original
+    print("✅ IR缓存命中时图片指向本次上传")
+
+
+if __name__ == "__main__":
+    test_key_and_lru_eviction()
+    test_upload_parse_reuses_result()
+    test_etl_processor_cache()
+    test_ir_cache_hit_copies_assets()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+测试文件解析任务队列 - 有界并发、状态持久化、排队/执行中取消、停止时取消标记保留到解析退出
+"""
+
+import sys
+import os
+import time
+import asyncio
+import tempfile
+import threading
+from pathlib import Path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'api'))
+
+import files.manager as manager
+from files.manager import FileStatus, ensure_meta, get_meta, is_cancel_requested
+from parsers.upload_parser import ParseProgress
+from services.parse_job_queue import ParseJobQueue, QueueFullError
+
+running = 0
+peak = 0
+lock = threading.Lock()
+
+
+def slow_worker(upload_id, file_path, result_path):
+    """模拟解析：分20步执行，每步上报进度（检查取消标记）"""
+    global running, peak
+    with lock:
+        running += 1
+        peak = max(peak, running)
+    try:
+        progress = ParseProgress(upload_id, interval=0)
+        for step in range(20):
+            progress(step * 5, "extracting")
+            time.sleep(0.02)
+        Path(result_path).write_text("{}", encoding="utf-8")
+        return {"total_records": 20, "total_entities": 3}
+    finally:
+        with lock:
+            running -= 1
+
+
+def failing_worker(upload_id, file_path, result_path):
+    raise ValueError("损坏的文件")
+
+
+async def wait_all(queue, timeout=10):
+    deadline = time.time() + timeout
+    while queue.active_count and time.time() < deadline:
+        await asyncio.sleep(0.02)
+
+
+def run_with_cache(coro_factory):
+    """在临时元数据目录中运行"""
+    original = manager.CACHE
+    with tempfile.TemporaryDirectory() as tmp:
+        manager.CACHE = Path(tmp)
+        try:
+            return asyncio.run(coro_factory(Path(tmp)))
+        finally:
+            manager.CACHE = original
+
+
+def test_bounded_concurrency_and_status():
+    """并发不超过max_workers，完成后元数据为parsed且进度100"""
+    async def scenario(tmp):
+        queue = ParseJobQueue(slow_worker, max_workers=2, max_pending=10, executor_type="thread")
+        ids = [f"job{i}" for i in range(5)]
+        for uid in ids:
+            ensure_meta(uid, f"{uid}.txt")
+            job = queue.submit(uid, str(tmp / uid), str(tmp / f"{uid}_result.json"))
+            assert job.status == FileStatus.queued
+        # 重复提交返回同一任务
+        assert queue.submit("job0", "", "") is queue.get("job0")
+        await wait_all(queue)
+        await queue.stop()
+        return [get_meta(uid) for uid in ids]
+
+    metas = run_with_cache(scenario)
+    assert peak <= 2
+    for meta in metas:
+        assert meta["status"] == "parsed" and meta["progress"] == 100 and meta["entity_count"] == 3
+    print(f"✅ 5个任务全部完成，最大并发 {peak}")
+
+
+def test_cancel_queued_and_running():
+    """排队中的任务直接取消，执行中的任务在下一个进度点退出"""
+    async def scenario(tmp):
+        queue = ParseJobQueue(slow_worker, max_workers=1, max_pending=1, executor_type="thread")
+        for uid in ("running", "queued"):
+            ensure_meta(uid, uid)
+            queue.submit(uid, str(tmp / uid), str(tmp / f"{uid}_result.json"))
+        try:
+            ensure_meta("overflow", "overflow")
+            queue.submit("overflow", "", "")
+            raise AssertionError("应当拒绝超出排队上限的任务")
+        except QueueFullError:
+            pass
+
+        await asyncio.sleep(0.1)
+        assert get_meta("running")["status"] == "parsing"
+        assert queue.cancel("queued") is not None
+        assert queue.cancel("running") is not None
+        await wait_all(queue)
+        assert queue.cancel("running") is None
+        await queue.stop()
+        return get_meta("running"), get_meta("queued"), (tmp / "running_result.json").exists()
+
+    running_meta, queued_meta, has_result = run_with_cache(scenario)
+    assert running_meta["status"] == "cancelled" and not has_result
+    assert queued_meta["status"] == "cancelled"
+    print("✅ 排队/执行中任务均可取消")
+
+
+def test_failure_is_persisted():
+    """解析异常写入failed状态和错误信息"""
+    async def scenario(tmp):
+        queue = ParseJobQueue(failing_worker, max_workers=1, executor_type="thread")
+        ensure_meta("bad", "bad.xlsx")
+        queue.submit("bad", "", "")
+        await wait_all(queue)
+        await queue.stop()
+        return get_meta("bad")
+
+    meta = run_with_cache(scenario)
+    assert meta["status"] == "failed" and "损坏" in meta["error"]
+    print("✅ 解析失败状态已持久化")
+
+
+def test_stop_keeps_cancel_marker_until_worker_returns():
+    """stop()取消执行中的任务后，取消标记保留到解析函数看到标记退出为止，之后才清除"""
+    async def scenario(tmp):
+        queue = ParseJobQueue(slow_worker, max_workers=1, executor_type="thread")
+        ensure_meta("stopping", "stopping.pdf")
+        queue.submit("stopping", str(tmp / "stopping"), str(tmp / "stopping_result.json"))
+        await asyncio.sleep(0.1)
+        assert get_meta("stopping")["status"] == "parsing"
+
+        await queue.stop()
+        marker_after_stop = is_cancel_requested("stopping")
+        deadline = time.time() + 5
+        while is_cancel_requested("stopping") and time.time() < deadline:
+            await asyncio.sleep(0.02)
+        return (marker_after_stop, is_cancel_requested("stopping"), running, get_meta("stopping"),
+                (tmp / "stopping_result.json").exists())
+
+    marker_after_stop, marker_after_exit, still_running, meta, has_result = run_with_cache(scenario)
+    assert marker_after_stop and not marker_after_exit and still_running == 0
+    assert meta["status"] == "cancelled" and not has_result
+    print("✅ 停止队列时取消标记保留到解析退出")
+
+
+if __name__ == "__main__":
+    test_bounded_concurrency_and_status()
+    test_cancel_queued_and_running()
+    test_failure_is_persisted()
+    test_stop_keeps_cancel_marker_until_worker_returns()
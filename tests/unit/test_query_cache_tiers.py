@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+测试两级查询缓存 - L1命中不访问Redis、并发未命中只计算一次、发起请求被取消不影响等待者、
+过期后返回旧值并后台刷新、L1容量上限
+"""
+
+import sys
+import os
+import time
+import pickle
+import asyncio
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'api'))
+
+from cache.redis_manager import RedisManager, TieredCache, L1Cache
+
+
+class FakeRedis:
+    """内存版Redis客户端，记录读取次数"""
+
+    def __init__(self):
+        self.data = {}
+        self.gets = 0
+
+    async def get(self, key):
+        self.gets += 1
+        return self.data.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    async def delete(self, *keys):
+        return sum(self.data.pop(k, None) is not None for k in keys)
+
+
+def make_cache(max_entries=256, max_age=30):
+    manager = RedisManager()
+    manager.redis_client = FakeRedis()
+    return TieredCache(manager, L1Cache(max_entries=max_entries, max_age=max_age)), manager.redis_client
+
+
+def test_l1_hit_skips_redis():
+    """第二次读取命中L1，不访问Redis；L1过期后从L2读取并回填"""
+    async def scenario():
+        cache, client = make_cache(max_age=0.05)
+
+        async def compute():
+            return {"nodes": [1, 2, 3]}
+
+        value, source = await cache.get_or_compute("kg:graph:a", compute, ttl=60)
+        assert source == "computed" and client.gets == 1
+        again, source = await cache.get_or_compute("kg:graph:a", compute, ttl=60)
+        assert source == "l1" and again is value and client.gets == 1
+
+        await asyncio.sleep(0.08)
+        again, source = await cache.get_or_compute("kg:graph:a", compute, ttl=60)
+        assert source == "l2" and again == value and client.gets == 2
+        _, source = await cache.get_or_compute("kg:graph:a", compute, ttl=60)
+        assert source == "l1"
+
+    asyncio.run(scenario())
+    print("✅ L1命中不访问Redis")
+
+
+def test_concurrent_misses_compute_once():
+    """同一个键并发未命中时只计算一次，其余协程得到同一结果；计算失败时异常传给所有等待者"""
+    async def scenario():
+        cache, _ = make_cache()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return {"total": 42}
+
+        results = await asyncio.gather(*[cache.get_or_compute("kg:stats:x", compute, ttl=60) for _ in range(20)])
+        assert len(calls) == 1
+        assert all(value == {"total": 42} for value, _ in results)
+        assert sorted(source for _, source in results) == ["coalesced"] * 19 + ["computed"]
+
+        async def failing():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise RuntimeError("neo4j down")
+
+        outcomes = await asyncio.gather(*[cache.get_or_compute("kg:stats:y", failing, ttl=60) for _ in range(5)],
+                                        return_exceptions=True)
+        assert len(calls) == 2 and all(isinstance(o, RuntimeError) for o in outcomes)
+        assert cache.get_stats()["inflight"] == 0
+
+    asyncio.run(scenario())
+    print("✅ 并发未命中只计算一次")
+
+
+def test_cancelled_starter_does_not_cancel_waiters():
+    """发起计算的请求被取消（客户端断开）时，合并等待的请求仍拿到结果，结果照常写入缓存"""
+    async def scenario():
+        cache, client = make_cache()
+        calls = []
+        release = asyncio.Event()
+
+        async def compute():
+            calls.append(1)
+            await release.wait()
+            return {"total": 7}
+
+        starter = asyncio.ensure_future(cache.get_or_compute("kg:stats:c", compute, ttl=60))
+        await asyncio.sleep(0)
+        waiters = [asyncio.ensure_future(cache.get_or_compute("kg:stats:c", compute, ttl=60)) for _ in range(3)]
+        await asyncio.sleep(0)
+
+        starter.cancel()
+        await asyncio.sleep(0)
+        assert starter.cancelled()
+        release.set()
+
+        results = await asyncio.gather(*waiters)
+        assert results == [({"total": 7}, "coalesced")] * 3
+        assert len(calls) == 1 and "kg:stats:c" in client.data
+        assert cache.get_stats()["inflight"] == 0
+
+        # 所有等待者都取消时计算仍完成并写入缓存
+        cache.l1.clear()
+        client.data.clear()
+        release.clear()
+        lone = asyncio.ensure_future(cache.get_or_compute("kg:stats:d", compute, ttl=60))
+        await asyncio.sleep(0)
+        lone.cancel()
+        release.set()
+        await asyncio.sleep(0.01)
+        assert "kg:stats:d" in client.data and cache.get_stats()["inflight"] == 0
+
+    asyncio.run(scenario())
+    print("✅ 发起请求被取消不影响合并等待者")
+
+
+def test_stale_served_while_refreshing():
+    """新鲜期过后在宽限期内立即返回旧值，后台只刷新一次；超过宽限期则同步重新计算"""
+    async def scenario():
+        cache, client = make_cache()
+        version = {"n": 0}
+
+        async def compute():
+            version["n"] += 1
+            await asyncio.sleep(0.02)
+            return {"version": version["n"]}
+
+        await cache.get_or_compute("kg:graph:g", compute, ttl=0.05, stale_ttl=10)
+        raw = pickle.loads(client.data["kg:graph:g"])
+        assert raw["value"] == {"version": 1}
+
+        await asyncio.sleep(0.06)
+        first = await cache.get_or_compute("kg:graph:g", compute, ttl=0.05, stale_ttl=10)
+        second = await cache.get_or_compute("kg:graph:g", compute, ttl=0.05, stale_ttl=10)
+        assert first == ({"version": 1}, "stale") and second == ({"version": 1}, "stale")
+
+        await asyncio.sleep(0.04)
+        value, source = await cache.get_or_compute("kg:graph:g", compute, ttl=0.05, stale_ttl=10)
+        assert value == {"version": 2} and source == "l1"
+        assert cache.get_stats()["refreshes"] == 1 and version["n"] == 2
+
+        # 没有宽限期的键过期后同步重新计算
+        await cache.get_or_compute("kg:entity:e", compute, ttl=0.01)
+        cache.l1.clear()
+        client.data.clear()
+        await asyncio.sleep(0.02)
+        value, source = await cache.get_or_compute("kg:entity:e", compute, ttl=0.01)
+        assert source == "computed" and value == {"version": 4}
+
+    asyncio.run(scenario())
+    print("✅ 宽限期内返回旧值并后台刷新")
+
+
+def test_l1_is_bounded():
+    """L1按LRU淘汰，条目数不超过上限；清除前缀只影响对应命名空间"""
+    l1 = L1Cache(max_entries=3, max_age=60)
+    far = time.time() + 60
+    for key in ("kg:graph:a", "kg:graph:b", "kg:stats:c"):
+        l1.set(key, key, far, far)
+    assert l1.get("kg:graph:a") is not None
+    l1.set("kg:graph:d", "d", far, far)
+    assert len(l1) == 3 and l1.get("kg:graph:b") is None
+    l1.clear("kg:graph:")
+    assert len(l1) == 1 and l1.get("kg:stats:c")[0] == "kg:stats:c"
+    print("✅ L1容量有上限")
+
+
+if __name__ == "__main__":
+    test_l1_hit_skips_redis()
+    test_concurrent_misses_compute_once()
+    test_cancelled_starter_does_not_cancel_waiters()
+    test_stale_served_while_refreshing()
+    test_l1_is_bounded()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+测试关系批量导入 - source_hash预检、批内去重、按块失败计数、结果结构、NDJSON流式导入输出
+"""
+
+import sys
+import os
+import json
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'api'))
+
+from services.kg_relation_service import KGRelationService
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def data(self):
+        return self.rows
+
+
+class FakeTx:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def run(self, query, rows):
+        rel_type = query.split('[r:')[1].split(']')[0]
+        if rel_type in self.driver.fail_types:
+            raise RuntimeError(f"{rel_type} write failed")
+        records = []
+        for row in rows:
+            self.driver.next_id += 1
+            self.driver.written.append((rel_type, row['idx']))
+            records.append({'idx': row['idx'], 'rel_id': self.driver.next_id})
+        return FakeResult(records)
+
+
+class FakeSession:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, rows):
+        """预检：按source_hash返回库中已存在的关系"""
+        self.driver.checks += 1
+        if self.driver.fail_check:
+            raise RuntimeError("neo4j unavailable")
+        return FakeResult([{'idx': row['idx'], 'rel_type': 'CAUSES'}
+                           for row in rows if row['source_hash'] in self.driver.existing_hashes])
+
+    def execute_write(self, work):
+        self.driver.transactions += 1
+        return work(FakeTx(self.driver))
+
+
+class FakeDriver:
+    def __init__(self, existing_hashes=(), fail_types=(), fail_check=False, broken=False):
+        self.existing_hashes = set(existing_hashes)
+        self.fail_types = set(fail_types)
+        self.fail_check = fail_check
+        self.broken = broken
+        self.checks = 0
+        self.transactions = 0
+        self.written = []
+        self.next_id = 100
+
+    def session(self):
+        if self.broken:
+            raise ConnectionError("pool closed")
+        return FakeSession(self)
+
+
+def relation(rel_type, source, target, evidence, source_cat='Symptom', target_cat='Symptom'):
+    return {
+        'relation_type': rel_type,
+        'source': {'name': source, 'category': source_cat},
+        'target': {'name': target, 'category': target_cat},
+        'props': {'confidence': 0.9, 'evidence': evidence, 'source': 'manual'}
+    }
+
+
+RELATIONS = [
+    relation('CAUSES', 'A', 'B', '现象A导致现象B的证据'),
+    relation('CAUSES', 'A', 'B', '现象A导致现象B的证据'),
+    relation('CAUSES', 'C', 'B', '现象C导致现象B的证据'),
+    relation('RESOLVED_BY', 'A', 'S1', '更换治具后现象A消失', target_cat='Solution'),
+    relation('CAUSES', 'D', 'B', '现象D导致现象B的证据'),
+]
+
+
+def existing_hash(service):
+    return service._generate_source_hash('C', 'B', '现象C导致现象B的证据', 'manual')
+
+
+def test_precheck_dedup_and_chunk_failures():
+    """批内重复和库中已存在的关系不写入；失败块内的关系计入failed；进度事件按块产出"""
+    probe = KGRelationService(driver=FakeDriver())
+    driver = FakeDriver(existing_hashes={existing_hash(probe)}, fail_types={'RESOLVED_BY'})
+    service = KGRelationService(driver=driver)
+
+    events = list(service.iter_batch_upsert_relations(RELATIONS, chunk_size=1))
+    assert driver.checks == 1 and driver.transactions == 3
+    assert events[0] == {'event': 'checked', 'total': 5, 'existing': 2, 'to_write': 3}
+    assert [(e['relation_type'], e['processed'], e['success'], e['failed']) for e in events[1:-1]] == [
+        ('CAUSES', 3, 1, 2), ('CAUSES', 4, 2, 2), ('RESOLVED_BY', 5, 2, 3)]
+    assert driver.written == [('CAUSES', 0), ('CAUSES', 4)]
+
+    result = events[-1]['result']
+    assert events[-1]['event'] == 'done'
+    assert set(result) == {'success', 'failed', 'errors', 'created_ids'}
+    assert result['success'] == 2 and result['failed'] == 3
+    assert result['created_ids'] == ['101', '102']
+    assert result['errors'][:2] == ["关系 2: 关系已存在: CAUSES", "关系 3: 关系已存在: CAUSES"]
+    assert result['errors'][2].startswith("关系 4: 创建关系失败: RESOLVED_BY write failed")
+    assert service.batch_upsert_relations(RELATIONS, chunk_size=1)['success'] == 2
+    print("✅ 预检、批内去重与分块失败计数")
+
+
+def test_precheck_failure_marks_all_failed():
+    """预检查询失败时所有关系记为失败，不发起写事务"""
+    driver = FakeDriver(fail_check=True)
+    result = KGRelationService(driver=driver).batch_upsert_relations(RELATIONS)
+    assert driver.transactions == 0
+    assert result['success'] == 0 and result['failed'] == 5 and result['created_ids'] == []
+    assert result['errors'][0] == "关系 1: 创建关系失败: neo4j unavailable"
+    assert result['errors'][1] == "关系 2: 关系已存在: CAUSES"
+    print("✅ 预检失败全部计为失败")
+
+
+def test_stream_ndjson_lines():
+    """流式导入逐行输出 checked/progress/done，有写入时先回调再输出done；异常时输出error行"""
+    probe = KGRelationService(driver=FakeDriver())
+    driver = FakeDriver(existing_hashes={existing_hash(probe)}, fail_types={'RESOLVED_BY'})
+    calls = []
+    lines = list(KGRelationService(driver=driver).iter_import_ndjson(
+        RELATIONS, chunk_size=2, on_success=lambda: calls.append(len(driver.written))))
+    assert all(line.endswith("\n") for line in lines)
+
+    events = [json.loads(line) for line in lines]
+    assert [event['event'] for event in events] == ['checked', 'progress', 'progress', 'done']
+    assert events[0]['to_write'] == 3
+    done = events[-1]['data']
+    assert set(done) == {'success_count', 'failed_count', 'errors', 'created_ids'}
+    assert done['success_count'] == 2 and done['failed_count'] == 3 and done['created_ids'] == ['101', '102']
+    assert calls == [2]
+
+    calls.clear()
+    driver = FakeDriver(existing_hashes={existing_hash(probe)})
+    many = [relation('CAUSES', 'A', f'B{i}', f'现象A导致现象B{i}的证据') for i in range(12)] * 2
+    done = json.loads(list(KGRelationService(driver=driver).iter_import_ndjson(
+        many, on_success=lambda: calls.append(1)))[-1])['data']
+    assert done['failed_count'] == 12 and len(done['errors']) == 10 and calls == [1]
+
+    calls.clear()
+    lines = list(KGRelationService(driver=FakeDriver(broken=True)).iter_import_ndjson(
+        RELATIONS, on_success=lambda: calls.append(1)))
+    assert [json.loads(line) for line in lines] == [{'event': 'error', 'message': 'pool closed'}]
+    assert calls == []
+    print("✅ NDJSON流式导入")
+
+
+if __name__ == "__main__":
+    test_precheck_dedup_and_chunk_failures()
+    test_precheck_failure_marks_all_failed()
+    test_stream_ndjson_lines()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+测试关系推断的相似连接 - 倒排索引候选与笛卡尔积结果一致、提及评分、top-k
+"""
+
+import sys
+import os
+import random
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'nlp'))
+
+from relation_inference import RelationInference, shared_token_pairs
+
+
+def random_tags(rng, n):
+    vocab = [f"tag{i}" for i in range(30)]
+    return {f"n{i}": rng.sample(vocab, rng.randint(0, 6)) for i in range(n)}
+
+
+def test_candidates_match_cartesian_product():
+    """共享标签的候选对及共同标签与两两比较的结果完全一致"""
+    rng = random.Random(7)
+    sources, targets = random_tags(rng, 60), random_tags(rng, 80)
+    expected = {}
+    for s, s_tags in sources.items():
+        for t, t_tags in targets.items():
+            common = set(s_tags) & set(t_tags)
+            if common:
+                expected.setdefault(s, {})[t] = common
+    assert shared_token_pairs(sources, targets) == expected
+    print("✅ 倒排索引候选对")
+
+
+def test_thresholds_and_top_k():
+    """置信度、最少共同标签过滤与每个源的 top-k 同按 Cypher 版规则计算"""
+    rng = random.Random(11)
+    sources, targets = random_tags(rng, 40), random_tags(rng, 50)
+    inference = RelationInference(sources, targets)
+    inference.add_tag_overlap(weight=1)
+    results = inference.results(min_common=2, min_confidence=0.4, top_k=3)
+
+    for s, s_tags in sources.items():
+        brute = []
+        for t, t_tags in targets.items():
+            common = set(s_tags) & set(t_tags)
+            conf = len(common) / max(1, len(set(s_tags)))
+            if len(common) >= 2 and conf >= 0.4:
+                brute.append(len(common))
+        got = [r for r in results if r.source == s]
+        assert [r.common_count for r in got] == sorted(brute, reverse=True)[:3]
+        assert all(r.confidence >= 0.4 and r.score == r.common_count for r in got)
+    print("✅ 阈值与top-k")
+
+
+def test_mention_scoring():
+    """描述提及按权重累加，reverse 表示目标描述提到源"""
+    inference = RelationInference({"温箱": ["环境"], "示波器": []}, {"高温测试": ["环境", "可靠性"]})
+    inference.add_tag_overlap(weight=2)
+    inference.add_mentions({"高温测试": ["温箱", "未知工具"]}, 10, reason="描述匹配", reverse=True)
+    inference.add_mentions({"示波器": ["高温测试"]}, 10, reason="描述匹配")
+    relations = {(r.source, r.target): r for r in inference.results(min_score=8)}
+    assert relations[("温箱", "高温测试")].score == 12
+    assert relations[("温箱", "高温测试")].jaccard == 0.5
+    assert relations[("示波器", "高温测试")].score == 10
+    assert len(relations) == 2
+    print("✅ 提及评分")
+
+
+if __name__ == "__main__":
+    test_candidates_match_cartesian_product()
+    test_thresholds_and_top_k()
+    test_mention_scoring()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+测试表格流式读取 - Excel/CSV按批次读取、批次结果与整表读取一致、ETL/写图按批次进行
+"""
+
+import sys
+import os
+import logging
+import tempfile
+from datetime import datetime
+from pathlib import Path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'api'))
+
+import openpyxl
+import pandas as pd
+
+from etl.tabular_stream import iter_table_batches, read_table, estimate_rows
+from etl.enhanced_etl_processor import EnhancedETLProcessor
+
+
+def build_sheet(path: Path, rows: int):
+    """异常表：空列名、重复列名、表中空行、表尾空行、时间和数值单元格"""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["AnomalyID", "产品", "版本", "组件", "症状", None, "组件"])
+    for i in range(rows):
+        if i == 5:
+            ws.append([None] * 7)
+            continue
+        ws.append([f"ANO-{i:04d}", f"X{i % 3}", 2.0 + i % 2, "电池" if i % 2 else " 屏幕 ",
+                   "鼓包" if i % 4 else None, datetime(2024, 1, 1 + i % 28), i])
+    ws.append([None] * 7)
+    wb.save(path)
+
+
+def test_excel_batches_match_full_read():
+    """批次拼接后与 pd.read_excel 的行、列名、取值一致；索引为全表行位置"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "anomalies.xlsx"
+        build_sheet(path, 23)
+        batches = list(iter_table_batches(path, batch_rows=4))
+        expected = pd.read_excel(path)
+        assert estimate_rows(path) == 24
+
+    assert [len(b) for b in batches] == [4, 4, 4, 4, 4, 3]
+    combined = pd.concat(batches)
+    assert list(combined.columns) == list(expected.columns) == \
+           ["AnomalyID", "产品", "版本", "组件", "症状", "Unnamed: 5", "组件.1"]
+    assert list(combined.index) == list(expected.index)
+    assert combined.iloc[5].isna().all()
+    for col in expected.columns:
+        assert combined[col].isna().tolist() == expected[col].isna().tolist(), col
+    # 数值列在各批次中保持同一格式（整表读取因空行会把整列变成float）
+    assert combined["版本"].dropna().map(str).isin(["2", "3"]).all()
+    assert (combined["组件"].dropna() == expected["组件"].dropna()).all()
+    print("✅ Excel按批次读取结果与整表读取一致")
+
+
+def test_csv_chunks_and_encoding():
+    """CSV按chunksize读取，utf-8解码失败时改用gbk"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "export.csv"
+        pd.DataFrame({"组件": ["电池", "屏幕", None, "主板", "天线"], "数量": [1, 2, 3, 4, 5]}) \
+            .to_csv(path, index=False, encoding="gbk")
+        batches = list(iter_table_batches(path, batch_rows=2))
+        table = read_table(path)
+    assert [list(b.index) for b in batches] == [[0, 1], [2, 3], [4]]
+    assert table["组件"].tolist()[:2] == ["电池", "屏幕"] and pd.isna(table["组件"][2])
+    assert table["数量"].tolist() == ["1", "2", "3", "4", "5"]
+    print("✅ CSV分块读取与编码回退正确")
+
+
+def test_etl_batches_match_single_pass():
+    """ETL按小批次处理与单批处理结果一致（跨批次去重、属性合并）"""
+    logging.disable(logging.ERROR)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "anomalies.xlsx"
+            build_sheet(path, 40)
+            results = []
+            for batch_rows in (3, 1000):
+                processor = EnhancedETLProcessor(mapping_file=str(Path(tmp) / "missing.yaml"))
+                results.append(processor.process_excel(str(path), use_cache=False, batch_rows=batch_rows))
+    finally:
+        logging.disable(logging.NOTSET)
+
+    small, single = results
+    assert small["entities"] == single["entities"] and small["relationships"] == single["relationships"]
+    for field in ("total_rows", "success_rows", "failed_rows", "duplicate_rows"):
+        assert small["stats"][field] == single["stats"][field], field
+    assert small["stats"]["total_rows"] == 40
+    print(f"✅ ETL按批次处理结果一致（{len(small['entities'])}个实体）")
+
+
+def test_upsert_writes_per_batch():
+    """写图按批次进行：每读完一批即写入一次，不等整个文件读完"""
+    from etl import upsert_writer
+
+    events = []
+    original = upsert_writer.iter_anomaly_batches
+
+    def tracked_batches(path, batch_rows=None):
+        for batch in original(path, batch_rows):
+            events.append(("read", len(batch)))
+            yield batch
+
+    writer = upsert_writer.UpsertWriter.__new__(upsert_writer.UpsertWriter)
+    writer.norm = upsert_writer.Normalizer()
+    writer._run = lambda cypher, params: events.append(("write", len(params["rows"])))
+    upsert_writer.iter_anomaly_batches = tracked_batches
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "anomalies.xlsx"
+            build_sheet(path, 10)
+            written = writer.load_anomalies(path, batch_rows=4)
+    finally:
+        upsert_writer.iter_anomaly_batches = original
+
+    # 第6行是空行，不写入
+    assert written == 9
+    assert events == [("read", 4), ("write", 4), ("read", 3), ("write", 3), ("read", 2), ("write", 2)]
+    print("✅ 写图按批次交替进行")
+
+
+if __name__ == "__main__":
+    test_excel_batches_match_full_read()
+    test_csv_chunks_and_encoding()
+    test_etl_batches_match_single_pass()
+    test_upsert_writes_per_batch()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+测试术语解析索引 - 与逐条difflib扫描结果一致
+"""
+
+import sys
+import os
+import random
+import difflib
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'services', 'nlp'))
+
+from term_index import TermIndex
+
+CHARS = "摄像头模组屏幕闪烁电池鼓包充电异常主板按键失灵扬声器破音ABCDEFGH"
+
+
+def random_terms(rng, count):
+    return [''.join(rng.choice(CHARS) for _ in range(rng.randint(2, 8))) for _ in range(count)]
+
+
+def linear_best(mapping, term, threshold):
+    """原DictionaryService._fuzzy_match的逐条扫描"""
+    best_match, best_score = None, 0
+    for alias, canonical in mapping.items():
+        score = difflib.SequenceMatcher(None, term.lower(), alias).ratio()
+        if score > best_score and score >= threshold:
+            best_score, best_match = score, canonical
+    return best_match, best_score
+
+
+def test_exact_lookup():
+    """精确匹配忽略大小写和首尾空白，重复键保留先添加的值"""
+    index = TermIndex.from_mapping({'camera': '摄像头', '相机': '摄像头', 'LCD': '屏幕'})
+    index.add('lcd', '液晶')
+    assert index.get(' Camera ') == '摄像头'
+    assert index.get('lcd') == '屏幕'
+    assert index.get('未知') is None
+    assert 'LCD' in index and len(index) == 4
+    print("✅ 精确匹配正常")
+
+
+def test_fuzzy_matches_linear_scan():
+    """模糊匹配得分与逐条扫描一致"""
+    rng = random.Random(3)
+    aliases = random_terms(rng, 800)
+    mapping = {alias.lower(): f"std_{i}" for i, alias in enumerate(aliases)}
+    index = TermIndex.from_mapping(mapping)
+    queries = [alias[:-1] + rng.choice(CHARS) for alias in rng.sample(aliases, 150)] + random_terms(rng, 50)
+    for query in queries:
+        expected, expected_score = linear_best(mapping, query, 0.8)
+        matched = index.match(query, 0.8)
+        if expected is None:
+            assert matched is None, query
+        else:
+            assert matched is not None and abs(matched[2] - expected_score) < 1e-9, query
+    print(f"✅ {len(queries)} 个查询的模糊匹配与逐条扫描一致")
+
+
+def test_similar_and_resolve():
+    """相似术语列表与resolve回退"""
+    index = TermIndex.from_terms(['屏幕闪烁', '屏幕闪屏', '电池鼓包', '屏幕'])
+    names = [name for name, _, _ in index.similar('屏幕闪烁', 0.7)]
+    assert names[0] == '屏幕闪烁' and '屏幕闪屏' in names and '电池鼓包' not in names
+    assert index.resolve('屏幕闪炼', 0.7) in ('屏幕闪烁', '屏幕闪屏')
+    assert index.resolve('屏幕闪炼', None) is None
+    print("✅ 相似术语与resolve正常")
+
+
+if __name__ == "__main__":
+    test_exact_lookup()
+    test_fuzzy_matches_linear_scan()
+    test_similar_and_resolve()